@@ -0,0 +1,113 @@
+"""
+SVIP v1.0 — 数据库加载基准
+
+对比默认连接与只读 + 内存映射连接（--read-only）加载全市场的冷/热耗时。
+
+用法:
+    # 合成库（默认 A股 5000 家 / 美股 5000 家）
+    python benchmarks/bench_db_load.py
+
+    # 生产库
+    python benchmarks/bench_db_load.py --china-db ../database/china_a_stocks.db \\
+        --us-db ../database/us_stocks_financial_data.db
+
+冷启动：新建连接，并尽量把库文件逐出操作系统页缓存（posix_fadvise DONTNEED，
+仅 Linux 有效）；热启动：同一连接重复加载。
+"""
+import argparse
+import os
+import statistics
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_db import make_china_db, make_us_db
+from src.db_loader import SVIPDatabaseLoader
+
+
+def _evict(path: str) -> bool:
+    """把文件逐出页缓存，返回是否成功"""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return True
+
+
+def _universe(china_db: str, us_db: str) -> List[Tuple[str, str, str]]:
+    """全市场股票列表"""
+    stock_list = []
+    with sqlite3.connect(china_db) as conn:
+        stock_list += [("CN", code, "") for (code,) in conn.execute(
+            "SELECT stock_code FROM companies ORDER BY company_id")]
+    with sqlite3.connect(us_db) as conn:
+        stock_list += [("US", tic, "") for (tic,) in conn.execute(
+            "SELECT tic FROM companies ORDER BY gvkey")]
+    return stock_list
+
+
+def _load(loader: SVIPDatabaseLoader, stock_list) -> float:
+    start = time.perf_counter()
+    loader.load_stocks_from_list(stock_list)
+    return time.perf_counter() - start
+
+
+def bench(china_db: str, us_db: str, read_only: bool, repeat: int, stock_list) -> dict:
+    cold = []
+    evicted = True
+    for _ in range(repeat):
+        evicted = _evict(china_db) and _evict(us_db) and evicted
+        loader = SVIPDatabaseLoader(china_db, us_db, read_only=read_only)
+        start = time.perf_counter()
+        loader.connect("CN")
+        loader.connect("US")
+        loader.load_stocks_from_list(stock_list)
+        cold.append(time.perf_counter() - start)
+        loader.close()
+
+    loader = SVIPDatabaseLoader(china_db, us_db, read_only=read_only)
+    loader.connect("CN")
+    loader.connect("US")
+    _load(loader, stock_list)
+    warm = [_load(loader, stock_list) for _ in range(repeat)]
+    loader.close()
+    return {"cold": cold, "warm": warm, "evicted": evicted}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SVIP 数据库加载基准（冷/热）")
+    parser.add_argument("--china-db", help="A股数据库路径（默认生成合成库）")
+    parser.add_argument("--us-db", help="美股数据库路径（默认生成合成库）")
+    parser.add_argument("--companies", type=int, default=5000, help="合成库每个市场的公司数")
+    parser.add_argument("--repeat", type=int, default=3, help="每种模式重复次数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        china_db, us_db = args.china_db, args.us_db
+        if not china_db or not us_db:
+            china_db = os.path.join(tmp, "china.db")
+            us_db = os.path.join(tmp, "us.db")
+            print(f"生成合成库: 每市场 {args.companies} 家公司 ...")
+            make_china_db(china_db, args.companies)
+            make_us_db(us_db, args.companies)
+
+        stock_list = _universe(china_db, us_db)
+        print(f"全市场: {len(stock_list)} 只股票\n")
+        print(f"{'模式':<12}{'冷启动(中位)':>14}{'热启动(中位)':>14}")
+        for label, read_only in (("默认", False), ("只读+mmap", True)):
+            result = bench(china_db, us_db, read_only, args.repeat, stock_list)
+            print(f"{label:<12}{statistics.median(result['cold']):>13.3f}s"
+                  f"{statistics.median(result['warm']):>13.3f}s")
+        if not result["evicted"]:
+            print("\n注意: 当前平台不支持 posix_fadvise，冷启动未逐出页缓存")
+
+
+if __name__ == "__main__":
+    main()
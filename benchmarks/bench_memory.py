@@ -0,0 +1,110 @@
+"""
+SVIP v1.0 — 评分结果内存基准
+
+对比 SVIScore / ValuationResult / AccelerationResult 三种布局的单对象内存占用：
+
+    dict     普通 @dataclass（每个实例带 __dict__，即 slots 之前的布局）
+    slots    @dataclass(slots=True)（models 中的默认布局）
+    frozen   只读 slots 变体（FrozenSVIScore 等，models.freeze 生成）
+
+每种布局各创建 N 个对象，用 tracemalloc 统计新增分配再除以 N（字段值为共享的常量，
+只计对象本身与 __dict__ 的开销）。
+
+用法:
+    python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --count 100000
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models import (
+    AccelerationResult, PhaseState, SVILevel, SVIScore, ValuationResult, ValuationTier,
+    freeze,
+)
+
+LAYOUTS = ("dict", "slots", "frozen")
+
+SAMPLES = {
+    SVIScore: SVIScore(
+        symbol="S0", market="US", passed_hard_screen=True, roic_score=80.0, total=82.5,
+        level=SVILevel.CORE, roic_10y_median=0.18,
+    ),
+    ValuationResult: ValuationResult(
+        symbol="S0", fcf_yield=0.05, pe_ratio=18.0, growth_rate=0.1, qpeg=1.1,
+        tier=ValuationTier.B, valuation_factor=0.7,
+    ),
+    AccelerationResult: AccelerationResult(
+        symbol="S0", theme="AI/算力密度", acceleration_score=72.0,
+        phase=PhaseState.ACCELERATING, phase_factor=1.2,
+    ),
+}
+
+
+def _dict_variant(cls: type) -> type:
+    """同字段的普通 dataclass（带 __dict__）"""
+    return make_dataclass(f"Dict{cls.__name__}", [(f.name, f.type) for f in fields(cls)])
+
+
+def _factories(cls: type) -> Dict[str, Callable[[], object]]:
+    sample = SAMPLES[cls]
+    values = {f.name: getattr(sample, f.name) for f in fields(cls)}
+    dict_cls = _dict_variant(cls)
+    frozen_cls = type(freeze(sample))
+    return {
+        "dict": lambda: dict_cls(**values),
+        "slots": lambda: cls(**values),
+        "frozen": lambda: frozen_cls(**values),
+    }
+
+
+def bytes_per_object(factory: Callable[[], object], count: int) -> float:
+    """创建 count 个对象的平均新增分配字节数"""
+    factory()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # 扣除容器列表本身
+    return (after - before - sys.getsizeof(objects)) / count
+
+
+def bench(count: int) -> Dict[str, Dict[str, float]]:
+    """{类型名: {布局: 字节/对象}}"""
+    return {
+        cls.__name__: {
+            layout: bytes_per_object(factory, count)
+            for layout, factory in _factories(cls).items()
+        }
+        for cls in SAMPLES
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SVIP 评分结果内存基准")
+    parser.add_argument("--count", type=int, default=100_000, help="每种布局创建的对象数")
+    args = parser.parse_args()
+
+    results = bench(args.count)
+    print(f"每对象内存（{args.count} 个对象平均，字节）\n")
+    print(f"{'类型':<20}" + "".join(f"{layout:>10}" for layout in LAYOUTS) + f"{'节省':>10}")
+    total = dict.fromkeys(LAYOUTS, 0.0)
+    for name, row in results.items():
+        saved = 1 - row["slots"] / row["dict"]
+        print(f"{name:<20}" + "".join(f"{row[layout]:>10.0f}" for layout in LAYOUTS) + f"{saved:>10.0%}")
+        for layout in LAYOUTS:
+            total[layout] += row[layout]
+    print(f"{'每只股票合计':<16}" + "".join(f"{total[layout]:>10.0f}" for layout in LAYOUTS)
+          + f"{1 - total['slots'] / total['dict']:>10.0%}")
+    print(f"\n10 万只股票三层评分: {total['dict'] * 1e5 / 2**20:.1f}MB → "
+          f"{total['slots'] * 1e5 / 2**20:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+SVIP v1.0 — 全流程基准
+
+对 100 / 1k / 10k / 100k 只合成股票分阶段计时，并与基线 JSON 对比：
+
+    load                     合成 SQLite 库（CN financial_data/market_data + US
+                             financial_data_annual）上的批量加载
+    compute_svi              SVI 评分
+    compute_valuation        A1 估值
+    compute_acceleration     A2 加速检测
+    build_allocation         分池、权重、轮动
+    generate_markdown_report Markdown 报告渲染
+
+用法:
+    python benchmarks/bench_pipeline.py                          # 默认规模，对比基线
+    python benchmarks/bench_pipeline.py --sizes 100,1000 --repeat 5
+    python benchmarks/bench_pipeline.py --save-baseline          # 覆盖基线
+    python benchmarks/bench_pipeline.py --fail-on-regression     # 有退化时退出码为 1
+    python benchmarks/bench_pipeline.py --indexed                # 合成库先建推荐索引
+
+合成库缓存在 .cache/bench/ 下，同一规模重复运行不再重新生成。
+默认合成库与生产库一样不带索引；--indexed 时先建 run_db_optimize.py 的推荐索引
+（与默认结果不可比，应使用单独的 --baseline）。
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic_db import china_codes, make_china_db, make_us_db, us_tickers
+from benchmarks.synthetic_universe import make_universe
+from src.acceleration_engine import compute_acceleration_score
+from src.db_loader import SVIPDatabaseLoader
+from src.db_optimizer import apply_indexes
+from src.macro_filter import compute_macro_state
+from src.models import SVIPStock
+from src.portfolio_engine import build_allocation, generate_report
+from src.report_generator import generate_markdown_report
+from src.svi_engine import compute_svi
+from src.tail_risk import compute_tail_risk
+from src.valuation_engine import compute_valuation
+
+DEFAULT_SIZES = [100, 1_000, 10_000, 100_000]
+STAGES = [
+    "load",
+    "compute_svi",
+    "compute_valuation",
+    "compute_acceleration",
+    "build_allocation",
+    "generate_markdown_report",
+]
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+CACHE_DIR = os.path.join(ROOT, ".cache", "bench")
+
+# 低于该耗时的阶段不判定退化（计时噪声占主导）
+MIN_COMPARABLE_SECONDS = 0.005
+
+
+def db_fixture(n: int, seed: int = 7, indexed: bool = False) -> Tuple[str, str]:
+    """n 只股票（A股、美股各半）的合成库，按规模缓存"""
+    suffix = "_indexed" if indexed else ""
+    directory = os.path.join(CACHE_DIR, f"db_{n}_{seed}{suffix}")
+    china_db = os.path.join(directory, "china.db")
+    us_db = os.path.join(directory, "us.db")
+    if not (os.path.exists(china_db) and os.path.exists(us_db)):
+        os.makedirs(directory, exist_ok=True)
+        for path in (china_db, us_db):
+            if os.path.exists(path):
+                os.remove(path)
+        make_china_db(china_db, n // 2, seed=seed)
+        make_us_db(us_db, n - n // 2, seed=seed + 1)
+        if indexed:
+            for market, path in (("CN", china_db), ("US", us_db)):
+                with sqlite3.connect(path) as conn:
+                    apply_indexes(conn, market)
+    return china_db, us_db
+
+
+def stage_load(n: int, indexed: bool = False) -> Callable[[], None]:
+    china_db, us_db = db_fixture(n, indexed=indexed)
+    stock_list = [("CN", code, "") for code in china_codes(n // 2)]
+    stock_list += [("US", tic, "") for tic in us_tickers(n - n // 2)]
+
+    def run():
+        with SVIPDatabaseLoader(china_db, us_db) as loader:
+            loader.connect("CN")
+            loader.connect("US")
+            loader.load_stocks_from_list(stock_list)
+
+    return run
+
+
+def score_svi(items: List[dict]) -> list:
+    results = []
+    for item in items:
+        fin = item["financials"]
+        results.append(compute_svi(
+            symbol=item["symbol"],
+            market=item["market"],
+            roic_10y_median=fin["roic_10y_median"],
+            fcf_conversion=fin["fcf_conversion"],
+            gross_margin_std=fin["gross_margin_std"],
+            debt_to_equity=fin["debt_to_equity"],
+            market_share=fin["market_share"],
+            cr4=fin["cr4"],
+            moat_rating=fin["moat_rating"],
+            demand_rigidity_rating=fin["demand_rigidity_rating"],
+            substitution_risk_rating=fin["substitution_risk_rating"],
+        ))
+    return results
+
+
+def score_valuation(items: List[dict], svis: list) -> list:
+    results = []
+    for item, svi in zip(items, svis):
+        val = item["valuation"]
+        results.append(compute_valuation(
+            symbol=item["symbol"],
+            fcf_yield=val["fcf_yield"],
+            pe_ratio=val["pe_ratio"],
+            growth_rate=val["growth_rate"],
+            svi_score=svi.total,
+            valuation_percentile=val["valuation_percentile"],
+            growth_concentration=val["growth_concentration"],
+            reinvestment_declining_years=val["reinvestment_declining_years"],
+        ))
+    return results
+
+
+def score_acceleration(items: List[dict]) -> list:
+    results = []
+    for item in items:
+        accel = item["acceleration"]
+        results.append(compute_acceleration_score(
+            symbol=item["symbol"],
+            theme=item["theme"],
+            penetration_series=accel.get("penetration"),
+            cost_curve_series=accel.get("cost_curve"),
+            capex_series=accel.get("capex"),
+            policy_series=accel.get("policy"),
+        ))
+    return results
+
+
+def _best(fn: Callable[[], object], repeat: int) -> float:
+    """repeat 次中的最短耗时"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_size(n: int, repeat: int, indexed: bool = False) -> Dict[str, float]:
+    """一个规模的分阶段计时（秒）"""
+    items = make_universe(n)
+    macro = compute_macro_state(
+        yield_spread=0.35, real_yield=1.8, credit_spread=3.2, m2_yoy=0.04,
+        fci=0.1, credit_growth=0.03, earnings_yoy=0.08, ism_new_orders=53.5,
+    )
+    tail_risk = compute_tail_risk(vix=18.5, credit_spread_change=0.2, regulatory_intensity=10.0)
+
+    timings = {"load": _best(stage_load(n, indexed), repeat)}
+
+    svis = score_svi(items)
+    valuations = score_valuation(items, svis)
+    accelerations = score_acceleration(items)
+    timings["compute_svi"] = _best(lambda: score_svi(items), repeat)
+    timings["compute_valuation"] = _best(lambda: score_valuation(items, svis), repeat)
+    timings["compute_acceleration"] = _best(lambda: score_acceleration(items), repeat)
+
+    def make_stocks() -> List[SVIPStock]:
+        return [
+            SVIPStock(
+                symbol=item["symbol"], name=item["name"], market=item["market"],
+                sector=item["sector"], theme=item["theme"],
+                svi=svi, valuation=valuation, acceleration=acceleration,
+            )
+            for item, svi, valuation, acceleration in zip(items, svis, valuations, accelerations)
+        ]
+
+    # build_allocation 会改写股票的池与权重，每次计时使用新的 SVIPStock
+    allocation_times = []
+    for _ in range(repeat):
+        stocks = make_stocks()
+        start = time.perf_counter()
+        build_allocation(stocks, macro, tail_risk, market="US")
+        allocation_times.append(time.perf_counter() - start)
+    timings["build_allocation"] = min(allocation_times)
+
+    report = generate_report(make_stocks(), macro, tail_risk, market="US")
+    timings["generate_markdown_report"] = _best(lambda: generate_markdown_report(report), repeat)
+    return {stage: timings[stage] for stage in STAGES}
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, float]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, float]]) -> None:
+    payload = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {
+            size: {stage: round(seconds, 6) for stage, seconds in stages.items()}
+            for size, stages in results.items()
+        },
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> Tuple[str, List[str]]:
+    """对比基线，返回 (表格, 退化列表)；比值 > tolerance 判定为退化"""
+    lines = [f"{'规模':>8}  {'阶段':<26}{'耗时(s)':>10}{'基线(s)':>10}{'比值':>8}"]
+    regressions = []
+    for size, stages in results.items():
+        base = baseline.get(size, {})
+        for stage, seconds in stages.items():
+            old = base.get(stage)
+            if old is None:
+                lines.append(f"{size:>8}  {stage:<26}{seconds:>10.4f}{'-':>10}{'-':>8}")
+                continue
+            ratio = seconds / old if old > 0 else float("inf")
+            flag = ""
+            if ratio > tolerance and max(seconds, old) >= MIN_COMPARABLE_SECONDS:
+                flag = "  ⚠️ 退化"
+                regressions.append(f"{size}/{stage}: {old:.4f}s → {seconds:.4f}s ({ratio:.2f}x)")
+            lines.append(
+                f"{size:>8}  {stage:<26}{seconds:>10.4f}{old:>10.4f}{ratio:>7.2f}x{flag}"
+            )
+    return "\n".join(lines), regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SVIP 全流程基准（合成股票池）")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(n) for n in DEFAULT_SIZES),
+        help="逗号分隔的股票数",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="每阶段重复次数（取最短）")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="基线 JSON 路径")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果写为基线")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="判定退化的耗时比值")
+    parser.add_argument("--fail-on-regression", action="store_true", help="有退化时退出码为 1")
+    parser.add_argument("--output", help="本次结果 JSON 输出路径")
+    parser.add_argument("--indexed", action="store_true", help="合成库先建推荐索引")
+    args = parser.parse_args()
+
+    # 合成数据里有刻意缺失的字段，加载器警告不影响计时
+    logging.disable(logging.WARNING)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results: Dict[str, Dict[str, float]] = {}
+    for n in sizes:
+        print(f"⏱  {n} 只股票 ...", flush=True)
+        results[str(n)] = bench_size(n, args.repeat, args.indexed)
+
+    if args.output:
+        save_baseline(args.output, results)
+    if args.save_baseline:
+        baseline = load_baseline(args.baseline)
+        baseline.update(results)
+        save_baseline(args.baseline, baseline)
+        print(f"📄 基线已更新: {args.baseline}")
+
+    table, regressions = compare(results, load_baseline(args.baseline), args.tolerance)
+    print()
+    print(table)
+    if regressions:
+        print(f"\n⚠️  {len(regressions)} 项退化（> {args.tolerance:.2f}x）:")
+        for line in regressions:
+            print(f"   {line}")
+        if args.fail_on_regression:
+            sys.exit(1)
+    else:
+        total = statistics.fsum(sum(stages.values()) for stages in results.values())
+        print(f"\n✅ 无退化（合计 {total:.2f}s）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+SVIP v1.0 — Synthetic Databases for Benchmarks
+
+生成与生产库表结构一致的合成 A股 / 美股 SQLite 库，供基准测试使用。
+"""
+import random
+import sqlite3
+from typing import List
+
+CHINA_SCHEMA = """
+    CREATE TABLE companies (
+        company_id INTEGER PRIMARY KEY, stock_code TEXT,
+        company_name TEXT, industry_name TEXT
+    );
+    CREATE TABLE financial_data (
+        id INTEGER PRIMARY KEY, company_id INTEGER, fiscal_year INTEGER,
+        report_period TEXT, net_profit REAL, total_assets REAL,
+        total_liabilities REAL, operating_cash_flow REAL, capex REAL,
+        free_cash_flow REAL, revenue REAL, operating_profit REAL, pe_ttm REAL
+    );
+    CREATE TABLE market_data (
+        id INTEGER PRIMARY KEY, company_id INTEGER, trade_date TEXT,
+        market_cap REAL, pe_ratio_ttm REAL
+    );
+"""
+
+US_SCHEMA = """
+    CREATE TABLE companies (gvkey TEXT, tic TEXT, conm TEXT);
+    CREATE TABLE financial_data_annual (
+        gvkey TEXT, fyear INTEGER, ni REAL, ib REAL, at REAL, lt REAL,
+        oancf REAL, capx REAL, revt REAL, sale REAL, oiadp REAL,
+        oibdp REAL, prcc_f REAL, csho REAL, epsfi REAL
+    );
+"""
+
+
+def china_codes(n_companies: int) -> List[str]:
+    return [f"{600000 + cid:06d}" for cid in range(1, n_companies + 1)]
+
+
+def us_tickers(n_companies: int) -> List[str]:
+    return [f"T{i:05d}" for i in range(n_companies)]
+
+
+def make_china_db(
+    path: str,
+    n_companies: int = 1000,
+    years: int = 12,
+    quarters: bool = True,
+    seed: int = 7,
+) -> None:
+    """生成合成 A股库：每家公司 years 期年报（可选附带季报）与 5 个交易日行情"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript(CHINA_SCHEMA)
+    companies, financials, market = [], [], []
+    for cid, code in enumerate(china_codes(n_companies), start=1):
+        companies.append((cid, code, f"公司{cid}", f"行业{cid % 30}"))
+        for year in range(2025 - years, 2025):
+            revenue = rng.uniform(50, 500)
+            assets = rng.uniform(100, 1000)
+            profit = rng.uniform(5, 60)
+            ocf = profit * rng.uniform(0.8, 1.5)
+            capex = -rng.uniform(1, 20)
+            financials.append((
+                cid, year, "Q4", profit, assets, assets * rng.uniform(0.2, 0.6),
+                ocf, capex, ocf + capex, revenue, revenue * rng.uniform(0.1, 0.3),
+                rng.uniform(8, 40),
+            ))
+            if quarters:
+                financials.append((
+                    cid, year, "Q2", profit / 2, assets, assets * 0.4,
+                    ocf / 2, capex / 2, (ocf + capex) / 2, revenue / 2,
+                    revenue * 0.1, rng.uniform(8, 40),
+                ))
+        for day in range(1, 6):
+            market.append(
+                (cid, f"2025-01-{day:02d}", rng.uniform(500, 5000), rng.uniform(8, 40))
+            )
+    conn.executemany("INSERT INTO companies VALUES (?, ?, ?, ?)", companies)
+    conn.executemany(
+        "INSERT INTO financial_data (company_id, fiscal_year, report_period,"
+        " net_profit, total_assets, total_liabilities, operating_cash_flow,"
+        " capex, free_cash_flow, revenue, operating_profit, pe_ttm)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        financials,
+    )
+    conn.executemany(
+        "INSERT INTO market_data (company_id, trade_date, market_cap, pe_ratio_ttm)"
+        " VALUES (?, ?, ?, ?)",
+        market,
+    )
+    conn.commit()
+    conn.close()
+
+
+def make_us_db(path: str, n_companies: int = 1000, years: int = 12, seed: int = 11) -> None:
+    """生成合成美股库（Compustat 年报字段）"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript(US_SCHEMA)
+    companies, financials = [], []
+    for i, tic in enumerate(us_tickers(n_companies)):
+        gvkey = f"{100000 + i:06d}"
+        companies.append((gvkey, tic, f"Company {i}"))
+        for year in range(2025 - years, 2025):
+            at = rng.uniform(100, 1000)
+            ni = rng.uniform(5, 80)
+            revt = rng.uniform(100, 900)
+            financials.append((
+                gvkey, year, ni, ni, at, at * rng.uniform(0.2, 0.6),
+                ni * rng.uniform(0.8, 1.5), rng.uniform(1, 30), revt, revt,
+                revt * rng.uniform(0.1, 0.3), revt * rng.uniform(0.15, 0.35),
+                rng.uniform(10, 300), rng.uniform(1, 50), rng.uniform(0.5, 10),
+            ))
+    conn.executemany("INSERT INTO companies VALUES (?, ?, ?)", companies)
+    conn.executemany(
+        "INSERT INTO financial_data_annual VALUES"
+        " (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        financials,
+    )
+    conn.commit()
+    conn.close()
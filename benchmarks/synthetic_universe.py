@@ -0,0 +1,83 @@
+"""
+SVIP v1.0 — Synthetic Universe for Benchmarks
+
+确定性生成 YAML 输入格式（与 data/sample_stocks.yaml 一致）的合成股票池，
+覆盖全部主题桶、多个行业与 US / CN / HK 三个市场。同一 (n, seed) 输出完全相同。
+"""
+import os
+import random
+from typing import Any, Dict, List
+
+from src.data_loader import load_theme_buckets
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+SECTORS = [
+    "Tech", "Semiconductors", "Healthcare", "Financials", "Consumer Staples",
+    "Consumer Discretionary", "Industrials", "Utilities", "Energy", "Materials",
+    "Communication", "Real Estate",
+]
+
+# 市场与权重：美股、A股、港股
+MARKETS = [("US", 0.5), ("CN", 0.35), ("HK", 0.15)]
+
+# 约 20% 股票不属于任何主题桶
+NO_THEME_SHARE = 0.2
+
+
+def universe_themes() -> List[str]:
+    """主题桶名称（按定义顺序）"""
+    return list(load_theme_buckets(DATA_DIR))
+
+
+def _series(rng: random.Random, start: float, drift: float, n: int = 5) -> List[float]:
+    values, value = [], start
+    for _ in range(n):
+        values.append(round(value, 4))
+        value *= 1.0 + drift + rng.gauss(0, 0.05)
+    return values
+
+
+def make_stock(rng: random.Random, index: int, themes: List[str]) -> Dict[str, Any]:
+    """生成一只股票的输入字典"""
+    market = rng.choices([m for m, _ in MARKETS], weights=[w for _, w in MARKETS])[0]
+    theme = "" if rng.random() < NO_THEME_SHARE else rng.choice(themes)
+    has_series = bool(theme) and rng.random() < 0.8
+    return {
+        "symbol": f"{market}{index:06d}",
+        "name": f"Synthetic {index}",
+        "market": market,
+        "sector": rng.choice(SECTORS),
+        "theme": theme,
+        "financials": {
+            "roic_10y_median": round(rng.uniform(-0.05, 0.40), 4),
+            "fcf_conversion": round(rng.uniform(0.2, 1.4), 4),
+            "gross_margin_std": round(rng.uniform(0.005, 0.12), 4),
+            "debt_to_equity": round(rng.uniform(0.0, 2.5), 4),
+            "market_share": round(rng.uniform(0.0, 0.5), 4),
+            "cr4": round(rng.uniform(0.1, 0.9), 4),
+            "moat_rating": rng.randint(20, 95),
+            "demand_rigidity_rating": rng.randint(20, 95),
+            "substitution_risk_rating": rng.randint(5, 80),
+        },
+        "valuation": {
+            "fcf_yield": round(rng.uniform(-0.01, 0.09), 4),
+            "pe_ratio": round(rng.uniform(5, 80), 2),
+            "growth_rate": round(rng.uniform(-0.05, 0.35), 4),
+            "valuation_percentile": round(rng.random(), 4),
+            "growth_concentration": round(rng.uniform(0.1, 0.8), 4),
+            "reinvestment_declining_years": rng.choice([0, 0, 0, 1, 2, 3]),
+        },
+        "acceleration": {
+            "penetration": _series(rng, rng.uniform(0.02, 0.3), rng.uniform(-0.05, 0.4)),
+            "cost_curve": _series(rng, 1.0, -rng.uniform(0.0, 0.3)),
+            "capex": _series(rng, rng.uniform(5, 50), rng.uniform(-0.1, 0.4)),
+        } if has_series else {},
+    }
+
+
+def make_universe(n: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """生成 n 只股票的合成股票池"""
+    rng = random.Random(seed)
+    themes = universe_themes()
+    return [make_stock(rng, i, themes) for i in range(n)]
@@ -0,0 +1,178 @@
+"""
+SVIP v1.0 — 财年滚动回测
+
+从年报库重建每个历史财年的时点输入，逐个调仓日跑 SVI → A1 → A2 → A3，
+用调仓日价格计算组合收益，并与股票池等权基准对比。
+
+用法:
+    # A股全市场，2012-2022 财年
+    python run_backtest.py --market CN --start 2012 --end 2022
+
+    # 指定股票列表与主题映射，结果写 JSON
+    python run_backtest.py --market US --stocks-list stocks.txt --theme-map themes.yaml \\
+        --output reports/backtest_us.json
+
+    # 逐年宏观/尾部风险输入 + AIRS-X 主观评估 + 每期快照
+    python run_backtest.py --market CN --macro-history macro_history.yaml --airsx \\
+        --snapshot-db reports/backtest_snapshots.db
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Dict, Tuple
+
+# 确保 src 和 config 可导入
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.backtest_engine import (
+    DEFAULT_REBALANCE_DAY,
+    airsx_ratings,
+    format_backtest_report,
+    load_annual_panel,
+    run_backtest,
+)
+from src.db_loader import create_db_loader
+from src.instrumentation import tracer
+from src.macro_filter import compute_macro_state
+from src.models import MacroState, TailRiskResult
+from src.snapshot_store import SnapshotStore
+from src.tail_risk import compute_tail_risk
+from run_svip_db import load_stocks_list, load_theme_map, load_yaml
+
+
+def load_macro_history(path: str) -> Tuple[Dict[int, MacroState], Dict[int, TailRiskResult]]:
+    """
+    加载逐财年宏观输入
+
+    格式（各财年字段与 data/macro_inputs.yaml 相同）：
+    years:
+      2015:
+        macro: {yield_spread_10y2y: 0.35, ...}
+        tail_risk: {vix: 18.5, ...}
+    """
+    macro_by_year, tail_risk_by_year = {}, {}
+    for year, inputs in (load_yaml(path).get("years") or {}).items():
+        md = inputs.get("macro", {})
+        td = inputs.get("tail_risk", {})
+        macro_by_year[int(year)] = compute_macro_state(
+            yield_spread=md.get("yield_spread_10y2y"),
+            real_yield=md.get("real_yield"),
+            credit_spread=md.get("credit_spread"),
+            m2_yoy=md.get("m2_yoy"),
+            fci=md.get("fci"),
+            credit_growth=md.get("credit_growth"),
+            earnings_yoy=md.get("earnings_yoy"),
+            ism_new_orders=md.get("ism_new_orders"),
+        )
+        tail_risk_by_year[int(year)] = compute_tail_risk(
+            vix=td.get("vix"),
+            credit_spread_change=td.get("credit_spread_change"),
+            regulatory_intensity=td.get("regulatory_intensity", 0),
+        )
+    return macro_by_year, tail_risk_by_year
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="SVIP 财年滚动回测（时点输入 + 调仓日收益）"
+    )
+    parser.add_argument("--china-db", help="A股数据库路径")
+    parser.add_argument("--us-db", help="美股数据库路径")
+    parser.add_argument("--market", choices=["CN", "US"], default="CN", help="回测市场")
+    parser.add_argument("--start", type=int, help="首个调仓财年")
+    parser.add_argument("--end", type=int, help="最后一个调仓财年")
+    parser.add_argument(
+        "--rebalance-day",
+        default=DEFAULT_REBALANCE_DAY,
+        help="A股调仓日 MM-DD（取次年该日之后的第一个交易日）",
+    )
+    parser.add_argument("--stocks-list", help="股票代码列表文件（默认全部公司）")
+    parser.add_argument("--theme-map", help="股票-主题映射YAML文件")
+    parser.add_argument("--macro-history", help="逐财年宏观/尾部风险 YAML")
+    parser.add_argument(
+        "--airsx",
+        nargs="?",
+        const="",
+        help="用 AIRS-X 评级补充主观评估（可指定 AIRS-X 目录）",
+    )
+    parser.add_argument("--read-only", action="store_true", help="只读 + 内存映射打开数据库")
+    parser.add_argument("--output", help="逐期结果 JSON 输出路径")
+    parser.add_argument("--snapshot-db", help="每个调仓日追加一份快照的 SQLite 路径")
+    parser.add_argument("--trace", help="JSON 阶段追踪输出路径")
+    args = parser.parse_args()
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+
+    print("=" * 60)
+    print("  SVIP v1.0 — 财年滚动回测")
+    print("=" * 60)
+    print()
+
+    symbols = None
+    if args.stocks_list:
+        symbols = load_stocks_list(os.path.join(base_dir, args.stocks_list))
+        print(f"📊 股票列表: {len(symbols)} 只")
+    themes = {}
+    if args.theme_map:
+        themes = load_theme_map(os.path.join(base_dir, args.theme_map))
+        print(f"   主题映射: {len(themes)} 条")
+    macro_by_year, tail_risk_by_year = {}, {}
+    if args.macro_history:
+        macro_by_year, tail_risk_by_year = load_macro_history(
+            os.path.join(base_dir, args.macro_history)
+        )
+        print(f"🌍 宏观输入: {len(macro_by_year)} 个财年")
+
+    loader = create_db_loader(args.china_db, args.us_db, read_only=args.read_only)
+    try:
+        loader.connect(args.market)
+        conn = loader.china_conn if args.market == "CN" else loader.us_conn
+        panel = load_annual_panel(conn, args.market, symbols, args.rebalance_day)
+    finally:
+        loader.close()
+    n, periods = panel.shape
+    print(f"📚 年报面板: {n} 家公司 × {periods} 个财年")
+
+    ratings = None
+    if args.airsx is not None:
+        ratings = airsx_ratings(panel, args.airsx or None)
+        print(f"   AIRS-X 主观评估: {len(ratings)} 只")
+
+    store = SnapshotStore(os.path.join(base_dir, args.snapshot_db)) if args.snapshot_db else None
+    try:
+        result = run_backtest(
+            panel,
+            start_year=args.start,
+            end_year=args.end,
+            themes=themes,
+            ratings=ratings,
+            macro_by_year=macro_by_year,
+            tail_risk_by_year=tail_risk_by_year,
+            snapshot_store=store,
+        )
+    finally:
+        if store is not None:
+            store.close()
+
+    print()
+    print(format_backtest_report(result))
+
+    if args.output:
+        path = os.path.join(base_dir, args.output)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result.to_dict(), f, ensure_ascii=False, indent=2)
+        print(f"\n📄 回测结果已保存: {args.output}")
+    if args.snapshot_db:
+        print(f"🗂  快照已追加: {args.snapshot_db} ({len(result)} 期)")
+
+    print("\n⏱  阶段耗时:")
+    print(tracer.summary_table())
+    if args.trace:
+        path = tracer.write_json(os.path.join(base_dir, args.trace))
+        print(f"📄 阶段追踪已保存: {path}")
+
+
+if __name__ == "__main__":
+    main()
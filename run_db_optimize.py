@@ -0,0 +1,106 @@
+"""
+SVIP v1.0 — 数据库索引优化
+
+对加载器查询做 EXPLAIN QUERY PLAN，报告全表扫描；
+加 --apply 时创建缺失的推荐索引，并对比建索引前后的查询耗时。
+
+用法:
+    # 仅分析（只读打开，不修改数据库）
+    python run_db_optimize.py
+
+    # 指定数据库并创建索引
+    python run_db_optimize.py --china-db ../database/china_a_stocks.db --market CN --apply
+"""
+import argparse
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+# 确保 src 可导入
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.db_loader import create_db_loader
+from src.db_optimizer import (
+    apply_indexes,
+    explain,
+    format_plan_report,
+    format_timing_report,
+    missing_indexes,
+    time_queries,
+)
+
+
+def optimize(market: str, path: str, apply: bool, repeat: int) -> None:
+    """分析（并可选优化）一个数据库"""
+    if not os.path.exists(path):
+        print(f"⚠️  {market} 数据库未找到，跳过: {path}\n")
+        return
+
+    if apply:
+        conn = sqlite3.connect(path)
+    else:
+        conn = sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        plans = explain(conn, market)
+        missing = missing_indexes(conn, market)
+        print(format_plan_report(market, plans, missing))
+        if not apply or not missing:
+            return
+
+        before = time_queries(conn, market, repeat)
+        created = apply_indexes(conn, market)
+        print(f"已创建 {len(created)} 个索引")
+        after = time_queries(conn, market, repeat)
+        print(format_timing_report(before, after))
+        print()
+        print(format_plan_report(market, explain(conn, market), []))
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="SVIP 数据库索引优化（EXPLAIN QUERY PLAN + 推荐索引）"
+    )
+    parser.add_argument(
+        "--china-db",
+        help="A股数据库路径（默认：../database/china_a_stocks.db）",
+    )
+    parser.add_argument(
+        "--us-db",
+        help="美股数据库路径（默认：../database/us_stocks_financial_data.db）",
+    )
+    parser.add_argument(
+        "--market",
+        choices=["CN", "US", "ALL"],
+        default="ALL",
+        help="分析的数据库",
+    )
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="创建缺失的推荐索引并对比前后耗时",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="计时重复次数（取最短）",
+    )
+    args = parser.parse_args()
+
+    config = create_db_loader(args.china_db, args.us_db).config
+    paths = {"CN": config.china_db_path, "US": config.us_db_path}
+    markets = ["CN", "US"] if args.market == "ALL" else [args.market]
+
+    print("=" * 60)
+    print("  SVIP v1.0 — 数据库索引优化")
+    print("=" * 60)
+    print()
+    for market in markets:
+        optimize(market, paths[market], args.apply, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ SVIP v1.0 — 主入口
     python run_svip.py --stocks data.yaml # 指定股票数据
     python run_svip.py --market CN        # 指定市场
     python run_svip.py --no-save          # 不保存报告
+    python run_svip.py --profile          # 附带 cProfile 采样
+    python run_svip.py --scenario-grid    # 附带 VIX × 信用利差情景网格
 """
 import argparse
 import sys
@@ -20,14 +22,15 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from config.settings import settings
 from src.models import SVIPStock, PhaseState
-from src.svi_engine import compute_svi
-from src.valuation_engine import compute_valuation
-from src.acceleration_engine import compute_acceleration_score
 from src.macro_filter import compute_macro_state
 from src.tail_risk import compute_tail_risk
 from src.portfolio_engine import generate_report
+from src.scenario_grid import evaluate_scenarios, format_heatmap, load_axes_spec
+from src.universe_scorer import STREAM_CHUNK_SIZE, build_stock, score_stream
 from src.report_generator import generate_markdown_report, save_report
-from src.data_loader import validate_stock_themes
+from src.snapshot_store import SnapshotStore
+from src.data_loader import iter_stock_records, validate_stock_data, validate_stock_themes
+from src.instrumentation import tracer, profiled
 
 
 def load_yaml(path: str) -> dict:
@@ -35,102 +38,12 @@ def load_yaml(path: str) -> dict:
         return yaml.safe_load(f)
 
 
-def validate_stock_data(item: dict) -> list[str]:
-    """校验单只股票输入数据，返回警告列表"""
-    warnings = []
-    symbol = item.get("symbol", "UNKNOWN")
-    fin = item.get("financials", {})
-    val = item.get("valuation", {})
-
-    # 财务数据范围检查
-    roic = fin.get("roic_10y_median", 0)
-    if not (-0.5 <= roic <= 1.0):
-        warnings.append(f"{symbol}: roic_10y_median={roic} 超出合理范围 [-0.5, 1.0]")
-
-    fcf = fin.get("fcf_conversion", 0)
-    if not (-1.0 <= fcf <= 3.0):
-        warnings.append(f"{symbol}: fcf_conversion={fcf} 超出合理范围 [-1.0, 3.0]")
-
-    gm_std = fin.get("gross_margin_std", 0)
-    if not (0 <= gm_std <= 1.0):
-        warnings.append(f"{symbol}: gross_margin_std={gm_std} 超出合理范围 [0, 1.0]")
-
-    # 估值数据范围检查
-    fcf_yield = val.get("fcf_yield", 0)
-    if not (-0.5 <= fcf_yield <= 1.0):
-        warnings.append(f"{symbol}: fcf_yield={fcf_yield} 超出合理范围 [-0.5, 1.0]")
-
-    pe = val.get("pe_ratio", 0)
-    if pe < 0:
-        warnings.append(f"{symbol}: pe_ratio={pe} 为负值")
-
-    growth = val.get("growth_rate", 0)
-    if not (-1.0 <= growth <= 5.0):
-        warnings.append(f"{symbol}: growth_rate={growth} 超出合理范围 [-1.0, 5.0]")
-
-    return warnings
-
-
 def build_stocks_from_yaml(data: dict) -> list[SVIPStock]:
     """从 YAML 数据构建 SVIPStock 列表"""
-    stocks = []
     all_warnings = []
-    for item in data.get("stocks", []):
-        # 输入校验
-        warnings = validate_stock_data(item)
-        all_warnings.extend(warnings)
-        fin = item.get("financials", {})
-        val = item.get("valuation", {})
-
-        # Step 1: SVI 评分
-        svi = compute_svi(
-            symbol=item["symbol"],
-            market=item.get("market", "US"),
-            roic_10y_median=fin.get("roic_10y_median", 0),
-            fcf_conversion=fin.get("fcf_conversion", 0),
-            gross_margin_std=fin.get("gross_margin_std", 0.1),
-            debt_to_equity=fin.get("debt_to_equity", 1.0),
-            market_share=fin.get("market_share", 0),
-            cr4=fin.get("cr4", 0),
-            moat_rating=fin.get("moat_rating", 50),
-            demand_rigidity_rating=fin.get("demand_rigidity_rating", 50),
-            substitution_risk_rating=fin.get("substitution_risk_rating", 50),
-        )
-
-        # Step 2: A1 估值评估
-        valuation = compute_valuation(
-            symbol=item["symbol"],
-            fcf_yield=val.get("fcf_yield", 0),
-            pe_ratio=val.get("pe_ratio", 0),
-            growth_rate=val.get("growth_rate", 0),
-            svi_score=svi.total,
-            valuation_percentile=val.get("valuation_percentile", 0.5),
-            growth_concentration=val.get("growth_concentration", 0.3),
-            reinvestment_declining_years=val.get("reinvestment_declining_years", 0),
-        )
+    stocks = [build_stock(item, all_warnings) for item in data.get("stocks", [])]
 
-        # Step 3: A2 加速检测（从YAML读取时间序列数据）
-        accel_data = item.get("acceleration", {})
-        acceleration = compute_acceleration_score(
-            symbol=item["symbol"],
-            theme=item.get("theme", ""),
-            penetration_series=accel_data.get("penetration"),
-            cost_curve_series=accel_data.get("cost_curve"),
-            capex_series=accel_data.get("capex"),
-            policy_series=accel_data.get("policy"),
-        )
-
-        stock = SVIPStock(
-            symbol=item["symbol"],
-            name=item.get("name", ""),
-            market=item.get("market", "US"),
-            sector=item.get("sector", ""),
-            theme=item.get("theme", ""),
-            svi=svi,
-            valuation=valuation,
-            acceleration=acceleration,
-        )
-        stocks.append(stock)
+    tracer.count("stocks_scored", len(stocks))
 
     if all_warnings:
         print("\n⚠️  输入数据校验警告:")
@@ -140,6 +53,28 @@ def build_stocks_from_yaml(data: dict) -> list[SVIPStock]:
     return stocks
 
 
+def stream_stocks(path: str, data_dir: str, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    流式读取并评分股票输入，返回 (Core/Watch 股票, 禁入池紧凑行)。
+
+    每块先做主题桶与数据范围校验（警告随块输出，不累积），再融合评分。
+    """
+    def check(chunk: list) -> None:
+        warnings = validate_stock_themes(chunk, data_dir)
+        for item in chunk:
+            warnings.extend(validate_stock_data(item))
+        if warnings:
+            print("\n⚠️  输入数据校验警告:")
+            for w in warnings:
+                print(f"   {w}")
+
+    with tracer.span("stream"):
+        result = score_stream(iter_stock_records(path), chunk_size, on_chunk=check)
+    print(f"   流式评分 {result.n_scored} 只股票（{result.n_chunks} 块）：核心/观察 {len(result.stocks)}"
+          f" / 禁入 {len(result.blocked)}")
+    return result.stocks, result.blocked
+
+
 def main():
     parser = argparse.ArgumentParser(description="SVIP 慢变量投资池系统")
     parser.add_argument(
@@ -163,8 +98,61 @@ def main():
         action="store_true",
         help="不保存 Markdown 报告",
     )
+    parser.add_argument(
+        "--snapshot-db",
+        help="时点快照 SQLite 路径（每次运行追加一份快照，供回测与漂移分析）",
+    )
+    parser.add_argument(
+        "--snapshot-date",
+        help="快照日期 YYYY-MM-DD（默认当天，用于补录历史）",
+    )
+    parser.add_argument(
+        "--trace",
+        help="JSON 阶段追踪输出路径（指定时才写出）",
+    )
+    parser.add_argument(
+        "--scenario-grid",
+        nargs="?",
+        const="",
+        help="评估宏观/尾部风险情景网格（可选扫描轴 YAML，默认 VIX 15–60 × 信用利差 2–8）",
+    )
+    parser.add_argument(
+        "--scenario-output",
+        help="情景网格长表 CSV 路径（默认随报告保存到 reports/）",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="流式读取股票输入（JSONL 或多文档 YAML，每条一只股票），分块评分，内存不随股票池增长",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=STREAM_CHUNK_SIZE,
+        help=f"流式模式每块股票数（默认 {STREAM_CHUNK_SIZE}）",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="reports/svip_profile.prof",
+        help="启用 cProfile 采样并保存到该路径",
+    )
     args = parser.parse_args()
 
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    with profiled(args.profile and os.path.join(base_dir, args.profile)):
+        run(args)
+
+    # 阶段耗时汇总
+    print("\n⏱  阶段耗时:")
+    print(tracer.summary_table())
+    if args.trace:
+        path = tracer.write_json(os.path.join(base_dir, args.trace))
+        print(f"📄 阶段追踪已保存: {path}")
+
+
+def run(args):
+    """执行一次完整的 SVIP 流程"""
     print("=" * 60)
     print("  SVIP v1.0 — 慢变量投资池系统")
     print("  Slow Variable Investment Pool")
@@ -177,65 +165,83 @@ def main():
     macro_path = os.path.join(base_dir, args.macro)
 
     print(f"📊 加载股票数据: {args.stocks}")
-    stock_data = load_yaml(stocks_path)
-
-    # 校验主题桶
     data_dir = os.path.join(base_dir, "data")
-    theme_warnings = validate_stock_themes(stock_data.get("stocks", []), data_dir)
-    if theme_warnings:
-        print("\n⚠️  主题桶校验警告:")
-        for w in theme_warnings:
-            print(f"   {w}")
-
-    stocks = build_stocks_from_yaml(stock_data)
-    print(f"   共 {len(stocks)} 只股票")
-
-    # SVI 结果摘要
-    print("\n📈 SVI 慢变量指数评分:")
-    for s in stocks:
-        status = "✅" if s.svi.passed_hard_screen else "❌"
-        print(f"   {status} {s.symbol:6s} SVI={s.svi.total:5.1f} [{s.svi.level.value}]"
-              f"  ROIC={s.svi.roic_10y_median:.0%}")
-
-    # 估值结果
-    print("\n💰 A1 估值安全垫:")
-    for s in stocks:
-        tier_icon = {"A": "🟢", "B": "🟡", "C": "🔴"}[s.valuation.tier.value]
-        flags = f" 红旗×{s.valuation.red_flag_count}" if s.valuation.red_flag_count > 0 else ""
-        print(f"   {tier_icon} {s.symbol:6s} Tier={s.valuation.tier.value}"
-              f"  FCF_Yield={s.valuation.fcf_yield:.1%}"
-              f"  QPEG={s.valuation.qpeg:.2f}{flags}")
+    blocked = None
+    if args.stream:
+        stocks, blocked = stream_stocks(stocks_path, data_dir, args.chunk_size)
+    else:
+        with tracer.span("load"):
+            stock_data = load_yaml(stocks_path)
+
+            # 校验主题桶
+            theme_warnings = validate_stock_themes(stock_data.get("stocks", []), data_dir)
+            if theme_warnings:
+                print("\n⚠️  主题桶校验警告:")
+                for w in theme_warnings:
+                    print(f"   {w}")
+
+        with tracer.span("score"):
+            stocks = build_stocks_from_yaml(stock_data)
+        print(f"   共 {len(stocks)} 只股票")
+
+        # SVI 结果摘要
+        print("\n📈 SVI 慢变量指数评分:")
+        for s in stocks:
+            status = "✅" if s.svi.passed_hard_screen else "❌"
+            print(f"   {status} {s.symbol:6s} SVI={s.svi.total:5.1f} [{s.svi.level.value}]"
+                  f"  ROIC={s.svi.roic_10y_median:.0%}")
+
+        # 估值结果
+        print("\n💰 A1 估值安全垫:")
+        for s in stocks:
+            tier_icon = {"A": "🟢", "B": "🟡", "C": "🔴"}[s.valuation.tier.value]
+            flags = f" 红旗×{s.valuation.red_flag_count}" if s.valuation.red_flag_count > 0 else ""
+            print(f"   {tier_icon} {s.symbol:6s} Tier={s.valuation.tier.value}"
+                  f"  FCF_Yield={s.valuation.fcf_yield:.1%}"
+                  f"  QPEG={s.valuation.qpeg:.2f}{flags}")
 
     # 加载宏观数据
     print(f"\n🌍 加载宏观数据: {args.macro}")
-    macro_data = load_yaml(macro_path)
-    md = macro_data.get("macro", {})
-    td = macro_data.get("tail_risk", {})
-
-    macro = compute_macro_state(
-        yield_spread=md.get("yield_spread_10y2y"),
-        real_yield=md.get("real_yield"),
-        credit_spread=md.get("credit_spread"),
-        m2_yoy=md.get("m2_yoy"),
-        fci=md.get("fci"),
-        credit_growth=md.get("credit_growth"),
-        earnings_yoy=md.get("earnings_yoy"),
-        ism_new_orders=md.get("ism_new_orders"),
-    )
-    print(f"   宏观评分: {macro.total_score:+d} ({macro.wind.value})"
-          f"  MacroRiskFactor={macro.macro_risk_factor:.2f}")
+    with tracer.span("macro"):
+        macro_data = load_yaml(macro_path)
+        md = macro_data.get("macro", {})
+        td = macro_data.get("tail_risk", {})
+
+        macro = compute_macro_state(
+            yield_spread=md.get("yield_spread_10y2y"),
+            real_yield=md.get("real_yield"),
+            credit_spread=md.get("credit_spread"),
+            m2_yoy=md.get("m2_yoy"),
+            fci=md.get("fci"),
+            credit_growth=md.get("credit_growth"),
+            earnings_yoy=md.get("earnings_yoy"),
+            ism_new_orders=md.get("ism_new_orders"),
+        )
+        print(f"   宏观评分: {macro.total_score:+d} ({macro.wind.value})"
+              f"  MacroRiskFactor={macro.macro_risk_factor:.2f}")
 
-    tail_risk = compute_tail_risk(
-        vix=td.get("vix"),
-        credit_spread_change=td.get("credit_spread_change"),
-        regulatory_intensity=td.get("regulatory_intensity", 0),
-    )
-    print(f"   尾部风险: {tail_risk.state.value}"
-          f"  TailRiskFactor={tail_risk.tail_risk_factor:.2f}")
+        tail_risk = compute_tail_risk(
+            vix=td.get("vix"),
+            credit_spread_change=td.get("credit_spread_change"),
+            regulatory_intensity=td.get("regulatory_intensity", 0),
+        )
+        print(f"   尾部风险: {tail_risk.state.value}"
+              f"  TailRiskFactor={tail_risk.tail_risk_factor:.2f}")
+
+    # 情景网格（在构建组合之前，使用未分配权重的股票）
+    scenarios = None
+    if args.scenario_grid is not None:
+        axes = load_axes_spec(os.path.join(base_dir, args.scenario_grid)) if args.scenario_grid else None
+        scenarios = evaluate_scenarios(stocks, axes, base_inputs=macro_data, market=args.market)
+        print(f"\n🧭 情景网格: {len(scenarios)} 个情景"
+              f"（{len(scenarios.factor_pairs)} 组不同的风险因子）")
+        if len(scenarios.axes) == 2:
+            print(format_heatmap(scenarios, "total_equity"))
 
     # 生成报告
     print(f"\n🔧 构建组合 (市场: {args.market})...")
-    report = generate_report(stocks, macro, tail_risk, market=args.market)
+    with tracer.span("report"):
+        report = generate_report(stocks, macro, tail_risk, market=args.market, blocked=blocked)
 
     # 控制台输出
     alloc = report.allocation
@@ -263,9 +269,27 @@ def main():
     # 保存报告
     if not args.no_save:
         report_dir = os.path.join(base_dir, "reports")
-        filepath = save_report(report, report_dir)
+        with tracer.span("save"):
+            filepath = save_report(report, report_dir)
         print(f"\n📄 报告已保存: {filepath}")
 
+    if scenarios is not None:
+        output = args.scenario_output
+        if output is None and not args.no_save:
+            output = os.path.join("reports", f"SVIP_scenarios_{datetime.now():%Y%m%d_%H%M%S}.csv")
+        if output:
+            path = scenarios.write_csv(os.path.join(base_dir, output))
+            print(f"📄 情景网格已保存: {path}")
+
+    # 追加时点快照
+    if args.snapshot_db:
+        with tracer.span("snapshot"):
+            # 流式模式不保留禁入池的完整数据，快照只记录核心与观察池
+            snapshot_stocks = alloc.stocks if args.stream else None
+            with SnapshotStore(os.path.join(base_dir, args.snapshot_db)) as store:
+                run_id = store.record(report, stocks=snapshot_stocks, run_date=args.snapshot_date)
+        print(f"🗂  快照已追加: {args.snapshot_db} (run_id={run_id})")
+
     print("\n" + "=" * 60)
     print("  完成。慢变量是地形，价格是水流。")
     print("=" * 60)
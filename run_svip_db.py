@@ -13,29 +13,42 @@ SVIP v1.0 — 数据库模式主入口
     
     # 混合模式：YAML + 数据库
     python run_svip_db.py --yaml data/sample_stocks.yaml --db-stocks stocks.txt
+    
+    # 多进程并行加载（A股/美股混合列表，代码前缀 CN: / US:）
+    python run_svip_db.py --stocks-list stocks.txt --workers 4
+    
+    # 只读 + 内存映射打开数据库（大体量静态库）
+    python run_svip_db.py --stocks-list stocks.txt --market CN --read-only
+    
+    # 输出阶段追踪 JSON 并附带 cProfile 采样
+    python run_svip_db.py --stocks-list stocks.txt --trace trace.json --profile
+    
+    # 融合评分：SVI → A1 → A2 整列批量计算，只物化 Core/Watch 股票
+    python run_svip_db.py --stocks-list stocks.txt --market CN --fused
 """
 import argparse
 import sys
 import os
 import yaml
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import Any, List, Dict, Tuple, Optional
 
 # 确保 src 和 config 可导入
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from config.settings import settings
-from src.models import SVIPStock
-from src.svi_engine import compute_svi
-from src.valuation_engine import compute_valuation
-from src.acceleration_engine import compute_acceleration_score
+from src.models import SVIPStock, SVILevel, Universe
 from src.macro_filter import compute_macro_state
 from src.tail_risk import compute_tail_risk
 from src.portfolio_engine import generate_report
 from src.report_generator import save_report
+from src.snapshot_store import SnapshotStore
 from src.data_loader import validate_stock_themes
 from src.db_loader import create_db_loader
-from src.airsx_bridge import enrich_batch
+from src.airsx_bridge import enrich_batch, load_bridge_cache
+from src.universe_scorer import build_stock, pool_counts, pool_stocks, score_universe
+from src.instrumentation import tracer, profiled
 
 
 def load_yaml(path: str) -> dict:
@@ -50,6 +63,7 @@ def load_stocks_list(path: str) -> List[str]:
     
     格式：每行一个股票代码
     支持注释（#开头）
+    支持 "CN:600519" / "US:AAPL" 形式为单只股票指定市场
     """
     stocks = []
     with open(path, "r", encoding="utf-8") as f:
@@ -74,126 +88,215 @@ def load_theme_map(path: str) -> Dict[str, str]:
     return data.get("stocks", {})
 
 
+def parse_stock_entry(entry: str, default_market: str) -> Tuple[str, str]:
+    """解析股票列表条目，返回 (market, code)；无市场前缀时使用 default_market"""
+    prefix, sep, code = entry.partition(":")
+    if sep and prefix.upper() in ("CN", "HK", "US"):
+        return prefix.upper(), code.strip()
+    return default_market, entry
+
+
 def build_stocks_from_db(
     stock_codes: List[str],
     market: str,
     theme_map: Dict[str, str],
     china_db_path: str = None,
-    us_db_path: str = None
+    us_db_path: str = None,
+    metrics_cache_path: str = None,
+    read_only: bool = False,
+    workers: int = 1,
+    chunk_size: int = 500,
+    prescreen: bool = False,
 ) -> List[SVIPStock]:
     """
     从数据库构建SVIPStock列表
     
     Args:
-        stock_codes: 股票代码列表
-        market: 市场 ("CN", "US", "HK")
+        stock_codes: 股票代码列表（可带 "CN:" / "US:" 市场前缀）
+        market: 默认市场 ("CN", "US", "HK")
         theme_map: 股票代码到主题的映射
         china_db_path: A股数据库路径
         us_db_path: 美股数据库路径
+        metrics_cache_path: 衍生指标缓存路径（None 表示不缓存）
+        read_only: 是否以只读 + 内存映射模式打开数据库（workers > 1 时总是只读）
+        workers: 并行进程数；>1 时按 chunk_size 分块并行加载与评分
+        chunk_size: 每块股票数
+        prescreen: 加载前在 SQL 中做硬筛选预筛，确定不通过的股票不再加载与评分
     
     Returns:
-        SVIPStock列表
+        SVIPStock列表（与输入顺序一致）
+    """
+    parts, loaded = _load_chunks(
+        stock_codes, market, theme_map, china_db_path, us_db_path, metrics_cache_path,
+        read_only, workers, chunk_size, prescreen, fused=False,
+    )
+    stocks: List[SVIPStock] = []
+    for chunk_stocks in parts:
+        stocks.extend(chunk_stocks)
+    print(f"   成功加载 {loaded}/{len(stock_codes)} 只股票")
+    
+    return stocks
+
+
+def build_universe_from_db(
+    stock_codes: List[str],
+    market: str,
+    theme_map: Dict[str, str],
+    china_db_path: str = None,
+    us_db_path: str = None,
+    metrics_cache_path: str = None,
+    read_only: bool = False,
+    workers: int = 1,
+    chunk_size: int = 500,
+    prescreen: bool = False,
+) -> Optional[Universe]:
+    """
+    从数据库加载并融合评分，返回列式 Universe（参数同 build_stocks_from_db）。
+    
+    SVI → A1 → A2 整列批量计算，不创建逐只结果对象；未加载到股票时返回 None。
     """
+    parts, loaded = _load_chunks(
+        stock_codes, market, theme_map, china_db_path, us_db_path, metrics_cache_path,
+        read_only, workers, chunk_size, prescreen, fused=True,
+    )
+    print(f"   成功加载 {loaded}/{len(stock_codes)} 只股票")
+    parts = [part for part in parts if len(part)]
+    return Universe.concat(parts) if parts else None
+
+
+def _load_chunks(
+    stock_codes: List[str],
+    market: str,
+    theme_map: Dict[str, str],
+    china_db_path: Optional[str],
+    us_db_path: Optional[str],
+    metrics_cache_path: Optional[str],
+    read_only: bool,
+    workers: int,
+    chunk_size: int,
+    prescreen: bool,
+    fused: bool,
+) -> Tuple[list, int]:
+    """分块加载与评分，按分块序号返回 (各块结果, 加载数)"""
     print(f"\n📊 从数据库加载股票数据...")
     
-    # 创建数据库加载器
-    db_loader = create_db_loader(china_db_path, us_db_path)
+    # 构建加载列表：[(market, code, theme), ...]
+    stock_list = []
+    for entry in stock_codes:
+        stock_market, code = parse_stock_entry(entry, market)
+        stock_list.append((stock_market, code, theme_map.get(code, "")))
+    
+    chunks = [
+        stock_list[i:i + chunk_size] for i in range(0, len(stock_list), chunk_size)
+    ]
+    tasks = [(index, chunk, prescreen, fused) for index, chunk in enumerate(chunks)]
+    
+    if workers > 1 and len(chunks) > 1:
+        # 每个 worker 一份只读连接；加载器与 AIRS-X 索引在进程初始化时建立一次
+        print(f"   并行加载: {len(chunks)} 块 × ≤{chunk_size} 只，{workers} 个进程（只读连接）")
+        initargs = (china_db_path, us_db_path, metrics_cache_path, True)
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=initargs,
+        ) as pool:
+            results = list(pool.map(_build_chunk, tasks))
+    else:
+        _init_worker(china_db_path, us_db_path, metrics_cache_path, read_only)
+        try:
+            results = [_build_chunk(task) for task in tasks]
+        finally:
+            _close_worker()
+    
+    # 按分块序号合并，保证结果顺序确定
+    parts = []
+    loaded = 0
+    rejected = 0
+    for index, chunk_result, n_loaded, trace in sorted(results, key=lambda r: r[0]):
+        loaded += n_loaded
+        rejected += trace["counters"].get("prescreen_rejected", 0)
+        parts.append(chunk_result)
+        tracer.merge(trace)
+        timings = {span["path"]: span["seconds"] for span in trace["spans"]}
+        if len(results) > 1:
+            print(f"   分块 {index}: {n_loaded}/{len(chunks[index])} 只"
+                  f"  加载 {timings['load']:.2f}s  AIRS-X {timings['enrich']:.2f}s"
+                  f"  评分 {timings['score']:.2f}s")
+    if prescreen:
+        print(f"   硬筛选预筛剔除 {rejected} 家公司")
+    return parts, loaded
+
+
+# 每个进程一份的加载状态：数据库加载器（连接与衍生指标缓存常驻）与 AIRS-X 索引
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(
+    china_db_path: Optional[str],
+    us_db_path: Optional[str],
+    metrics_cache_path: Optional[str],
+    read_only: bool,
+) -> None:
+    """进程初始化：创建加载器并加载 AIRS-X 索引（每个进程一次，而不是每块一次）"""
+    _WORKER["loader"] = create_db_loader(
+        china_db_path, us_db_path, metrics_cache_path, read_only
+    )
+    _WORKER["airsx"] = load_bridge_cache()
+
+
+def _close_worker() -> None:
+    """关闭本进程的加载器（串行路径结束时调用；worker 进程随进程退出）"""
+    loader = _WORKER.pop("loader", None)
+    if loader is not None:
+        loader.close()
+    _WORKER.clear()
+
+
+def _build_chunk(
+    task: Tuple[int, List[Tuple[str, str, str]], bool, bool],
+) -> Tuple[int, Any, int, Dict[str, Any]]:
+    """
+    加载并评分一个分块（串行路径与并行 worker 共用，需先 _init_worker）。
     
-    try:
-        # 连接数据库
-        db_loader.connect(market)
-        
-        # 构建加载列表：[(market, code, theme), ...]
-        stock_list = []
-        for code in stock_codes:
-            theme = theme_map.get(code, "")
-            stock_list.append((market, code, theme))
-        
-        # 批量加载
-        stocks_data = db_loader.load_stocks_from_list(stock_list)
-        print(f"   成功加载 {len(stocks_data)}/{len(stock_codes)} 只股票")
+    复用本进程的加载器与 AIRS-X 索引，返回 (分块序号, SVIPStock 列表, 加载数, 阶段追踪)；
+    fused 为 True 时第二项为融合评分的 Universe。
+    阶段追踪在独立的 tracer 状态中记录，由主进程合并。
+    """
+    index, stock_list, prescreen, fused = task
+    db_loader = _WORKER["loader"]
+    
+    with tracer.isolated():
+        with tracer.span("load"):
+            # 连接数据库（本进程首次用到该市场时）
+            for stock_market in dict.fromkeys(entry[0] for entry in stock_list):
+                conn = db_loader.us_conn if stock_market == "US" else db_loader.china_conn
+                if conn is None:
+                    db_loader.connect(stock_market)
+            
+            # 批量加载
+            stocks_data = db_loader.load_stocks_from_list(stock_list, prescreen=prescreen)
+            # worker 进程不会显式关闭加载器：每块提交一次新算出的衍生指标
+            if db_loader.metrics_cache is not None:
+                db_loader.metrics_cache.flush()
         
         # AIRS-X 桥接补充主观评估字段
-        stocks_data = enrich_batch(stocks_data)
+        with tracer.span("enrich"):
+            stocks_data = enrich_batch(stocks_data, airsx_cache=_WORKER["airsx"])
         
-        # 转换为SVIPStock
-        stocks = []
-        for item in stocks_data:
-            stock = build_stock_from_data(item)
-            if stock:
-                stocks.append(stock)
+        # 转换为SVIPStock（融合模式下为列式 Universe）
+        with tracer.span("score"):
+            if fused:
+                result = score_universe(stocks_data)
+            else:
+                result = [build_stock(item) for item in stocks_data]
+                tracer.count("stocks_scored", len(result))
         
-        return stocks
-    
-    finally:
-        db_loader.close()
-
-
-def build_stock_from_data(item: dict) -> SVIPStock:
-    """从数据字典构建SVIPStock对象"""
-    fin = item.get("financials", {})
-    val = item.get("valuation", {})
-    
-    # Step 1: SVI 评分
-    svi = compute_svi(
-        symbol=item["symbol"],
-        market=item.get("market", "US"),
-        roic_10y_median=fin.get("roic_10y_median", 0),
-        fcf_conversion=fin.get("fcf_conversion", 0),
-        gross_margin_std=fin.get("gross_margin_std", 0.1),
-        debt_to_equity=fin.get("debt_to_equity", 1.0),
-        market_share=fin.get("market_share", 0),
-        cr4=fin.get("cr4", 0),
-        moat_rating=fin.get("moat_rating", 50),
-        demand_rigidity_rating=fin.get("demand_rigidity_rating", 50),
-        substitution_risk_rating=fin.get("substitution_risk_rating", 50),
-    )
+        trace = tracer.export()
     
-    # Step 2: A1 估值评估
-    valuation = compute_valuation(
-        symbol=item["symbol"],
-        fcf_yield=val.get("fcf_yield", 0),
-        pe_ratio=val.get("pe_ratio", 0),
-        growth_rate=val.get("growth_rate", 0),
-        svi_score=svi.total,
-        valuation_percentile=val.get("valuation_percentile", 0.5),
-        growth_concentration=val.get("growth_concentration", 0.3),
-        reinvestment_declining_years=val.get("reinvestment_declining_years", 0),
-    )
-    
-    # Step 3: A2 加速检测
-    accel_data = item.get("acceleration", {})
-    acceleration = compute_acceleration_score(
-        symbol=item["symbol"],
-        theme=item.get("theme", ""),
-        penetration_series=accel_data.get("penetration"),
-        cost_curve_series=accel_data.get("cost_curve"),
-        capex_series=accel_data.get("capex"),
-        policy_series=accel_data.get("policy"),
-    )
-    
-    stock = SVIPStock(
-        symbol=item["symbol"],
-        name=item.get("name", ""),
-        market=item.get("market", "US"),
-        sector=item.get("sector", ""),
-        theme=item.get("theme", ""),
-        svi=svi,
-        valuation=valuation,
-        acceleration=acceleration,
-    )
-    
-    return stock
+    return index, result, len(stocks_data), trace
 
 
 def build_stocks_from_yaml(data: dict) -> List[SVIPStock]:
     """从YAML数据构建SVIPStock列表（兼容原有逻辑）"""
-    stocks = []
-    for item in data.get("stocks", []):
-        stock = build_stock_from_data(item)
-        if stock:
-            stocks.append(stock)
-    return stocks
+    return [build_stock(item) for item in data.get("stocks", [])]
 
 
 def print_stock_summary(stocks: List[SVIPStock]):
@@ -239,6 +342,43 @@ def main():
         help="美股数据库路径（默认：../database/us_stocks_financial_data.db）",
     )
     
+    parser.add_argument(
+        "--metrics-cache",
+        help="衍生指标缓存 SQLite 路径（年报未变化的公司直接复用缓存）",
+    )
+    
+    parser.add_argument(
+        "--read-only",
+        action="store_true",
+        help="以只读 + 内存映射模式打开数据库（mode=ro、mmap、大页缓存）",
+    )
+    
+    parser.add_argument(
+        "--prescreen",
+        action="store_true",
+        help="加载前在 SQL 中按硬筛选阈值预筛，跳过确定不通过的股票",
+    )
+    
+    # 并行
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="并行进程数（>1 时分块并行加载与评分）",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=500,
+        help="并行模式下每块股票数",
+    )
+    
+    parser.add_argument(
+        "--fused",
+        action="store_true",
+        help="融合评分：SVI → A1 → A2 整列批量计算，只为 Core/Watch 股票创建完整对象",
+    )
+    
     # 主题映射
     parser.add_argument(
         "--theme-map",
@@ -266,9 +406,46 @@ def main():
         action="store_true",
         help="不保存 Markdown 报告",
     )
+    parser.add_argument(
+        "--snapshot-db",
+        help="时点快照 SQLite 路径（每次运行追加一份快照，供回测与漂移分析）",
+    )
+    parser.add_argument(
+        "--snapshot-date",
+        help="快照日期 YYYY-MM-DD（默认当天，用于补录历史）",
+    )
+    parser.add_argument(
+        "--trace",
+        help="JSON 阶段追踪输出路径（指定时才写出）",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="reports/svip_db_profile.prof",
+        help="启用 cProfile 采样并保存到该路径（并行模式只采样主进程）",
+    )
     
     args = parser.parse_args()
     
+    if not args.yaml and not args.stocks_list:
+        print("❌ 错误: 必须指定 --yaml 或 --stocks-list")
+        parser.print_help()
+        sys.exit(1)
+    
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    with profiled(args.profile and os.path.join(base_dir, args.profile)):
+        run(args)
+    
+    # 阶段耗时汇总
+    print("\n⏱  阶段耗时:")
+    print(tracer.summary_table())
+    if args.trace:
+        path = tracer.write_json(os.path.join(base_dir, args.trace))
+        print(f"📄 阶段追踪已保存: {path}")
+
+
+def run(args):
+    """执行一次完整的数据库模式 SVIP 流程"""
     print("=" * 60)
     print("  SVIP v1.0 — 慢变量投资池系统（数据库模式）")
     print("  Slow Variable Investment Pool - Database Mode")
@@ -279,14 +456,20 @@ def main():
     
     # 加载股票数据
     stocks = []
+    universe = None
     
     if args.yaml:
         # YAML模式
         print(f"📊 加载YAML数据: {args.yaml}")
         yaml_path = os.path.join(base_dir, args.yaml)
-        stock_data = load_yaml(yaml_path)
-        stocks = build_stocks_from_yaml(stock_data)
-        print(f"   共 {len(stocks)} 只股票")
+        with tracer.span("build_stocks"):
+            stock_data = load_yaml(yaml_path)
+            if args.fused:
+                items = stock_data.get("stocks", [])
+                universe = score_universe(items) if items else None
+            else:
+                stocks = build_stocks_from_yaml(stock_data)
+        print(f"   共 {len(universe) if universe is not None else len(stocks)} 只股票")
     
     elif args.stocks_list:
         # 数据库模式
@@ -303,20 +486,34 @@ def main():
             print(f"   加载主题映射: {len(theme_map)} 条")
         
         # 从数据库加载
-        stocks = build_stocks_from_db(
-            stock_codes,
-            args.market,
-            theme_map,
-            args.china_db,
-            args.us_db
-        )
-    
-    else:
-        print("❌ 错误: 必须指定 --yaml 或 --stocks-list")
-        parser.print_help()
-        sys.exit(1)
-    
-    if not stocks:
+        build = build_universe_from_db if args.fused else build_stocks_from_db
+        with tracer.span("build_stocks"):
+            result = build(
+                stock_codes,
+                args.market,
+                theme_map,
+                args.china_db,
+                args.us_db,
+                args.metrics_cache,
+                read_only=args.read_only,
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+                prescreen=args.prescreen,
+            )
+        if args.fused:
+            universe = result
+        else:
+            stocks = result
+    
+    if universe is not None:
+        # 只物化进入 Core/Watch 的股票，禁入池保留在列式 Universe 中
+        with tracer.span("materialize"):
+            stocks = pool_stocks(universe)
+        counts = pool_counts(universe)
+        print(f"   融合评分: 核心 {counts[SVILevel.CORE]} / 观察 {counts[SVILevel.WATCH]}"
+              f" / 禁入 {counts[SVILevel.BLOCK]}（只物化核心与观察池）")
+    
+    if not stocks and universe is None:
         print("❌ 未加载到任何股票数据")
         sys.exit(1)
     
@@ -326,34 +523,38 @@ def main():
     # 加载宏观数据
     print(f"\n🌍 加载宏观数据: {args.macro}")
     macro_path = os.path.join(base_dir, args.macro)
-    macro_data = load_yaml(macro_path)
-    md = macro_data.get("macro", {})
-    td = macro_data.get("tail_risk", {})
-    
-    macro = compute_macro_state(
-        yield_spread=md.get("yield_spread_10y2y"),
-        real_yield=md.get("real_yield"),
-        credit_spread=md.get("credit_spread"),
-        m2_yoy=md.get("m2_yoy"),
-        fci=md.get("fci"),
-        credit_growth=md.get("credit_growth"),
-        earnings_yoy=md.get("earnings_yoy"),
-        ism_new_orders=md.get("ism_new_orders"),
-    )
-    print(f"   宏观评分: {macro.total_score:+d} ({macro.wind.value})"
-          f"  MacroRiskFactor={macro.macro_risk_factor:.2f}")
+    with tracer.span("macro"):
+        macro_data = load_yaml(macro_path)
+        md = macro_data.get("macro", {})
+        td = macro_data.get("tail_risk", {})
+    
+        macro = compute_macro_state(
+            yield_spread=md.get("yield_spread_10y2y"),
+            real_yield=md.get("real_yield"),
+            credit_spread=md.get("credit_spread"),
+            m2_yoy=md.get("m2_yoy"),
+            fci=md.get("fci"),
+            credit_growth=md.get("credit_growth"),
+            earnings_yoy=md.get("earnings_yoy"),
+            ism_new_orders=md.get("ism_new_orders"),
+        )
+        print(f"   宏观评分: {macro.total_score:+d} ({macro.wind.value})"
+              f"  MacroRiskFactor={macro.macro_risk_factor:.2f}")
     
-    tail_risk = compute_tail_risk(
-        vix=td.get("vix"),
-        credit_spread_change=td.get("credit_spread_change"),
-        regulatory_intensity=td.get("regulatory_intensity", 0),
-    )
-    print(f"   尾部风险: {tail_risk.state.value}"
-          f"  TailRiskFactor={tail_risk.tail_risk_factor:.2f}")
+        tail_risk = compute_tail_risk(
+            vix=td.get("vix"),
+            credit_spread_change=td.get("credit_spread_change"),
+            regulatory_intensity=td.get("regulatory_intensity", 0),
+        )
+        print(f"   尾部风险: {tail_risk.state.value}"
+              f"  TailRiskFactor={tail_risk.tail_risk_factor:.2f}")
     
     # 生成报告
     print(f"\n🔧 构建组合 (市场: {args.market})...")
-    report = generate_report(stocks, macro, tail_risk, market=args.market)
+    with tracer.span("report"):
+        # 融合模式下禁入池以紧凑行并入报告，快照时才物化
+        blocked = universe.blocked_rows() if universe is not None else None
+        report = generate_report(stocks, macro, tail_risk, market=args.market, blocked=blocked)
     
     # 控制台输出
     alloc = report.allocation
@@ -381,9 +582,17 @@ def main():
     # 保存报告
     if not args.no_save:
         report_dir = os.path.join(base_dir, "reports")
-        filepath = save_report(report, report_dir)
+        with tracer.span("save"):
+            filepath = save_report(report, report_dir)
         print(f"\n📄 报告已保存: {filepath}")
     
+    # 追加时点快照
+    if args.snapshot_db:
+        with tracer.span("snapshot"):
+            with SnapshotStore(os.path.join(base_dir, args.snapshot_db)) as store:
+                run_id = store.record(report, run_date=args.snapshot_date)
+        print(f"🗂  快照已追加: {args.snapshot_db} (run_id={run_id})")
+    
     print("\n" + "=" * 60)
     print("  完成。慢变量是地形，价格是水流。")
     print("=" * 60)
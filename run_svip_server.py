@@ -0,0 +1,91 @@
+"""
+SVIP v1.0 — 常驻服务
+
+启动 HTTP/JSON 服务，数据库连接、AIRS-X 索引、主题元数据与已评分股票常驻内存。
+
+用法:
+    # 数据库模式，预连 A股库
+    python run_svip_server.py --china-db ../database/china_a_stocks.db --warm CN --read-only
+
+    # 只用 YAML 股票池（不连数据库）
+    python run_svip_server.py --yaml data/sample_stocks.yaml --no-db
+
+    # 调用
+    curl -X POST localhost:8765/score -d '{"symbols": ["600519", "US:AAPL"], "market": "CN"}'
+    curl -X POST localhost:8765/allocation -d @request.json
+    curl 'localhost:8765/report/latest?format=markdown'
+    curl localhost:8765/metrics
+"""
+import argparse
+import logging
+import os
+import sys
+
+# 确保 src 和 config 可导入
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.server import SVIPService, create_server
+from run_svip_db import load_theme_map
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SVIP 常驻服务（HTTP/JSON API）")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--china-db", help="A股数据库路径")
+    parser.add_argument("--us-db", help="美股数据库路径")
+    parser.add_argument("--no-db", action="store_true", help="不连接数据库，只用 --yaml 股票池")
+    parser.add_argument("--read-only", action="store_true", help="只读 + 内存映射打开数据库")
+    parser.add_argument("--metrics-cache", help="衍生指标缓存 SQLite 路径")
+    parser.add_argument("--yaml", help="常驻的 YAML 股票池（优先于数据库）")
+    parser.add_argument("--theme-map", help="股票-主题映射YAML文件")
+    parser.add_argument("--airsx", help="AIRS-X 目录（默认 ../airs-x）")
+    parser.add_argument(
+        "--warm",
+        nargs="*",
+        default=[],
+        choices=["CN", "US"],
+        help="启动时预先连接的市场数据库",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+
+    print("=" * 60)
+    print("  SVIP v1.0 — 常驻服务")
+    print("=" * 60)
+    print()
+
+    theme_map = load_theme_map(os.path.join(base_dir, args.theme_map)) if args.theme_map else {}
+    service = SVIPService(
+        args.china_db,
+        args.us_db,
+        yaml_path=args.yaml and os.path.join(base_dir, args.yaml),
+        theme_map=theme_map,
+        airsx_dir=args.airsx,
+        metrics_cache_path=args.metrics_cache,
+        read_only=args.read_only,
+        use_db=not args.no_db,
+    )
+    service.warm(args.warm)
+    health = service.health()
+    print(f"📊 YAML 股票池: {health['yaml_stocks']} 只  主题映射: {len(theme_map)} 条")
+    if health["connected_markets"]:
+        print(f"   已连接数据库: {', '.join(health['connected_markets'])}")
+
+    server = create_server(service, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"🚀 监听 http://{host}:{port}  （Ctrl+C 退出）")
+    print("   GET /health  GET /metrics  POST /score  POST /allocation  GET /report/latest")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 正在停止...")
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+SVIP v1.0 — 参数敏感性扫描
+
+在同一份股票输入上，对 SVI / A1 / A2 / A3 配置做网格或随机覆盖，
+多进程评估每组配置并与基线对比分池、仓位与违规的变化。
+
+用法:
+    # 样例数据 + 示例扫描空间（网格）
+    python run_sweep.py --space data/sweep_space_example.yaml
+
+    # 随机采样 200 组，4 个进程，结果写 JSON
+    python run_sweep.py --space data/sweep_space_example.yaml --random 200 --workers 4 \\
+        --output reports/sweep.json
+
+    # 数据库模式
+    python run_sweep.py --stocks-list stocks.txt --market CN --theme-map themes.yaml \\
+        --space data/sweep_space_example.yaml
+"""
+import argparse
+import json
+import os
+import sys
+
+# 确保 src 和 config 可导入
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.airsx_bridge import enrich_batch
+from src.db_loader import create_db_loader
+from src.instrumentation import tracer
+from src.macro_filter import compute_macro_state
+from src.param_sweep import (
+    compare_to_baseline,
+    format_sweep_report,
+    grid,
+    prepare_inputs,
+    random_configs,
+    run_sweep,
+)
+from src.tail_risk import compute_tail_risk
+from run_svip_db import load_stocks_list, load_theme_map, load_yaml, parse_stock_entry
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="SVIP 参数敏感性扫描（网格 / 随机覆盖 + 基线对比）"
+    )
+    data_group = parser.add_mutually_exclusive_group()
+    data_group.add_argument(
+        "--yaml",
+        default="data/sample_stocks.yaml",
+        help="YAML格式股票数据文件",
+    )
+    data_group.add_argument("--stocks-list", help="股票代码列表文件（数据库模式）")
+    parser.add_argument("--china-db", help="A股数据库路径")
+    parser.add_argument("--us-db", help="美股数据库路径")
+    parser.add_argument("--theme-map", help="股票-主题映射YAML文件")
+    parser.add_argument("--space", required=True, help="扫描空间 YAML（见 data/sweep_space_example.yaml）")
+    parser.add_argument("--random", type=int, help="随机采样组数（默认按网格展开）")
+    parser.add_argument("--seed", type=int, default=0, help="随机采样种子")
+    parser.add_argument("--workers", type=int, default=1, help="并行进程数")
+    parser.add_argument(
+        "-m", "--macro",
+        default="data/macro_inputs.yaml",
+        help="宏观数据 YAML 路径",
+    )
+    parser.add_argument("--market", default="US", choices=["US", "HK", "CN"], help="目标市场")
+    parser.add_argument("--output", help="对比结果 JSON 输出路径")
+    parser.add_argument("--trace", help="JSON 阶段追踪输出路径")
+    args = parser.parse_args()
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+
+    print("=" * 60)
+    print("  SVIP v1.0 — 参数敏感性扫描")
+    print("=" * 60)
+    print()
+
+    # 股票输入
+    with tracer.span("load"):
+        if args.stocks_list:
+            print(f"📊 加载股票列表: {args.stocks_list}")
+            theme_map = {}
+            if args.theme_map:
+                theme_map = load_theme_map(os.path.join(base_dir, args.theme_map))
+            stock_list = []
+            for entry in load_stocks_list(os.path.join(base_dir, args.stocks_list)):
+                stock_market, code = parse_stock_entry(entry, args.market)
+                stock_list.append((stock_market, code, theme_map.get(code, "")))
+            loader = create_db_loader(args.china_db, args.us_db)
+            try:
+                for stock_market in dict.fromkeys(entry[0] for entry in stock_list):
+                    loader.connect(stock_market)
+                items = loader.load_stocks_from_list(stock_list)
+            finally:
+                loader.close()
+            items = enrich_batch(items)
+        else:
+            print(f"📊 加载YAML数据: {args.yaml}")
+            items = load_yaml(os.path.join(base_dir, args.yaml)).get("stocks", [])
+    if not items:
+        print("❌ 未加载到任何股票数据")
+        sys.exit(1)
+    print(f"   共 {len(items)} 只股票")
+
+    # 宏观与尾部风险（所有配置共享）
+    macro_data = load_yaml(os.path.join(base_dir, args.macro))
+    md = macro_data.get("macro", {})
+    td = macro_data.get("tail_risk", {})
+    macro = compute_macro_state(
+        yield_spread=md.get("yield_spread_10y2y"),
+        real_yield=md.get("real_yield"),
+        credit_spread=md.get("credit_spread"),
+        m2_yoy=md.get("m2_yoy"),
+        fci=md.get("fci"),
+        credit_growth=md.get("credit_growth"),
+        earnings_yoy=md.get("earnings_yoy"),
+        ism_new_orders=md.get("ism_new_orders"),
+    )
+    tail_risk = compute_tail_risk(
+        vix=td.get("vix"),
+        credit_spread_change=td.get("credit_spread_change"),
+        regulatory_intensity=td.get("regulatory_intensity", 0),
+    )
+
+    # 扫描空间
+    space = load_yaml(os.path.join(base_dir, args.space)).get("space") or {}
+    if args.random:
+        configs = random_configs(space, args.random, seed=args.seed)
+        print(f"🎲 随机采样: {len(configs)} 组（seed={args.seed}）")
+    else:
+        configs = grid(space)
+        print(f"🔢 网格: {len(configs)} 组")
+
+    inputs = prepare_inputs(items, macro, tail_risk, market=args.market)
+    results = run_sweep(inputs, configs, workers=args.workers)
+    rows = compare_to_baseline(results, list(inputs.symbols))
+
+    print()
+    print(format_sweep_report(rows))
+
+    if args.output:
+        path = os.path.join(base_dir, args.output)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        print(f"\n📄 扫描结果已保存: {args.output}")
+
+    print("\n⏱  阶段耗时:")
+    print(tracer.summary_table())
+    if args.trace:
+        path = tracer.write_json(os.path.join(base_dir, args.trace))
+        print(f"📄 阶段追踪已保存: {path}")
+
+
+if __name__ == "__main__":
+    main()
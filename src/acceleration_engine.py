@@ -7,9 +7,12 @@ SVIP v1.0 — A2 Acceleration Engine (慢变量加速检测模块)
 输出：AccelerationScore (0-100) + PhaseState
 """
 import numpy as np
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple, Union
 from config.settings import settings, AccelerationConfig
-from src.models import AccelerationResult, PhaseState
+from src.models import AccelerationResult, AccelerationBatch, PhaseState, PHASE_STATES
+
+# 打包后的序列块：(左对齐的二维数组 stocks × periods, 每行有效长度)
+SeriesBlock = Tuple[np.ndarray, np.ndarray]
 
 
 def compute_growth_rate(series: List[float]) -> float:
@@ -155,3 +158,169 @@ def compute_acceleration_score(
     result.phase_factor = phase_factors[result.phase]
 
     return result
+
+
+# ============================================================================
+# 批量检测（二维序列矩阵，逐行结果与标量路径一致）
+# ============================================================================
+
+def pack_series(series_list: Sequence[Optional[Sequence[float]]]) -> SeriesBlock:
+    """
+    把变长序列打包为左对齐的二维数组 + 长度数组。
+
+    None 或空序列的长度为 0（视为无数据）。
+    """
+    lengths = np.fromiter(
+        (len(x) if x else 0 for x in series_list), dtype=np.int64, count=len(series_list)
+    )
+    periods = int(lengths.max()) if len(lengths) else 0
+    values = np.zeros((len(series_list), max(periods, 1)), dtype=float)
+    for i, x in enumerate(series_list):
+        if x:
+            values[i, :len(x)] = x
+    return values, lengths
+
+
+def _last_smoothed(
+    values: np.ndarray,
+    lengths: np.ndarray,
+    window: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    每行平滑序列的最后三个值 (n × 3) 及平滑后长度。
+
+    与 smooth_series 一致：长度不足 window 时不平滑。
+    """
+    n, periods = values.shape
+    rows = np.arange(n)[:, None]
+    smoothed_window = np.where(lengths >= window, window, 1)
+    smoothed_len = lengths - smoothed_window + 1
+
+    # 平滑序列下标 smoothed_len-3 .. smoothed_len-1，对应原序列窗口起点
+    starts = smoothed_len[:, None] + np.arange(-3, 0)[None, :]
+
+    def gather(offset: int) -> np.ndarray:
+        return values[rows, np.clip(starts + offset, 0, periods - 1)]
+
+    kernel = (np.ones(window) / window)[0]
+    windowed = gather(0) * kernel
+    for offset in range(1, window):
+        windowed = windowed + gather(offset) * kernel
+    last3 = np.where((smoothed_window == window)[:, None], windowed, gather(0))
+    return last3, smoothed_len
+
+
+def _safe_growth(curr: np.ndarray, prev: np.ndarray) -> np.ndarray:
+    """(curr - prev) / |prev|，prev 为 0 时取 0"""
+    out = np.zeros_like(curr)
+    np.divide(curr - prev, np.abs(prev), out=out, where=prev != 0)
+    return out
+
+
+def score_proxy_batch(
+    values: np.ndarray,
+    lengths: np.ndarray,
+    smoothing: int = 3,
+) -> np.ndarray:
+    """score_proxy_indicator 的批量版本：一次计算整块序列的 0-100 评分"""
+    last3, smoothed_len = _last_smoothed(values, lengths, smoothing)
+    growth = _safe_growth(last3[:, 2], last3[:, 1])
+    accel = growth - _safe_growth(last3[:, 1], last3[:, 0])
+
+    growth_score = np.maximum(0, np.minimum(100, 50 + growth * 250))
+    accel_score = np.maximum(0, np.minimum(100, 50 + accel * 500))
+    scores = growth_score * 0.4 + accel_score * 0.6
+    return np.where((lengths >= 3) & (smoothed_len >= 3), scores, 50.0)
+
+
+def classify_phase_batch(
+    scores: np.ndarray,
+    cfg: AccelerationConfig = None,
+) -> np.ndarray:
+    """相位判定（向量化），返回 PHASE_STATES 下标编码"""
+    if cfg is None:
+        cfg = settings.acceleration
+    phase = np.where(
+        scores >= cfg.accelerating_threshold, PHASE_STATES.index(PhaseState.ACCELERATING),
+        np.where(
+            scores >= cfg.steady_threshold,
+            PHASE_STATES.index(PhaseState.STEADY),
+            PHASE_STATES.index(PhaseState.DECAYING),
+        ),
+    )
+    return phase.astype(np.int8)
+
+
+def compute_acceleration_batch(
+    symbols: Sequence[str],
+    themes: Union[str, Sequence[str]] = "",
+    penetration: Optional[SeriesBlock] = None,
+    cost_curve: Optional[SeriesBlock] = None,
+    capex: Optional[SeriesBlock] = None,
+    policy: Optional[SeriesBlock] = None,
+    cfg: AccelerationConfig = None,
+) -> AccelerationBatch:
+    """
+    批量计算 A2 慢变量加速检测（compute_acceleration_score 的列式版本）。
+
+    每个代理指标为 pack_series() 打包的 (values, lengths)，整块为 None 表示
+    全部无数据。平滑、一/二阶差分、评分映射、加权与相位判定一次完成。
+    """
+    if cfg is None:
+        cfg = settings.acceleration
+
+    symbols = np.asarray(symbols, dtype=object)
+    n = len(symbols)
+    if isinstance(themes, str):
+        themes = np.full(n, themes, dtype=object)
+    else:
+        themes = np.asarray(themes, dtype=object)
+
+    proxies = (
+        (penetration, False, cfg.penetration_weight),
+        (cost_curve, True, cfg.cost_curve_weight),    # 成本下降是好事，反转序列
+        (capex, False, cfg.capex_weight),
+        (policy, False, cfg.policy_weight),
+    )
+
+    proxy_scores = []
+    weighted_sum = np.zeros(n)
+    weight_total = np.zeros(n)
+    for block, invert, weight in proxies:
+        if block is None:
+            proxy_scores.append(np.zeros(n))
+            continue
+        values, lengths = block
+        included = lengths >= 3
+        scores = score_proxy_batch(-values if invert else values, lengths, cfg.smoothing_periods)
+        proxy_scores.append(np.where(included, scores, 0.0))
+        weighted_sum = weighted_sum + np.where(included, scores * weight, 0.0)
+        weight_total = weight_total + np.where(included, weight, 0.0)
+
+    # 加权平均（无数据默认稳态 50）
+    has_data = weight_total > 0
+    acceleration_score = np.full(n, 50.0)
+    np.divide(weighted_sum, weight_total, out=acceleration_score, where=has_data)
+
+    # 相位判定与相位因子
+    phase = classify_phase_batch(acceleration_score, cfg)
+    phase_factors = np.array([
+        {
+            PhaseState.ACCELERATING: cfg.accelerating_factor,
+            PhaseState.STEADY: cfg.steady_factor,
+            PhaseState.DECAYING: cfg.decaying_factor,
+        }[state]
+        for state in PHASE_STATES
+    ])
+
+    return AccelerationBatch(
+        symbol=symbols,
+        theme=themes,
+        penetration_score=proxy_scores[0],
+        cost_curve_score=proxy_scores[1],
+        capex_score=proxy_scores[2],
+        policy_score=proxy_scores[3],
+        acceleration_score=acceleration_score,
+        phase=phase,
+        phase_factor=phase_factors[phase],
+    )
@@ -13,46 +13,186 @@ AIRS-X 提供的可用数据：
 """
 import csv
 import glob
+import hashlib
 import os
 import logging
-from typing import Dict, Optional, List
+import pickle
+from dataclasses import dataclass
+from typing import Dict, Optional, List, Tuple
 
 logger = logging.getLogger(__name__)
 
+# enrich_svip_stock 用到的列（索引只保留这些）
+AIRSX_FIELDS = ("S", "U", "zone", "esd_quadrant", "airs_grade", "industry")
 
-def load_airsx_summary(airsx_dir: str) -> Dict[str, Dict]:
-    """
-    从 AIRS-X 目录加载 summary.csv，按 stock_code 索引。
+# 索引格式版本（字段或结构变化时递增，旧索引自动重建）
+INDEX_VERSION = 1
 
-    Args:
-        airsx_dir: AIRS-X 项目根目录
+# 默认索引目录：项目根目录下 .cache/airsx
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "airsx"
+)
 
-    Returns:
-        {stock_code: {字段字典}, ...}
+# (mtime_ns, size)
+Stamp = Tuple[int, int]
+
+
+@dataclass
+class AirsxIndex:
+    """
+    编译后的 AIRS-X 索引
+
+    key 为 CSV 列表及各自版本，merged 为按 CSV 优先级合并后的结果；
+    files 保存每个 summary.csv 的版本与精简行（代码 → AIRSX_FIELDS 元组），
+    只在增量重建时需要，从磁盘读取时按需加载（未加载为 None）。
     """
-    cache: Dict[str, Dict] = {}
+    key: Tuple[Tuple[str, Stamp], ...]
+    merged: Dict[str, Dict[str, str]]
+    files: Optional[Dict[str, Tuple[Stamp, Dict[str, Tuple[str, ...]]]]] = None
+
+
+# 进程内缓存：{airsx_dir: AirsxIndex}
+_INDEXES: Dict[str, AirsxIndex] = {}
+
 
-    # 优先查找结果目录中的 summary.csv
+def _summary_csvs(airsx_dir: str) -> List[str]:
+    """按优先级排列的 summary.csv（新结果目录在前，没有时回退到根目录）"""
     pattern = os.path.join(airsx_dir, "airs_*_results_*", "summary.csv")
     csvs = sorted(glob.glob(pattern), reverse=True)
     if not csvs:
-        # 回退到根目录
         root_csv = os.path.join(airsx_dir, "summary.csv")
         if os.path.exists(root_csv):
             csvs = [root_csv]
+    return csvs
+
+
+def _stamp(path: str) -> Stamp:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _parse_summary(csv_path: str) -> Dict[str, Tuple[str, ...]]:
+    """解析一个 summary.csv，只保留 AIRSX_FIELDS；同一代码取第一行"""
+    rows: Dict[str, Tuple[str, ...]] = {}
+    with open(csv_path, "r", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            code = (row.get("stock_code") or "").strip()
+            if code and code not in rows:
+                rows[code] = tuple(row.get(name) or "" for name in AIRSX_FIELDS)
+    return rows
 
+
+def _index_path(cache_dir: str, airsx_dir: str) -> str:
+    digest = hashlib.sha1(os.path.abspath(airsx_dir).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"airsx_index_{digest}.pkl")
+
+
+def _read_index(path: str, key: Tuple[Tuple[str, Stamp], ...]) -> Optional[AirsxIndex]:
+    """
+    读取磁盘索引。文件内依次为 (版本, key, merged) 与 files 两个 pickle，
+    key 一致时只读第一个。
+    """
+    try:
+        with open(path, "rb") as f:
+            version, stored_key, merged = pickle.load(f)
+            if version != INDEX_VERSION:
+                return None
+            if stored_key == key:
+                return AirsxIndex(key=stored_key, merged=merged)
+            return AirsxIndex(key=stored_key, merged=merged, files=pickle.load(f))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"AIRS-X 索引损坏，重建: {path}: {e}")
+        return None
+
+
+def _write_index(path: str, index: AirsxIndex) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump((INDEX_VERSION, index.key, index.merged), f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(index.files, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"写入 AIRS-X 索引失败: {path}: {e}")
+
+
+def clear_airsx_cache() -> None:
+    """清除进程内索引缓存（磁盘索引按 CSV 版本自动失效）"""
+    _INDEXES.clear()
+
+
+def load_airsx_summary(
+    airsx_dir: str,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+) -> Dict[str, Dict]:
+    """
+    从 AIRS-X 目录加载 summary.csv，按 stock_code 索引。
+
+    结果按 CSV 路径与 (mtime, 大小) 编译为索引并 pickle 到 cache_dir：
+    CSV 未变化时只加载合并结果；新增结果目录或 CSV 被修改时只重新解析变化的文件。
+    cache_dir=None 时不读写磁盘索引（仍使用进程内缓存）。
+
+    Args:
+        airsx_dir: AIRS-X 项目根目录
+        cache_dir: 索引目录
+
+    Returns:
+        {stock_code: {AIRSX_FIELDS 字段字典}, ...}（共享对象，不要修改）
+    """
+    csvs = _summary_csvs(airsx_dir)
+    stamps = []
     for csv_path in csvs:
         try:
-            with open(csv_path, "r", encoding="utf-8-sig") as f:
-                for row in csv.DictReader(f):
-                    code = row.get("stock_code", "").strip()
-                    if code and code not in cache:
-                        cache[code] = row
+            stamps.append((csv_path, _stamp(csv_path)))
+        except OSError as e:
+            logger.warning(f"加载 AIRS-X summary 失败: {csv_path}: {e}")
+    key = tuple(stamps)
+
+    dir_key = os.path.abspath(airsx_dir)
+    index = _INDEXES.get(dir_key)
+    if index is not None and index.key == key:
+        return index.merged
+
+    path = _index_path(cache_dir, airsx_dir) if cache_dir else None
+    if path and (index is None or index.files is None):
+        index = _read_index(path, key) or index
+    if index is not None and index.key == key:
+        _INDEXES[dir_key] = index
+        return index.merged
+
+    # 增量重建：未变化的 CSV 复用已解析的精简行
+    previous = (index.files if index is not None else None) or {}
+    files = {}
+    parsed = 0
+    for csv_path, stamp in key:
+        cached = previous.get(csv_path)
+        if cached is not None and cached[0] == stamp:
+            files[csv_path] = cached
+            continue
+        try:
+            files[csv_path] = (stamp, _parse_summary(csv_path))
+            parsed += 1
         except Exception as e:
             logger.warning(f"加载 AIRS-X summary 失败: {csv_path}: {e}")
 
-    logger.info(f"AIRS-X bridge: 加载 {len(cache)} 只股票数据")
-    return cache
+    merged: Dict[str, Dict[str, str]] = {}
+    for csv_path, _ in key:
+        if csv_path not in files:
+            continue
+        for code, values in files[csv_path][1].items():
+            if code not in merged:
+                merged[code] = dict(zip(AIRSX_FIELDS, values))
+
+    index = AirsxIndex(key=key, merged=merged, files=files)
+    _INDEXES[dir_key] = index
+    if path:
+        _write_index(path, index)
+
+    logger.info(f"AIRS-X bridge: 加载 {len(merged)} 只股票数据（重新解析 {parsed}/{len(key)} 个 CSV）")
+    return merged
 
 
 def _safe_float(val, default=0.0) -> float:
@@ -194,9 +334,32 @@ def enrich_svip_stock(stock_data: Dict, airsx_cache: Dict[str, Dict]) -> Dict:
     return stock_data
 
 
+def load_bridge_cache(
+    airsx_dir: str = None,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+) -> Dict[str, Dict]:
+    """
+    解析 AIRS-X 目录（默认 ../airs-x）并加载索引；目录不存在时返回空字典。
+
+    需要对多批股票补充时先调用一次，再把结果作为 enrich_batch(airsx_cache=...) 传入。
+    """
+    from pathlib import Path
+
+    if airsx_dir is None:
+        airsx_dir = str(Path(__file__).resolve().parent.parent.parent / "airs-x")
+
+    if not os.path.isdir(airsx_dir):
+        logger.info(f"AIRS-X 目录不存在: {airsx_dir}，跳过桥接补充")
+        return {}
+
+    return load_airsx_summary(airsx_dir, cache_dir)
+
+
 def enrich_batch(
     stocks_data: List[Dict],
     airsx_dir: str = None,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    airsx_cache: Optional[Dict[str, Dict]] = None,
 ) -> List[Dict]:
     """
     批量补充 SVIP 股票数据。
@@ -204,20 +367,13 @@ def enrich_batch(
     Args:
         stocks_data: SVIP 格式的股票字典列表
         airsx_dir: AIRS-X 项目目录（默认 ../airs-x）
+        cache_dir: 编译索引目录（None 表示不持久化）
+        airsx_cache: 已加载的索引（load_bridge_cache 的结果）；传入时不再查找目录
 
     Returns:
         补充后的列表
     """
-    from pathlib import Path
-
-    if airsx_dir is None:
-        airsx_dir = str(Path(__file__).resolve().parent.parent.parent / "airs-x")
-
-    if not os.path.isdir(airsx_dir):
-        logger.info(f"AIRS-X 目录不存在: {airsx_dir}，跳过桥接补充")
-        return stocks_data
-
-    cache = load_airsx_summary(airsx_dir)
+    cache = airsx_cache if airsx_cache is not None else load_bridge_cache(airsx_dir, cache_dir)
     if not cache:
         return stocks_data
 
@@ -0,0 +1,852 @@
+"""
+SVIP v1.0 — Walk-Forward Backtest Engine (财年滚动回测)
+
+从 financial_data / financial_data_annual 重建每个历史财年的时点输入，
+逐个调仓日跑 SVI → A1 → A2 → A3，并用调仓日价格计算下一持有期组合收益。
+
+时点规则：
+  - 财年 Y 的输入只使用 fiscal_year <= Y 的年报行（与加载器一样取最近 10 行）
+  - A股财年 Y 的调仓日为 Y+1 年 rebalance_day（默认 05-01，年报披露截止之后）
+    的第一个交易日，价格与市值取自 market_data 该日
+  - 美股 Compustat 只有财年末价格 prcc_f，财年 Y 的持有期取 prcc_f[Y+1] → prcc_f[Y+2]
+    （保守滞后一年，避免用财年末价格买入尚未披露的年报）
+
+全部指标以 (股票 × 财年) 二维数组计算；SVI 与 A2 对所有调仓日一次批量评分，
+只有通过硬筛选的股票才物化为 SVIPStock 进入 build_allocation。
+"""
+import logging
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.acceleration_engine import compute_acceleration_batch
+from src.airsx_bridge import enrich_batch
+from src.db_loader import field_expressions
+from src.instrumentation import tracer
+from src.models import MacroState, SVILevel, SVIPReport, SVIPStock, TailRiskResult
+from src.portfolio_engine import build_allocation
+from src.svi_engine import compute_svi_batch
+from src.valuation_engine import compute_valuation_batch
+
+logger = logging.getLogger(__name__)
+
+# 与加载器一致：ROIC/毛利率窗口 10 行，资本开支递减 8 行，A2 资本开支序列 5 行
+HISTORY_ROWS = 10
+DECLINE_ROWS = 8
+CAPEX_ROWS = 5
+# 估值分位至少需要的历史 PE 个数
+MIN_PE_HISTORY = 5
+
+DEFAULT_REBALANCE_DAY = "05-01"
+
+# 数据库没有的主观评估字段（与加载器默认值一致），可按代码用 ratings 覆盖
+RATING_DEFAULTS = {
+    "market_share": 0.0,
+    "cr4": 0.0,
+    "moat_rating": 50.0,
+    "demand_rigidity_rating": 50.0,
+    "substitution_risk_rating": 50.0,
+}
+
+
+# ===============================================================================
+# 面板 SQL
+# ===============================================================================
+
+CN_PANEL_COMPANIES_SQL = """
+    SELECT company_id AS k, stock_code AS symbol, company_name AS name,
+           industry_name AS sector
+    FROM companies
+"""
+
+US_PANEL_COMPANIES_SQL = """
+    SELECT gvkey AS k, tic AS symbol, conm AS name, '' AS sector
+    FROM companies
+"""
+
+CN_PANEL_FINANCIALS_SQL = """
+    SELECT f.company_id AS k, f.fiscal_year AS yr, {columns}
+    FROM financial_data f
+    WHERE f.fiscal_year IS NOT NULL
+      AND (f.report_period = 'Q4' OR f.report_period IS NULL
+           OR f.report_period LIKE '%1231')
+    ORDER BY f.company_id, f.fiscal_year
+"""
+
+US_PANEL_FINANCIALS_SQL = """
+    SELECT f.gvkey AS k, f.fyear AS yr, {columns}
+    FROM financial_data_annual f
+    WHERE f.fyear IS NOT NULL
+    ORDER BY f.gvkey, f.fyear
+"""
+
+# 全部报告期的 pe_ttm（与 CN_PE_HISTORY_SQL 一致，不限年报）
+CN_PANEL_PE_HISTORY_SQL = """
+    SELECT company_id AS k, fiscal_year AS yr, pe_ttm AS pe
+    FROM financial_data
+    WHERE pe_ttm IS NOT NULL AND pe_ttm > 0 AND fiscal_year IS NOT NULL
+"""
+
+# 每家公司每个日历年 rebalance_day 之后的第一个交易日（MIN 聚合取同行的裸列）
+CN_REBALANCE_PRICES_SQL = """
+    SELECT m.company_id AS k,
+           CAST(substr(m.trade_date, 1, 4) AS INTEGER) - 1 AS yr,
+           MIN(m.trade_date) AS trade_date, {columns}
+    FROM market_data m
+    WHERE substr(m.trade_date, 6, 5) >= ?
+    GROUP BY m.company_id, yr
+"""
+
+PANEL_FIELDS = {
+    "CN": {
+        "np": ("net_profit",),
+        "ta": ("total_assets",),
+        "tl": ("total_liabilities",),
+        "ocf": ("operating_cash_flow",),
+        "capex": ("capex",),
+        "fcf": ("free_cash_flow",),
+        "rev": ("revenue",),
+        "op": ("operating_profit",),
+    },
+    "US": {
+        "np": ("ni", "ib"),
+        "ta": ("at",),
+        "tl": ("lt",),
+        "ocf": ("oancf",),
+        "capex": ("capx",),
+        "rev": ("revt", "sale"),
+        "op": ("oiadp", "oibdp"),
+        "price": ("prcc_f",),
+        "shares": ("csho",),
+        "eps": ("epsfi",),
+    },
+}
+
+
+# ===============================================================================
+# 数据结构
+# ===============================================================================
+
+@dataclass
+class AnnualPanel:
+    """
+    单个市场的 (股票 × 财年) 年报面板
+
+    fields 中每个数组为 (N, T)，缺失为 NaN；present 标记该财年是否有年报行。
+    prices[:, t] 为财年 years[t] 调仓日的价格（A股无 close 列时为总市值）。
+    """
+    market: str
+    keys: List[Any]
+    symbols: np.ndarray
+    names: np.ndarray
+    sectors: np.ndarray
+    years: np.ndarray
+    present: np.ndarray
+    fields: Dict[str, np.ndarray]
+    prices: np.ndarray
+    market_cap: np.ndarray
+    market_pe: np.ndarray
+    rebalance_dates: List[str]
+    # A股全部报告期 pe_ttm：(股票下标, 财年, PE)
+    pe_history: Tuple[np.ndarray, np.ndarray, np.ndarray] = field(
+        default_factory=lambda: _pe_history([])
+    )
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.present.shape
+
+    def year_index(self, year: int) -> int:
+        matches = np.nonzero(self.years == year)[0]
+        if not len(matches):
+            raise KeyError(f"面板中没有财年 {year}")
+        return int(matches[0])
+
+
+@dataclass
+class PointInTimeInputs:
+    """每个 (股票, 财年) 的时点指标，形状均为 (N, T)；capex 为 (N, T, CAPEX_ROWS)"""
+    roic_10y_median: np.ndarray
+    fcf_conversion: np.ndarray
+    gross_margin_std: np.ndarray
+    debt_to_equity: np.ndarray
+    reinvestment_declining_years: np.ndarray
+    fcf_yield: np.ndarray
+    pe_ratio: np.ndarray
+    growth_rate: np.ndarray
+    valuation_percentile: np.ndarray
+    capex: np.ndarray
+    capex_lengths: np.ndarray
+
+
+@dataclass
+class BacktestResult:
+    """
+    回测结果
+
+    第 p 行对应一个调仓日：weights 为调仓后的目标权重，asset_returns 为
+    下一持有期的个股收益（缺失价格记 0），其余为组合层面的逐期序列。
+    """
+    market: str
+    fiscal_years: np.ndarray
+    rebalance_dates: List[str]
+    symbols: np.ndarray
+    weights: np.ndarray
+    asset_returns: np.ndarray
+    portfolio_returns: np.ndarray
+    benchmark_returns: np.ndarray
+    turnover: np.ndarray
+    cash_weight: np.ndarray
+    n_universe: np.ndarray
+    n_passed: np.ndarray
+    n_core: np.ndarray
+    n_watch: np.ndarray
+    violations: List[List[str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.fiscal_years)
+
+    @property
+    def equity_curve(self) -> np.ndarray:
+        return np.cumprod(1.0 + self.portfolio_returns)
+
+    @property
+    def benchmark_curve(self) -> np.ndarray:
+        return np.cumprod(1.0 + self.benchmark_returns)
+
+    def holdings(self, p: int, top: int = 10) -> List[Tuple[str, float]]:
+        """第 p 期权重最大的 top 只持仓"""
+        order = np.argsort(-self.weights[p], kind="stable")[:top]
+        return [
+            (str(self.symbols[i]), float(self.weights[p, i]))
+            for i in order if self.weights[p, i] > 0
+        ]
+
+    def summary(self) -> Dict[str, float]:
+        """累计/年化收益、波动、最大回撤、平均换手（每期为一年）"""
+        periods = len(self)
+        if periods == 0:
+            return {"periods": 0}
+        curve = self.equity_curve
+        drawdown = 1.0 - curve / np.maximum.accumulate(np.concatenate(([1.0], curve)))[1:]
+        total = float(curve[-1] - 1.0)
+        benchmark = float(self.benchmark_curve[-1] - 1.0)
+        return {
+            "periods": periods,
+            "total_return": total,
+            "annualized_return": float(curve[-1] ** (1.0 / periods) - 1.0),
+            "volatility": float(np.std(self.portfolio_returns)),
+            "max_drawdown": float(drawdown.max()),
+            "benchmark_total_return": benchmark,
+            "excess_return": total - benchmark,
+            "avg_turnover": float(self.turnover.mean()),
+            "avg_cash": float(self.cash_weight.mean()),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON 可序列化的逐期结果与汇总"""
+        return {
+            "market": self.market,
+            "summary": self.summary(),
+            "periods": [
+                {
+                    "fiscal_year": int(self.fiscal_years[p]),
+                    "rebalance_date": self.rebalance_dates[p],
+                    "portfolio_return": float(self.portfolio_returns[p]),
+                    "benchmark_return": float(self.benchmark_returns[p]),
+                    "turnover": float(self.turnover[p]),
+                    "cash_weight": float(self.cash_weight[p]),
+                    "n_universe": int(self.n_universe[p]),
+                    "n_passed": int(self.n_passed[p]),
+                    "n_core": int(self.n_core[p]),
+                    "n_watch": int(self.n_watch[p]),
+                    "holdings": self.holdings(p),
+                    "violations": self.violations[p] if p < len(self.violations) else [],
+                }
+                for p in range(len(self))
+            ],
+        }
+
+
+# ===============================================================================
+# 面板加载
+# ===============================================================================
+
+def _columns(conn: sqlite3.Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def load_annual_panel(
+    conn: sqlite3.Connection,
+    market: str,
+    symbols: Optional[Sequence[str]] = None,
+    rebalance_day: str = DEFAULT_REBALANCE_DAY,
+) -> AnnualPanel:
+    """
+    一次扫描读出整个市场的年报面板（及 A股调仓日行情）。
+
+    Args:
+        conn: 对应市场的数据库连接
+        market: "CN" 或 "US"
+        symbols: 只保留这些代码（美股不区分大小写）；None 为全部公司
+        rebalance_day: A股调仓日 MM-DD
+    """
+    if market not in PANEL_FIELDS:
+        raise ValueError(f"不支持的回测市场: {market}")
+
+    with tracer.span("panel_load"):
+        companies_sql = CN_PANEL_COMPANIES_SQL if market == "CN" else US_PANEL_COMPANIES_SQL
+        companies = [tuple(r) for r in conn.execute(companies_sql)]
+        if symbols is not None:
+            if market == "US":
+                wanted = {s.upper() for s in symbols}
+                companies = [c for c in companies if c[1] and c[1].upper() in wanted]
+            else:
+                wanted = set(symbols)
+                companies = [c for c in companies if c[1] in wanted]
+
+        table = "financial_data" if market == "CN" else "financial_data_annual"
+        sql = CN_PANEL_FINANCIALS_SQL if market == "CN" else US_PANEL_FINANCIALS_SQL
+        names = list(PANEL_FIELDS[market])
+        columns = field_expressions(conn, table, PANEL_FIELDS[market])
+        rows = [tuple(r) for r in conn.execute(sql.format(columns=", ".join(columns)))]
+        tracer.count("rows", len(rows))
+
+        key_index = {c[0]: i for i, c in enumerate(companies)}
+        rows = [r for r in rows if r[0] in key_index]
+        years = np.array(sorted({int(r[1]) for r in rows}), dtype=np.int64)
+        year_index = {int(y): t for t, y in enumerate(years)}
+        n, periods = len(companies), len(years)
+
+        present = np.zeros((n, periods), dtype=bool)
+        fields = {name: np.full((n, periods), np.nan) for name in names}
+        if rows:
+            ii = np.fromiter((key_index[r[0]] for r in rows), dtype=np.int64, count=len(rows))
+            tt = np.fromiter((year_index[int(r[1])] for r in rows), dtype=np.int64, count=len(rows))
+            values = np.array([r[2:] for r in rows], dtype=float)
+            # 同一财年多条年报时取最后一条
+            present[ii, tt] = True
+            for j, name in enumerate(names):
+                fields[name][ii, tt] = values[:, j]
+
+        prices = np.full((n, periods), np.nan)
+        market_cap = np.full((n, periods), np.nan)
+        market_pe = np.full((n, periods), np.nan)
+        pe_history = _pe_history([])
+        if market == "CN":
+            rebalance_dates = [f"{y + 1}-{rebalance_day}" for y in years]
+            if "market_data" in _table_names(conn) and periods:
+                _load_cn_prices(
+                    conn, rebalance_day, key_index, year_index, prices, market_cap, market_pe,
+                )
+            pe_history = _load_cn_pe_history(conn, key_index)
+        else:
+            # 财年 Y 的持有期起点为下一财年末价格（日期按日历年末近似）
+            rebalance_dates = [f"{y + 1}-12-31" for y in years]
+            prices[:, :-1] = fields["price"][:, 1:]
+
+    return AnnualPanel(
+        market=market,
+        keys=[c[0] for c in companies],
+        symbols=np.array([c[1] for c in companies], dtype=object),
+        names=np.array([c[2] or "" for c in companies], dtype=object),
+        sectors=np.array([c[3] or "" for c in companies], dtype=object),
+        years=years,
+        present=present,
+        fields=fields,
+        prices=prices,
+        market_cap=market_cap,
+        market_pe=market_pe,
+        rebalance_dates=rebalance_dates,
+        pe_history=pe_history,
+    )
+
+
+def _table_names(conn: sqlite3.Connection) -> set:
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def _load_cn_prices(
+    conn: sqlite3.Connection,
+    rebalance_day: str,
+    key_index: Dict[Any, int],
+    year_index: Dict[int, int],
+    prices: np.ndarray,
+    market_cap: np.ndarray,
+    market_pe: np.ndarray,
+) -> None:
+    """调仓日行情：有 close 列用收盘价，否则以总市值近似（不含分红、忽略股本变动）"""
+    existing = _columns(conn, "market_data")
+    price_column = ("close",) if "close" in existing else ("market_cap",)
+    columns = field_expressions(conn, "market_data", {
+        "price": price_column,
+        "mcap": ("market_cap",),
+        "pe": ("pe_ratio_ttm",),
+    }, alias="m")
+    rows = conn.execute(
+        CN_REBALANCE_PRICES_SQL.format(columns=", ".join(columns)), (rebalance_day,),
+    ).fetchall()
+    tracer.count("rows", len(rows))
+    for k, yr, _, price, mcap, pe in map(tuple, rows):
+        i = key_index.get(k)
+        t = year_index.get(yr)
+        if i is None or t is None:
+            continue
+        prices[i, t] = np.nan if price is None else price
+        market_cap[i, t] = np.nan if mcap is None else mcap
+        market_pe[i, t] = np.nan if pe is None else pe
+
+
+def _load_cn_pe_history(
+    conn: sqlite3.Connection,
+    key_index: Dict[Any, int],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rows = [
+        (key_index[k], yr, pe) for k, yr, pe in conn.execute(CN_PANEL_PE_HISTORY_SQL)
+        if k in key_index
+    ]
+    tracer.count("rows", len(rows))
+    return _pe_history(rows)
+
+
+def _pe_history(rows: List[Tuple[int, int, float]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(股票下标, 财年, PE) 行 → 三列数组"""
+    return (
+        np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)),
+        np.fromiter((int(r[1]) for r in rows), dtype=np.int64, count=len(rows)),
+        np.fromiter((r[2] for r in rows), dtype=float, count=len(rows)),
+    )
+
+
+# ===============================================================================
+# 时点指标
+# ===============================================================================
+
+def _truthy(a: np.ndarray) -> np.ndarray:
+    """对应 Python 的 bool(x)：非 NULL 且非 0"""
+    return np.isfinite(a) & (a != 0)
+
+
+def _row_windows(panel: AnnualPanel, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    每个 (股票, 财年) 截至该财年的最近 width 条年报行（最新在前）。
+
+    返回 (行下标 (N, T, width), 有效掩码)；年报行按财年压实，
+    跳过缺失财年，与加载器按行取 LIMIT 一致。
+    """
+    present = panel.present
+    order = np.argsort(~present, axis=1, kind="stable")       # 压实后第 r 行 → 财年下标
+    position = np.cumsum(present, axis=1) - 1                 # 财年 t 在压实序列中的行号
+    n, periods = present.shape
+    rows = position[:, :, None] - np.arange(width)[None, None, :]
+    valid = (rows >= 0) & present[:, :, None]
+    years = np.take_along_axis(order, np.clip(rows, 0, None).reshape(n, -1), axis=1)
+    return years.reshape(n, periods, width), valid
+
+
+def _gather(values: np.ndarray, years: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """按 _row_windows 的下标取值，无效位置为 NaN"""
+    n = values.shape[0]
+    out = values[np.arange(n)[:, None, None], years]
+    return np.where(valid, out, np.nan)
+
+
+def _nanmedian_sorted(values: np.ndarray) -> np.ndarray:
+    """最后一维的中位数（NaN 忽略，全部 NaN 时为 0）"""
+    count = np.isfinite(values).sum(axis=-1)
+    ordered = np.sort(values, axis=-1)                        # NaN 排在末尾
+    lo = np.clip((count - 1) // 2, 0, None)
+    hi = np.clip(count // 2, 0, None)
+    a = np.take_along_axis(ordered, lo[..., None], axis=-1)[..., 0]
+    b = np.take_along_axis(ordered, hi[..., None], axis=-1)[..., 0]
+    return np.where(count > 0, np.where(count % 2 == 1, a, (a + b) / 2), 0.0)
+
+
+def _declining_years(series: np.ndarray) -> np.ndarray:
+    """最新在前的资本开支序列中连续递减的年数"""
+    curr, prev = series[..., :-1], series[..., 1:]
+    step = np.isfinite(curr) & np.isfinite(prev) & (prev > 0) & (curr < prev)
+    return np.cumprod(step, axis=-1).sum(axis=-1)
+
+
+def _percentile_below(
+    history: np.ndarray,
+    valid: np.ndarray,
+    current: np.ndarray,
+) -> np.ndarray:
+    """current 在 history（最后一维，valid 掩码）中的分位；样本不足或 PE<=0 时 0.5"""
+    count = valid.sum(axis=-1)
+    below = (valid & (history <= current[..., None])).sum(axis=-1)
+    pct = np.round(below / np.maximum(count, 1), 3)
+    return np.where((count >= MIN_PE_HISTORY) & (current > 0), pct, 0.5)
+
+
+def point_in_time_inputs(panel: AnnualPanel) -> PointInTimeInputs:
+    """
+    全部 (股票, 财年) 的时点指标，公式与 db_loader 的 _calculate_* 一致。
+
+    加载器里会抛异常的缺失值（如 capex 为 NULL 时的 FCF）在这里记为 0，
+    效果同样是无法通过硬筛选。
+    """
+    f = panel.fields
+    market = panel.market
+    n, periods = panel.shape
+    idx = np.arange(n)[:, None]
+
+    with np.errstate(divide="ignore", invalid="ignore"), tracer.span("point_in_time"):
+        years, valid = _row_windows(panel, HISTORY_ROWS)
+
+        # ROIC 中位数
+        net, assets, liab = (_gather(f[c], years, valid) for c in ("np", "ta", "tl"))
+        invested = assets - liab
+        ok = _truthy(net) & _truthy(assets) & _truthy(liab) & (invested > 0)
+        roic = _nanmedian_sorted(np.where(ok, net / invested, np.nan))
+
+        # 毛利率波动（>= 3 个样本，总体标准差）
+        rev, op = _gather(f["rev"], years, valid), _gather(f["op"], years, valid)
+        margins = np.where(_truthy(rev) & _truthy(op) & (rev > 0), op / rev, np.nan)
+        m_count = np.isfinite(margins).sum(axis=-1)
+        m_mean = np.nansum(margins, axis=-1) / np.maximum(m_count, 1)
+        m_var = np.nansum((margins - m_mean[..., None]) ** 2, axis=-1) / np.maximum(m_count, 1)
+        margin_std = np.where(m_count >= 3, np.sqrt(m_var), 0.0)
+
+        # FCF 转化率与负债权益比（当年）
+        fcf = f["ocf"] - np.abs(f["capex"])
+        fcf_conversion = np.where(f["np"] > 0, fcf / f["np"], 0.0)
+        fcf_conversion = np.nan_to_num(fcf_conversion, nan=0.0, posinf=0.0, neginf=0.0)
+        equity = f["ta"] - f["tl"]
+        debt = np.where(
+            _truthy(f["ta"]) & (f["ta"] > 0),
+            np.where(equity > 0, f["tl"] / equity, 0.0), 0.0,
+        )
+        debt = np.nan_to_num(debt, nan=0.0)
+
+        # 资本开支：A股缺失时用 |OCF - FCF| 近似
+        capex_abs = np.abs(f["capex"])
+        if market == "CN":
+            proxy = np.where(
+                _truthy(f["ocf"]) & _truthy(f["fcf"]), np.abs(f["ocf"] - f["fcf"]), np.nan,
+            )
+            reinvest = np.where(np.isfinite(f["capex"]), capex_abs, proxy)
+            capex_values = np.where(_truthy(f["capex"]), capex_abs, proxy)
+        else:
+            reinvest = np.where(_truthy(f["capex"]), capex_abs, np.nan)
+            capex_values = reinvest
+        d_years, d_valid = years[..., :DECLINE_ROWS], valid[..., :DECLINE_ROWS]
+        declining = _declining_years(_gather(reinvest, d_years, d_valid))
+
+        # A2 资本开支序列：最近 CAPEX_ROWS 行中有值的部分，保持最新在前
+        series = _gather(capex_values, years[..., :CAPEX_ROWS], valid[..., :CAPEX_ROWS])
+        has = np.isfinite(series)
+        order = np.argsort(~has, axis=-1, kind="stable")
+        capex = np.nan_to_num(np.take_along_axis(series, order, axis=-1), nan=0.0)
+        capex_lengths = has.sum(axis=-1)
+
+        # 估值：FCF Yield、PE、营收 CAGR
+        fcf_pos = np.isfinite(fcf) & (fcf > 0)
+        if market == "CN":
+            mcap = panel.market_cap
+            has_market = np.isfinite(mcap) | np.isfinite(panel.market_pe)
+            pe = np.where(has_market, np.nan_to_num(panel.market_pe, nan=0.0), 0.0)
+        else:
+            price, shares, eps = f["price"], f["shares"], f["eps"]
+            mcap = np.where(_truthy(price) & _truthy(shares), price * shares, np.nan)
+            has_market = np.ones((n, periods), dtype=bool)
+            pe = np.where(_truthy(eps) & (eps > 0) & _truthy(price), price / eps, 0.0)
+        fcf_yield = np.where(
+            _truthy(mcap) & (mcap > 0) & fcf_pos & has_market, fcf / mcap, 0.0,
+        )
+
+        rev_now = _gather(f["rev"], years[..., :1], valid[..., :1])[..., 0]
+        rev_old = _gather(f["rev"], years[..., 2:3], valid[..., 2:3])[..., 0]
+        growth = np.where(
+            has_market & _truthy(rev_now) & _truthy(rev_old) & (rev_old > 0),
+            np.sqrt(rev_now / rev_old) - 1, 0.0,
+        )
+
+        # 估值分位：A股为截至当年的全部 pe_ttm，美股为窗口内 prcc_f / epsfi
+        if market == "CN":
+            c, y, v = panel.pe_history
+            below = np.zeros((n, periods))
+            count = np.zeros((n, periods))
+            if len(c):
+                seen = y[:, None] <= panel.years[None, :]                    # (E, T)
+                np.add.at(count, c, seen.astype(float))
+                np.add.at(below, c, (seen & (v[:, None] <= pe[c])).astype(float))
+            pct = np.round(below / np.maximum(count, 1), 3)
+            percentile = np.where((count >= MIN_PE_HISTORY) & (pe > 0), pct, 0.5)
+        else:
+            hist_price = _gather(f["price"], years, valid)
+            hist_eps = _gather(f["eps"], years, valid)
+            hist_ok = _truthy(hist_price) & _truthy(hist_eps) & (hist_eps > 0)
+            percentile = _percentile_below(hist_price / hist_eps, hist_ok, pe)
+
+    return PointInTimeInputs(
+        roic_10y_median=roic,
+        fcf_conversion=fcf_conversion,
+        gross_margin_std=margin_std,
+        debt_to_equity=debt,
+        reinvestment_declining_years=declining.astype(np.int64),
+        fcf_yield=fcf_yield,
+        pe_ratio=pe,
+        growth_rate=np.nan_to_num(growth, nan=0.0),
+        valuation_percentile=percentile,
+        capex=capex,
+        capex_lengths=capex_lengths.astype(np.int64),
+    )
+
+
+# ===============================================================================
+# 回测
+# ===============================================================================
+
+def run_backtest(
+    panel: AnnualPanel,
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+    themes: Optional[Dict[str, str]] = None,
+    ratings: Optional[Dict[str, Dict[str, float]]] = None,
+    macro_by_year: Optional[Dict[int, MacroState]] = None,
+    tail_risk_by_year: Optional[Dict[int, TailRiskResult]] = None,
+    snapshot_store=None,
+) -> BacktestResult:
+    """
+    财年滚动回测。
+
+    每个调仓财年：当年有年报行且调仓日有价格的股票进入股票池，
+    SVI → A1 → A2 → A3 构建目标权重（current_weight 为上一期权重随价格漂移后的值），
+    持有到下一个调仓日。缺失下一期价格的持仓收益记 0。
+
+    Args:
+        panel: load_annual_panel 的结果
+        start_year / end_year: 调仓财年区间（含），默认面板全部可交易财年
+        themes: 代码 → 慢变量主题桶
+        ratings: 代码 → RATING_DEFAULTS 中字段的覆盖值（各财年相同）
+        macro_by_year / tail_risk_by_year: 各财年的 A4 / A7 状态，缺省不修正仓位
+        snapshot_store: SnapshotStore，提供时每个调仓日追加一份快照
+    """
+    themes = themes or {}
+    macro_by_year = macro_by_year or {}
+    tail_risk_by_year = tail_risk_by_year or {}
+    market = panel.market
+    n, periods = panel.shape
+
+    # 可调仓财年：区间内、且本期与下期都有价格
+    tradable = np.isfinite(panel.prices).any(axis=0)
+    steps = [
+        t for t in range(periods - 1)
+        if tradable[t] and tradable[t + 1]
+        and (start_year is None or panel.years[t] >= start_year)
+        and (end_year is None or panel.years[t] <= end_year)
+    ]
+    inputs = point_in_time_inputs(panel)
+
+    # 股票池 (调仓期, 股票)
+    universe = panel.present[:, steps].T & np.isfinite(panel.prices[:, steps]).T
+    pp, ii = np.nonzero(universe)
+    tt = np.asarray(steps, dtype=np.int64)[pp]
+
+    # SVI：全部调仓日一次批量评分
+    with tracer.span("svi"):
+        subjective = rating_columns(panel.symbols, ratings)
+        svi = compute_svi_batch(
+            panel.symbols[ii], market,
+            roic_10y_median=inputs.roic_10y_median[ii, tt],
+            fcf_conversion=inputs.fcf_conversion[ii, tt],
+            gross_margin_std=inputs.gross_margin_std[ii, tt],
+            debt_to_equity=inputs.debt_to_equity[ii, tt],
+            **{name: column[ii] for name, column in subjective.items()},
+        )
+    passed = np.nonzero(svi.passed_hard_screen)[0]
+
+    # A2：通过硬筛选的行批量检测
+    with tracer.span("acceleration"):
+        rows_ii, rows_tt = ii[passed], tt[passed]
+        accel = compute_acceleration_batch(
+            panel.symbols[rows_ii],
+            np.array([themes.get(s, "") for s in panel.symbols[rows_ii]], dtype=object),
+            capex=(inputs.capex[rows_ii, rows_tt], inputs.capex_lengths[rows_ii, rows_tt]),
+        )
+
+    # A1：通过硬筛选的行批量估值
+    with tracer.span("valuation"):
+        valuation = compute_valuation_batch(
+            panel.symbols[rows_ii],
+            fcf_yield=inputs.fcf_yield[rows_ii, rows_tt],
+            pe_ratio=inputs.pe_ratio[rows_ii, rows_tt],
+            growth_rate=inputs.growth_rate[rows_ii, rows_tt],
+            svi_score=svi.total[passed],
+            valuation_percentile=inputs.valuation_percentile[rows_ii, rows_tt],
+            reinvestment_declining_years=inputs.reinvestment_declining_years[rows_ii, rows_tt],
+        )
+
+    weights = np.zeros((len(steps), n))
+    cash = np.zeros(len(steps))
+    n_passed = np.zeros(len(steps), dtype=np.int64)
+    n_core = np.zeros(len(steps), dtype=np.int64)
+    n_watch = np.zeros(len(steps), dtype=np.int64)
+    violations: List[List[str]] = []
+    drifted = np.zeros(n)
+    returns = np.zeros((len(steps), n))
+    turnover = np.zeros(len(steps))
+    portfolio = np.zeros(len(steps))
+    benchmark = np.zeros(len(steps))
+
+    # 个股持有期收益
+    for p, t in enumerate(steps):
+        start, end = panel.prices[:, t], panel.prices[:, t + 1]
+        ok = np.isfinite(start) & np.isfinite(end) & (start > 0)
+        returns[p] = np.where(ok, end / np.where(ok, start, 1.0) - 1.0, 0.0)
+
+    bounds = np.searchsorted(pp[passed], np.arange(len(steps) + 1))
+    for p, t in enumerate(steps):
+        year = int(panel.years[t])
+        with tracer.span("rebalance"):
+            stocks = []
+            index = []
+            for k in range(bounds[p], bounds[p + 1]):
+                row = passed[k]
+                i = ii[row]
+                symbol = panel.symbols[i]
+                svi_score = svi.to_score(row)
+                stocks.append(SVIPStock(
+                    symbol=symbol,
+                    name=panel.names[i],
+                    market=market,
+                    sector=panel.sectors[i],
+                    theme=themes.get(symbol, ""),
+                    svi=svi_score,
+                    valuation=valuation.to_result(k),
+                    acceleration=accel.to_result(k),
+                    current_weight=float(drifted[i]),
+                ))
+                index.append(i)
+
+            allocation = build_allocation(
+                stocks, macro_by_year.get(year), tail_risk_by_year.get(year), market,
+            )
+            for s, i in zip(stocks, index):
+                weights[p, i] = s.target_weight
+
+        n_passed[p] = len(stocks)
+        n_core[p] = sum(1 for s in stocks if s.pool == SVILevel.CORE)
+        n_watch[p] = sum(1 for s in stocks if s.pool == SVILevel.WATCH)
+        cash[p] = 1.0 - weights[p].sum()
+        violations.append(list(allocation.violations))
+        turnover[p] = 0.5 * np.abs(weights[p] - drifted).sum()
+
+        portfolio[p] = weights[p] @ returns[p]
+        members = universe[p]
+        benchmark[p] = returns[p, members].mean() if members.any() else 0.0
+        grown = weights[p] * (1.0 + returns[p])
+        drifted = grown / (1.0 + portfolio[p]) if portfolio[p] > -1.0 else np.zeros(n)
+
+        if snapshot_store is not None:
+            snapshot_store.record(
+                _snapshot_report(allocation, market, panel.rebalance_dates[t]),
+                run_date=panel.rebalance_dates[t],
+            )
+
+    tracer.count("backtest_periods", len(steps))
+    logger.info(f"回测完成: {market} {len(steps)} 期, 股票池 {n} 家")
+    return BacktestResult(
+        market=market,
+        fiscal_years=panel.years[steps],
+        rebalance_dates=[panel.rebalance_dates[t] for t in steps],
+        symbols=panel.symbols,
+        weights=weights,
+        asset_returns=returns,
+        portfolio_returns=portfolio,
+        benchmark_returns=benchmark,
+        turnover=turnover,
+        cash_weight=cash,
+        n_universe=universe.sum(axis=1),
+        n_passed=n_passed,
+        n_core=n_core,
+        n_watch=n_watch,
+        violations=violations,
+    )
+
+
+def rating_columns(
+    symbols: np.ndarray,
+    ratings: Optional[Dict[str, Dict[str, float]]] = None,
+) -> Dict[str, np.ndarray]:
+    """主观评估字段列（默认值 + ratings 覆盖）"""
+    ratings = ratings or {}
+    columns = {name: np.full(len(symbols), default) for name, default in RATING_DEFAULTS.items()}
+    for i, symbol in enumerate(symbols):
+        for name, value in ratings.get(symbol, {}).items():
+            if name in columns:
+                columns[name][i] = value
+    return columns
+
+
+def airsx_ratings(panel: AnnualPanel, airsx_dir: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """
+    用 AIRS-X 桥接补充主观评估，返回 run_backtest 的 ratings。
+
+    AIRS-X 只有当前评级，回测各财年使用同一组值；行业为空时同时补充 panel.sectors。
+    """
+    stocks_data = enrich_batch([
+        {
+            "symbol": symbol,
+            "sector": sector,
+            "financials": {name: RATING_DEFAULTS[name] for name in RATING_DEFAULTS},
+        }
+        for symbol, sector in zip(panel.symbols, panel.sectors)
+    ], airsx_dir)
+    ratings = {}
+    for i, item in enumerate(stocks_data):
+        changed = {
+            name: value for name, value in item["financials"].items()
+            if value != RATING_DEFAULTS[name]
+        }
+        if changed:
+            ratings[item["symbol"]] = changed
+        if not panel.sectors[i] and item.get("sector"):
+            panel.sectors[i] = item["sector"]
+    return ratings
+
+
+def _snapshot_report(allocation, market: str, rebalance_date: str) -> SVIPReport:
+    """调仓结果包装为 SVIPReport（供 SnapshotStore 记录）"""
+    return SVIPReport(
+        timestamp=datetime.strptime(rebalance_date, "%Y-%m-%d"),
+        market=market,
+        core_pool=[s for s in allocation.stocks if s.pool == SVILevel.CORE],
+        watch_pool=[s for s in allocation.stocks if s.pool == SVILevel.WATCH],
+        allocation=allocation,
+        macro=allocation.macro,
+        tail_risk=allocation.tail_risk,
+    )
+
+
+def format_backtest_report(result: BacktestResult) -> str:
+    """逐期收益与汇总的文本表格"""
+    lines = [
+        f"{'财年':>6}  {'调仓日':<12}{'股票池':>8}{'通过':>6}{'核心':>6}{'观察':>6}"
+        f"{'现金':>8}{'换手':>8}{'组合':>9}{'基准':>9}",
+    ]
+    for p in range(len(result)):
+        lines.append(
+            f"{int(result.fiscal_years[p]):>6}  {result.rebalance_dates[p]:<12}"
+            f"{int(result.n_universe[p]):>8}{int(result.n_passed[p]):>6}"
+            f"{int(result.n_core[p]):>6}{int(result.n_watch[p]):>6}"
+            f"{result.cash_weight[p]:>8.1%}{result.turnover[p]:>8.1%}"
+            f"{result.portfolio_returns[p]:>9.2%}{result.benchmark_returns[p]:>9.2%}"
+        )
+    summary = result.summary()
+    if summary["periods"]:
+        lines.append("")
+        lines.append(
+            f"累计 {summary['total_return']:.2%}（基准 {summary['benchmark_total_return']:.2%}）"
+            f"  年化 {summary['annualized_return']:.2%}"
+            f"  波动 {summary['volatility']:.2%}"
+            f"  最大回撤 {summary['max_drawdown']:.2%}"
+            f"  平均换手 {summary['avg_turnover']:.1%}"
+        )
+    return "\n".join(lines)
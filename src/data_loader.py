@@ -2,41 +2,125 @@
 SVIP v1.0 — Data Loader
 
 加载并校验 slow_variables.yaml 和 theme_buckets.yaml。
-提供主题桶验证和慢变量代理指标查询。
+提供主题桶验证和慢变量代理指标查询，以及股票输入的校验与流式读取。
+
+配置文件按 (路径, mtime, 大小) 缓存：文件未变化时直接复用解析结果与
+预建索引（有效主题集合、主题 → 代理指标），文件被修改后下次访问自动重新解析。
 """
+import json
 import os
 import yaml
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+# libyaml 可用时用 C 实现解析（语义与 SafeLoader 相同）
+_SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
 def load_yaml(path: str) -> dict:
     """加载 YAML 文件"""
     with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+        return yaml.load(f, Loader=_SafeLoader) or {}
+
+
+# ===============================================================================
+# 缓存
+# ===============================================================================
+
+@dataclass
+class _CacheEntry:
+    """一个文件的解析结果与按需构建的索引"""
+    stamp: Tuple[int, int]                       # (mtime_ns, size)
+    data: dict
+    indexes: Dict[str, Any] = field(default_factory=dict)
+
+
+_CACHE: Dict[str, _CacheEntry] = {}
+
+
+def _entry(path: str) -> Optional[_CacheEntry]:
+    """取文件的缓存项；文件不存在返回 None，mtime 或大小变化时重新解析"""
+    path = os.path.abspath(path)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        _CACHE.pop(path, None)
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    entry = _CACHE.get(path)
+    if entry is None or entry.stamp != stamp:
+        entry = _CacheEntry(stamp=stamp, data=load_yaml(path))
+        _CACHE[path] = entry
+    return entry
+
+
+def _index(path: str, name: str, build: Callable[[dict], Any], default: Any) -> Any:
+    """文件的派生索引：同一版本的文件只构建一次"""
+    entry = _entry(path)
+    if entry is None:
+        return default
+    if name not in entry.indexes:
+        entry.indexes[name] = build(entry.data)
+    return entry.indexes[name]
+
+
+def load_yaml_cached(path: str) -> dict:
+    """
+    带缓存的 load_yaml（文件不存在返回空字典）。
+
+    返回的是缓存对象，调用方不要修改。
+    """
+    entry = _entry(path)
+    return entry.data if entry is not None else {}
+
+
+def clear_yaml_cache(path: Optional[str] = None) -> None:
+    """清除缓存（path 为 None 时清除全部）"""
+    if path is None:
+        _CACHE.clear()
+    else:
+        _CACHE.pop(os.path.abspath(path), None)
+
+
+# ===============================================================================
+# 主题桶与慢变量
+# ===============================================================================
+
+def _theme_buckets_path(data_dir: str) -> str:
+    return os.path.join(data_dir, "theme_buckets.yaml")
+
+
+def _slow_variables_path(data_dir: str) -> str:
+    return os.path.join(data_dir, "slow_variables.yaml")
 
 
 def load_theme_buckets(data_dir: str) -> Dict[str, dict]:
-    """加载主题桶定义"""
-    path = os.path.join(data_dir, "theme_buckets.yaml")
-    if not os.path.exists(path):
-        return {}
-    data = load_yaml(path)
-    return data.get("theme_buckets", {})
+    """加载主题桶定义（缓存对象，不要修改）"""
+    return load_yaml_cached(_theme_buckets_path(data_dir)).get("theme_buckets", {})
 
 
 def load_slow_variables(data_dir: str) -> List[dict]:
-    """加载慢变量清单"""
-    path = os.path.join(data_dir, "slow_variables.yaml")
-    if not os.path.exists(path):
-        return []
-    data = load_yaml(path)
-    return data.get("slow_variables", [])
+    """加载慢变量清单（缓存对象，不要修改）"""
+    return load_yaml_cached(_slow_variables_path(data_dir)).get("slow_variables", [])
 
 
-def get_valid_themes(data_dir: str) -> set:
+def get_valid_themes(data_dir: str) -> FrozenSet[str]:
     """获取所有有效主题桶名称"""
-    buckets = load_theme_buckets(data_dir)
-    return set(buckets.keys())
+    return _index(
+        _theme_buckets_path(data_dir),
+        "valid_themes",
+        lambda data: frozenset(data.get("theme_buckets", {})),
+        frozenset(),
+    )
+
+
+def _build_proxy_index(data: dict) -> Dict[str, List[str]]:
+    # 同一主题出现多次时取第一条（与逐条查找一致）
+    index: Dict[str, List[str]] = {}
+    for sv in data.get("slow_variables", []):
+        index.setdefault(sv.get("theme"), sv.get("proxy_indicators", []))
+    return index
 
 
 def validate_stock_themes(
@@ -52,21 +136,110 @@ def validate_stock_themes(
         return []
 
     warnings = []
+    valid_list = None
     for item in stocks_data:
         theme = item.get("theme", "")
-        symbol = item.get("symbol", "UNKNOWN")
         if theme and theme not in valid_themes:
+            if valid_list is None:
+                valid_list = ", ".join(sorted(valid_themes))
+            symbol = item.get("symbol", "UNKNOWN")
             warnings.append(
                 f"{symbol}: theme '{theme}' 不在已定义的主题桶中。"
-                f"有效主题: {', '.join(sorted(valid_themes))}"
+                f"有效主题: {valid_list}"
             )
     return warnings
 
 
 def get_proxy_indicators(data_dir: str, theme: str) -> List[str]:
     """获取指定主题的慢变量代理指标"""
-    sv_list = load_slow_variables(data_dir)
-    for sv in sv_list:
-        if sv.get("theme") == theme:
-            return sv.get("proxy_indicators", [])
-    return []
+    index = _index(_slow_variables_path(data_dir), "proxy_indicators", _build_proxy_index, {})
+    return index.get(theme, [])
+
+
+# ===============================================================================
+# 股票输入
+# ===============================================================================
+
+def validate_stock_data(item: dict) -> List[str]:
+    """校验单只股票输入数据，返回警告列表"""
+    warnings = []
+    symbol = item.get("symbol", "UNKNOWN")
+    fin = item.get("financials", {})
+    val = item.get("valuation", {})
+
+    # 财务数据范围检查
+    roic = fin.get("roic_10y_median", 0)
+    if not (-0.5 <= roic <= 1.0):
+        warnings.append(f"{symbol}: roic_10y_median={roic} 超出合理范围 [-0.5, 1.0]")
+
+    fcf = fin.get("fcf_conversion", 0)
+    if not (-1.0 <= fcf <= 3.0):
+        warnings.append(f"{symbol}: fcf_conversion={fcf} 超出合理范围 [-1.0, 3.0]")
+
+    gm_std = fin.get("gross_margin_std", 0)
+    if not (0 <= gm_std <= 1.0):
+        warnings.append(f"{symbol}: gross_margin_std={gm_std} 超出合理范围 [0, 1.0]")
+
+    # 估值数据范围检查
+    fcf_yield = val.get("fcf_yield", 0)
+    if not (-0.5 <= fcf_yield <= 1.0):
+        warnings.append(f"{symbol}: fcf_yield={fcf_yield} 超出合理范围 [-0.5, 1.0]")
+
+    pe = val.get("pe_ratio", 0)
+    if pe < 0:
+        warnings.append(f"{symbol}: pe_ratio={pe} 为负值")
+
+    growth = val.get("growth_rate", 0)
+    if not (-1.0 <= growth <= 5.0):
+        warnings.append(f"{symbol}: growth_rate={growth} 超出合理范围 [-1.0, 5.0]")
+
+    return warnings
+
+
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+
+
+def _records_from_document(doc: Any) -> Iterator[dict]:
+    # 单文档 {stocks: [...]}（原格式）、股票列表或单只股票
+    if doc is None:
+        return
+    if isinstance(doc, dict) and "stocks" in doc:
+        doc = doc["stocks"] or []
+    if isinstance(doc, dict):
+        yield doc
+    else:
+        yield from doc
+
+
+def iter_stock_records(path: str) -> Iterator[dict]:
+    """
+    逐条读取股票输入（生成器，不整体载入文件）。
+
+    - .jsonl / .ndjson：每行一个 JSON 对象（空行跳过）
+    - YAML：多文档流（`---` 分隔，每个文档一只股票），也兼容单文档 `stocks:` 列表
+      （此时该文档整体解析）
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.lower().endswith(JSONL_SUFFIXES):
+            for lineno, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{lineno}: 无效的 JSON 记录: {e.msg}") from e
+        else:
+            for doc in yaml.load_all(f, Loader=_SafeLoader):
+                yield from _records_from_document(doc)
+
+
+def iter_chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """按 size 切块（最后一块可能不足 size）"""
+    if size < 1:
+        raise ValueError(f"chunk size 必须为正整数: {size}")
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
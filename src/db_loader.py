@@ -11,16 +11,313 @@ from pathlib import Path
 from dataclasses import dataclass
 import logging
 
+from config.settings import settings, SVIConfig
 from src.models import SVIPStock, Market
+from src.metrics_cache import DerivedMetricsCache, metrics_fingerprint
+from src.instrumentation import tracer
 
 logger = logging.getLogger(__name__)
 
+# 批量查询时每块 IN (...) 的参数个数（低于 SQLite 默认变量上限 999）
+BULK_CHUNK_SIZE = 500
+
+
+def _chunked(items: List[Any], size: int = BULK_CHUNK_SIZE):
+    """按固定大小切分列表"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _placeholders(n: int) -> str:
+    return ", ".join("?" * n)
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> set:
+    """表的实际列名"""
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def field_expressions(
+    conn: sqlite3.Connection,
+    table: str,
+    fields: Dict[str, Tuple[str, ...]],
+    alias: str = "f",
+) -> List[str]:
+    """
+    字段 → 候选列 映射渲染为 "表达式 AS 字段" 列表
+    
+    多个候选列时取第一个非零值（对应 Python 的 a or b），
+    表中不存在的候选列跳过，全部不存在时为 NULL。
+    """
+    existing = table_columns(conn, table)
+    columns = []
+    for name, candidates in fields.items():
+        present = [f'{alias}."{col}"' for col in candidates if col in existing]
+        if not present:
+            expr = "NULL"
+        elif len(present) == 1:
+            expr = present[0]
+        else:
+            whens = " ".join(f"WHEN {col} != 0 THEN {col}" for col in present[:-1])
+            expr = f"CASE {whens} ELSE {present[-1]} END"
+        columns.append(f"{expr} AS {name}")
+    return columns
+
+
+def _record_query(n_rows: int) -> None:
+    """累计 SQL 查询数与取回行数"""
+    tracer.count("queries")
+    tracer.count("rows", n_rows)
+
+
+# ===============================================================================
+# 加载器 SQL（db_optimizer 据此做 EXPLAIN QUERY PLAN 与索引建议）
+# 批量模板中 {values} 展开为 VALUES (?), ...，{ids} 展开为 IN (...) 占位符
+# ===============================================================================
+
+CN_COMPANY_SQL = "SELECT * FROM companies WHERE stock_code = ?"
+
+CN_FINANCIALS_SQL = """
+    SELECT * FROM financial_data
+    WHERE company_id = ?
+      AND (report_period = 'Q4' OR report_period IS NULL
+           OR report_period LIKE '%%1231')
+    ORDER BY fiscal_year DESC
+    LIMIT ?
+"""
+
+CN_MARKET_DATA_SQL = """
+    SELECT * FROM market_data
+    WHERE company_id = ?
+    ORDER BY trade_date DESC
+    LIMIT 1
+"""
+
+CN_PE_HISTORY_SQL = """
+    SELECT pe_ttm FROM financial_data
+    WHERE company_id = ? AND pe_ttm IS NOT NULL AND pe_ttm > 0
+    ORDER BY fiscal_year
+"""
+
+CN_BULK_COMPANIES_SQL = """
+    WITH req(code) AS (VALUES {values})
+    SELECT req.code AS _svip_key, c.*
+    FROM req JOIN companies c ON c.stock_code = req.code
+"""
+
+CN_BULK_FINANCIALS_SQL = """
+    SELECT * FROM (
+        SELECT f.*, ROW_NUMBER() OVER (
+            PARTITION BY f.company_id ORDER BY f.fiscal_year DESC
+        ) AS _svip_rn
+        FROM financial_data f
+        WHERE f.company_id IN ({ids})
+          AND (f.report_period = 'Q4' OR f.report_period IS NULL
+               OR f.report_period LIKE '%%1231')
+    )
+    WHERE _svip_rn <= ?
+    ORDER BY company_id, _svip_rn
+"""
+
+CN_BULK_MARKET_DATA_SQL = """
+    SELECT * FROM (
+        SELECT m.*, ROW_NUMBER() OVER (
+            PARTITION BY m.company_id ORDER BY m.trade_date DESC
+        ) AS _svip_rn
+        FROM market_data m
+        WHERE m.company_id IN ({ids})
+    )
+    WHERE _svip_rn = 1
+"""
+
+CN_BULK_PE_HISTORY_SQL = """
+    SELECT company_id, pe_ttm FROM financial_data
+    WHERE company_id IN ({ids}) AND pe_ttm IS NOT NULL AND pe_ttm > 0
+    ORDER BY company_id, fiscal_year
+"""
+
+US_COMPANY_SQL = "SELECT * FROM companies WHERE UPPER(tic) = ? LIMIT 1"
+
+US_FINANCIALS_SQL = """
+    SELECT * FROM financial_data_annual
+    WHERE gvkey = ?
+    ORDER BY fyear DESC
+    LIMIT ?
+"""
+
+US_BULK_COMPANIES_SQL = """
+    WITH req(code) AS (VALUES {values})
+    SELECT req.code AS _svip_key, c.*
+    FROM req JOIN companies c ON UPPER(c.tic) = req.code
+"""
+
+US_BULK_FINANCIALS_SQL = """
+    SELECT * FROM (
+        SELECT f.*, ROW_NUMBER() OVER (
+            PARTITION BY f.gvkey ORDER BY f.fyear DESC
+        ) AS _svip_rn
+        FROM financial_data_annual f
+        WHERE f.gvkey IN ({ids})
+    )
+    WHERE _svip_rn <= ?
+    ORDER BY gvkey, _svip_rn
+"""
+
+# 硬筛选预筛：在 SQL 中一次算出全部公司的 ROIC 中位数、FCF 转化率、
+# 利润率方差与负债率，口径与 _calculate_* 一致。
+# {columns} 由 PRESCREEN_FIELDS 按实际表结构展开为 np/ta/tl/ocf/capex/rev/op，
+# {{ids}} 在执行时展开为 IN (...) 占位符。
+# n_same > 1 表示同一财年有多条年报，取数顺序不确定，由调用方直接放行。
+PRESCREEN_SQL = """
+    WITH annual AS (
+        SELECT * FROM (
+            SELECT f.{key} AS k, {columns},
+                   ROW_NUMBER() OVER (PARTITION BY f.{key} ORDER BY f.{year} DESC) AS rn,
+                   COUNT(*) OVER (PARTITION BY f.{key}, f.{year}) AS n_same
+            FROM {table} f
+            WHERE f.{key} IN ({{ids}}){where}
+        )
+        WHERE rn <= ?
+    ),
+    roic AS (
+        SELECT k, np * 1.0 / (ta - tl) AS v FROM annual
+        WHERE np != 0 AND ta != 0 AND tl != 0 AND ta - tl > 0
+    ),
+    roic_ranked AS (
+        SELECT k, v,
+               ROW_NUMBER() OVER (PARTITION BY k ORDER BY v) AS i,
+               COUNT(*) OVER (PARTITION BY k) AS n
+        FROM roic
+    ),
+    roic_median AS (
+        SELECT k, AVG(v) AS v FROM roic_ranked
+        WHERE i IN ((n + 1) / 2, (n + 2) / 2)
+        GROUP BY k
+    ),
+    margins AS (
+        SELECT k, COUNT(*) AS n, AVG(m) AS mean, AVG(m * m) AS mean_sq
+        FROM (SELECT k, op * 1.0 / rev AS m FROM annual WHERE rev > 0 AND op != 0)
+        GROUP BY k
+    ),
+    ties AS (
+        SELECT k, MAX(n_same) AS n_same FROM annual GROUP BY k
+    )
+    SELECT a.k AS company_key,
+           t.n_same > 1 AS ambiguous,
+           COALESCE(r.v, 0.0) AS roic_10y_median,
+           CASE WHEN a.np > 0 THEN (a.ocf - ABS(a.capex)) * 1.0 / a.np
+                ELSE 0.0 END AS fcf_conversion,
+           CASE WHEN m.n >= 3 THEN m.mean_sq - m.mean * m.mean
+                ELSE 0.0 END AS margin_variance,
+           COALESCE(m.mean_sq, 0.0) AS margin_scale,
+           CASE WHEN a.ta > 0 AND a.ta - a.tl > 0 THEN a.tl * 1.0 / (a.ta - a.tl)
+                ELSE 0.0 END AS debt_to_equity
+    FROM annual a
+    JOIN ties t ON t.k = a.k
+    LEFT JOIN roic_median r ON r.k = a.k
+    LEFT JOIN margins m ON m.k = a.k
+    WHERE a.rn = 1
+"""
+
+# 预筛数据源：(年报表, 公司键, 年份列, 附加过滤)
+PRESCREEN_SOURCES = {
+    "CN": (
+        "financial_data", "company_id", "fiscal_year",
+        " AND (f.report_period = 'Q4' OR f.report_period IS NULL"
+        " OR f.report_period LIKE '%%1231')",
+    ),
+    "US": ("financial_data_annual", "gvkey", "fyear", ""),
+}
+
+# 衍生指标缓存的年报指纹：每家公司一行聚合（最新财年、年报行数、最大 rowid，
+# 以及衍生指标所读各列的 TOTAL 拼接成的内容校验和，原地修订历史年报也会改变指纹），
+# 数据源同 PRESCREEN_SOURCES；{checksum} 由 METRICS_CHECKSUM_COLUMNS 按实际表结构展开，
+# {{ids}} 在执行时展开为 IN (...) 占位符。
+METRICS_FINGERPRINT_SQL = """
+    SELECT f.{key} AS company_key, MAX(f.{year}) AS max_year,
+           COUNT(*) AS n_rows, MAX(f.rowid) AS max_rowid,
+           {checksum} AS checksum
+    FROM {table} f
+    WHERE f.{key} IN ({{ids}}){where}
+    GROUP BY f.{key}
+"""
+
+# 衍生指标（_compute_*_metrics）读取的年报列
+METRICS_CHECKSUM_COLUMNS = {
+    "CN": (
+        "net_profit", "total_assets", "total_liabilities", "operating_cash_flow",
+        "capex", "free_cash_flow", "revenue", "operating_profit",
+    ),
+    "US": (
+        "ni", "ib", "at", "lt", "oancf", "capx", "revt", "sale",
+        "oiadp", "oibdp", "prcc_f", "epsfi", "csho",
+    ),
+}
+
+
+def render_fingerprint_sql(conn: sqlite3.Connection, market: str) -> str:
+    """按实际表结构渲染指定市场的年报指纹 SQL（表中不存在的列跳过）"""
+    table, key, year, where = PRESCREEN_SOURCES[market]
+    existing = table_columns(conn, table)
+    totals = [f'TOTAL(f."{col}")' for col in METRICS_CHECKSUM_COLUMNS[market] if col in existing]
+    checksum = " || ':' || ".join(totals) or "''"
+    return METRICS_FINGERPRINT_SQL.format(
+        key=key, year=year, table=table, where=where, checksum=checksum,
+    )
+
+
+# 预筛字段 → 候选列（多列时取第一个非零值，对应 Python 的 a or b）
+PRESCREEN_FIELDS = {
+    "CN": {
+        "np": ("net_profit",),
+        "ta": ("total_assets",),
+        "tl": ("total_liabilities",),
+        "ocf": ("operating_cash_flow",),
+        "capex": ("capex",),
+        "rev": ("revenue",),
+        "op": ("operating_profit",),
+    },
+    "US": {
+        "np": ("ni", "ib"),
+        "ta": ("at",),
+        "tl": ("lt",),
+        "ocf": ("oancf",),
+        "capex": ("capx",),
+        "rev": ("revt", "sale"),
+        "op": ("oiadp", "oibdp"),
+    },
+}
+
+# 预筛判定的数值容差：SQL 与 Python 的浮点运算顺序不同，边界附近一律放行
+PRESCREEN_TOLERANCE = 1e-9
+
+
+def render_prescreen_sql(conn: sqlite3.Connection, market: str) -> str:
+    """
+    按实际表结构渲染指定市场的预筛 SQL
+    
+    表中不存在的列替换为 NULL：对应指标为 NULL 时该公司一律放行。
+    """
+    table, key, year, where = PRESCREEN_SOURCES[market]
+    columns = field_expressions(conn, table, PRESCREEN_FIELDS[market])
+    return PRESCREEN_SQL.format(
+        key=key, year=year, table=table, where=where, columns=", ".join(columns),
+    )
+
+
+# 只读模式默认 PRAGMA：256MB 内存映射，64MB 页缓存
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+DEFAULT_CACHE_SIZE_KB = 64 * 1024
+
 
 @dataclass
 class DatabaseConfig:
     """数据库配置"""
     china_db_path: str
     us_db_path: str
+    read_only: bool = False               # 以 file:...?mode=ro 只读打开
+    mmap_size: int = DEFAULT_MMAP_SIZE    # PRAGMA mmap_size（字节，只读模式生效）
+    cache_size_kb: int = DEFAULT_CACHE_SIZE_KB  # PRAGMA cache_size（KiB，只读模式生效）
 
 
 class SVIPDatabaseLoader:
@@ -34,7 +331,9 @@ class SVIPDatabaseLoader:
     def __init__(
         self,
         china_db_path: Optional[str] = None,
-        us_db_path: Optional[str] = None
+        us_db_path: Optional[str] = None,
+        metrics_cache_path: Optional[str] = None,
+        read_only: bool = False,
     ):
         """
         初始化数据库加载器
@@ -42,6 +341,8 @@ class SVIPDatabaseLoader:
         Args:
             china_db_path: A股数据库路径
             us_db_path: 美股数据库路径
+            metrics_cache_path: 衍生指标缓存路径（None 表示不缓存）
+            read_only: 是否以只读 + 内存映射模式打开数据库
         """
         # 默认路径：project/database/
         if china_db_path is None:
@@ -55,27 +356,50 @@ class SVIPDatabaseLoader:
         
         self.config = DatabaseConfig(
             china_db_path=china_db_path,
-            us_db_path=us_db_path
+            us_db_path=us_db_path,
+            read_only=read_only,
         )
         self.china_conn = None
         self.us_conn = None
+        self.metrics_cache = (
+            DerivedMetricsCache(metrics_cache_path) if metrics_cache_path else None
+        )
+        self._prescreen_sql: Dict[str, str] = {}
+        self._fingerprint_sql: Dict[str, str] = {}
     
     def connect(self, market: str = "CN"):
         """建立数据库连接"""
         if market in ("CN", "HK"):
             if not os.path.exists(self.config.china_db_path):
                 raise FileNotFoundError(f"A股数据库未找到: {self.config.china_db_path}")
-            self.china_conn = sqlite3.connect(self.config.china_db_path)
-            self.china_conn.row_factory = sqlite3.Row
+            self.china_conn = self._open(self.config.china_db_path)
             logger.info(f"已连接A股数据库: {self.config.china_db_path}")
         
         if market == "US":
             if not os.path.exists(self.config.us_db_path):
                 raise FileNotFoundError(f"美股数据库未找到: {self.config.us_db_path}")
-            self.us_conn = sqlite3.connect(self.config.us_db_path)
-            self.us_conn.row_factory = sqlite3.Row
+            self.us_conn = self._open(self.config.us_db_path)
             logger.info(f"已连接美股数据库: {self.config.us_db_path}")
     
+    def _open(self, path: str) -> sqlite3.Connection:
+        """
+        打开一个数据库连接
+        
+        只读模式通过 URI 以 mode=ro 打开，并设置内存映射、页缓存、
+        内存临时表与 query_only，适合大体量、基本静态的财务库。
+        """
+        if not self.config.read_only:
+            conn = sqlite3.connect(path)
+        else:
+            uri = Path(path).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True)
+            conn.execute(f"PRAGMA mmap_size = {int(self.config.mmap_size)}")
+            conn.execute(f"PRAGMA cache_size = -{int(self.config.cache_size_kb)}")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            conn.execute("PRAGMA query_only = ON")
+        conn.row_factory = sqlite3.Row
+        return conn
+    
     def close(self):
         """关闭数据库连接"""
         if self.china_conn:
@@ -84,6 +408,9 @@ class SVIPDatabaseLoader:
         if self.us_conn:
             self.us_conn.close()
             self.us_conn = None
+        if self.metrics_cache:
+            self.metrics_cache.close()
+            self.metrics_cache = None
     
     def __enter__(self):
         return self
@@ -115,9 +442,11 @@ class SVIPDatabaseLoader:
             logger.warning(f"未找到A股公司: {code}")
             return None
         
-        # 获取财务数据
-        financials = self._get_china_financials(company['company_id'])
-        if not financials:
+        # 获取财务数据（衍生指标缓存命中时不取年报行）
+        cached, fingerprints = self._cached_metrics("CN", [company['company_id']])
+        metrics = cached.get(company['company_id'])
+        financials = [] if metrics else self._get_china_financials(company['company_id'])
+        if not metrics and not financials:
             logger.warning(f"未找到A股财务数据: {code}")
             return None
         
@@ -126,14 +455,15 @@ class SVIPDatabaseLoader:
         
         # 转换为SVIP格式
         return self._convert_china_to_svip_format(
-            company, financials, market_data, theme
+            company, financials, market_data, theme,
+            metrics=metrics, fingerprint=fingerprints.get(company['company_id']),
         )
     
     def _get_china_company_info(self, code: str) -> Optional[Dict]:
         """获取A股公司信息"""
-        query = "SELECT * FROM companies WHERE stock_code = ?"
-        cursor = self.china_conn.execute(query, (code,))
+        cursor = self.china_conn.execute(CN_COMPANY_SQL, (code,))
         row = cursor.fetchone()
+        _record_query(1 if row else 0)
         return dict(row) if row else None
     
     def _get_china_financials(
@@ -142,27 +472,16 @@ class SVIPDatabaseLoader:
         years: int = 10
     ) -> List[Dict]:
         """获取A股历史财务数据（年报，Q4 或 report_period 为 NULL 的年度报告）"""
-        query = """
-        SELECT * FROM financial_data
-        WHERE company_id = ?
-          AND (report_period = 'Q4' OR report_period IS NULL
-               OR report_period LIKE '%%1231')
-        ORDER BY fiscal_year DESC
-        LIMIT ?
-        """
-        cursor = self.china_conn.execute(query, (company_id, years))
-        return [dict(row) for row in cursor.fetchall()]
+        cursor = self.china_conn.execute(CN_FINANCIALS_SQL, (company_id, years))
+        rows = [dict(row) for row in cursor.fetchall()]
+        _record_query(len(rows))
+        return rows
     
     def _get_china_market_data(self, company_id: int) -> Optional[Dict]:
         """获取A股最新市场数据"""
-        query = """
-        SELECT * FROM market_data
-        WHERE company_id = ?
-        ORDER BY trade_date DESC
-        LIMIT 1
-        """
-        cursor = self.china_conn.execute(query, (company_id,))
+        cursor = self.china_conn.execute(CN_MARKET_DATA_SQL, (company_id,))
         row = cursor.fetchone()
+        _record_query(1 if row else 0)
         return dict(row) if row else None
     
     def _convert_china_to_svip_format(
@@ -170,23 +489,27 @@ class SVIPDatabaseLoader:
         company: Dict,
         financials: List[Dict],
         market_data: Optional[Dict],
-        theme: str
+        theme: str,
+        pe_history: Optional[List[float]] = None,
+        metrics: Optional[Dict[str, Any]] = None,
+        fingerprint: Optional[Tuple[Any, str]] = None,
     ) -> Dict[str, Any]:
-        """将A股数据转换为SVIP格式"""
-        latest = financials[0] if financials else {}
-        
-        # 计算10年ROIC中位数
-        roic_10y_median = self._calculate_roic_median(financials)
-        
-        # 计算FCF转化率
-        fcf_conversion = self._calculate_fcf_conversion(financials)
+        """
+        将A股数据转换为SVIP格式
         
-        # 计算毛利率波动
-        gross_margin_std = self._calculate_margin_stability(financials)
+        metrics 为缓存命中的衍生指标（此时 financials 可为空）；
+        否则由 financials 计算，fingerprint 不为 None 时写回缓存。
+        """
+        # 仅依赖年报行的衍生指标（可缓存）
+        if metrics is None:
+            metrics = self._derived_metrics(
+                "CN", company['company_id'], financials, self._compute_china_metrics,
+                fingerprint,
+            )
         
         # 计算估值指标
-        fcf_yield, pe_ratio, growth_rate = self._calculate_valuation_metrics(
-            financials, market_data
+        fcf_yield, pe_ratio, growth_rate = self._valuation_from_inputs(
+            metrics["valuation_inputs"], market_data
         )
         
         return {
@@ -196,10 +519,10 @@ class SVIPDatabaseLoader:
             "sector": company.get('industry_name', ''),
             "theme": theme,
             "financials": {
-                "roic_10y_median": roic_10y_median,
-                "fcf_conversion": fcf_conversion,
-                "gross_margin_std": gross_margin_std,
-                "debt_to_equity": self._calculate_debt_ratio(latest),
+                "roic_10y_median": metrics["roic_10y_median"],
+                "fcf_conversion": metrics["fcf_conversion"],
+                "gross_margin_std": metrics["gross_margin_std"],
+                "debt_to_equity": metrics["debt_to_equity"],
                 "market_share": 0.0,  # 需要额外数据源
                 "cr4": 0.0,  # 需要额外数据源
                 "moat_rating": 50,  # 默认值，需要人工评估
@@ -211,18 +534,83 @@ class SVIPDatabaseLoader:
                 "pe_ratio": pe_ratio,
                 "growth_rate": growth_rate,
                 "valuation_percentile": self._calculate_china_valuation_percentile(
-                    company['company_id'], pe_ratio
+                    company['company_id'], pe_ratio, pe_history
                 ),
                 "growth_concentration": 0.3,  # 需要分析师预测数据
-                "reinvestment_declining_years": self._calculate_reinvestment_declining_years(financials),
+                "reinvestment_declining_years": metrics["reinvestment_declining_years"],
             },
             "acceleration": {
                 "penetration": None,
                 "cost_curve": None,
-                "capex": self._extract_capex_series(financials),
+                "capex": metrics["capex"],
             }
         }
     
+    def _compute_china_metrics(self, financials: List[Dict]) -> Dict[str, Any]:
+        """A股衍生指标（只依赖年报行）"""
+        latest = financials[0] if financials else {}
+        return {
+            # 计算10年ROIC中位数
+            "roic_10y_median": self._calculate_roic_median(financials),
+            # 计算FCF转化率
+            "fcf_conversion": self._calculate_fcf_conversion(financials),
+            # 计算毛利率波动
+            "gross_margin_std": self._calculate_margin_stability(financials),
+            "debt_to_equity": self._calculate_debt_ratio(latest),
+            "reinvestment_declining_years": self._calculate_reinvestment_declining_years(financials),
+            "capex": self._extract_capex_series(financials),
+            # 估值中只依赖年报行的部分（FCF Yield 与增长率另需行情）
+            "valuation_inputs": self._china_valuation_inputs(financials),
+        }
+    
+    def _derived_metrics(
+        self,
+        market: str,
+        company_key: Any,
+        financials: List[Dict],
+        compute,
+        fingerprint: Optional[Tuple[Any, str]] = None,
+    ) -> Dict[str, Any]:
+        """由年报行计算衍生指标；启用缓存且有年报指纹时写回缓存"""
+        metrics = compute(financials)
+        if self.metrics_cache is not None and fingerprint is not None:
+            self.metrics_cache.put(market, company_key, *fingerprint, metrics)
+        return metrics
+    
+    def _cached_metrics(
+        self,
+        market: str,
+        keys: List[Any],
+        years: int = 10,
+    ) -> Tuple[Dict[Any, Dict[str, Any]], Dict[Any, Tuple[Any, str]]]:
+        """
+        按年报指纹查衍生指标缓存
+        
+        Args:
+            years: 计算指标所取的年报期数（计入指纹，不同窗口的缓存互不命中）
+        
+        Returns:
+            (命中的指标, 全部有年报公司的 (最新财年, 指纹))；未启用缓存时均为空
+        """
+        if self.metrics_cache is None or not keys:
+            return {}, {}
+        conn = self.china_conn if market == "CN" else self.us_conn
+        if market not in self._fingerprint_sql:
+            self._fingerprint_sql[market] = render_fingerprint_sql(conn, market)
+        grouped = self._fetch_grouped(conn, self._fingerprint_sql[market], keys, 'company_key')
+        fingerprints = {
+            key: (rows[0]['max_year'], metrics_fingerprint(
+                years, rows[0]['n_rows'], rows[0]['max_rowid'], rows[0]['checksum'],
+            ))
+            for key, rows in grouped.items()
+        }
+        cached = {}
+        for key, (fiscal_year, fingerprint) in fingerprints.items():
+            metrics = self.metrics_cache.get(market, key, fiscal_year, fingerprint)
+            if metrics is not None:
+                cached[key] = metrics
+        return cached, fingerprints
+    
     # =========================================================================
     # 美股数据加载
     # =========================================================================
@@ -247,48 +635,49 @@ class SVIPDatabaseLoader:
             logger.warning(f"未找到美股公司: {ticker}")
             return None
         
-        # 获取财务数据
-        financials = self._get_us_financials(company['gvkey'])
-        if not financials:
+        # 获取财务数据（衍生指标缓存命中时不取年报行）
+        cached, fingerprints = self._cached_metrics("US", [company['gvkey']])
+        metrics = cached.get(company['gvkey'])
+        financials = [] if metrics else self._get_us_financials(company['gvkey'])
+        if not metrics and not financials:
             logger.warning(f"未找到美股财务数据: {ticker}")
             return None
         
         # 转换为SVIP格式
-        return self._convert_us_to_svip_format(company, financials, theme)
+        return self._convert_us_to_svip_format(
+            company, financials, theme,
+            metrics=metrics, fingerprint=fingerprints.get(company['gvkey']),
+        )
     
     def _get_us_company_info(self, ticker: str) -> Optional[Dict]:
         """获取美股公司信息"""
         clean_ticker = ticker.replace(".", "").upper()
-        query = "SELECT * FROM companies WHERE UPPER(tic) = ? LIMIT 1"
-        cursor = self.us_conn.execute(query, (clean_ticker,))
+        cursor = self.us_conn.execute(US_COMPANY_SQL, (clean_ticker,))
         row = cursor.fetchone()
+        _record_query(1 if row else 0)
         return dict(row) if row else None
     
     def _get_us_financials(self, gvkey: str, years: int = 10) -> List[Dict]:
         """获取美股历史财务数据（年报）"""
-        query = """
-        SELECT * FROM financial_data_annual
-        WHERE gvkey = ?
-        ORDER BY fyear DESC
-        LIMIT ?
-        """
-        cursor = self.us_conn.execute(query, (gvkey, years))
-        return [dict(row) for row in cursor.fetchall()]
+        cursor = self.us_conn.execute(US_FINANCIALS_SQL, (gvkey, years))
+        rows = [dict(row) for row in cursor.fetchall()]
+        _record_query(len(rows))
+        return rows
     
     def _convert_us_to_svip_format(
         self,
         company: Dict,
         financials: List[Dict],
-        theme: str
+        theme: str,
+        metrics: Optional[Dict[str, Any]] = None,
+        fingerprint: Optional[Tuple[Any, str]] = None,
     ) -> Dict[str, Any]:
-        """将美股数据转换为SVIP格式"""
-        latest = financials[0] if financials else {}
-        
-        # 计算指标（美股字段名不同）
-        roic_10y_median = self._calculate_us_roic_median(financials)
-        fcf_conversion = self._calculate_us_fcf_conversion(financials)
-        gross_margin_std = self._calculate_us_margin_stability(financials)
-        fcf_yield, pe_ratio, growth_rate = self._calculate_us_valuation_metrics(financials)
+        """将美股数据转换为SVIP格式（metrics / fingerprint 同 _convert_china_to_svip_format）"""
+        # 计算指标（美股字段名不同；估值只依赖年报行，一并缓存）
+        if metrics is None:
+            metrics = self._derived_metrics(
+                "US", company['gvkey'], financials, self._compute_us_metrics, fingerprint,
+            )
         
         return {
             "symbol": company['tic'],
@@ -297,10 +686,10 @@ class SVIPDatabaseLoader:
             "sector": "",  # Compustat不直接提供
             "theme": theme,
             "financials": {
-                "roic_10y_median": roic_10y_median,
-                "fcf_conversion": fcf_conversion,
-                "gross_margin_std": gross_margin_std,
-                "debt_to_equity": self._calculate_us_debt_ratio(latest),
+                "roic_10y_median": metrics["roic_10y_median"],
+                "fcf_conversion": metrics["fcf_conversion"],
+                "gross_margin_std": metrics["gross_margin_std"],
+                "debt_to_equity": metrics["debt_to_equity"],
                 "market_share": 0.0,
                 "cr4": 0.0,
                 "moat_rating": 50,
@@ -308,29 +697,389 @@ class SVIPDatabaseLoader:
                 "substitution_risk_rating": 50,
             },
             "valuation": {
-                "fcf_yield": fcf_yield,
-                "pe_ratio": pe_ratio,
-                "growth_rate": growth_rate,
-                "valuation_percentile": self._calculate_us_valuation_percentile(
-                    financials, pe_ratio
-                ),
+                "fcf_yield": metrics["fcf_yield"],
+                "pe_ratio": metrics["pe_ratio"],
+                "growth_rate": metrics["growth_rate"],
+                "valuation_percentile": metrics["valuation_percentile"],
                 "growth_concentration": 0.3,
-                "reinvestment_declining_years": self._calculate_us_reinvestment_declining_years(financials),
+                "reinvestment_declining_years": metrics["reinvestment_declining_years"],
             },
             "acceleration": {
                 "penetration": None,
                 "cost_curve": None,
-                "capex": self._extract_us_capex_series(financials),
+                "capex": metrics["capex"],
             }
         }
     
+    def _compute_us_metrics(self, financials: List[Dict]) -> Dict[str, Any]:
+        """美股衍生指标与估值（只依赖年报行）"""
+        latest = financials[0] if financials else {}
+        metrics = {
+            "roic_10y_median": self._calculate_us_roic_median(financials),
+            "fcf_conversion": self._calculate_us_fcf_conversion(financials),
+            "gross_margin_std": self._calculate_us_margin_stability(financials),
+            "debt_to_equity": self._calculate_us_debt_ratio(latest),
+            "reinvestment_declining_years": self._calculate_us_reinvestment_declining_years(financials),
+            "capex": self._extract_us_capex_series(financials),
+        }
+        fcf_yield, pe_ratio, growth_rate = self._calculate_us_valuation_metrics(financials)
+        metrics.update(
+            fcf_yield=fcf_yield,
+            pe_ratio=pe_ratio,
+            growth_rate=growth_rate,
+            valuation_percentile=self._calculate_us_valuation_percentile(financials, pe_ratio),
+        )
+        return metrics
+    
+    # =========================================================================
+    # 集合查询（批量加载用，替代逐只 N+1 查询）
+    # =========================================================================
+    
+    def load_china_stocks_bulk(
+        self,
+        items: List[Tuple[str, str]],
+        years: int = 10,
+        prescreen: bool = False,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        批量加载A股数据
+        
+        公司信息、近 N 年年报、最新行情与 PE 历史各用一组集合查询取回，
+        再在内存中按公司分组，输出与 load_china_stock 完全一致。
+        启用衍生指标缓存时先查年报指纹，命中的公司不再取年报行。
+        
+        Args:
+            items: [(code, theme), ...] 列表
+            years: 每家公司取最近的年报数量
+            prescreen: 先在 SQL 中做硬筛选预筛，确定不通过的公司不再加载
+        
+        Returns:
+            与 items 等长的列表，未找到、转换失败或被预筛剔除的股票为 None
+        """
+        if not self.china_conn:
+            self.connect("CN")
+        
+        with tracer.span("query"):
+            codes = list(dict.fromkeys(code for code, _ in items))
+            companies = self._bulk_china_companies(codes)
+            company_ids = list(dict.fromkeys(c['company_id'] for c in companies.values()))
+            rejected = self._prescreen("CN", company_ids, years) if prescreen else frozenset()
+            company_ids = [cid for cid in company_ids if cid not in rejected]
+            cached, fingerprints = self._cached_metrics("CN", company_ids, years)
+            financials = self._bulk_china_financials(
+                [cid for cid in company_ids if cid not in cached], years
+            )
+            market_data = self._bulk_china_market_data(company_ids)
+            pe_history = self._bulk_china_pe_history(company_ids)
+        
+        with tracer.span("convert"):
+            return self._convert_china_bulk(
+                items, companies, financials, market_data, pe_history, rejected,
+                cached, fingerprints,
+            )
+    
+    def _convert_china_bulk(
+        self,
+        items: List[Tuple[str, str]],
+        companies: Dict[str, Dict],
+        financials: Dict[int, List[Dict]],
+        market_data: Dict[int, Dict],
+        pe_history: Dict[int, List[float]],
+        rejected: frozenset = frozenset(),
+        cached: Optional[Dict[int, Dict[str, Any]]] = None,
+        fingerprints: Optional[Dict[int, Tuple[Any, str]]] = None,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        把批量查询结果按 items 顺序转换为SVIP格式
+        
+        rejected 为预筛剔除的 company_id；cached / fingerprints 为 _cached_metrics 的结果。
+        """
+        cached = cached or {}
+        fingerprints = fingerprints or {}
+        results: List[Optional[Dict[str, Any]]] = []
+        for code, theme in items:
+            company = companies.get(code)
+            if not company:
+                logger.warning(f"未找到A股公司: {code}")
+                results.append(None)
+                continue
+            
+            company_id = company['company_id']
+            if company_id in rejected:
+                results.append(None)
+                continue
+            
+            metrics = cached.get(company_id)
+            company_financials = financials.get(company_id, [])
+            if not metrics and not company_financials:
+                logger.warning(f"未找到A股财务数据: {code}")
+                results.append(None)
+                continue
+            
+            try:
+                results.append(self._convert_china_to_svip_format(
+                    company, company_financials, market_data.get(company_id), theme,
+                    pe_history.get(company_id, []),
+                    metrics=metrics, fingerprint=fingerprints.get(company_id),
+                ))
+            except Exception as e:
+                logger.error(f"加载股票 CN:{code} 失败: {e}")
+                results.append(None)
+        
+        return results
+    
+    def load_us_stocks_bulk(
+        self,
+        items: List[Tuple[str, str]],
+        years: int = 10,
+        prescreen: bool = False,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        批量加载美股数据
+        
+        Args:
+            items: [(ticker, theme), ...] 列表
+            years: 每家公司取最近的年报数量
+            prescreen: 先在 SQL 中做硬筛选预筛，确定不通过的公司不再加载
+        
+        Returns:
+            与 items 等长的列表，未找到、转换失败或被预筛剔除的股票为 None
+        """
+        if not self.us_conn:
+            self.connect("US")
+        
+        with tracer.span("query"):
+            clean = {ticker: ticker.replace(".", "").upper() for ticker, _ in items}
+            companies = self._bulk_us_companies(list(dict.fromkeys(clean.values())))
+            gvkeys = list(dict.fromkeys(c['gvkey'] for c in companies.values()))
+            rejected = self._prescreen("US", gvkeys, years) if prescreen else frozenset()
+            gvkeys = [gvkey for gvkey in gvkeys if gvkey not in rejected]
+            cached, fingerprints = self._cached_metrics("US", gvkeys, years)
+            financials = self._bulk_us_financials(
+                [gvkey for gvkey in gvkeys if gvkey not in cached], years
+            )
+        
+        with tracer.span("convert"):
+            return self._convert_us_bulk(
+                items, clean, companies, financials, rejected, cached, fingerprints,
+            )
+    
+    def _convert_us_bulk(
+        self,
+        items: List[Tuple[str, str]],
+        clean: Dict[str, str],
+        companies: Dict[str, Dict],
+        financials: Dict[str, List[Dict]],
+        rejected: frozenset = frozenset(),
+        cached: Optional[Dict[str, Dict[str, Any]]] = None,
+        fingerprints: Optional[Dict[str, Tuple[Any, str]]] = None,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """把批量查询结果按 items 顺序转换为SVIP格式（参数同 _convert_china_bulk）"""
+        cached = cached or {}
+        fingerprints = fingerprints or {}
+        results: List[Optional[Dict[str, Any]]] = []
+        for ticker, theme in items:
+            company = companies.get(clean[ticker])
+            if not company:
+                logger.warning(f"未找到美股公司: {ticker}")
+                results.append(None)
+                continue
+            
+            if company['gvkey'] in rejected:
+                results.append(None)
+                continue
+            
+            metrics = cached.get(company['gvkey'])
+            company_financials = financials.get(company['gvkey'], [])
+            if not metrics and not company_financials:
+                logger.warning(f"未找到美股财务数据: {ticker}")
+                results.append(None)
+                continue
+            
+            try:
+                results.append(self._convert_us_to_svip_format(
+                    company, company_financials, theme,
+                    metrics=metrics, fingerprint=fingerprints.get(company['gvkey']),
+                ))
+            except Exception as e:
+                logger.error(f"加载股票 US:{ticker} 失败: {e}")
+                results.append(None)
+        
+        return results
+    
+    @staticmethod
+    def _fetch_keyed_first(
+        conn: sqlite3.Connection,
+        query_template: str,
+        keys: List[Any],
+    ) -> Dict[Any, Dict]:
+        """
+        按请求键分块查询，每个键只保留第一行（等价于逐只 fetchone）。
+        
+        query_template 中的 {values} 展开为 VALUES (?), (?), ...，
+        结果集第一列 _svip_key 为请求键。
+        """
+        rows: Dict[Any, Dict] = {}
+        for chunk in _chunked(keys):
+            values = ", ".join(["(?)"] * len(chunk))
+            cursor = conn.execute(query_template.format(values=values), chunk)
+            n_rows = 0
+            for row in cursor:
+                record = dict(row)
+                rows.setdefault(record.pop('_svip_key'), record)
+                n_rows += 1
+            _record_query(n_rows)
+        return rows
+    
+    @staticmethod
+    def _fetch_grouped(
+        conn: sqlite3.Connection,
+        query_template: str,
+        keys: List[Any],
+        group_col: str,
+        extra_params: Tuple = (),
+    ) -> Dict[Any, List[Dict]]:
+        """按 group_col 分组的 IN (...) 分块查询，组内保持 SQL 返回顺序"""
+        grouped: Dict[Any, List[Dict]] = {}
+        for chunk in _chunked(keys):
+            query = query_template.format(ids=_placeholders(len(chunk)))
+            cursor = conn.execute(query, (*chunk, *extra_params))
+            n_rows = 0
+            for row in cursor:
+                record = dict(row)
+                record.pop('_svip_rn', None)
+                grouped.setdefault(record[group_col], []).append(record)
+                n_rows += 1
+            _record_query(n_rows)
+        return grouped
+    
+    def _bulk_china_companies(self, codes: List[str]) -> Dict[str, Dict]:
+        """批量获取A股公司信息，按请求代码索引"""
+        return self._fetch_keyed_first(self.china_conn, CN_BULK_COMPANIES_SQL, codes)
+    
+    def _bulk_china_financials(
+        self,
+        company_ids: List[int],
+        years: int = 10,
+    ) -> Dict[int, List[Dict]]:
+        """批量获取A股年报（每家公司最近 years 期，按 fiscal_year 降序）"""
+        return self._fetch_grouped(
+            self.china_conn, CN_BULK_FINANCIALS_SQL, company_ids, 'company_id', (years,)
+        )
+    
+    def _bulk_china_market_data(self, company_ids: List[int]) -> Dict[int, Dict]:
+        """批量获取A股最新市场数据"""
+        grouped = self._fetch_grouped(
+            self.china_conn, CN_BULK_MARKET_DATA_SQL, company_ids, 'company_id'
+        )
+        return {cid: rows[0] for cid, rows in grouped.items()}
+    
+    def _bulk_china_pe_history(self, company_ids: List[int]) -> Dict[int, List[float]]:
+        """批量获取A股历史 PE（pe_ttm > 0，按 fiscal_year 升序）"""
+        grouped = self._fetch_grouped(
+            self.china_conn, CN_BULK_PE_HISTORY_SQL, company_ids, 'company_id'
+        )
+        return {
+            cid: [row['pe_ttm'] for row in rows] for cid, rows in grouped.items()
+        }
+    
+    def _bulk_us_companies(self, tickers: List[str]) -> Dict[str, Dict]:
+        """批量获取美股公司信息，按清洗后的大写代码索引"""
+        return self._fetch_keyed_first(self.us_conn, US_BULK_COMPANIES_SQL, tickers)
+    
+    def _bulk_us_financials(
+        self,
+        gvkeys: List[str],
+        years: int = 10,
+    ) -> Dict[str, List[Dict]]:
+        """批量获取美股年报（每家公司最近 years 期，按 fyear 降序）"""
+        return self._fetch_grouped(
+            self.us_conn, US_BULK_FINANCIALS_SQL, gvkeys, 'gvkey', (years,)
+        )
+    
+    # =========================================================================
+    # 硬筛选预筛（SQL 聚合，批量加载前剔除确定不通过的公司）
+    # =========================================================================
+    
+    def _prescreen_query(self, market: str) -> str:
+        """按实际表结构渲染预筛 SQL（每个市场渲染一次）"""
+        if market not in self._prescreen_sql:
+            conn = self.china_conn if market == "CN" else self.us_conn
+            self._prescreen_sql[market] = render_prescreen_sql(conn, market)
+        return self._prescreen_sql[market]
+    
+    def _prescreen_metrics(
+        self,
+        market: str,
+        keys: List[Any],
+        years: int = 10,
+    ) -> Dict[Any, Dict[str, Any]]:
+        """SQL 计算的硬筛选指标，按公司键（company_id / gvkey）索引"""
+        conn = self.china_conn if market == "CN" else self.us_conn
+        grouped = self._fetch_grouped(
+            conn, self._prescreen_query(market), keys, 'company_key', (years,)
+        )
+        return {key: rows[0] for key, rows in grouped.items()}
+    
+    @staticmethod
+    def _prescreen_passes(metrics: Dict[str, Any], cfg: SVIConfig) -> bool:
+        """
+        预筛判定：只剔除确定不通过 hard_screen 的公司
+        
+        同财年多条年报（取数顺序不确定）、指标为 NULL 或落在容差内的一律放行，
+        保证预筛只会多放、不会误杀。利润率标准差以方差与阈值平方比较。
+        """
+        if metrics['ambiguous']:
+            return True
+        tol = PRESCREEN_TOLERANCE
+        roic = metrics['roic_10y_median']
+        fcf = metrics['fcf_conversion']
+        variance = metrics['margin_variance']
+        debt = metrics['debt_to_equity']
+        if roic is not None and roic < cfg.roic_10y_min - tol:
+            return False
+        if fcf is not None and fcf < cfg.fcf_conversion_min - tol:
+            return False
+        if variance is not None and (
+            variance > cfg.gross_margin_volatility_max ** 2 + tol * (1 + metrics['margin_scale'])
+        ):
+            return False
+        if debt is not None and debt > cfg.debt_to_equity_max + tol:
+            return False
+        return True
+    
+    def _prescreen(
+        self,
+        market: str,
+        keys: List[Any],
+        years: int = 10,
+        cfg: SVIConfig = None,
+    ) -> frozenset:
+        """
+        硬筛选预筛，返回确定不通过的公司键
+        
+        没有年报的公司不在结果中，照常进入完整加载（由后续流程报告缺失）。
+        """
+        if cfg is None:
+            cfg = settings.svi
+        with tracer.span("prescreen"):
+            metrics = self._prescreen_metrics(market, keys, years)
+            rejected = frozenset(
+                key for key, row in metrics.items() if not self._prescreen_passes(row, cfg)
+            )
+            tracer.count("prescreen_rejected", len(rejected))
+        logger.info(f"{market} 硬筛选预筛: {len(keys)} 家公司，剔除 {len(rejected)} 家")
+        return rejected
+    
     # =========================================================================
     # 批量加载
     # =========================================================================
     
     def load_stocks_from_list(
         self,
-        stock_list: List[Tuple[str, str, str]]
+        stock_list: List[Tuple[str, str, str]],
+        bulk: bool = True,
+        prescreen: bool = False,
     ) -> List[Dict[str, Any]]:
         """
         批量加载股票数据
@@ -340,10 +1089,56 @@ class SVIPDatabaseLoader:
                 market: "CN" 或 "US"
                 code: 股票代码
                 theme: 慢变量主题桶
+            bulk: 使用集合查询批量加载（默认）；False 时逐只加载
+            prescreen: 先在 SQL 中按 settings.svi 阈值预筛，
+                确定不通过硬筛选的股票不再加载（仅批量路径生效）
         
         Returns:
-            股票数据字典列表
+            股票数据字典列表（保持输入顺序）
         """
+        if not bulk:
+            if prescreen:
+                logger.warning("逐只加载模式不支持硬筛选预筛，已忽略")
+            with tracer.span("db_one_by_one"):
+                stocks = self._load_stocks_one_by_one(stock_list)
+                tracer.count("stocks_loaded", len(stocks))
+            return stocks
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(stock_list)
+        by_market: Dict[str, List[int]] = {"CN": [], "US": []}
+        for i, (market, code, theme) in enumerate(stock_list):
+            if market in ("CN", "HK"):
+                by_market["CN"].append(i)
+            elif market == "US":
+                by_market["US"].append(i)
+            else:
+                logger.warning(f"不支持的市场: {market}")
+        
+        bulk_loaders = {
+            "CN": self.load_china_stocks_bulk,
+            "US": self.load_us_stocks_bulk,
+        }
+        for market, indices in by_market.items():
+            if not indices:
+                continue
+            items = [(stock_list[i][1], stock_list[i][2]) for i in indices]
+            with tracer.span(f"db_{market}"):
+                try:
+                    loaded = bulk_loaders[market](items, prescreen=prescreen)
+                except Exception as e:
+                    logger.error(f"批量加载 {market} 股票失败: {e}")
+                    continue
+                tracer.count("stocks_loaded", sum(1 for stock_data in loaded if stock_data))
+            for i, stock_data in zip(indices, loaded):
+                results[i] = stock_data
+        
+        return [stock_data for stock_data in results if stock_data]
+    
+    def _load_stocks_one_by_one(
+        self,
+        stock_list: List[Tuple[str, str, str]]
+    ) -> List[Dict[str, Any]]:
+        """逐只加载股票数据（每只 3-4 次查询）"""
         stocks = []
         for market, code, theme in stock_list:
             try:
@@ -432,18 +1227,39 @@ class SVIPDatabaseLoader:
         market_data: Optional[Dict]
     ) -> Tuple[float, float, float]:
         """计算估值指标：FCF Yield, PE, Growth Rate"""
+        return self._valuation_from_inputs(
+            self._china_valuation_inputs(financials), market_data
+        )
+    
+    @staticmethod
+    def _china_valuation_inputs(financials: List[Dict]) -> Optional[Dict[str, Any]]:
+        """估值所需的年报字段：最新一期现金流与资本开支、最近3年营收"""
+        if not financials:
+            return None
+        latest = financials[0]
+        return {
+            "operating_cash_flow": latest.get('operating_cash_flow', 0),
+            "capex": latest.get('capex', 0),
+            "revenues": [f.get('revenue', 0) for f in financials[:3]],
+        }
+    
+    @staticmethod
+    def _valuation_from_inputs(
+        inputs: Optional[Dict[str, Any]],
+        market_data: Optional[Dict]
+    ) -> Tuple[float, float, float]:
+        """由年报字段（_china_valuation_inputs）与最新行情计算 FCF Yield, PE, Growth Rate"""
         fcf_yield = 0.0
         pe_ratio = 0.0
         growth_rate = 0.0
         
-        if market_data and financials:
-            latest = financials[0]
+        if market_data and inputs:
             market_cap = market_data.get('market_cap')
             
             # FCF Yield
             if market_cap and market_cap > 0:
-                operating_cf = latest.get('operating_cash_flow', 0)
-                capex = latest.get('capex', 0)
+                operating_cf = inputs['operating_cash_flow']
+                capex = inputs['capex']
                 fcf = operating_cf - abs(capex)
                 fcf_yield = fcf / market_cap if fcf > 0 else 0.0
             
@@ -451,8 +1267,8 @@ class SVIPDatabaseLoader:
             pe_ratio = market_data.get('pe_ratio_ttm', 0.0) or 0.0
             
             # Growth Rate (简单计算：最近3年营收CAGR)
-            if len(financials) >= 3:
-                revenues = [f.get('revenue', 0) for f in financials[:3]]
+            revenues = inputs['revenues']
+            if len(revenues) >= 3:
                 if revenues[0] and revenues[-1] and revenues[-1] > 0:
                     growth_rate = (revenues[0] / revenues[-1]) ** (1/2) - 1
         
@@ -476,24 +1292,25 @@ class SVIPDatabaseLoader:
         return capex_list if capex_list else None
     
     def _calculate_china_valuation_percentile(
-        self, company_id: int, current_pe: float
+        self,
+        company_id: int,
+        current_pe: float,
+        pe_history: Optional[List[float]] = None,
     ) -> float:
         """
         计算A股当前PE在历史PE分布中的分位数。
         
         从 financial_data 取该公司所有年份的 pe_ttm，
         计算 current_pe 在历史分布中的百分位（0=极便宜, 1=极贵）。
+        批量模式下由调用方传入预先取好的 pe_history，不再单独查询。
         """
         if not self.china_conn or not current_pe or current_pe <= 0:
             return 0.5
         
-        query = """
-        SELECT pe_ttm FROM financial_data
-        WHERE company_id = ? AND pe_ttm IS NOT NULL AND pe_ttm > 0
-        ORDER BY fiscal_year
-        """
-        cursor = self.china_conn.execute(query, (company_id,))
-        pe_history = [row[0] for row in cursor.fetchall()]
+        if pe_history is None:
+            cursor = self.china_conn.execute(CN_PE_HISTORY_SQL, (company_id,))
+            pe_history = [row[0] for row in cursor.fetchall()]
+            _record_query(len(pe_history))
         
         if len(pe_history) < 5:
             return 0.5
@@ -702,7 +1519,9 @@ class SVIPDatabaseLoader:
 
 def create_db_loader(
     china_db_path: Optional[str] = None,
-    us_db_path: Optional[str] = None
+    us_db_path: Optional[str] = None,
+    metrics_cache_path: Optional[str] = None,
+    read_only: bool = False,
 ) -> SVIPDatabaseLoader:
     """
     创建数据库加载器
@@ -710,8 +1529,10 @@ def create_db_loader(
     Args:
         china_db_path: A股数据库路径
         us_db_path: 美股数据库路径
+        metrics_cache_path: 衍生指标缓存路径（None 表示不缓存）
+        read_only: 是否以只读 + 内存映射模式打开数据库
     
     Returns:
         SVIPDatabaseLoader实例
     """
-    return SVIPDatabaseLoader(china_db_path, us_db_path)
+    return SVIPDatabaseLoader(china_db_path, us_db_path, metrics_cache_path, read_only)
@@ -0,0 +1,291 @@
+"""
+SVIP v1.0 — Database Index Advisor
+
+对加载器的每条 SQL 执行 EXPLAIN QUERY PLAN，报告全表扫描，
+并按需创建加载器所需的覆盖索引 / 表达式索引，前后各计时一次对比。
+"""
+import logging
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from src import db_loader
+
+logger = logging.getLogger(__name__)
+
+# EXPLAIN / 计时时批量模板展开的样本键个数
+SAMPLE_SIZE = 200
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """推荐索引"""
+    name: str
+    table: str
+    columns: str        # 索引列定义（可含表达式与 DESC）
+    reason: str
+
+    @property
+    def create_sql(self) -> str:
+        return f"CREATE INDEX IF NOT EXISTS {self.name} ON {self.table} ({self.columns})"
+
+
+@dataclass(frozen=True)
+class LoaderQuery:
+    """一条加载器查询及其样本参数构造方式"""
+    name: str
+    sql: Union[str, Callable[[sqlite3.Connection], str]]  # 依赖表结构时为渲染函数
+    key: str                                    # 样本键类型，见 _sample_keys
+    params: Callable[[List[Any]], Tuple]        # 样本键 → 绑定参数
+    bulk: bool = False
+
+
+@dataclass
+class QueryPlan:
+    """一条查询的执行计划分析结果"""
+    name: str
+    plan: List[str] = field(default_factory=list)
+    full_scans: List[str] = field(default_factory=list)   # 被全表扫描的表
+    temp_sort: bool = False                                # 是否需要临时 B 树排序
+    error: Optional[str] = None
+
+
+RECOMMENDED_INDEXES: Dict[str, List[IndexSpec]] = {
+    "CN": [
+        IndexSpec(
+            "idx_svip_companies_stock_code", "companies", "stock_code",
+            "按股票代码查公司",
+        ),
+        IndexSpec(
+            "idx_svip_financial_company_year", "financial_data",
+            "company_id, fiscal_year DESC, report_period, pe_ttm",
+            "年报按 fiscal_year 倒序取最近 N 期；覆盖历史 PE 查询",
+        ),
+        IndexSpec(
+            "idx_svip_market_company_date", "market_data",
+            "company_id, trade_date DESC",
+            "取最新交易日行情",
+        ),
+    ],
+    "US": [
+        IndexSpec(
+            "idx_svip_companies_upper_tic", "companies", "UPPER(tic)",
+            "UPPER(tic) = ? 表达式查找",
+        ),
+        IndexSpec(
+            "idx_svip_financial_annual_gvkey_year", "financial_data_annual",
+            "gvkey, fyear DESC",
+            "年报按 fyear 倒序取最近 N 期",
+        ),
+    ],
+}
+
+
+def _bulk(keys: List[Any], *extra: Any) -> Tuple:
+    return (*keys, *extra)
+
+
+def _schema_sql(
+    render: Callable[[sqlite3.Connection, str], str],
+    market: str,
+) -> Callable[[sqlite3.Connection], str]:
+    """预筛 / 指纹 SQL 的列随表结构变化，EXPLAIN / 计时前按连接渲染"""
+    return lambda conn: render(conn, market)
+
+
+LOADER_QUERIES: Dict[str, List[LoaderQuery]] = {
+    "CN": [
+        LoaderQuery("company", db_loader.CN_COMPANY_SQL, "code", lambda k: (k[0],)),
+        LoaderQuery("financials", db_loader.CN_FINANCIALS_SQL, "company_id",
+                    lambda k: (k[0], 10)),
+        LoaderQuery("market_data", db_loader.CN_MARKET_DATA_SQL, "company_id",
+                    lambda k: (k[0],)),
+        LoaderQuery("pe_history", db_loader.CN_PE_HISTORY_SQL, "company_id",
+                    lambda k: (k[0],)),
+        LoaderQuery("bulk_companies", db_loader.CN_BULK_COMPANIES_SQL, "code",
+                    _bulk, bulk=True),
+        LoaderQuery("bulk_financials", db_loader.CN_BULK_FINANCIALS_SQL, "company_id",
+                    lambda k: _bulk(k, 10), bulk=True),
+        LoaderQuery("bulk_market_data", db_loader.CN_BULK_MARKET_DATA_SQL, "company_id",
+                    _bulk, bulk=True),
+        LoaderQuery("bulk_pe_history", db_loader.CN_BULK_PE_HISTORY_SQL, "company_id",
+                    _bulk, bulk=True),
+        LoaderQuery("bulk_prescreen", _schema_sql(db_loader.render_prescreen_sql, "CN"),
+                    "company_id", lambda k: _bulk(k, 10), bulk=True),
+        LoaderQuery("bulk_fingerprint", _schema_sql(db_loader.render_fingerprint_sql, "CN"),
+                    "company_id", _bulk, bulk=True),
+    ],
+    "US": [
+        LoaderQuery("company", db_loader.US_COMPANY_SQL, "ticker", lambda k: (k[0],)),
+        LoaderQuery("financials", db_loader.US_FINANCIALS_SQL, "gvkey",
+                    lambda k: (k[0], 10)),
+        LoaderQuery("bulk_companies", db_loader.US_BULK_COMPANIES_SQL, "ticker",
+                    _bulk, bulk=True),
+        LoaderQuery("bulk_financials", db_loader.US_BULK_FINANCIALS_SQL, "gvkey",
+                    lambda k: _bulk(k, 10), bulk=True),
+        LoaderQuery("bulk_prescreen", _schema_sql(db_loader.render_prescreen_sql, "US"),
+                    "gvkey", lambda k: _bulk(k, 10), bulk=True),
+        LoaderQuery("bulk_fingerprint", _schema_sql(db_loader.render_fingerprint_sql, "US"),
+                    "gvkey", _bulk, bulk=True),
+    ],
+}
+
+# 取表尾的键作样本，避免单条查询在全表扫描开头即命中而低估耗时
+_SAMPLE_KEY_SQL = {
+    "code": "SELECT stock_code FROM companies ORDER BY rowid DESC LIMIT ?",
+    "company_id": "SELECT company_id FROM companies ORDER BY rowid DESC LIMIT ?",
+    "ticker": "SELECT UPPER(tic) FROM companies ORDER BY rowid DESC LIMIT ?",
+    "gvkey": "SELECT gvkey FROM companies ORDER BY rowid DESC LIMIT ?",
+}
+
+_ALIAS_RE = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?!ON\b|WHERE\b|JOIN\b)(\w+))?", re.I)
+# 全表扫描，或 SQLite 临时建自动索引（同样要扫全表）
+_SCAN_RE = re.compile(r"^(?:SCAN (\w+)|SEARCH (\w+) USING AUTOMATIC)")
+
+
+def _render(
+    query: LoaderQuery,
+    conn: sqlite3.Connection,
+    keys: List[Any],
+) -> Tuple[str, Tuple]:
+    """按连接渲染 SQL、展开批量模板并构造绑定参数"""
+    sql = query.sql if isinstance(query.sql, str) else query.sql(conn)
+    if query.bulk:
+        sql = sql.format(
+            values=", ".join(["(?)"] * len(keys)),
+            ids=", ".join("?" * len(keys)),
+        )
+    return sql, query.params(keys)
+
+
+def _table_aliases(sql: str, tables: set) -> Dict[str, str]:
+    """SQL 中 FROM/JOIN 的别名 → 实表名（只保留真实存在的表）"""
+    aliases = {}
+    for table, alias in _ALIAS_RE.findall(sql):
+        if table in tables:
+            aliases[table] = table
+            if alias:
+                aliases[alias] = table
+    return aliases
+
+
+def _tables(conn: sqlite3.Connection) -> set:
+    return {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def _sample_keys(conn: sqlite3.Connection, key: str, n: int = SAMPLE_SIZE) -> List[Any]:
+    keys = [row[0] for row in conn.execute(_SAMPLE_KEY_SQL[key], (n,))]
+    return keys or [None]
+
+
+def explain(conn: sqlite3.Connection, market: str) -> List[QueryPlan]:
+    """对该市场的全部加载器查询执行 EXPLAIN QUERY PLAN"""
+    tables = _tables(conn)
+    results = []
+    for query in LOADER_QUERIES[market]:
+        result = QueryPlan(query.name)
+        try:
+            keys = _sample_keys(conn, query.key)
+            sql, params = _render(query, conn, keys)
+            rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        except sqlite3.Error as e:
+            result.error = str(e)
+            results.append(result)
+            continue
+        aliases = _table_aliases(sql, tables)
+        for row in rows:
+            detail = row[-1]
+            result.plan.append(detail)
+            match = _SCAN_RE.match(detail)
+            name = match and (match.group(1) or match.group(2))
+            if name in aliases:
+                result.full_scans.append(aliases[name])
+            if detail.startswith("USE TEMP B-TREE"):
+                result.temp_sort = True
+        results.append(result)
+    return results
+
+
+def missing_indexes(conn: sqlite3.Connection, market: str) -> List[IndexSpec]:
+    """尚未创建、且目标表存在的推荐索引"""
+    tables = _tables(conn)
+    existing = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index'")}
+    return [
+        spec for spec in RECOMMENDED_INDEXES[market]
+        if spec.table in tables and spec.name not in existing
+    ]
+
+
+def apply_indexes(conn: sqlite3.Connection, market: str) -> List[IndexSpec]:
+    """创建缺失的推荐索引并 ANALYZE，返回新建的索引"""
+    created = []
+    for spec in missing_indexes(conn, market):
+        logger.info(f"创建索引: {spec.create_sql}")
+        conn.execute(spec.create_sql)
+        created.append(spec)
+    if created:
+        conn.execute("ANALYZE")
+    conn.commit()
+    return created
+
+
+def time_queries(
+    conn: sqlite3.Connection,
+    market: str,
+    repeat: int = 3,
+) -> Dict[str, float]:
+    """每条加载器查询用样本键执行 repeat 次，返回最短耗时（秒）"""
+    timings = {}
+    for query in LOADER_QUERIES[market]:
+        try:
+            keys = _sample_keys(conn, query.key)
+            sql, params = _render(query, conn, keys)
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn.execute(sql, params).fetchall()
+                best = min(best, time.perf_counter() - start)
+        except sqlite3.Error as e:
+            logger.warning(f"计时失败 {market}:{query.name}: {e}")
+            continue
+        timings[query.name] = best
+    return timings
+
+
+def format_plan_report(market: str, plans: List[QueryPlan], missing: List[IndexSpec]) -> str:
+    """执行计划报告"""
+    lines = [f"## {market} 数据库", ""]
+    for plan in plans:
+        if plan.error:
+            status = f"⚠️ 无法分析: {plan.error}"
+        elif plan.full_scans:
+            status = "❌ 全表扫描: " + ", ".join(dict.fromkeys(plan.full_scans))
+        else:
+            status = "✅ 索引查找"
+        if plan.temp_sort and not plan.error:
+            status += "（临时 B 树排序）"
+        lines.append(f"- {plan.name:<18} {status}")
+    lines.append("")
+    if missing:
+        lines.append("建议索引:")
+        lines.extend(f"  {spec.create_sql};  -- {spec.reason}" for spec in missing)
+    else:
+        lines.append("推荐索引均已存在")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def format_timing_report(before: Dict[str, float], after: Dict[str, float]) -> str:
+    """建索引前后的计时对比"""
+    lines = [f"  {'查询':<18}{'之前(ms)':>10}{'之后(ms)':>10}{'加速':>8}"]
+    for name, old in before.items():
+        new = after.get(name)
+        if new is None:
+            continue
+        speedup = old / new if new > 0 else float("inf")
+        lines.append(f"  {name:<18}{old * 1000:>10.2f}{new * 1000:>10.2f}{speedup:>7.1f}x")
+    return "\n".join(lines)
@@ -0,0 +1,246 @@
+"""
+SVIP v1.0 — Instrumentation
+
+轻量级阶段计时与计数：
+- span(name)：上下文管理器，按嵌套路径（如 "allocation/weights"）聚合耗时与调用次数
+- count(key, n)：给当前 span 累加计数（stocks_loaded / queries / rows 等），同时计入全局合计
+- 运行结束输出耗时汇总表，并写出 JSON 追踪文件
+- profiled(path)：可选的 cProfile 采样（--profile）
+
+同名 span 在循环中多次进入只聚合为一条记录，追踪数据量与股票数无关。
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import unicodedata
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+
+def _ljust(text: str, width: int) -> str:
+    """按显示宽度左对齐（中文字符占两列）"""
+    display = sum(2 if unicodedata.east_asian_width(c) in "WF" else 1 for c in text)
+    return text + " " * max(0, width - display)
+
+
+def _rjust(text: str, width: int) -> str:
+    display = sum(2 if unicodedata.east_asian_width(c) in "WF" else 1 for c in text)
+    return " " * max(0, width - display) + text
+
+
+class SpanStats:
+    """一个 span 路径的聚合统计"""
+
+    __slots__ = ("path", "calls", "seconds", "min_seconds", "max_seconds", "counters")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.calls = 0
+        self.seconds = 0.0
+        self.min_seconds = float("inf")
+        self.max_seconds = 0.0
+        self.counters: Dict[str, int] = {}
+
+    def add(self, seconds: float, calls: int = 1) -> None:
+        self.calls += calls
+        self.seconds += seconds
+        self.min_seconds = min(self.min_seconds, seconds)
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "name": self.path.rsplit("/", 1)[-1],
+            "depth": self.path.count("/"),
+            "calls": self.calls,
+            "seconds": self.seconds,
+            "min_seconds": self.min_seconds if self.calls else 0.0,
+            "max_seconds": self.max_seconds,
+            "counters": dict(self.counters),
+        }
+
+
+class Tracer:
+    """
+    阶段追踪器
+
+    stats 按 span 首次出现的顺序保存（dict 保序），汇总表即按执行顺序输出。
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.stats: Dict[str, SpanStats] = {}
+        self.counters: Dict[str, int] = {}
+        self._stack: List[str] = []
+        self.started = datetime.now()
+        self._start = time.perf_counter()
+
+    @property
+    def current_path(self) -> str:
+        return self._stack[-1] if self._stack else ""
+
+    def _stats_for(self, path: str) -> SpanStats:
+        stats = self.stats.get(path)
+        if stats is None:
+            stats = self.stats[path] = SpanStats(path)
+        return stats
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[SpanStats]:
+        """计时一个阶段；嵌套 span 的路径为 父路径/name"""
+        parent = self.current_path
+        path = f"{parent}/{name}" if parent else name
+        stats = self._stats_for(path)
+        self._stack.append(path)
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.add(time.perf_counter() - start)
+            self._stack.pop()
+
+    def count(self, key: str, n: int = 1) -> None:
+        """给当前 span 与全局计数累加 n"""
+        self.counters[key] = self.counters.get(key, 0) + n
+        if self._stack:
+            counters = self.stats[self._stack[-1]].counters
+            counters[key] = counters.get(key, 0) + n
+
+    @contextmanager
+    def isolated(self) -> Iterator["Tracer"]:
+        """
+        临时切换到一份空白状态（供并行 worker 使用），退出时恢复原状态。
+
+        产生的统计由调用方用 export() 取出，在主进程 merge() 回去。
+        """
+        saved = (self.stats, self.counters, self._stack, self.started, self._start)
+        self.reset()
+        try:
+            yield self
+        finally:
+            self.stats, self.counters, self._stack, self.started, self._start = saved
+
+    def export(self) -> Dict[str, Any]:
+        """导出统计（可 pickle，跨进程传回）"""
+        return {
+            "spans": [stats.to_dict() for stats in self._tree_order()],
+            "counters": dict(self.counters),
+        }
+
+    def merge(self, exported: Dict[str, Any]) -> None:
+        """把 export() 的结果并入当前 span 之下"""
+        parent = self.current_path
+        for span in exported["spans"]:
+            path = f"{parent}/{span['path']}" if parent else span["path"]
+            stats = self._stats_for(path)
+            stats.calls += span["calls"]
+            stats.seconds += span["seconds"]
+            if span["calls"]:
+                stats.min_seconds = min(stats.min_seconds, span["min_seconds"])
+            stats.max_seconds = max(stats.max_seconds, span["max_seconds"])
+            for key, n in span["counters"].items():
+                stats.counters[key] = stats.counters.get(key, 0) + n
+        for key, n in exported["counters"].items():
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def _tree_order(self) -> List[SpanStats]:
+        """深度优先排列：子阶段紧跟父阶段，同级保持首次出现顺序"""
+        children: Dict[str, List[SpanStats]] = {}
+        for stats in self.stats.values():
+            parent = stats.path.rsplit("/", 1)[0] if "/" in stats.path else ""
+            children.setdefault(parent, []).append(stats)
+        ordered: List[SpanStats] = []
+
+        def visit(path: str) -> None:
+            for stats in children.get(path, []):
+                ordered.append(stats)
+                visit(stats.path)
+
+        visit("")
+        return ordered
+
+    def summary_table(self) -> str:
+        """
+        耗时汇总表（按执行顺序，子阶段缩进）
+
+        并行 worker 的阶段耗时按各进程累加合并，占比可能超过 100%。
+        """
+        wall = time.perf_counter() - self._start
+        lines = [
+            _ljust("阶段", 34) + _rjust("调用", 8) + _rjust("耗时(s)", 10)
+            + _rjust("占比", 8) + "  计数",
+            "-" * 78,
+        ]
+        for stats in self._tree_order():
+            depth = stats.path.count("/")
+            label = "  " * depth + stats.path.rsplit("/", 1)[-1]
+            share = stats.seconds / wall if wall > 0 else 0.0
+            counters = "  ".join(f"{k}={v}" for k, v in stats.counters.items())
+            lines.append(
+                f"{_ljust(label, 34)}{stats.calls:>8}{stats.seconds:>10.3f}{share:>8.1%}"
+                f"  {counters}".rstrip()
+            )
+        lines.append("-" * 78)
+        lines.append(f"{_ljust('总耗时', 34)}{'':>8}{wall:>10.3f}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON 追踪内容"""
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall_seconds": time.perf_counter() - self._start,
+            "argv": sys.argv,
+            **self.export(),
+        }
+
+    def write_json(self, path: str) -> str:
+        """写出 JSON 追踪文件"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+# 进程级全局追踪器
+tracer = Tracer()
+
+
+def span(name: str):
+    """tracer.span 的快捷方式"""
+    return tracer.span(name)
+
+
+def count(key: str, n: int = 1) -> None:
+    """tracer.count 的快捷方式"""
+    tracer.count(key, n)
+
+
+@contextmanager
+def profiled(path: Optional[str] = None, top: int = 20) -> Iterator[Optional[cProfile.Profile]]:
+    """
+    cProfile 采样
+
+    path 为 None 时不采样；否则结束后写出 .prof 文件并打印累计耗时前 top 的函数。
+    """
+    if path is None:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        profiler.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        print(out.getvalue())
+        print(f"📄 cProfile 已保存: {path}")
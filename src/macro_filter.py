@@ -9,9 +9,15 @@ SVIP v1.0 — A4 Macro Filter (宏观慢变量过滤器)
 输出：MacroRiskFactor (0.75 - 1.10)
 不是择时，只是回答：资金地形是否允许慢变量释放能量？
 """
-from typing import Optional
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
 from config.settings import settings, MacroConfig
-from src.models import MacroState, MacroWind
+from src.models import MacroState, MacroStateBatch, MacroWind, MACRO_WINDS
+
+# 批量接口的输入：标量（对全部行相同）、等长数组或 None（缺失）；数组中的 NaN 也视为缺失
+ArrayLike = Union[None, float, Sequence[float], np.ndarray]
 
 
 def score_interest_rate(
@@ -187,3 +193,103 @@ def compute_macro_state(
     state.macro_risk_factor = cfg.factor_map.get(state.total_score, 0.90)
 
     return state
+
+
+# ===============================================================================
+# 批量（列式）版本
+# ===============================================================================
+
+def broadcast_columns(**columns: ArrayLike) -> Dict[str, np.ndarray]:
+    """把标量 / 数组 / None 输入广播为等长 float 数组（None → NaN）"""
+    names = list(columns)
+    arrays = np.broadcast_arrays(*(
+        np.atleast_1d(np.asarray(np.nan if v is None else v, dtype=float))
+        for v in columns.values()
+    ))
+    return {name: np.array(a, dtype=float) for name, a in zip(names, arrays)}
+
+
+def _signal(up: np.ndarray, down: np.ndarray) -> np.ndarray:
+    """单个指标的 +1 / 0 / -1 信号（NaN 与两侧比较均为 False，得 0）"""
+    return np.where(up, 1, np.where(down, -1, 0))
+
+
+def _combine(*pairs) -> np.ndarray:
+    """
+    (信号, 原始值) 对 → 分项评分：有效信号均值 > 0.3 为 +1，< -0.3 为 -1。
+    与标量版本一致，缺失的指标不计入均值；全部缺失时为 0。
+    """
+    total = np.zeros(len(pairs[0][1]), dtype=int)
+    count = np.zeros(len(pairs[0][1]), dtype=int)
+    for signal, values in pairs:
+        present = ~np.isnan(values)
+        total += np.where(present, signal, 0)
+        count += present
+    avg = total / np.maximum(count, 1)
+    score = np.where(avg > 0.3, 1, np.where(avg < -0.3, -1, 0))
+    return np.where(count > 0, score, 0)
+
+
+def compute_macro_state_batch(
+    yield_spread: ArrayLike = None,
+    real_yield: ArrayLike = None,
+    credit_spread: ArrayLike = None,
+    m2_yoy: ArrayLike = None,
+    fci: ArrayLike = None,
+    credit_growth: ArrayLike = None,
+    earnings_yoy: ArrayLike = None,
+    ism_new_orders: ArrayLike = None,
+    cfg: MacroConfig = None,
+) -> MacroStateBatch:
+    """
+    批量计算宏观状态（compute_macro_state 的列式版本）。
+
+    各输入可为标量或等长数组，广播后逐行计算；逐行结果与 compute_macro_state 完全一致。
+    """
+    if cfg is None:
+        cfg = settings.macro
+
+    c = broadcast_columns(
+        yield_spread=yield_spread, real_yield=real_yield, credit_spread=credit_spread,
+        m2_yoy=m2_yoy, fci=fci, credit_growth=credit_growth,
+        earnings_yoy=earnings_yoy, ism_new_orders=ism_new_orders,
+    )
+    ys, ry, cs = c["yield_spread"], c["real_yield"], c["credit_spread"]
+    m2, fc, cg = c["m2_yoy"], c["fci"], c["credit_growth"]
+    ey, ism = c["earnings_yoy"], c["ism_new_orders"]
+
+    interest_rate = _combine(
+        (_signal(ys > 0.5, ys < -0.2), ys),
+        (_signal(ry < 0.5, ry > 2.0), ry),
+        (_signal(cs < 3.5, cs > 5.0), cs),
+    )
+    liquidity = _combine(
+        (_signal(m2 > 0.06, m2 < 0.02), m2),
+        (_signal(fc < -0.5, fc > 0.5), fc),
+        (_signal(cg > 0.05, cg < 0.0), cg),
+    )
+    earnings = _combine(
+        (_signal(ey > 0.05, ey < -0.05), ey),
+        (_signal(ism > 52, ism < 48), ism),
+    )
+    total = interest_rate + liquidity + earnings
+
+    wind = np.where(
+        total >= 2, MACRO_WINDS.index(MacroWind.TAILWIND),
+        np.where(total <= -2, MACRO_WINDS.index(MacroWind.HEADWIND),
+                 MACRO_WINDS.index(MacroWind.NEUTRAL)),
+    ).astype(np.int8)
+    factor_table = np.array([cfg.factor_map.get(score, 0.90) for score in range(-3, 4)])
+
+    return MacroStateBatch(
+        interest_rate_score=interest_rate,
+        liquidity_score=liquidity,
+        earnings_cycle_score=earnings,
+        total_score=total,
+        wind=wind,
+        macro_risk_factor=factor_table[total + 3],
+        yield_spread_10y2y=ys,
+        real_yield=ry,
+        credit_spread=cs,
+        m2_yoy=m2,
+    )
@@ -0,0 +1,121 @@
+"""
+SVIP v1.0 — Derived Metrics Cache
+
+数据库衍生指标的持久化缓存（sidecar SQLite）。
+
+ROIC 中位数、FCF 转化率、毛利率波动等指标只依赖年报行，
+而年报一年只变几次。缓存按 (market, company_key) 存储，
+以年报行的 SQL 聚合指纹（取数窗口、行数、最大 rowid、指标列校验和，
+最新财年单独比对）判定是否失效：新增年报与原地修订历史年报都会使指纹变化。
+指纹一次聚合查询取回，命中的公司不再读取原始年报行，只有指纹变化的公司才取行重算。
+"""
+import json
+import logging
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 指标公式版本：修改衍生指标计算逻辑时递增，使旧缓存整体失效
+METRICS_VERSION = 3
+
+
+def metrics_fingerprint(years: int, n_rows: int, max_rowid: int, checksum: str) -> str:
+    """年报行指纹（含公式版本号与取数窗口；最新财年单独存放）"""
+    return f"v{METRICS_VERSION}:{years}:{n_rows}:{max_rowid}:{checksum}"
+
+
+class DerivedMetricsCache:
+    """
+    衍生指标缓存
+
+    同一市场的缓存行在首次访问时整体读入内存，写入先暂存，
+    flush()/close() 时一次性提交。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # 多进程加载时各 worker 共用同一缓存文件，写锁等待放宽到 30 秒
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS derived_metrics (
+                market TEXT NOT NULL,
+                company_key TEXT NOT NULL,
+                fiscal_year INTEGER,
+                checksum TEXT NOT NULL,       -- 年报行指纹（metrics_fingerprint）
+                metrics TEXT NOT NULL,
+                PRIMARY KEY (market, company_key)
+            )
+        """)
+        self.conn.commit()
+        self._entries: Dict[str, Dict[str, Tuple[Any, str, str]]] = {}
+        self._pending: List[Tuple[str, str, Any, str, str]] = []
+        self.hits = 0
+        self.misses = 0
+
+    def _market_entries(self, market: str) -> Dict[str, Tuple[Any, str, str]]:
+        if market not in self._entries:
+            cursor = self.conn.execute(
+                "SELECT company_key, fiscal_year, checksum, metrics"
+                " FROM derived_metrics WHERE market = ?",
+                (market,),
+            )
+            self._entries[market] = {
+                key: (year, checksum, metrics) for key, year, checksum, metrics in cursor
+            }
+        return self._entries[market]
+
+    def get(
+        self,
+        market: str,
+        company_key: Any,
+        fiscal_year: Any,
+        fingerprint: str,
+    ) -> Optional[Dict[str, Any]]:
+        """命中且未失效时返回指标字典，否则返回 None"""
+        entry = self._market_entries(market).get(str(company_key))
+        if entry and entry[0] == fiscal_year and entry[1] == fingerprint:
+            self.hits += 1
+            return json.loads(entry[2])
+        self.misses += 1
+        return None
+
+    def put(
+        self,
+        market: str,
+        company_key: Any,
+        fiscal_year: Any,
+        fingerprint: str,
+        metrics: Dict[str, Any],
+    ) -> None:
+        """写入（或覆盖）一家公司的指标"""
+        payload = json.dumps(metrics)
+        self._market_entries(market)[str(company_key)] = (fiscal_year, fingerprint, payload)
+        self._pending.append((market, str(company_key), fiscal_year, fingerprint, payload))
+
+    def flush(self) -> None:
+        """提交暂存的写入"""
+        if not self._pending:
+            return
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO derived_metrics"
+            " (market, company_key, fiscal_year, checksum, metrics)"
+            " VALUES (?, ?, ?, ?, ?)",
+            self._pending,
+        )
+        self.conn.commit()
+        logger.info(f"衍生指标缓存: 写入 {len(self._pending)} 条")
+        self._pending.clear()
+
+    def close(self) -> None:
+        if self.conn:
+            self.flush()
+            logger.info(f"衍生指标缓存: 命中 {self.hits}，重算 {self.misses}")
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
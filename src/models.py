@@ -4,11 +4,13 @@ SVIP v1.0 Data Models
 慢变量投资池系统 — 所有数据结构定义。
 基于 A0-A11 理论体系。
 """
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, make_dataclass
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Callable, Optional, List, Dict, Sequence, Tuple
 from enum import Enum
 
+import numpy as np
+
 
 # ============================================================================
 # 枚举类型
@@ -77,11 +79,28 @@ class PoolAction(str, Enum):
     EXIT = "exit"            # 清仓
 
 
+class BlockReason(str, Enum):
+    """禁入原因"""
+    NO_SCORE = "no_score"          # 无 SVI 评分
+    HARD_SCREEN = "hard_screen"    # 未通过硬筛选
+    LOW_SVI = "low_svi"            # SVI 总分不足
+
+
+# 枚举的整数编码（列式/批量结果使用）：编码 = 枚举定义顺序中的下标
+SVI_LEVELS = tuple(SVILevel)
+VALUATION_TIERS = tuple(ValuationTier)
+PHASE_STATES = tuple(PhaseState)
+POOL_ACTIONS = tuple(PoolAction)
+MACRO_WINDS = tuple(MacroWind)
+TAIL_RISK_STATES = tuple(TailRiskState)
+BLOCK_REASONS = tuple(BlockReason)
+
+
 # ============================================================================
 # 核心数据结构
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class SVIScore:
     """SVI 慢变量指数评分结果"""
     symbol: str
@@ -106,6 +125,60 @@ class SVIScore:
 
 
 @dataclass
+class SVIScoreBatch:
+    """
+    SVI 批量评分结果（列式）
+
+    每个字段为等长数组，第 i 行对应一只股票；level 为 SVI_LEVELS 下标编码。
+    """
+    symbol: np.ndarray
+    market: np.ndarray
+    passed_hard_screen: np.ndarray
+    roic_score: np.ndarray
+    fcf_score: np.ndarray
+    margin_stability_score: np.ndarray
+    concentration_score: np.ndarray
+    moat_score: np.ndarray
+    demand_rigidity_score: np.ndarray
+    substitution_risk_score: np.ndarray
+    total: np.ndarray
+    level: np.ndarray
+    roic_10y_median: np.ndarray
+    fcf_conversion: np.ndarray
+    gross_margin_std: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.symbol)
+
+    def levels(self) -> List[SVILevel]:
+        """level 编码 → SVILevel 列表"""
+        return [SVI_LEVELS[code] for code in self.level]
+
+    def to_score(self, i: int) -> SVIScore:
+        """物化第 i 行为 SVIScore"""
+        return SVIScore(
+            symbol=self.symbol[i],
+            market=self.market[i],
+            passed_hard_screen=bool(self.passed_hard_screen[i]),
+            roic_score=float(self.roic_score[i]),
+            fcf_score=float(self.fcf_score[i]),
+            margin_stability_score=float(self.margin_stability_score[i]),
+            concentration_score=float(self.concentration_score[i]),
+            moat_score=float(self.moat_score[i]),
+            demand_rigidity_score=float(self.demand_rigidity_score[i]),
+            substitution_risk_score=float(self.substitution_risk_score[i]),
+            total=float(self.total[i]),
+            level=SVI_LEVELS[self.level[i]],
+            roic_10y_median=float(self.roic_10y_median[i]),
+            fcf_conversion=float(self.fcf_conversion[i]),
+            gross_margin_std=float(self.gross_margin_std[i]),
+        )
+
+    def to_scores(self) -> List[SVIScore]:
+        return [self.to_score(i) for i in range(len(self))]
+
+
+@dataclass(slots=True)
 class ValuationResult:
     """A1 估值安全垫评估结果"""
     symbol: str
@@ -125,6 +198,61 @@ class ValuationResult:
 
 
 @dataclass
+class ValuationBatch:
+    """
+    A1 批量估值结果（列式）
+
+    每个字段为等长数组；red_flag_a/b/c 为布尔掩码，tier 为 VALUATION_TIERS 下标编码。
+    """
+    symbol: np.ndarray
+    fcf_yield: np.ndarray
+    pe_ratio: np.ndarray
+    growth_rate: np.ndarray
+    qpeg: np.ndarray
+    valuation_percentile: np.ndarray
+    red_flag_a: np.ndarray
+    red_flag_b: np.ndarray
+    red_flag_c: np.ndarray
+    red_flag_count: np.ndarray
+    tier: np.ndarray
+    valuation_factor: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.symbol)
+
+    @property
+    def red_flags(self) -> np.ndarray:
+        """三个红旗合成的位掩码（RED_FLAG_A | RED_FLAG_B | RED_FLAG_C，同 Universe.red_flags）"""
+        return (
+            self.red_flag_a * RED_FLAG_A + self.red_flag_b * RED_FLAG_B + self.red_flag_c * RED_FLAG_C
+        ).astype(np.uint8)
+
+    def tiers(self) -> List[ValuationTier]:
+        """tier 编码 → ValuationTier 列表"""
+        return [VALUATION_TIERS[code] for code in self.tier]
+
+    def to_result(self, i: int) -> ValuationResult:
+        """物化第 i 行为 ValuationResult"""
+        return ValuationResult(
+            symbol=self.symbol[i],
+            fcf_yield=float(self.fcf_yield[i]),
+            pe_ratio=float(self.pe_ratio[i]),
+            growth_rate=float(self.growth_rate[i]),
+            qpeg=float(self.qpeg[i]),
+            valuation_percentile=float(self.valuation_percentile[i]),
+            red_flag_a=bool(self.red_flag_a[i]),
+            red_flag_b=bool(self.red_flag_b[i]),
+            red_flag_c=bool(self.red_flag_c[i]),
+            red_flag_count=int(self.red_flag_count[i]),
+            tier=VALUATION_TIERS[self.tier[i]],
+            valuation_factor=float(self.valuation_factor[i]),
+        )
+
+    def to_results(self) -> List[ValuationResult]:
+        return [self.to_result(i) for i in range(len(self))]
+
+
+@dataclass(slots=True)
 class AccelerationResult:
     """A2 慢变量加速检测结果"""
     symbol: str
@@ -140,6 +268,48 @@ class AccelerationResult:
     phase_factor: float = 1.0
 
 
+@dataclass
+class AccelerationBatch:
+    """
+    A2 批量加速检测结果（列式）
+
+    每个字段为等长数组；phase 为 PHASE_STATES 下标编码。
+    """
+    symbol: np.ndarray
+    theme: np.ndarray
+    penetration_score: np.ndarray
+    cost_curve_score: np.ndarray
+    capex_score: np.ndarray
+    policy_score: np.ndarray
+    acceleration_score: np.ndarray
+    phase: np.ndarray
+    phase_factor: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.symbol)
+
+    def phases(self) -> List[PhaseState]:
+        """phase 编码 → PhaseState 列表"""
+        return [PHASE_STATES[code] for code in self.phase]
+
+    def to_result(self, i: int) -> AccelerationResult:
+        """物化第 i 行为 AccelerationResult"""
+        return AccelerationResult(
+            symbol=self.symbol[i],
+            theme=self.theme[i],
+            penetration_score=float(self.penetration_score[i]),
+            cost_curve_score=float(self.cost_curve_score[i]),
+            capex_score=float(self.capex_score[i]),
+            policy_score=float(self.policy_score[i]),
+            acceleration_score=float(self.acceleration_score[i]),
+            phase=PHASE_STATES[self.phase[i]],
+            phase_factor=float(self.phase_factor[i]),
+        )
+
+    def to_results(self) -> List[AccelerationResult]:
+        return [self.to_result(i) for i in range(len(self))]
+
+
 @dataclass
 class SVIPStock:
     """SVIP 投资池中的单只股票完整画像"""
@@ -161,6 +331,55 @@ class SVIPStock:
     action: PoolAction = PoolAction.HOLD
 
 
+def _frozen_variant(cls: type) -> type:
+    """同字段（名称、类型、缺省值）的只读 slots 变体"""
+    frozen = make_dataclass(
+        f"Frozen{cls.__name__}",
+        [(f.name, f.type, field(default=f.default)) for f in fields(cls)],
+        frozen=True, slots=True,
+    )
+    frozen.__module__ = __name__
+    frozen.__doc__ = f"{cls.__doc__}（只读）"
+    return frozen
+
+
+# 只读评分结果：可哈希、可在缓存 / 回测历史间共享，属性与可变版本一致
+FrozenSVIScore = _frozen_variant(SVIScore)
+FrozenValuationResult = _frozen_variant(ValuationResult)
+FrozenAccelerationResult = _frozen_variant(AccelerationResult)
+
+_FROZEN_TYPES = {
+    SVIScore: FrozenSVIScore,
+    ValuationResult: FrozenValuationResult,
+    AccelerationResult: FrozenAccelerationResult,
+}
+_MUTABLE_TYPES = {frozen: cls for cls, frozen in _FROZEN_TYPES.items()}
+
+
+def freeze(result):
+    """SVIScore / ValuationResult / AccelerationResult → 只读变体（None 与已冻结对象原样返回）"""
+    cls = _FROZEN_TYPES.get(type(result))
+    if cls is None:
+        return result
+    return cls(**{f.name: getattr(result, f.name) for f in fields(result)})
+
+
+def thaw(result):
+    """只读变体 → 可变评分结果（None 与可变对象原样返回）"""
+    cls = _MUTABLE_TYPES.get(type(result))
+    if cls is None:
+        return result
+    return cls(**{f.name: getattr(result, f.name) for f in fields(result)})
+
+
+def freeze_stock(stock: SVIPStock) -> SVIPStock:
+    """把股票的三层评分结果替换为只读变体（原地修改并返回）"""
+    stock.svi = freeze(stock.svi)
+    stock.valuation = freeze(stock.valuation)
+    stock.acceleration = freeze(stock.acceleration)
+    return stock
+
+
 @dataclass
 class MacroState:
     """A4 宏观慢变量状态"""
@@ -194,6 +413,139 @@ class TailRiskResult:
     credit_spread_change: Optional[float] = None
 
 
+def _optional(value: float) -> Optional[float]:
+    """批量结果中的 NaN → None（对应标量接口的缺失输入）"""
+    return None if np.isnan(value) else float(value)
+
+
+@dataclass
+class MacroStateBatch:
+    """
+    A4 批量宏观状态（列式）
+
+    每个字段为等长数组；wind 为 MACRO_WINDS 下标编码，原始输入缺失为 NaN。
+    """
+    interest_rate_score: np.ndarray
+    liquidity_score: np.ndarray
+    earnings_cycle_score: np.ndarray
+    total_score: np.ndarray
+    wind: np.ndarray
+    macro_risk_factor: np.ndarray
+    yield_spread_10y2y: np.ndarray
+    real_yield: np.ndarray
+    credit_spread: np.ndarray
+    m2_yoy: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.total_score)
+
+    def to_state(self, i: int) -> MacroState:
+        """物化第 i 行为 MacroState"""
+        return MacroState(
+            interest_rate_score=int(self.interest_rate_score[i]),
+            liquidity_score=int(self.liquidity_score[i]),
+            earnings_cycle_score=int(self.earnings_cycle_score[i]),
+            total_score=int(self.total_score[i]),
+            wind=MACRO_WINDS[self.wind[i]],
+            macro_risk_factor=float(self.macro_risk_factor[i]),
+            yield_spread_10y2y=_optional(self.yield_spread_10y2y[i]),
+            real_yield=_optional(self.real_yield[i]),
+            credit_spread=_optional(self.credit_spread[i]),
+            m2_yoy=_optional(self.m2_yoy[i]),
+        )
+
+
+@dataclass
+class TailRiskBatch:
+    """
+    A7 批量尾部风险评估（列式）
+
+    每个字段为等长数组；state 为 TAIL_RISK_STATES 下标编码，原始输入缺失为 NaN。
+    """
+    liquidity_risk: np.ndarray
+    regime_risk: np.ndarray
+    disruption_risk: np.ndarray
+    state: np.ndarray
+    tail_risk_factor: np.ndarray
+    vix: np.ndarray
+    credit_spread_change: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.state)
+
+    def to_result(self, i: int) -> TailRiskResult:
+        """物化第 i 行为 TailRiskResult"""
+        return TailRiskResult(
+            liquidity_risk=float(self.liquidity_risk[i]),
+            regime_risk=float(self.regime_risk[i]),
+            disruption_risk=float(self.disruption_risk[i]),
+            state=TAIL_RISK_STATES[self.state[i]],
+            tail_risk_factor=float(self.tail_risk_factor[i]),
+            vix=_optional(self.vix[i]),
+            credit_spread_change=_optional(self.credit_spread_change[i]),
+        )
+
+
+@dataclass
+class BlockedRows:
+    """
+    禁入池的紧凑行（列式）
+
+    每行只保留代码、禁入原因（BLOCK_REASONS 下标编码）与关键指标（SVI 总分，无评分为 NaN）；
+    完整 SVIPStock 由 loader(行号) 按需物化。
+    """
+    symbol: np.ndarray
+    reason: np.ndarray
+    metric: np.ndarray
+    loader: Optional[Callable[[int], SVIPStock]] = field(default=None, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.symbol)
+
+    def reasons(self) -> List[BlockReason]:
+        """reason 编码 → BlockReason 列表"""
+        return [BLOCK_REASONS[code] for code in self.reason]
+
+    def to_stock(self, i: int) -> SVIPStock:
+        """物化第 i 行为 SVIPStock（pool 为 BLOCK）"""
+        if self.loader is None:
+            raise ValueError("BlockedRows 未保留物化来源")
+        stock = self.loader(i)
+        stock.pool = SVILevel.BLOCK
+        return stock
+
+    def to_stocks(self) -> List[SVIPStock]:
+        return [self.to_stock(i) for i in range(len(self))]
+
+    @classmethod
+    def from_stocks(cls, stocks: Sequence[SVIPStock]) -> "BlockedRows":
+        """
+        由已分入禁入池的 SVIPStock 构建
+
+        先打包为列式 Universe，不保留对原对象的引用，物化时由列重建新对象；
+        原对象在调用方释放后即可回收（构建期间的峰值内存不变）。
+        """
+        universe = Universe.from_stocks(stocks)
+        universe.pool[:] = SVI_LEVELS.index(SVILevel.BLOCK)
+        return universe.blocked_rows()
+
+    @classmethod
+    def concat(cls, parts: Sequence["BlockedRows"]) -> "BlockedRows":
+        """按顺序拼接，物化时分派到各部分的 loader"""
+        offsets = np.cumsum([0] + [len(part) for part in parts])
+
+        def loader(i: int) -> SVIPStock:
+            k = int(np.searchsorted(offsets, i, side="right")) - 1
+            return parts[k].to_stock(i - int(offsets[k]))
+
+        return cls(
+            symbol=np.concatenate([part.symbol for part in parts]) if parts else np.empty(0, dtype=object),
+            reason=np.concatenate([part.reason for part in parts]) if parts else np.empty(0, dtype=np.int8),
+            metric=np.concatenate([part.metric for part in parts]) if parts else np.empty(0),
+            loader=loader,
+        )
+
+
 @dataclass
 class PortfolioAllocation:
     """组合配置输出"""
@@ -217,6 +569,20 @@ class PortfolioAllocation:
     final_equity_ceiling: float = 0.85
     # 违规
     violations: List[str] = field(default_factory=list)
+    # 惰性模式下的禁入池紧凑行（此时 stocks 只含 Core / Watch）
+    blocked: Optional[BlockedRows] = None
+
+    @property
+    def n_block(self) -> int:
+        """禁入池股票数（含紧凑行）"""
+        n = sum(1 for s in self.stocks if s.pool == SVILevel.BLOCK)
+        return n + (len(self.blocked) if self.blocked is not None else 0)
+
+    def all_stocks(self) -> List[SVIPStock]:
+        """含禁入池的全部股票（紧凑行在此时物化）"""
+        if self.blocked is None:
+            return list(self.stocks)
+        return self.stocks + self.blocked.to_stocks()
 
 
 @dataclass
@@ -243,3 +609,376 @@ class SVIPReport:
     # 系统状态
     macro: Optional[MacroState] = None
     tail_risk: Optional[TailRiskResult] = None
+
+
+# ============================================================================
+# 列式股票池（struct-of-arrays，热路径使用）
+# ============================================================================
+
+def _encode(values: Sequence[str]) -> Tuple[np.ndarray, Tuple[str, ...]]:
+    """分类编码：按首次出现顺序分配 int32 编码"""
+    index: Dict[str, int] = {}
+    codes = np.fromiter(
+        (index.setdefault(v, len(index)) for v in values),
+        dtype=np.int32, count=len(values),
+    )
+    return codes, tuple(index)
+
+
+# (Universe 列名, 结果对象属性名)
+_SVI_COLUMNS = (
+    ("roic_score", "roic_score"),
+    ("fcf_score", "fcf_score"),
+    ("margin_stability_score", "margin_stability_score"),
+    ("concentration_score", "concentration_score"),
+    ("moat_score", "moat_score"),
+    ("demand_rigidity_score", "demand_rigidity_score"),
+    ("substitution_risk_score", "substitution_risk_score"),
+    ("svi_total", "total"),
+    ("roic_10y_median", "roic_10y_median"),
+    ("fcf_conversion", "fcf_conversion"),
+    ("gross_margin_std", "gross_margin_std"),
+)
+_VALUATION_COLUMNS = (
+    ("fcf_yield", "fcf_yield"),
+    ("pe_ratio", "pe_ratio"),
+    ("growth_rate", "growth_rate"),
+    ("qpeg", "qpeg"),
+    ("valuation_percentile", "valuation_percentile"),
+    ("valuation_factor", "valuation_factor"),
+)
+_ACCELERATION_COLUMNS = (
+    ("penetration_score", "penetration_score"),
+    ("cost_curve_score", "cost_curve_score"),
+    ("capex_score", "capex_score"),
+    ("policy_score", "policy_score"),
+    ("acceleration_score", "acceleration_score"),
+    ("phase_factor", "phase_factor"),
+)
+_WEIGHT_COLUMNS = ("raw_weight", "target_weight", "current_weight")
+
+# 红旗位掩码
+RED_FLAG_A = 1
+RED_FLAG_B = 2
+RED_FLAG_C = 4
+
+
+@dataclass
+class Universe:
+    """
+    列式股票池（struct-of-arrays）
+
+    symbol/name/market/sector/theme 存为 int32 分类编码 + 类别表，
+    评分、因子、权重存为连续 float64 数组，枚举存为 int8 编码
+    （SVI_LEVELS / VALUATION_TIERS / PHASE_STATES / POOL_ACTIONS 下标）。
+    20k 只股票约 5MB，各引擎可直接做数组运算。
+
+    与 SVIPStock 互转：from_stocks() / to_stocks()。
+    SVIScore/ValuationResult/AccelerationResult 的 symbol、market、theme
+    视为与所属股票一致。
+    """
+    # 分类列
+    symbol_code: np.ndarray
+    name_code: np.ndarray
+    market_code: np.ndarray
+    sector_code: np.ndarray
+    theme_code: np.ndarray
+    symbol_cats: Tuple[str, ...]
+    name_cats: Tuple[str, ...]
+    market_cats: Tuple[str, ...]
+    sector_cats: Tuple[str, ...]
+    theme_cats: Tuple[str, ...]
+    # 三层评分是否存在
+    has_svi: np.ndarray
+    has_valuation: np.ndarray
+    has_acceleration: np.ndarray
+    # SVI
+    passed_hard_screen: np.ndarray
+    roic_score: np.ndarray
+    fcf_score: np.ndarray
+    margin_stability_score: np.ndarray
+    concentration_score: np.ndarray
+    moat_score: np.ndarray
+    demand_rigidity_score: np.ndarray
+    substitution_risk_score: np.ndarray
+    svi_total: np.ndarray
+    svi_level: np.ndarray
+    roic_10y_median: np.ndarray
+    fcf_conversion: np.ndarray
+    gross_margin_std: np.ndarray
+    # A1 估值
+    fcf_yield: np.ndarray
+    pe_ratio: np.ndarray
+    growth_rate: np.ndarray
+    qpeg: np.ndarray
+    valuation_percentile: np.ndarray
+    red_flags: np.ndarray           # RED_FLAG_A | RED_FLAG_B | RED_FLAG_C
+    red_flag_count: np.ndarray
+    tier: np.ndarray
+    valuation_factor: np.ndarray
+    # A2 加速
+    penetration_score: np.ndarray
+    cost_curve_score: np.ndarray
+    capex_score: np.ndarray
+    policy_score: np.ndarray
+    acceleration_score: np.ndarray
+    phase: np.ndarray
+    phase_factor: np.ndarray
+    # 组合
+    raw_weight: np.ndarray
+    target_weight: np.ndarray
+    current_weight: np.ndarray
+    pool: np.ndarray
+    action: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.symbol_code)
+
+    @property
+    def nbytes(self) -> int:
+        """数组占用字节数"""
+        return sum(
+            getattr(self, f.name).nbytes for f in fields(self)
+            if isinstance(getattr(self, f.name), np.ndarray)
+        )
+
+    def labels(self, column: str) -> np.ndarray:
+        """解码分类列，如 labels("symbol") → 股票代码数组"""
+        cats = np.asarray(getattr(self, f"{column}_cats"), dtype=object)
+        return cats[getattr(self, f"{column}_code")]
+
+    # ------------------------------------------------------------------
+    # 行选择
+    # ------------------------------------------------------------------
+
+    def _map_arrays(self, fn) -> "Universe":
+        values = {}
+        for f in fields(self):
+            value = getattr(self, f.name)
+            values[f.name] = fn(value) if isinstance(value, np.ndarray) else value
+        return Universe(**values)
+
+    def take(self, index: np.ndarray) -> "Universe":
+        """按下标/布尔掩码取子集（复制）"""
+        return self._map_arrays(lambda a: a[index])
+
+    def view(self, start: int, stop: int) -> "Universe":
+        """连续行区间的零拷贝视图，对视图的写入直接作用于原数组"""
+        return self._map_arrays(lambda a: a[start:stop])
+
+    def group_by_pool(self) -> "Universe":
+        """按 pool 编码稳定排序（复制一次），之后可用 pool_view() 取零拷贝视图"""
+        return self.take(np.argsort(self.pool, kind="stable"))
+
+    def pool_view(self, level: SVILevel) -> "Universe":
+        """某个池的零拷贝视图（要求已 group_by_pool）"""
+        if len(self) > 1 and np.any(np.diff(self.pool) < 0):
+            raise ValueError("Universe 未按 pool 分组，请先调用 group_by_pool()")
+        code = SVI_LEVELS.index(level)
+        start = int(np.searchsorted(self.pool, code, side="left"))
+        stop = int(np.searchsorted(self.pool, code, side="right"))
+        return self.view(start, stop)
+
+    # ------------------------------------------------------------------
+    # 与 dataclass 互转
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_stocks(cls, stocks: Sequence["SVIPStock"]) -> "Universe":
+        """由 SVIPStock 列表构建"""
+        n = len(stocks)
+        default_svi = SVIScore(symbol="", market="")
+        default_val = ValuationResult(symbol="")
+        default_accel = AccelerationResult(symbol="")
+        svis = [s.svi or default_svi for s in stocks]
+        vals = [s.valuation or default_val for s in stocks]
+        accels = [s.acceleration or default_accel for s in stocks]
+
+        def floats(objs, attr) -> np.ndarray:
+            return np.fromiter((getattr(o, attr) for o in objs), dtype=float, count=n)
+
+        def codes(values, order) -> np.ndarray:
+            index = {member: i for i, member in enumerate(order)}
+            return np.fromiter((index[v] for v in values), dtype=np.int8, count=n)
+
+        def flags(objs, attr) -> np.ndarray:
+            return np.fromiter((bool(getattr(o, attr)) for o in objs), dtype=bool, count=n)
+
+        columns = {}
+        for column in ("symbol", "name", "market", "sector", "theme"):
+            columns[f"{column}_code"], columns[f"{column}_cats"] = _encode(
+                [getattr(s, column) for s in stocks]
+            )
+        columns["has_svi"] = np.fromiter((s.svi is not None for s in stocks), dtype=bool, count=n)
+        columns["has_valuation"] = np.fromiter(
+            (s.valuation is not None for s in stocks), dtype=bool, count=n
+        )
+        columns["has_acceleration"] = np.fromiter(
+            (s.acceleration is not None for s in stocks), dtype=bool, count=n
+        )
+
+        columns["passed_hard_screen"] = flags(svis, "passed_hard_screen")
+        for column, attr in _SVI_COLUMNS:
+            columns[column] = floats(svis, attr)
+        columns["svi_level"] = codes((o.level for o in svis), SVI_LEVELS)
+
+        for column, attr in _VALUATION_COLUMNS:
+            columns[column] = floats(vals, attr)
+        columns["red_flags"] = (
+            flags(vals, "red_flag_a") * RED_FLAG_A
+            + flags(vals, "red_flag_b") * RED_FLAG_B
+            + flags(vals, "red_flag_c") * RED_FLAG_C
+        ).astype(np.uint8)
+        columns["red_flag_count"] = np.fromiter(
+            (o.red_flag_count for o in vals), dtype=np.int8, count=n
+        )
+        columns["tier"] = codes((o.tier for o in vals), VALUATION_TIERS)
+
+        for column, attr in _ACCELERATION_COLUMNS:
+            columns[column] = floats(accels, attr)
+        columns["phase"] = codes((o.phase for o in accels), PHASE_STATES)
+
+        for column in _WEIGHT_COLUMNS:
+            columns[column] = floats(stocks, column)
+        columns["pool"] = codes((s.pool for s in stocks), SVI_LEVELS)
+        columns["action"] = codes((s.action for s in stocks), POOL_ACTIONS)
+        return cls(**columns)
+
+    @classmethod
+    def from_batches(
+        cls,
+        names: Sequence[str],
+        sectors: Sequence[str],
+        svi: SVIScoreBatch,
+        valuation: ValuationBatch,
+        acceleration: AccelerationBatch,
+        pool: Optional[np.ndarray] = None,
+    ) -> "Universe":
+        """
+        由 SVI / A1 / A2 批量结果直接构建（不经过逐只结果对象）。
+
+        symbol / market 取自 svi，theme 取自 acceleration；权重为 0，行动为 HOLD，
+        pool 缺省时全部为 BLOCK。
+        """
+        n = len(svi)
+        columns = {}
+        for column, values in (
+            ("symbol", svi.symbol), ("name", names), ("market", svi.market),
+            ("sector", sectors), ("theme", acceleration.theme),
+        ):
+            columns[f"{column}_code"], columns[f"{column}_cats"] = _encode(list(values))
+        for column in ("has_svi", "has_valuation", "has_acceleration"):
+            columns[column] = np.ones(n, dtype=bool)
+
+        columns["passed_hard_screen"] = np.asarray(svi.passed_hard_screen, dtype=bool)
+        for column, attr in _SVI_COLUMNS:
+            columns[column] = np.asarray(getattr(svi, attr), dtype=float)
+        columns["svi_level"] = np.asarray(svi.level, dtype=np.int8)
+
+        for column, attr in _VALUATION_COLUMNS:
+            columns[column] = np.asarray(getattr(valuation, attr), dtype=float)
+        columns["red_flags"] = valuation.red_flags
+        columns["red_flag_count"] = np.asarray(valuation.red_flag_count, dtype=np.int8)
+        columns["tier"] = np.asarray(valuation.tier, dtype=np.int8)
+
+        for column, attr in _ACCELERATION_COLUMNS:
+            columns[column] = np.asarray(getattr(acceleration, attr), dtype=float)
+        columns["phase"] = np.asarray(acceleration.phase, dtype=np.int8)
+
+        for column in _WEIGHT_COLUMNS:
+            columns[column] = np.zeros(n)
+        if pool is None:
+            pool = np.full(n, SVI_LEVELS.index(SVILevel.BLOCK))
+        columns["pool"] = np.asarray(pool, dtype=np.int8)
+        columns["action"] = np.full(n, POOL_ACTIONS.index(PoolAction.HOLD), dtype=np.int8)
+        return cls(**columns)
+
+    @classmethod
+    def concat(cls, parts: Sequence["Universe"]) -> "Universe":
+        """按顺序拼接多个 Universe（分类列重新编码）"""
+        columns = {}
+        for f in fields(cls):
+            if f.name.endswith("_cats"):
+                continue
+            if f.name.endswith("_code"):
+                column = f.name[:-len("_code")]
+                labels = [label for part in parts for label in part.labels(column).tolist()]
+                columns[f.name], columns[f"{column}_cats"] = _encode(labels)
+            else:
+                columns[f.name] = np.concatenate([getattr(part, f.name) for part in parts])
+        return cls(**columns)
+
+    def blocked_rows(self) -> BlockedRows:
+        """pool 为 BLOCK 的行 → 紧凑行（物化时调用 to_stock）"""
+        index = np.nonzero(self.pool == SVI_LEVELS.index(SVILevel.BLOCK))[0]
+        reason = np.where(
+            ~self.has_svi[index], BLOCK_REASONS.index(BlockReason.NO_SCORE),
+            np.where(~self.passed_hard_screen[index], BLOCK_REASONS.index(BlockReason.HARD_SCREEN),
+                     BLOCK_REASONS.index(BlockReason.LOW_SVI)),
+        ).astype(np.int8)
+        return BlockedRows(
+            symbol=np.asarray(self.symbol_cats, dtype=object)[self.symbol_code[index]],
+            reason=reason,
+            metric=np.where(self.has_svi[index], self.svi_total[index], np.nan),
+            loader=lambda k: self.to_stock(int(index[k])),
+        )
+
+    def to_stock(self, i: int) -> "SVIPStock":
+        """物化第 i 行为 SVIPStock"""
+        symbol = self.symbol_cats[self.symbol_code[i]]
+        market = self.market_cats[self.market_code[i]]
+        theme = self.theme_cats[self.theme_code[i]]
+
+        svi = None
+        if self.has_svi[i]:
+            svi = SVIScore(
+                symbol=symbol, market=market,
+                passed_hard_screen=bool(self.passed_hard_screen[i]),
+                level=SVI_LEVELS[self.svi_level[i]],
+                **{attr: float(getattr(self, column)[i]) for column, attr in _SVI_COLUMNS},
+            )
+        valuation = None
+        if self.has_valuation[i]:
+            flags = int(self.red_flags[i])
+            valuation = ValuationResult(
+                symbol=symbol,
+                red_flag_a=bool(flags & RED_FLAG_A),
+                red_flag_b=bool(flags & RED_FLAG_B),
+                red_flag_c=bool(flags & RED_FLAG_C),
+                red_flag_count=int(self.red_flag_count[i]),
+                tier=VALUATION_TIERS[self.tier[i]],
+                **{attr: float(getattr(self, column)[i]) for column, attr in _VALUATION_COLUMNS},
+            )
+        acceleration = None
+        if self.has_acceleration[i]:
+            acceleration = AccelerationResult(
+                symbol=symbol, theme=theme,
+                phase=PHASE_STATES[self.phase[i]],
+                **{attr: float(getattr(self, column)[i]) for column, attr in _ACCELERATION_COLUMNS},
+            )
+        return SVIPStock(
+            symbol=symbol,
+            name=self.name_cats[self.name_code[i]],
+            market=market,
+            sector=self.sector_cats[self.sector_code[i]],
+            theme=theme,
+            svi=svi,
+            valuation=valuation,
+            acceleration=acceleration,
+            pool=SVI_LEVELS[self.pool[i]],
+            action=POOL_ACTIONS[self.action[i]],
+            **{column: float(getattr(self, column)[i]) for column in _WEIGHT_COLUMNS},
+        )
+
+    def to_stocks(self) -> List["SVIPStock"]:
+        """物化为 SVIPStock 列表"""
+        return [self.to_stock(i) for i in range(len(self))]
+
+    def write_back(self, stocks: Sequence["SVIPStock"]) -> None:
+        """把权重、池分类与行动写回同序的 SVIPStock 列表"""
+        for i, s in enumerate(stocks):
+            s.raw_weight = float(self.raw_weight[i])
+            s.target_weight = float(self.target_weight[i])
+            s.current_weight = float(self.current_weight[i])
+            s.pool = SVI_LEVELS[self.pool[i]]
+            s.action = POOL_ACTIONS[self.action[i]]
@@ -0,0 +1,356 @@
+"""
+SVIP v1.0 — Parameter Sweep (参数敏感性扫描)
+
+对 SVIConfig / ValuationConfig / WeightConfig 等配置做网格或随机覆盖，
+多进程评估每组配置下的分池、权重与违规，并与基线（不覆盖）对比。
+
+覆盖键为 "段.字段"：
+  svi.* / valuation.* / acceleration.* / weight.* / rotation.*  → settings 对应段
+  market.*                                                  → MARKET_PARAMS[扫描市场]
+
+与配置无关的部分只计算一次并在 worker 间共享：输入列、打包后的 A2 序列、
+默认 A2 结果、宏观与尾部风险状态。每组配置只重算 SVI 与 A1（批量）及 A3。
+"""
+import dataclasses
+import itertools
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.settings import settings, MARKET_PARAMS
+from src.acceleration_engine import SeriesBlock, compute_acceleration_batch
+from src.instrumentation import tracer
+from src.models import (
+    SVI_LEVELS, AccelerationBatch, MacroState, SVILevel, SVIPStock, TailRiskResult,
+)
+from src.portfolio_engine import build_allocation
+from src.svi_engine import compute_svi_batch
+from src.universe_scorer import extract_columns
+from src.valuation_engine import compute_valuation_batch
+
+# 可覆盖的 settings 段（market 对应 MARKET_PARAMS）
+SWEEP_SECTIONS = ("svi", "valuation", "acceleration", "weight", "rotation", "market")
+
+
+# ===============================================================================
+# 覆盖空间
+# ===============================================================================
+
+def _split_key(key: str) -> Tuple[str, str]:
+    section, sep, name = key.partition(".")
+    if not sep or section not in SWEEP_SECTIONS:
+        raise ValueError(f"覆盖键应为 '段.字段'，段取 {SWEEP_SECTIONS}: {key}")
+    return section, name
+
+
+def validate_overrides(overrides: Dict[str, Any]) -> None:
+    """检查覆盖键对应的配置字段存在"""
+    for key in overrides:
+        section, name = _split_key(key)
+        target = MARKET_PARAMS["US"] if section == "market" else getattr(settings, section)
+        if name not in {f.name for f in dataclasses.fields(target)}:
+            raise ValueError(f"未知配置字段: {key}")
+
+
+def grid(space: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """网格：各键取值的笛卡尔积（按键的给定顺序展开）"""
+    validate_overrides(space)
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*space.values())]
+
+
+def random_configs(
+    space: Dict[str, Any],
+    n: int,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    随机采样 n 组覆盖。
+
+    列表为离散候选（均匀抽取），{"low": a, "high": b} 为连续区间（均匀分布）。
+    同一 seed 结果相同。
+    """
+    validate_overrides(space)
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(n):
+        overrides = {}
+        for key, values in space.items():
+            if isinstance(values, dict):
+                overrides[key] = rng.uniform(values["low"], values["high"])
+            else:
+                overrides[key] = rng.choice(list(values))
+        configs.append(overrides)
+    return configs
+
+
+@contextmanager
+def overridden_settings(overrides: Dict[str, Any], market: str = "US") -> Iterator[None]:
+    """
+    临时替换 settings 各段与 MARKET_PARAMS[market]，退出时恢复。
+
+    各引擎在调用时读取 settings，因此覆盖对整条流水线生效。
+    """
+    validate_overrides(overrides)
+    by_section: Dict[str, Dict[str, Any]] = {}
+    for key, value in overrides.items():
+        section, name = _split_key(key)
+        by_section.setdefault(section, {})[name] = value
+
+    saved = {section: getattr(settings, section) for section in by_section if section != "market"}
+    saved_market = MARKET_PARAMS.get(market)
+    try:
+        for section, changes in by_section.items():
+            if section == "market":
+                if saved_market is None:
+                    raise ValueError(f"市场 {market} 没有 MARKET_PARAMS，无法覆盖 market.*")
+                MARKET_PARAMS[market] = dataclasses.replace(saved_market, **changes)
+            else:
+                setattr(settings, section, dataclasses.replace(saved[section], **changes))
+        yield
+    finally:
+        for section, value in saved.items():
+            setattr(settings, section, value)
+        if saved_market is not None:
+            MARKET_PARAMS[market] = saved_market
+
+
+# ===============================================================================
+# 共享输入
+# ===============================================================================
+
+@dataclass
+class SweepInputs:
+    """与配置无关、所有配置共享的输入（列式）"""
+    symbols: np.ndarray
+    names: np.ndarray
+    markets: np.ndarray
+    sectors: np.ndarray
+    themes: np.ndarray
+    svi_columns: Dict[str, np.ndarray]
+    valuation_columns: Dict[str, np.ndarray]
+    series: Dict[str, Optional[SeriesBlock]]
+    acceleration: AccelerationBatch
+    macro: Optional[MacroState] = None
+    tail_risk: Optional[TailRiskResult] = None
+    market: str = "US"
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+
+def prepare_inputs(
+    items: Sequence[Dict[str, Any]],
+    macro: Optional[MacroState] = None,
+    tail_risk: Optional[TailRiskResult] = None,
+    market: str = "US",
+) -> SweepInputs:
+    """
+    股票输入字典（YAML / 数据库加载器格式）→ 共享输入。
+
+    A2 序列在这里打包，并用当前 settings.acceleration 计算一次默认结果。
+    """
+    with tracer.span("prepare"):
+        columns = extract_columns(items)
+        acceleration = compute_acceleration_batch(columns.symbols, columns.themes, **columns.series)
+
+    return SweepInputs(
+        symbols=columns.symbols,
+        names=columns.names,
+        markets=columns.markets,
+        sectors=columns.sectors,
+        themes=columns.themes,
+        svi_columns=columns.svi_columns,
+        valuation_columns=columns.valuation_columns,
+        series=columns.series,
+        acceleration=acceleration,
+        macro=macro,
+        tail_risk=tail_risk,
+        market=market,
+    )
+
+
+# ===============================================================================
+# 单组配置评估
+# ===============================================================================
+
+@dataclass
+class SweepResult:
+    """一组配置的分池、权重与违规（pools 为 SVI_LEVELS 下标编码）"""
+    index: int
+    overrides: Dict[str, Any]
+    pools: np.ndarray
+    weights: np.ndarray
+    total_equity: float = 0.0
+    cash_weight: float = 0.0
+    core_pool_weight: float = 0.0
+    watch_pool_weight: float = 0.0
+    violations: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def count(self, level: SVILevel) -> int:
+        return int((self.pools == SVI_LEVELS.index(level)).sum())
+
+
+def evaluate(inputs: SweepInputs, overrides: Dict[str, Any], index: int = 0) -> SweepResult:
+    """在覆盖后的配置下跑 SVI → A1 → A2 → A3"""
+    start = time.perf_counter()
+    with overridden_settings(overrides, inputs.market):
+        with tracer.span("svi"):
+            svi = compute_svi_batch(inputs.symbols, inputs.markets, **inputs.svi_columns)
+
+        acceleration = inputs.acceleration
+        if any(key.startswith("acceleration.") for key in overrides):
+            with tracer.span("acceleration"):
+                acceleration = compute_acceleration_batch(
+                    inputs.symbols, inputs.themes, **inputs.series,
+                )
+
+        with tracer.span("valuation"):
+            valuation = compute_valuation_batch(
+                inputs.symbols, svi_score=svi.total, **inputs.valuation_columns,
+            )
+
+        stocks = [
+            SVIPStock(
+                symbol=inputs.symbols[i],
+                name=inputs.names[i],
+                market=inputs.markets[i],
+                sector=inputs.sectors[i],
+                theme=inputs.themes[i],
+                svi=svi.to_score(i),
+                valuation=valuation.to_result(i),
+                acceleration=acceleration.to_result(i),
+            )
+            for i in range(len(inputs))
+        ]
+
+        allocation = build_allocation(stocks, inputs.macro, inputs.tail_risk, inputs.market)
+
+    return SweepResult(
+        index=index,
+        overrides=dict(overrides),
+        pools=np.array([SVI_LEVELS.index(s.pool) for s in stocks], dtype=np.int8),
+        weights=np.array([s.target_weight for s in stocks]),
+        total_equity=allocation.total_equity,
+        cash_weight=allocation.cash_weight,
+        core_pool_weight=allocation.core_pool_weight,
+        watch_pool_weight=allocation.watch_pool_weight,
+        violations=list(allocation.violations),
+        seconds=time.perf_counter() - start,
+    )
+
+
+# worker 进程内的共享输入（由 initializer 设置一次）
+_WORKER_INPUTS: Optional[SweepInputs] = None
+
+
+def _init_worker(inputs: SweepInputs) -> None:
+    global _WORKER_INPUTS
+    _WORKER_INPUTS = inputs
+
+
+def _evaluate_task(task: Tuple[int, Dict[str, Any]]) -> Tuple[SweepResult, Dict[str, Any]]:
+    index, overrides = task
+    with tracer.isolated():
+        result = evaluate(_WORKER_INPUTS, overrides, index)
+        trace = tracer.export()
+    return result, trace
+
+
+def run_sweep(
+    inputs: SweepInputs,
+    configs: Sequence[Dict[str, Any]],
+    workers: int = 1,
+) -> List[SweepResult]:
+    """
+    评估基线与全部配置，返回按序号排列的结果（第 0 个为基线）。
+
+    workers > 1 时使用进程池，共享输入只在每个 worker 初始化时传一次。
+    """
+    for overrides in configs:
+        validate_overrides(overrides)
+    tasks = list(enumerate([{}] + [dict(c) for c in configs]))
+
+    with tracer.span("sweep"):
+        tracer.count("sweep_configs", len(configs))
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(inputs,),
+            ) as pool:
+                outputs = list(pool.map(_evaluate_task, tasks))
+            for _, trace in outputs:
+                tracer.merge(trace)
+            results = [result for result, _ in outputs]
+        else:
+            results = [evaluate(inputs, overrides, index) for index, overrides in tasks]
+    return sorted(results, key=lambda r: r.index)
+
+
+# ===============================================================================
+# 对比与报告
+# ===============================================================================
+
+def compare_to_baseline(
+    results: Sequence[SweepResult],
+    symbols: Sequence[str],
+) -> List[Dict[str, Any]]:
+    """
+    每组配置相对基线（results[0]）的变化。
+
+    pool_changes 为换池股票数，weight_shift 为单边权重变动 ½Σ|w - w₀|，
+    entered_core / left_core 为进出核心池的代码。
+    """
+    base = results[0]
+    core = SVI_LEVELS.index(SVILevel.CORE)
+    base_violations = set(base.violations)
+    rows = []
+    for r in results:
+        entered = (r.pools == core) & (base.pools != core)
+        left = (base.pools == core) & (r.pools != core)
+        rows.append({
+            "index": r.index,
+            "overrides": r.overrides,
+            "n_core": r.count(SVILevel.CORE),
+            "n_watch": r.count(SVILevel.WATCH),
+            "n_block": r.count(SVILevel.BLOCK),
+            "total_equity": r.total_equity,
+            "cash_weight": r.cash_weight,
+            "pool_changes": int((r.pools != base.pools).sum()),
+            "weight_shift": float(0.5 * np.abs(r.weights - base.weights).sum()),
+            "entered_core": [symbols[i] for i in np.nonzero(entered)[0]],
+            "left_core": [symbols[i] for i in np.nonzero(left)[0]],
+            "violations": r.violations,
+            "new_violations": [v for v in r.violations if v not in base_violations],
+            "seconds": r.seconds,
+        })
+    return rows
+
+
+def _format_overrides(overrides: Dict[str, Any]) -> str:
+    if not overrides:
+        return "(基线)"
+    return ", ".join(
+        f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}" for k, v in overrides.items()
+    )
+
+
+def format_sweep_report(rows: Sequence[Dict[str, Any]]) -> str:
+    """对比结果的文本表格"""
+    lines = [
+        f"{'#':>4}  {'核心':>5}{'观察':>5}{'禁入':>5}{'股票仓位':>9}{'现金':>8}"
+        f"{'换池':>6}{'权重变动':>9}{'违规':>5}  覆盖",
+    ]
+    for row in rows:
+        lines.append(
+            f"{row['index']:>4}  {row['n_core']:>5}{row['n_watch']:>5}{row['n_block']:>5}"
+            f"{row['total_equity']:>9.1%}{row['cash_weight']:>8.1%}"
+            f"{row['pool_changes']:>6}{row['weight_shift']:>9.1%}{len(row['violations']):>5}"
+            f"  {_format_overrides(row['overrides'])}"
+        )
+    return "\n".join(lines)
@@ -4,17 +4,23 @@ SVIP v1.0 — Portfolio Engine (组合编排引擎)
 整合所有模块：SVI → A1 → A2 → A3 → A4 → A7 → A8
 输出完整的 PortfolioAllocation。
 """
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from datetime import datetime
 
-from config.settings import settings
+import numpy as np
+
+from config.settings import settings, WeightConfig
 from src.models import (
-    SVIPStock, SVILevel, ValuationTier, PhaseState,
-    PortfolioAllocation, MacroState,
+    SVIPStock, SVILevel, ValuationTier, PhaseState, PoolAction, POOL_ACTIONS,
+    SVI_LEVELS, VALUATION_TIERS, PHASE_STATES, BlockedRows, PortfolioAllocation, MacroState,
     TailRiskResult, RotationSignal, SVIPReport,
 )
-from src.weight_engine import compute_portfolio_weights
+from src.weight_engine import (
+    clamp, compute_portfolio_weights, compute_raw_weights, constraint_caps,
+    group_index, project_weights,
+)
 from src.rotation_engine import compute_rotation_signals
+from src.instrumentation import tracer
 
 
 def classify_pools(stocks: List[SVIPStock]) -> tuple[list, list, list]:
@@ -45,6 +51,29 @@ def classify_pools(stocks: List[SVIPStock]) -> tuple[list, list, list]:
     return core, watch, block
 
 
+def classify_pools_batch(
+    svi_level: np.ndarray,
+    tier: np.ndarray,
+    phase: np.ndarray,
+) -> np.ndarray:
+    """
+    classify_pools 的列式版本：SVI 分级、估值等级、相位编码 → 池编码（SVI_LEVELS 下标）。
+    """
+    core = SVI_LEVELS.index(SVILevel.CORE)
+    watch = SVI_LEVELS.index(SVILevel.WATCH)
+    is_core = svi_level == core
+    return np.select(
+        [
+            is_core
+            & (tier != VALUATION_TIERS.index(ValuationTier.C))
+            & (phase != PHASE_STATES.index(PhaseState.DECAYING)),
+            is_core | (svi_level == watch),
+        ],
+        [core, watch],
+        default=SVI_LEVELS.index(SVILevel.BLOCK),
+    ).astype(np.int8)
+
+
 def determine_cash_level(
     stocks: List[SVIPStock],
 ) -> float:
@@ -152,6 +181,8 @@ def build_allocation(
     macro: Optional[MacroState] = None,
     tail_risk: Optional[TailRiskResult] = None,
     market: str = "US",
+    lazy_block: bool = False,
+    blocked: Optional[BlockedRows] = None,
 ) -> PortfolioAllocation:
     """
     构建完整组合配置。
@@ -163,9 +194,36 @@ def build_allocation(
     4. 应用 A8 轮动调整
     5. 计算暴露
     6. 违规检查
+
+    惰性模式（lazy_block=True）下禁入池股票不进入 allocation.stocks，打包为
+    allocation.blocked 紧凑行（代码、原因、SVI 总分），需要时 all_stocks() 重新物化；
+    allocation 不再引用禁入池的 SVIPStock，但这些对象本就已创建，峰值内存不变。
+    要从源头省掉禁入池对象，应只传入非禁入股票，并把融合评分的
+    Universe.blocked_rows() 作为 blocked 传入，直接并入 allocation.blocked。
+    权重与违规结果与非惰性模式一致。
     """
+    with tracer.span("build_allocation"):
+        tracer.count("stocks_allocated", len(stocks))
+        return _build_allocation(stocks, macro, tail_risk, market, lazy_block, blocked)
+
+
+def _build_allocation(
+    stocks: List[SVIPStock],
+    macro: Optional[MacroState],
+    tail_risk: Optional[TailRiskResult],
+    market: str,
+    lazy_block: bool = False,
+    blocked: Optional[BlockedRows] = None,
+) -> PortfolioAllocation:
     # 1. 分池
-    core, watch, block = classify_pools(stocks)
+    with tracer.span("classify"):
+        core, watch, block = classify_pools(stocks)
+        if lazy_block or blocked is not None:
+            parts = [BlockedRows.from_stocks(block)] if block else []
+            if blocked is not None:
+                parts.append(blocked)
+            blocked = parts[0] if len(parts) == 1 else BlockedRows.concat(parts)
+            block = []
 
     # 2. 现金水平
     cash_level = determine_cash_level(stocks)
@@ -177,19 +235,35 @@ def build_allocation(
 
     # 4. 计算权重
     all_stocks = core + watch  # Block 不参与权重计算
-    all_stocks = compute_portfolio_weights(
-        all_stocks,
-        target_equity=target_equity,
-        macro_risk_factor=mrf,
-        tail_risk_factor=trf,
-        market=market,
-    )
+    with tracer.span("weights"):
+        all_stocks = compute_portfolio_weights(
+            all_stocks,
+            target_equity=target_equity,
+            macro_risk_factor=mrf,
+            tail_risk_factor=trf,
+            market=market,
+        )
 
     # 5. A8 轮动调整
-    rotation_signals = compute_rotation_signals(all_stocks)
-    all_stocks = apply_rotation_adjustments(all_stocks, rotation_signals)
+    with tracer.span("rotation"):
+        rotation_signals = compute_rotation_signals(all_stocks)
+        all_stocks = apply_rotation_adjustments(all_stocks, rotation_signals)
+
+    allocation = _summarize_allocation(all_stocks, block, macro, tail_risk, mrf, trf, target_equity)
+    allocation.blocked = blocked
+    return allocation
 
-    # 6. 汇总
+
+def _summarize_allocation(
+    all_stocks: List[SVIPStock],
+    block: List[SVIPStock],
+    macro: Optional[MacroState],
+    tail_risk: Optional[TailRiskResult],
+    mrf: float,
+    trf: float,
+    target_equity: float,
+) -> PortfolioAllocation:
+    """汇总暴露并检查违规（all_stocks 为 Core + Watch，权重已确定）"""
     allocation = PortfolioAllocation(
         timestamp=datetime.now(),
         stocks=all_stocks + block,
@@ -233,14 +307,166 @@ def build_allocation(
     return allocation
 
 
+_ACTION_CODE = {action: code for code, action in enumerate(POOL_ACTIONS)}
+
+
+class IncrementalAllocator:
+    """
+    增量组合构建：股票输入不变、只有宏观/尾部风险因子变化时复用中间结果。
+
+    构造时完成与因子无关的步骤并缓存：分池、现金水平、原始权重 W_raw、
+    主题/行业分组编码与约束上限、A8 轮动乘数、当前权重与各股的行动判定条件。
+    每次 allocate() 只重做依赖因子的部分：目标仓位修正 → 归一化 → 约束投影 →
+    行动 → 轮动调整 → 暴露与违规，结果与 build_allocation 完全一致。
+
+    股票输入（含 current_weight）或 settings 变化后需重新构造。
+
+    用法:
+        allocator = IncrementalAllocator(stocks, market="US")
+        for vix in (15, 25, 40):
+            alloc = allocator.allocate(macro, compute_tail_risk(vix=vix))
+    """
+
+    def __init__(
+        self,
+        stocks: List[SVIPStock],
+        market: str = "US",
+        cfg: WeightConfig = None,
+    ):
+        if cfg is None:
+            cfg = settings.weight
+        self.cfg = cfg
+        self.market = market
+
+        with tracer.span("incremental_prepare"):
+            core, watch, block = classify_pools(stocks)
+            self.active = core + watch  # Block 不参与权重计算
+            self.block = block
+            self.target_equity = 1.0 - determine_cash_level(stocks)
+
+            compute_raw_weights(self.active, cfg)
+            n = len(self.active)
+            self.raw = np.fromiter((s.raw_weight for s in self.active), dtype=float, count=n)
+            self.total_raw = sum(s.raw_weight for s in self.active)
+            # 原始权重全为 0 时 normalize_weights 保留原目标权重
+            self.initial_target = np.fromiter(
+                (s.target_weight for s in self.active), dtype=float, count=n,
+            )
+            self.theme_index = group_index([getattr(s, "theme", "other") for s in self.active])
+            self.sector_index = group_index([getattr(s, "sector", "other") for s in self.active])
+            self.caps = constraint_caps(cfg, market)
+
+            # determine_actions 的判定条件
+            self.current = np.fromiter((s.current_weight for s in self.active), dtype=float, count=n)
+            self.tier_c = np.array(
+                [bool(s.valuation and s.valuation.tier == ValuationTier.C) for s in self.active],
+                dtype=bool,
+            )
+            self.decaying = np.array(
+                [bool(s.acceleration and s.acceleration.phase == PhaseState.DECAYING)
+                 for s in self.active],
+                dtype=bool,
+            )
+            self.accelerating = np.array(
+                [bool(s.acceleration and s.acceleration.phase == PhaseState.ACCELERATING)
+                 for s in self.active],
+                dtype=bool,
+            )
+            self.initial_action = np.fromiter(
+                (_ACTION_CODE[s.action] for s in self.active), dtype=np.int8, count=n,
+            )
+
+            # A8 轮动只依赖各主题的加速度得分，与权重无关
+            self.rotation_signals = compute_rotation_signals(self.active)
+            signal_map = {sig.theme: sig.weight_adjustment for sig in self.rotation_signals}
+            adjustments = np.array([signal_map.get(s.theme, 0.0) for s in self.active], dtype=float)
+            self.rotation_mask = adjustments != 0.0
+            self.rotation_multiplier = 1.0 + adjustments
+
+    def __len__(self) -> int:
+        return len(self.active)
+
+    def weights(
+        self,
+        macro_risk_factor: float = 1.0,
+        tail_risk_factor: float = 1.0,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        给定因子下的 (目标权重, 行动编码)，顺序同 self.active（Core + Watch）。
+
+        行动编码为 POOL_ACTIONS 下标；不写回股票对象。
+        """
+        cfg = self.cfg
+        adjusted_equity = clamp(
+            self.target_equity * macro_risk_factor * tail_risk_factor, 0, cfg.core_pool_max,
+        )
+
+        # 归一化 + 约束投影
+        if self.total_raw > 0:
+            w = np.where(self.raw > 0, (self.raw / self.total_raw) * adjusted_equity, 0.0)
+        else:
+            w = self.initial_target.copy()
+        w = project_weights(w, self.theme_index, self.sector_index, *self.caps)
+
+        # 行动（与 determine_actions 的分支顺序一致）
+        held = self.current > 0
+        no_target = w <= 0
+        build = ~no_target & ~self.tier_c & ~self.decaying & ~held
+        diff = w - self.current
+        actions = np.select(
+            [
+                no_target | self.tier_c,
+                self.decaying,
+                build,
+                (diff > 0.005) & self.accelerating,
+                (diff > 0.005),
+                diff < -0.005,
+            ],
+            [
+                np.where(held, _ACTION_CODE[PoolAction.EXIT], _ACTION_CODE[PoolAction.HOLD]),
+                np.where(held, _ACTION_CODE[PoolAction.LIGHT_REDUCE], self.initial_action),
+                _ACTION_CODE[PoolAction.BUILD],
+                _ACTION_CODE[PoolAction.ADD],
+                _ACTION_CODE[PoolAction.HOLD],
+                _ACTION_CODE[PoolAction.LIGHT_REDUCE],
+            ],
+            default=_ACTION_CODE[PoolAction.HOLD],
+        ).astype(np.int8)
+        w = np.where(build, w * cfg.initial_position_ratio, w)
+
+        # A8 轮动调整
+        rotate = self.rotation_mask & (w > 0)
+        w = np.where(rotate, np.maximum(0.0, w * self.rotation_multiplier), w)
+        return w, actions
+
+    def allocate(
+        self,
+        macro: Optional[MacroState] = None,
+        tail_risk: Optional[TailRiskResult] = None,
+    ) -> PortfolioAllocation:
+        """构建组合（目标权重与行动写回股票对象），结果同 build_allocation"""
+        with tracer.span("incremental_allocation"):
+            mrf = macro.macro_risk_factor if macro else 1.0
+            trf = tail_risk.tail_risk_factor if tail_risk else 1.0
+            weights, actions = self.weights(mrf, trf)
+            for s, w, code in zip(self.active, weights.tolist(), actions.tolist()):
+                s.target_weight = w
+                s.action = POOL_ACTIONS[code]
+            return _summarize_allocation(
+                list(self.active), self.block, macro, tail_risk, mrf, trf, self.target_equity,
+            )
+
+
 def generate_report(
     stocks: List[SVIPStock],
     macro: Optional[MacroState] = None,
     tail_risk: Optional[TailRiskResult] = None,
     market: str = "US",
+    lazy_block: bool = False,
+    blocked: Optional[BlockedRows] = None,
 ) -> SVIPReport:
-    """生成完整 SVIP 报告"""
-    allocation = build_allocation(stocks, macro, tail_risk, market)
+    """生成完整 SVIP 报告（lazy_block / blocked 见 build_allocation）"""
+    allocation = build_allocation(stocks, macro, tail_risk, market, lazy_block, blocked)
     # rotation_signals 已在 build_allocation 中计算并应用
     rotation_signals = compute_rotation_signals(
         [s for s in allocation.stocks if s.pool in (SVILevel.CORE, SVILevel.WATCH)]
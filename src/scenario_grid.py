@@ -0,0 +1,313 @@
+"""
+SVIP v1.0 — Scenario Grid (宏观 / 尾部风险情景网格)
+
+在宏观与尾部风险输入的网格上（如 VIX 15–60 × 信用利差 2–8）批量评估
+compute_macro_state / compute_tail_risk、仓位上限与组合构建，
+输出每个情景的总仓位、现金、状态与违规数，便于直接画热力图。
+
+  1. 扫描轴展开为网格，未扫描的输入取基准值（data/macro_inputs.yaml）
+  2. 宏观与尾部风险用列式版本一次算完全部情景
+  3. 组合只依赖 (MacroRiskFactor, TailRiskFactor)，两个因子只有少数离散取值，
+     每个不同的因子组合用 IncrementalAllocator 构建一次，再广播回各情景
+
+扫描轴键为 "段.字段"，字段名与 macro_inputs.yaml 一致：
+  macro.*      yield_spread_10y2y / real_yield / credit_spread / m2_yoy / fci /
+               credit_growth / earnings_yoy / ism_new_orders
+  tail_risk.*  vix / credit_spread_change / regulatory_intensity /
+               industry_revenue_decline_years / market_share_erosion
+"""
+import csv
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.data_loader import load_yaml
+from src.instrumentation import tracer
+from src.macro_filter import compute_macro_state_batch
+from src.models import (
+    MACRO_WINDS, TAIL_RISK_STATES, MacroState, MacroStateBatch, PortfolioAllocation,
+    SVIPStock, TailRiskBatch, TailRiskResult,
+)
+from src.portfolio_engine import IncrementalAllocator
+from src.tail_risk import compute_tail_risk_batch
+
+# macro_inputs.yaml 字段 → compute_macro_state 参数
+MACRO_FIELDS = {
+    "yield_spread_10y2y": "yield_spread",
+    "real_yield": "real_yield",
+    "credit_spread": "credit_spread",
+    "m2_yoy": "m2_yoy",
+    "fci": "fci",
+    "credit_growth": "credit_growth",
+    "earnings_yoy": "earnings_yoy",
+    "ism_new_orders": "ism_new_orders",
+}
+# macro_inputs.yaml 字段 → compute_tail_risk 参数
+TAIL_RISK_FIELDS = {
+    "vix": "vix",
+    "credit_spread_change": "credit_spread_change",
+    "regulatory_intensity": "regulatory_intensity",
+    "industry_revenue_decline_years": "industry_revenue_decline_years",
+    "market_share_erosion": "market_share_erosion",
+}
+# 尾部风险参数缺省值（与 compute_tail_risk 一致）
+TAIL_RISK_DEFAULTS = {
+    "regulatory_intensity": 0.0,
+    "industry_revenue_decline_years": 0,
+    "market_share_erosion": 0.0,
+}
+
+# 默认网格：VIX 15–60 × 高收益信用利差 2–8%
+DEFAULT_AXES = {
+    "tail_risk.vix": {"start": 15, "stop": 60, "step": 5},
+    "macro.credit_spread": {"start": 2, "stop": 8, "step": 0.5},
+}
+
+
+# ===============================================================================
+# 扫描轴
+# ===============================================================================
+
+def axis_values(spec: Any) -> np.ndarray:
+    """
+    扫描轴取值：列表，或 {start, stop, step}（含 stop），或 {start, stop, num}。
+    """
+    if isinstance(spec, dict):
+        start, stop = float(spec["start"]), float(spec["stop"])
+        if "num" in spec:
+            return np.linspace(start, stop, int(spec["num"]))
+        step = float(spec.get("step", 1.0))
+        if step <= 0:
+            raise ValueError(f"扫描步长必须为正: {spec}")
+        # 按步数生成再取整，避免浮点累加误差（2 + 0.1*k 而不是逐次 +0.1）
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        return np.round(start + step * np.arange(count), 10)
+    values = np.asarray(spec, dtype=float)
+    if values.ndim != 1 or len(values) == 0:
+        raise ValueError(f"扫描轴应为非空列表或 {{start, stop, step}}: {spec}")
+    return values
+
+
+def parse_axes(spec: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """校验扫描轴键并展开取值（保持键顺序：第一个轴为热力图的行）"""
+    axes = {}
+    for key, value in spec.items():
+        section, _, name = key.partition(".")
+        known = {"macro": MACRO_FIELDS, "tail_risk": TAIL_RISK_FIELDS}.get(section, {})
+        if name not in known:
+            raise ValueError(
+                f"未知扫描轴: {key}（应为 macro.<{'/'.join(MACRO_FIELDS)}> 或 "
+                f"tail_risk.<{'/'.join(TAIL_RISK_FIELDS)}>）"
+            )
+        axes[key] = axis_values(value)
+    if not axes:
+        raise ValueError("至少需要一个扫描轴")
+    return axes
+
+
+# ===============================================================================
+# 结果表
+# ===============================================================================
+
+@dataclass
+class ScenarioTable:
+    """
+    情景网格结果（列式，每列一行一个情景，按扫描轴的笛卡尔积展开，最后一个轴变化最快）。
+
+    wind / tail_state 为 MACRO_WINDS / TAIL_RISK_STATES 下标编码。
+    """
+    axes: Dict[str, np.ndarray]
+    inputs: Dict[str, np.ndarray]           # 扫描轴键 → 每个情景的取值
+    macro: MacroStateBatch
+    tail_risk: TailRiskBatch
+    final_equity_ceiling: np.ndarray
+    total_equity: np.ndarray
+    cash_weight: np.ndarray
+    core_pool_weight: np.ndarray
+    watch_pool_weight: np.ndarray
+    n_violations: np.ndarray
+    # 每个不同的 (MacroRiskFactor, TailRiskFactor) 组合的违规明细，scenario_factor 为其下标
+    factor_pairs: List[Tuple[float, float]] = field(default_factory=list)
+    violations: List[List[str]] = field(default_factory=list)
+    scenario_factor: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=int))
+
+    def __len__(self) -> int:
+        return len(self.total_equity)
+
+    def column(self, name: str) -> np.ndarray:
+        """按名称取列：扫描轴键、结果列，或 macro_score / macro_risk_factor / tail_risk_factor"""
+        if name in self.inputs:
+            return self.inputs[name]
+        derived = {
+            "macro_score": self.macro.total_score,
+            "macro_risk_factor": self.macro.macro_risk_factor,
+            "tail_risk_factor": self.tail_risk.tail_risk_factor,
+        }
+        if name in derived:
+            return derived[name]
+        return getattr(self, name)
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """逐情景的字典列表（长表格式，可直接用于热力图）"""
+        columns = {key: values.tolist() for key, values in self.inputs.items()}
+        columns.update({
+            "macro_score": self.macro.total_score.tolist(),
+            "macro_wind": [MACRO_WINDS[c].value for c in self.macro.wind.tolist()],
+            "macro_risk_factor": self.macro.macro_risk_factor.tolist(),
+            "tail_state": [TAIL_RISK_STATES[c].value for c in self.tail_risk.state.tolist()],
+            "tail_risk_factor": self.tail_risk.tail_risk_factor.tolist(),
+            "final_equity_ceiling": self.final_equity_ceiling.tolist(),
+            "total_equity": self.total_equity.tolist(),
+            "cash_weight": self.cash_weight.tolist(),
+            "core_pool_weight": self.core_pool_weight.tolist(),
+            "watch_pool_weight": self.watch_pool_weight.tolist(),
+            "n_violations": self.n_violations.tolist(),
+        })
+        names = list(columns)
+        return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+    def pivot(self, value: str = "total_equity") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        二维透视 (行轴取值, 列轴取值, 矩阵)，要求恰好两个扫描轴。
+        """
+        if len(self.axes) != 2:
+            raise ValueError(f"透视需要恰好两个扫描轴，当前为 {list(self.axes)}")
+        rows, cols = self.axes.values()
+        return rows, cols, self.column(value).reshape(len(rows), len(cols))
+
+    def write_csv(self, path: str) -> str:
+        """保存长表 CSV"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        rows = self.to_rows()
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else [])
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+
+def format_heatmap(table: ScenarioTable, value: str = "total_equity") -> str:
+    """两轴网格的文本热力图（百分比列按 .0% 显示，其余取整）"""
+    rows, cols, matrix = table.pivot(value)
+    row_key, col_key = table.axes
+    percent = value not in ("macro_score", "n_violations")
+    cell = (lambda v: f"{v:.0%}") if percent else (lambda v: f"{v:.0f}")
+
+    width = max(6, *(len(f"{c:g}") + 1 for c in cols))
+    lines = [f"{value}（行: {row_key}，列: {col_key}）"]
+    lines.append(f"{'':>8}" + "".join(f"{c:>{width}g}" for c in cols))
+    for r, values in zip(rows, matrix):
+        lines.append(f"{r:>8g}" + "".join(f"{cell(v):>{width}}" for v in values))
+    return "\n".join(lines)
+
+
+# ===============================================================================
+# 评估
+# ===============================================================================
+
+def evaluate_scenarios(
+    stocks: List[SVIPStock],
+    axes: Optional[Dict[str, Any]] = None,
+    base_inputs: Optional[Dict[str, dict]] = None,
+    market: str = "US",
+) -> ScenarioTable:
+    """
+    在情景网格上评估宏观状态、尾部风险与组合。
+
+    Args:
+        stocks: 已完成 SVI / A1 / A2 的股票（尚未构建组合）
+        axes: 扫描轴 {"段.字段": 取值列表或 {start, stop, step}}，默认 DEFAULT_AXES
+        base_inputs: 未扫描输入的基准值，结构同 macro_inputs.yaml（{"macro": {...}, "tail_risk": {...}}）
+        market: 目标市场
+
+    股票对象的 target_weight / action 在评估后恢复原值。
+    """
+    axes = parse_axes(DEFAULT_AXES if axes is None else axes)
+    base_inputs = base_inputs or {}
+
+    with tracer.span("scenario_grid"):
+        mesh = np.meshgrid(*axes.values(), indexing="ij")
+        inputs = {key: values.ravel() for key, values in zip(axes, mesh)}
+
+        def columns(section: str, fields: Dict[str, str], defaults: Dict[str, Any]) -> Dict[str, Any]:
+            base = base_inputs.get(section) or {}
+            kwargs = {}
+            for name, param in fields.items():
+                key = f"{section}.{name}"
+                kwargs[param] = inputs[key] if key in inputs else base.get(name, defaults.get(param))
+            return kwargs
+
+        with tracer.span("scenario_states"):
+            macro = compute_macro_state_batch(**columns("macro", MACRO_FIELDS, {}))
+            tail_risk = compute_tail_risk_batch(
+                **columns("tail_risk", TAIL_RISK_FIELDS, TAIL_RISK_DEFAULTS)
+            )
+
+        # 不扫描的输入是标量，广播到情景数
+        n = len(next(iter(inputs.values())))
+        mrf = np.broadcast_to(macro.macro_risk_factor, n)
+        trf = np.broadcast_to(tail_risk.tail_risk_factor, n)
+        pairs, scenario_factor = np.unique(np.column_stack([mrf, trf]), axis=0, return_inverse=True)
+        scenario_factor = scenario_factor.ravel()
+
+        saved = [(s, s.target_weight, s.action) for s in stocks]
+        try:
+            allocator = IncrementalAllocator(stocks, market=market)
+            summaries, violations = [], []
+            with tracer.span("scenario_allocation"):
+                for m, t in pairs.tolist():
+                    alloc = _allocate(allocator, m, t)
+                    summaries.append((
+                        alloc.final_equity_ceiling, alloc.total_equity, alloc.cash_weight,
+                        alloc.core_pool_weight, alloc.watch_pool_weight, len(alloc.violations),
+                    ))
+                    violations.append(alloc.violations)
+        finally:
+            for s, weight, action in saved:
+                s.target_weight = weight
+                s.action = action
+
+        per_pair = np.array(summaries, dtype=float).reshape(len(pairs), 6)[scenario_factor]
+        tracer.count("scenarios", n)
+        tracer.count("scenario_allocations", len(pairs))
+
+    return ScenarioTable(
+        axes=axes,
+        inputs=inputs,
+        macro=_broadcast_batch(macro, n),
+        tail_risk=_broadcast_batch(tail_risk, n),
+        final_equity_ceiling=per_pair[:, 0],
+        total_equity=per_pair[:, 1],
+        cash_weight=per_pair[:, 2],
+        core_pool_weight=per_pair[:, 3],
+        watch_pool_weight=per_pair[:, 4],
+        n_violations=per_pair[:, 5].astype(int),
+        factor_pairs=[tuple(p) for p in pairs.tolist()],
+        violations=violations,
+        scenario_factor=scenario_factor,
+    )
+
+
+def _allocate(allocator: IncrementalAllocator, mrf: float, trf: float) -> PortfolioAllocation:
+    """只给定因子时构建组合（宏观 / 尾部风险状态仅用于报告，不影响权重）"""
+    return allocator.allocate(
+        MacroState(macro_risk_factor=mrf), TailRiskResult(tail_risk_factor=trf),
+    )
+
+
+def _broadcast_batch(batch, n: int):
+    """把批量结果的各列广播为 n 行（未扫描的段只有一行）"""
+    if len(batch) == n:
+        return batch
+    return type(batch)(**{
+        name: np.broadcast_to(values, (n,) + np.shape(values)[1:]).copy()
+        for name, values in vars(batch).items()
+    })
+
+
+def load_axes_spec(path: str) -> Dict[str, Any]:
+    """从 YAML 读取扫描轴（顶层 axes: 字典）"""
+    data = load_yaml(path)
+    return data.get("axes", data)
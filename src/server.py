@@ -0,0 +1,556 @@
+"""
+SVIP v1.0 — Service (常驻服务 + HTTP/JSON API)
+
+把数据库连接、AIRS-X 索引、主题元数据与已评分股票常驻内存，
+每次请求只做增量加载与组合构建，省去解释器启动、配置解析与建连的开销。
+
+接口（JSON 请求/响应）：
+  GET  /health           服务状态与缓存规模
+  GET  /metrics          按接口统计的请求耗时（次数、错误、均值、p50/p95、最大）
+  POST /score            {"symbols": [...], "market": "CN", "themes": {...}, "refresh": false}
+  POST /allocation       {"symbols": [...], "market": "US", "macro": {...}, "tail_risk": {...},
+                          "current_weights": {...}}
+  GET  /report/latest    最近一次 /allocation 的报告（?format=markdown 返回 Markdown 文本）
+  POST /cache/clear      清空已评分股票缓存
+
+评分与组合构建在单个引擎线程中串行执行（SQLite 连接与全局 tracer 只在该线程使用），
+HTTP 处理线程只负责解析、排队与序列化，/health、/metrics、/report/latest 不被长请求阻塞。
+"""
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from src.airsx_bridge import enrich_batch, load_airsx_summary
+from src.data_loader import get_valid_themes, load_yaml
+from src.db_loader import create_db_loader
+from src.macro_filter import compute_macro_state
+from src.models import MacroState, SVIPReport, SVIPStock, TailRiskResult
+from src.portfolio_engine import generate_report
+from src.report_generator import generate_markdown_report
+from src.tail_risk import compute_tail_risk
+from src.universe_scorer import build_stock
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+MARKETS = ("CN", "HK", "US")
+
+
+# ===============================================================================
+# 输入解析与输出序列化
+# ===============================================================================
+
+def parse_symbol(entry: str, default_market: str) -> Tuple[str, str]:
+    """"CN:600519" / "US:AAPL" → (market, code)；无前缀时使用 default_market"""
+    prefix, sep, code = entry.partition(":")
+    if sep and prefix.upper() in MARKETS:
+        return prefix.upper(), code.strip()
+    return default_market, entry.strip()
+
+
+def macro_from_dict(md: Optional[Dict[str, Any]]) -> Optional[MacroState]:
+    """宏观输入（字段同 data/macro_inputs.yaml 的 macro 段）→ MacroState"""
+    if not md:
+        return None
+    return compute_macro_state(
+        yield_spread=md.get("yield_spread_10y2y"),
+        real_yield=md.get("real_yield"),
+        credit_spread=md.get("credit_spread"),
+        m2_yoy=md.get("m2_yoy"),
+        fci=md.get("fci"),
+        credit_growth=md.get("credit_growth"),
+        earnings_yoy=md.get("earnings_yoy"),
+        ism_new_orders=md.get("ism_new_orders"),
+    )
+
+
+def tail_risk_from_dict(td: Optional[Dict[str, Any]]) -> Optional[TailRiskResult]:
+    """尾部风险输入（字段同 data/macro_inputs.yaml 的 tail_risk 段）→ TailRiskResult"""
+    if not td:
+        return None
+    return compute_tail_risk(
+        vix=td.get("vix"),
+        credit_spread_change=td.get("credit_spread_change"),
+        regulatory_intensity=td.get("regulatory_intensity", 0),
+    )
+
+
+def stock_summary(stock: SVIPStock) -> Dict[str, Any]:
+    """单只股票的 JSON 摘要"""
+    return {
+        "symbol": stock.symbol,
+        "name": stock.name,
+        "market": stock.market,
+        "sector": stock.sector,
+        "theme": stock.theme,
+        "svi_total": stock.svi.total if stock.svi else None,
+        "svi_level": stock.svi.level.value if stock.svi else None,
+        "passed_hard_screen": stock.svi.passed_hard_screen if stock.svi else None,
+        "valuation_tier": stock.valuation.tier.value if stock.valuation else None,
+        "fcf_yield": stock.valuation.fcf_yield if stock.valuation else None,
+        "qpeg": stock.valuation.qpeg if stock.valuation else None,
+        "red_flag_count": stock.valuation.red_flag_count if stock.valuation else None,
+        "acceleration_score": stock.acceleration.acceleration_score if stock.acceleration else None,
+        "phase": stock.acceleration.phase.value if stock.acceleration else None,
+        "pool": stock.pool.value,
+        "target_weight": stock.target_weight,
+        "current_weight": stock.current_weight,
+        "action": stock.action.value,
+    }
+
+
+def report_summary(report: SVIPReport) -> Dict[str, Any]:
+    """报告的 JSON 摘要（组合汇总 + 入池股票）"""
+    alloc = report.allocation
+    return {
+        "timestamp": report.timestamp.isoformat(),
+        "market": report.market,
+        "total_equity": alloc.total_equity,
+        "cash_weight": alloc.cash_weight,
+        "core_pool_weight": alloc.core_pool_weight,
+        "watch_pool_weight": alloc.watch_pool_weight,
+        "final_equity_ceiling": alloc.final_equity_ceiling,
+        "macro_risk_factor": alloc.macro_risk_factor,
+        "tail_risk_factor": alloc.tail_risk_factor,
+        "theme_exposure": alloc.theme_exposure,
+        "sector_exposure": alloc.sector_exposure,
+        "violations": alloc.violations,
+        "core_pool": [stock_summary(s) for s in report.core_pool],
+        "watch_pool": [stock_summary(s) for s in report.watch_pool],
+        "n_block": alloc.n_block,
+    }
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "item"):  # numpy 标量
+        return value.item()
+    raise TypeError(f"无法序列化: {type(value).__name__}")
+
+
+# ===============================================================================
+# 请求耗时统计
+# ===============================================================================
+
+@dataclass
+class LatencyStats:
+    """单个接口的请求耗时（保留最近 window 次用于分位数）"""
+    window: int = 1024
+    calls: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    recent: Deque[float] = field(default_factory=deque)
+
+    def add(self, seconds: float, error: bool = False) -> None:
+        self.calls += 1
+        self.errors += int(error)
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.recent.append(seconds)
+        if len(self.recent) > self.window:
+            self.recent.popleft()
+
+    def _percentile(self, q: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "mean_ms": 1000 * self.seconds / self.calls if self.calls else 0.0,
+            "p50_ms": 1000 * self._percentile(0.50),
+            "p95_ms": 1000 * self._percentile(0.95),
+            "max_ms": 1000 * self.max_seconds,
+        }
+
+
+# ===============================================================================
+# 服务
+# ===============================================================================
+
+class SVIPService:
+    """
+    常驻 SVIP 服务
+
+    缓存：
+      - 数据库连接：首次用到某市场时建立，服务关闭时断开
+      - AIRS-X 索引、主题元数据：启动时预热（各自模块内缓存）
+      - 已评分股票：按 (市场, 代码, 主题) 缓存评分后的 SVIPStock；
+        组合构建使用浅拷贝，缓存对象不会被写入权重
+    """
+
+    def __init__(
+        self,
+        china_db_path: Optional[str] = None,
+        us_db_path: Optional[str] = None,
+        yaml_path: Optional[str] = None,
+        theme_map: Optional[Dict[str, str]] = None,
+        airsx_dir: Optional[str] = None,
+        metrics_cache_path: Optional[str] = None,
+        read_only: bool = False,
+        use_db: bool = True,
+        data_dir: str = DATA_DIR,
+    ):
+        self.theme_map = dict(theme_map or {})
+        self.airsx_dir = airsx_dir
+        self.data_dir = data_dir
+        self.started = datetime.now()
+        self.loader = (
+            create_db_loader(china_db_path, us_db_path, metrics_cache_path, read_only)
+            if use_db else None
+        )
+        self._connected: set = set()
+        self._yaml_items: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        if yaml_path:
+            for item in load_yaml(yaml_path).get("stocks", []):
+                self._yaml_items[(item.get("market", "US"), item["symbol"])] = item
+        self._scored: Dict[Tuple[str, str, str], SVIPStock] = {}
+        self._latest: Optional[SVIPReport] = None
+        self._latest_markdown: Optional[str] = None
+        self._engine = ThreadPoolExecutor(max_workers=1, thread_name_prefix="svip-engine")
+        self._metrics: Dict[str, LatencyStats] = {}
+        self._metrics_lock = threading.Lock()
+
+    # ---- 引擎线程 -------------------------------------------------------------
+
+    def _submit(self, fn: Callable, *args) -> Any:
+        """在引擎线程中执行并等待结果"""
+        return self._engine.submit(fn, *args).result()
+
+    def warm(self, markets: Sequence[str] = ()) -> None:
+        """预热主题元数据、AIRS-X 索引与指定市场的数据库连接"""
+        self._submit(self._warm, tuple(markets))
+
+    def _warm(self, markets: Tuple[str, ...]) -> None:
+        get_valid_themes(self.data_dir)
+        if self.airsx_dir and os.path.isdir(self.airsx_dir):
+            load_airsx_summary(self.airsx_dir)
+        for market in markets:
+            self._connect(market)
+
+    def _connect(self, market: str) -> bool:
+        if self.loader is None:
+            return False
+        key = "US" if market == "US" else "CN"
+        if key not in self._connected:
+            try:
+                self.loader.connect(key)
+            except FileNotFoundError as e:
+                logger.warning(f"{e}")
+                return False
+            self._connected.add(key)
+        return True
+
+    def _load(self, entries: List[Tuple[str, str, str]]) -> Dict[str, Dict[str, Any]]:
+        """
+        未缓存的股票：YAML 股票池优先，其余从数据库批量加载并用 AIRS-X 补充。
+
+        按大写代码索引（美股代码在库中大小写不一）。
+        """
+        items, from_db = {}, []
+        for market, code, theme in entries:
+            item = self._yaml_items.get((market, code))
+            if item is not None:
+                items[code.upper()] = item
+            elif self._connect(market):
+                from_db.append((market, code, theme))
+        if from_db:
+            loaded = self.loader.load_stocks_from_list(from_db)
+            for item in enrich_batch(loaded, self.airsx_dir):
+                items[item["symbol"].upper()] = item
+        return items
+
+    def _theme(self, market: str, code: str, themes: Dict[str, str]) -> str:
+        """主题优先级：请求 > 主题映射 > YAML 股票池"""
+        item = self._yaml_items.get((market, code), {})
+        return themes.get(code) or self.theme_map.get(code) or item.get("theme", "")
+
+    def _score(
+        self,
+        symbols: Sequence[str],
+        market: str,
+        themes: Dict[str, str],
+        refresh: bool,
+    ) -> Tuple[List[SVIPStock], List[str]]:
+        keys = []
+        for entry in symbols:
+            stock_market, code = parse_symbol(entry, market)
+            keys.append((stock_market, code, self._theme(stock_market, code, themes)))
+
+        pending = list(dict.fromkeys(k for k in keys if refresh or k not in self._scored))
+        if pending:
+            items = self._load(pending)
+            for key in pending:
+                item = items.get(key[1].upper())
+                if item is not None:
+                    self._scored[key] = build_stock({**item, "theme": key[2]})
+
+        stocks, missing = [], []
+        for key, entry in zip(keys, symbols):
+            stock = self._scored.get(key)
+            if stock is None:
+                missing.append(entry)
+            else:
+                stocks.append(stock)
+        return stocks, missing
+
+    def _allocate(
+        self,
+        stocks: List[SVIPStock],
+        market: str,
+        macro: Optional[MacroState],
+        tail_risk: Optional[TailRiskResult],
+        current_weights: Dict[str, float],
+    ) -> SVIPReport:
+        working = []
+        for stock in stocks:
+            stock = copy.copy(stock)
+            stock.current_weight = float(current_weights.get(stock.symbol, 0.0))
+            working.append(stock)
+        report = generate_report(working, macro, tail_risk, market=market)
+        self._latest = report
+        self._latest_markdown = generate_markdown_report(report)
+        return report
+
+    # ---- 公开接口 -------------------------------------------------------------
+
+    def score(
+        self,
+        symbols: Sequence[str],
+        market: str = "US",
+        themes: Optional[Dict[str, str]] = None,
+        refresh: bool = False,
+    ) -> Tuple[List[SVIPStock], List[str]]:
+        """评分股票列表，返回 (已评分股票, 未找到的代码)"""
+        return self._submit(self._score, [str(s) for s in symbols], market, dict(themes or {}), refresh)
+
+    def allocate(
+        self,
+        symbols: Optional[Sequence[str]] = None,
+        market: str = "US",
+        macro: Optional[MacroState] = None,
+        tail_risk: Optional[TailRiskResult] = None,
+        themes: Optional[Dict[str, str]] = None,
+        current_weights: Optional[Dict[str, float]] = None,
+    ) -> Tuple[SVIPReport, List[str]]:
+        """
+        构建组合并生成报告（成为最新报告）。
+
+        symbols 为空时使用 YAML 股票池中该市场的全部股票。
+        """
+        if not symbols:
+            symbols = [code for m, code in self._yaml_items if m == market]
+        stocks, missing = self.score(symbols, market, themes)
+        report = self._submit(self._allocate, stocks, market, macro, tail_risk, dict(current_weights or {}))
+        return report, missing
+
+    def latest_report(self) -> Tuple[Optional[SVIPReport], Optional[str]]:
+        return self._latest, self._latest_markdown
+
+    def clear_cache(self) -> int:
+        """清空已评分股票缓存，返回清除的条数"""
+        def clear() -> int:
+            n = len(self._scored)
+            self._scored.clear()
+            return n
+        return self._submit(clear)
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "started": self.started.isoformat(),
+            "uptime_seconds": (datetime.now() - self.started).total_seconds(),
+            "connected_markets": sorted(self._connected),
+            "yaml_stocks": len(self._yaml_items),
+            "scored_stocks": len(self._scored),
+            "has_report": self._latest is not None,
+        }
+
+    def record_latency(self, route: str, seconds: float, error: bool = False) -> None:
+        with self._metrics_lock:
+            stats = self._metrics.get(route)
+            if stats is None:
+                stats = self._metrics[route] = LatencyStats()
+            stats.add(seconds, error)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            return {route: stats.to_dict() for route, stats in self._metrics.items()}
+
+    def close(self) -> None:
+        """在引擎线程中断开数据库连接，再停止引擎线程"""
+        def close_loader() -> None:
+            if self.loader is not None:
+                self.loader.close()
+            self._connected.clear()
+        self._submit(close_loader)
+        self._engine.shutdown(wait=True)
+
+
+# ===============================================================================
+# HTTP
+# ===============================================================================
+
+class HTTPError(Exception):
+    """带状态码的请求错误"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _require_symbols(body: Dict[str, Any], required: bool = True) -> List[str]:
+    symbols = body.get("symbols")
+    if symbols is None and not required:
+        return []
+    if not isinstance(symbols, list) or not symbols:
+        raise HTTPError(400, "symbols 必须是非空列表")
+    return [str(s) for s in symbols]
+
+
+def _market(body: Dict[str, Any]) -> str:
+    market = str(body.get("market", "US")).upper()
+    if market not in MARKETS:
+        raise HTTPError(400, f"market 取 {MARKETS}: {market}")
+    return market
+
+
+def _handle_health(service: SVIPService, body, query):
+    return 200, service.health()
+
+
+def _handle_metrics(service: SVIPService, body, query):
+    return 200, service.metrics()
+
+
+def _handle_score(service: SVIPService, body, query):
+    stocks, missing = service.score(
+        _require_symbols(body), _market(body), body.get("themes"), bool(body.get("refresh", False)),
+    )
+    return 200, {"stocks": [stock_summary(s) for s in stocks], "missing": missing}
+
+
+def _handle_allocation(service: SVIPService, body, query):
+    report, missing = service.allocate(
+        _require_symbols(body, required=False),
+        _market(body),
+        macro_from_dict(body.get("macro")),
+        tail_risk_from_dict(body.get("tail_risk")),
+        body.get("themes"),
+        body.get("current_weights"),
+    )
+    return 200, {**report_summary(report), "missing": missing}
+
+
+def _handle_latest_report(service: SVIPService, body, query):
+    report, markdown = service.latest_report()
+    if report is None:
+        raise HTTPError(404, "尚无报告，先调用 POST /allocation")
+    if query.get("format", [""])[0] == "markdown":
+        return 200, markdown
+    return 200, {**report_summary(report), "markdown": markdown}
+
+
+def _handle_clear_cache(service: SVIPService, body, query):
+    return 200, {"cleared": service.clear_cache()}
+
+
+ROUTES: Dict[Tuple[str, str], Callable] = {
+    ("GET", "/health"): _handle_health,
+    ("GET", "/metrics"): _handle_metrics,
+    ("POST", "/score"): _handle_score,
+    ("POST", "/allocation"): _handle_allocation,
+    ("GET", "/report/latest"): _handle_latest_report,
+    ("POST", "/cache/clear"): _handle_clear_cache,
+}
+
+
+class SVIPRequestHandler(BaseHTTPRequestHandler):
+    """JSON 请求分发；每个请求的耗时记入 service.metrics()"""
+
+    server_version = "SVIP/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _read_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length).decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise HTTPError(400, f"请求体不是合法 JSON: {e}")
+        if not isinstance(body, dict):
+            raise HTTPError(400, "请求体必须是 JSON 对象")
+        return body
+
+    def _dispatch(self, method: str) -> None:
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        route = f"{method} {url.path}"
+        service: SVIPService = self.server.service
+        try:
+            handler = ROUTES.get((method, url.path))
+            if handler is None:
+                raise HTTPError(404, f"未知接口: {route}")
+            status, payload = handler(service, self._read_body(), parse_qs(url.query))
+        except HTTPError as e:
+            status, payload = e.status, {"error": str(e)}
+        except (ValueError, TypeError, KeyError) as e:
+            status, payload = 400, {"error": f"{type(e).__name__}: {e}"}
+        except Exception as e:
+            logger.exception(f"{route} 处理失败")
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+        seconds = time.perf_counter() - start
+        if (method, url.path) in ROUTES:
+            service.record_latency(route, seconds, error=status >= 400)
+        self._send(status, payload, seconds)
+
+    def _send(self, status: int, payload: Any, seconds: float) -> None:
+        if isinstance(payload, str):
+            data, content_type = payload.encode("utf-8"), "text/markdown; charset=utf-8"
+        else:
+            data = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("X-Response-Time-Ms", f"{1000 * seconds:.2f}")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+def create_server(service: SVIPService, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """创建 HTTP 服务（port=0 时由系统分配端口）"""
+    server = ThreadingHTTPServer((host, port), SVIPRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
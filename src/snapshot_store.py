@@ -0,0 +1,367 @@
+"""
+SVIP v1.0 — Snapshot Store
+
+按运行日期留存的时点快照（append-only SQLite），供回测与漂移分析回放历史。
+
+每次运行写入：
+- svip_runs：一行运行记录（市场、组合汇总、MacroState 与 TailRiskResult）
+- svip_stock_snapshots：每只股票一行（SVI / A1 / A2 结果、池、权重、行动）
+
+股票快照按 (run_date, market, symbol) 建索引；同一日期同一市场多次运行时，
+查询默认取最后一次（run_id 最大）的结果。只追加、不更新、不删除。
+"""
+import json
+import logging
+import sqlite3
+from dataclasses import asdict, fields
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.models import (
+    AccelerationResult,
+    SVIPReport,
+    SVIPStock,
+    SVIScore,
+    ValuationResult,
+)
+
+logger = logging.getLogger(__name__)
+
+DateLike = Union[str, date, datetime]
+
+# 结果对象中与所属股票重复、不单独成列的字段
+_SHARED_FIELDS = ("symbol", "market", "theme")
+
+# (列前缀, 股票属性, 结果类型)
+_RESULT_GROUPS = (
+    ("svi_", "svi", SVIScore),
+    ("val_", "valuation", ValuationResult),
+    ("accel_", "acceleration", AccelerationResult),
+)
+
+_STOCK_FIELDS = ("name", "sector", "theme")
+_PORTFOLIO_FIELDS = ("raw_weight", "target_weight", "current_weight", "pool", "action")
+
+
+def _sql_type(annotation: Any) -> str:
+    if annotation in (bool, int, "bool", "int"):
+        return "INTEGER"
+    if annotation in (float, "float"):
+        return "REAL"
+    return "TEXT"
+
+
+def _result_columns() -> List[Tuple[str, str, str, str]]:
+    """(列名, SQL 类型, 股票属性, 结果字段) —— 由结果 dataclass 字段生成"""
+    columns = []
+    for prefix, attr, cls in _RESULT_GROUPS:
+        for f in fields(cls):
+            if f.name not in _SHARED_FIELDS:
+                columns.append((prefix + f.name, _sql_type(f.type), attr, f.name))
+    return columns
+
+
+RESULT_COLUMNS = _result_columns()
+STOCK_COLUMNS = (
+    ["run_id", "run_date", "market", "symbol"]
+    + list(_STOCK_FIELDS)
+    + [column for column, _, _, _ in RESULT_COLUMNS]
+    + list(_PORTFOLIO_FIELDS)
+)
+# 可做面板的数值列
+NUMERIC_COLUMNS = frozenset(
+    [column for column, sql_type, _, _ in RESULT_COLUMNS if sql_type != "TEXT"]
+    + ["raw_weight", "target_weight", "current_weight"]
+)
+
+_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS svip_runs (
+        run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_date TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        market TEXT NOT NULL,
+        n_stocks INTEGER NOT NULL,
+        total_equity REAL,
+        cash_weight REAL,
+        core_pool_weight REAL,
+        watch_pool_weight REAL,
+        final_equity_ceiling REAL,
+        macro_total_score INTEGER,
+        macro_wind TEXT,
+        macro_risk_factor REAL,
+        tail_risk_state TEXT,
+        tail_risk_factor REAL,
+        macro TEXT,
+        tail_risk TEXT,
+        theme_exposure TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_svip_runs_date_market ON svip_runs (run_date, market);
+
+    CREATE TABLE IF NOT EXISTS svip_stock_snapshots (
+        run_id INTEGER NOT NULL REFERENCES svip_runs (run_id),
+        run_date TEXT NOT NULL,
+        market TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        name TEXT,
+        sector TEXT,
+        theme TEXT,
+        {", ".join(f"{column} {sql_type}" for column, sql_type, _, _ in RESULT_COLUMNS)},
+        raw_weight REAL,
+        target_weight REAL,
+        current_weight REAL,
+        pool TEXT,
+        action TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_svip_snapshots_date_market_symbol
+        ON svip_stock_snapshots (run_date, market, symbol);
+    CREATE INDEX IF NOT EXISTS idx_svip_snapshots_symbol_date
+        ON svip_stock_snapshots (market, symbol, run_date);
+"""
+
+# 每个 (run_date, market) 的最后一次运行
+_LATEST_RUNS_SQL = "SELECT MAX(run_id) FROM svip_runs GROUP BY run_date, market"
+
+
+def _to_date(value: DateLike) -> str:
+    """日期统一为 YYYY-MM-DD 字符串"""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return date.fromisoformat(str(value)[:10]).isoformat()
+
+
+def _plain(value: Any) -> Any:
+    """枚举 → value，bool → int，其余原样写入"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def _to_json(obj: Any) -> Optional[str]:
+    if obj is None:
+        return None
+    return json.dumps(asdict(obj), default=_plain, ensure_ascii=False)
+
+
+def stock_row(run_id: int, run_date: str, stock: SVIPStock) -> Tuple:
+    """一只股票的快照行（列顺序同 STOCK_COLUMNS）"""
+    row: List[Any] = [run_id, run_date, stock.market, stock.symbol]
+    row.extend(getattr(stock, attr) for attr in _STOCK_FIELDS)
+    for _, _, attr, name in RESULT_COLUMNS:
+        result = getattr(stock, attr)
+        row.append(None if result is None else _plain(getattr(result, name)))
+    row.extend(_plain(getattr(stock, attr)) for attr in _PORTFOLIO_FIELDS)
+    return tuple(row)
+
+
+class SnapshotStore:
+    """
+    时点快照库
+
+    用法:
+        with SnapshotStore("reports/svip_snapshots.db") as store:
+            store.record(report)
+            history = store.stock_history("AAPL", market="US")
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def record(
+        self,
+        report: SVIPReport,
+        stocks: Optional[Sequence[SVIPStock]] = None,
+        run_date: Optional[DateLike] = None,
+    ) -> int:
+        """
+        追加一次运行的快照，返回 run_id
+
+        Args:
+            report: generate_report 的输出
+            stocks: 要记录的股票（默认 report.allocation.all_stocks()，即含禁入池的全部股票）
+            run_date: 快照日期（默认报告时间戳的日期）
+        """
+        if stocks is None:
+            if report.allocation is not None:
+                stocks = report.allocation.all_stocks()
+            else:
+                stocks = report.core_pool + report.watch_pool
+        run_date = _to_date(run_date if run_date is not None else report.timestamp)
+        alloc = report.allocation
+        macro = report.macro
+        tail_risk = report.tail_risk
+
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO svip_runs (run_date, timestamp, market, n_stocks,"
+                " total_equity, cash_weight, core_pool_weight, watch_pool_weight,"
+                " final_equity_ceiling, macro_total_score, macro_wind, macro_risk_factor,"
+                " tail_risk_state, tail_risk_factor, macro, tail_risk, theme_exposure)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_date,
+                    report.timestamp.isoformat(timespec="seconds"),
+                    report.market,
+                    len(stocks),
+                    alloc.total_equity if alloc else None,
+                    alloc.cash_weight if alloc else None,
+                    alloc.core_pool_weight if alloc else None,
+                    alloc.watch_pool_weight if alloc else None,
+                    alloc.final_equity_ceiling if alloc else None,
+                    macro.total_score if macro else None,
+                    macro.wind.value if macro else None,
+                    macro.macro_risk_factor if macro else None,
+                    tail_risk.state.value if tail_risk else None,
+                    tail_risk.tail_risk_factor if tail_risk else None,
+                    _to_json(macro),
+                    _to_json(tail_risk),
+                    json.dumps(alloc.theme_exposure if alloc else {}, ensure_ascii=False),
+                ),
+            )
+            run_id = cursor.lastrowid
+            self.conn.executemany(
+                f"INSERT INTO svip_stock_snapshots ({', '.join(STOCK_COLUMNS)})"
+                f" VALUES ({', '.join('?' * len(STOCK_COLUMNS))})",
+                (stock_row(run_id, run_date, stock) for stock in stocks),
+            )
+        logger.info(f"快照已写入: run_id={run_id} {run_date} {report.market} {len(stocks)} 只")
+        return run_id
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _range(
+        clauses: List[str],
+        params: List[Any],
+        start: Optional[DateLike],
+        end: Optional[DateLike],
+        column: str = "run_date",
+    ) -> None:
+        if start is not None:
+            clauses.append(f"{column} >= ?")
+            params.append(_to_date(start))
+        if end is not None:
+            clauses.append(f"{column} <= ?")
+            params.append(_to_date(end))
+
+    def runs(
+        self,
+        market: Optional[str] = None,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+    ) -> List[Dict[str, Any]]:
+        """运行记录（按 run_id 升序，含全部重复运行）"""
+        clauses, params = [], []
+        if market is not None:
+            clauses.append("market = ?")
+            params.append(market)
+        self._range(clauses, params, start, end)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.conn.execute(f"SELECT * FROM svip_runs{where} ORDER BY run_id", params)
+        return [dict(row) for row in rows]
+
+    def dates(self, market: Optional[str] = None) -> List[str]:
+        """有快照的日期（升序）"""
+        if market is None:
+            rows = self.conn.execute("SELECT DISTINCT run_date FROM svip_runs ORDER BY run_date")
+        else:
+            rows = self.conn.execute(
+                "SELECT DISTINCT run_date FROM svip_runs WHERE market = ? ORDER BY run_date",
+                (market,),
+            )
+        return [row[0] for row in rows]
+
+    def snapshot(self, run_date: DateLike, market: str) -> List[Dict[str, Any]]:
+        """某日某市场的截面（该日最后一次运行），按写入顺序"""
+        rows = self.conn.execute(
+            "SELECT * FROM svip_stock_snapshots"
+            f" WHERE run_date = ? AND market = ? AND run_id IN ({_LATEST_RUNS_SQL})"
+            " ORDER BY rowid",
+            (_to_date(run_date), market),
+        )
+        return [dict(row) for row in rows]
+
+    def stock_history(
+        self,
+        symbol: str,
+        market: Optional[str] = None,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+    ) -> List[Dict[str, Any]]:
+        """一只股票的历史快照（每个日期取最后一次运行，按日期升序）"""
+        clauses = ["symbol = ?", f"run_id IN ({_LATEST_RUNS_SQL})"]
+        params: List[Any] = [symbol]
+        if market is not None:
+            clauses.append("market = ?")
+            params.append(market)
+        self._range(clauses, params, start, end)
+        rows = self.conn.execute(
+            f"SELECT * FROM svip_stock_snapshots WHERE {' AND '.join(clauses)}"
+            " ORDER BY run_date, market",
+            params,
+        )
+        return [dict(row) for row in rows]
+
+    def panel(
+        self,
+        column: str,
+        market: Optional[str] = None,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+    ) -> Tuple[List[str], List[str], np.ndarray]:
+        """
+        数值列的 日期 × 股票 面板，供回测与漂移分析直接做数组运算
+
+        Returns:
+            (日期列表, "market:symbol" 列表, shape=(日期, 股票) 的 float 数组，缺失为 NaN)
+        """
+        if column not in NUMERIC_COLUMNS:
+            raise ValueError(f"不是数值快照列: {column}")
+        clauses = [f"run_id IN ({_LATEST_RUNS_SQL})"]
+        params: List[Any] = []
+        if market is not None:
+            clauses.append("market = ?")
+            params.append(market)
+        self._range(clauses, params, start, end)
+        rows = self.conn.execute(
+            f"SELECT run_date, market || ':' || symbol, {column}"
+            f" FROM svip_stock_snapshots WHERE {' AND '.join(clauses)}",
+            params,
+        ).fetchall()
+
+        dates = sorted({row[0] for row in rows})
+        keys = sorted({row[1] for row in rows})
+        date_index = {d: i for i, d in enumerate(dates)}
+        key_index = {k: j for j, k in enumerate(keys)}
+        values = np.full((len(dates), len(keys)), np.nan)
+        for run_date, key, value in rows:
+            if value is not None:
+                values[date_index[run_date], key_index[key]] = value
+        return dates, keys, values
+
+    def close(self) -> None:
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
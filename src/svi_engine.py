@@ -9,9 +9,11 @@ Step 2: 多维评分（7个维度加权）
 Step 3: 分级（Core / Watch / Block）
 """
 import numpy as np
-from typing import Optional, Dict
+from typing import Optional, Dict, Sequence, Union
 from config.settings import settings, SVIConfig, MARKET_PARAMS
-from src.models import SVIScore, SVILevel
+from src.models import SVIScore, SVILevel, SVIScoreBatch, SVI_LEVELS
+
+ArrayLike = Union[Sequence[float], np.ndarray]
 
 
 def clamp(x: float, lo: float = 0.0, hi: float = 100.0) -> float:
@@ -173,3 +175,177 @@ def compute_svi(
     # Step 3: 分级（使用市场特定阈值）
     result.level = classify_svi(result.total, cfg, market)
     return result
+
+
+# ============================================================================
+# 批量评分（NumPy 向量化，逐元素结果与标量路径完全一致）
+# ============================================================================
+
+def clamp_array(x: np.ndarray, lo: float = 0.0, hi: float = 100.0) -> np.ndarray:
+    return np.maximum(lo, np.minimum(hi, x))
+
+
+def hard_screen_batch(
+    roic_10y_median: np.ndarray,
+    fcf_conversion: np.ndarray,
+    gross_margin_std: np.ndarray,
+    debt_to_equity: np.ndarray,
+    cfg: SVIConfig = None,
+) -> np.ndarray:
+    """硬筛选（向量化），返回布尔数组"""
+    if cfg is None:
+        cfg = settings.svi
+    return (
+        (roic_10y_median >= cfg.roic_10y_min)
+        & (fcf_conversion >= cfg.fcf_conversion_min)
+        & (gross_margin_std <= cfg.gross_margin_volatility_max)
+        & (debt_to_equity <= cfg.debt_to_equity_max)
+    )
+
+
+def score_roic_batch(roic_10y_median: np.ndarray) -> np.ndarray:
+    x = roic_10y_median
+    mid = clamp_array((x - 0.10) / (0.35 - 0.10) * 100)
+    return np.where(x <= 0.10, 0.0, np.where(x >= 0.35, 100.0, mid))
+
+
+def score_fcf_batch(fcf_conversion: np.ndarray) -> np.ndarray:
+    x = fcf_conversion
+    mid = clamp_array((x - 0.5) / (1.0 - 0.5) * 100)
+    return np.where(x <= 0.5, 0.0, np.where(x >= 1.0, 100.0, mid))
+
+
+def score_margin_stability_batch(gross_margin_std: np.ndarray) -> np.ndarray:
+    x = gross_margin_std
+    mid = clamp_array((1 - (x - 0.01) / (0.15 - 0.01)) * 100)
+    return np.where(x <= 0.01, 100.0, np.where(x >= 0.15, 0.0, mid))
+
+
+def score_concentration_batch(market_share: np.ndarray, cr4: np.ndarray) -> np.ndarray:
+    share_score = clamp_array(market_share / 0.30 * 100)
+    cr4_score = clamp_array(cr4 / 0.80 * 100)
+    return share_score * 0.5 + cr4_score * 0.5
+
+
+def core_thresholds(markets: np.ndarray, cfg: SVIConfig = None) -> np.ndarray:
+    """每只股票的核心池阈值（跨市场适配，同 classify_svi）"""
+    if cfg is None:
+        cfg = settings.svi
+    uniq, inverse = np.unique(markets.astype(str), return_inverse=True)
+    per_market = np.array([
+        MARKET_PARAMS[m].svi_threshold if m in MARKET_PARAMS else cfg.core_threshold
+        for m in uniq
+    ], dtype=float)
+    return per_market[inverse]
+
+
+def classify_svi_batch(
+    total: np.ndarray,
+    markets: np.ndarray,
+    cfg: SVIConfig = None,
+) -> np.ndarray:
+    """SVI 分级（向量化），返回 SVI_LEVELS 下标编码"""
+    if cfg is None:
+        cfg = settings.svi
+    core = SVI_LEVELS.index(SVILevel.CORE)
+    watch = SVI_LEVELS.index(SVILevel.WATCH)
+    block = SVI_LEVELS.index(SVILevel.BLOCK)
+    level = np.where(
+        total >= core_thresholds(markets, cfg), core,
+        np.where(total >= cfg.watch_threshold, watch, block),
+    )
+    return level.astype(np.int8)
+
+
+def as_column(values: Optional[ArrayLike], n: int, default: float) -> np.ndarray:
+    """批量输入列转为 float 数组（None → 长度 n 的缺省值列）"""
+    if values is None:
+        return np.full(n, default, dtype=float)
+    return np.asarray(values, dtype=float)
+
+
+def compute_svi_batch(
+    symbols: Sequence[str],
+    markets: Union[str, Sequence[str]],
+    roic_10y_median: ArrayLike,
+    fcf_conversion: ArrayLike,
+    gross_margin_std: ArrayLike,
+    debt_to_equity: ArrayLike,
+    market_share: Optional[ArrayLike] = None,
+    cr4: Optional[ArrayLike] = None,
+    moat_rating: Optional[ArrayLike] = None,
+    demand_rigidity_rating: Optional[ArrayLike] = None,
+    substitution_risk_rating: Optional[ArrayLike] = None,
+    cfg: SVIConfig = None,
+) -> SVIScoreBatch:
+    """
+    批量计算 SVI（compute_svi 的列式版本）。
+
+    参数与 compute_svi 一一对应，但每个指标为等长数组；markets 可为单个市场。
+    可选列缺省时使用 compute_svi 的默认值。逐行结果与 compute_svi 完全一致。
+    """
+    if cfg is None:
+        cfg = settings.svi
+
+    symbols = np.asarray(symbols, dtype=object)
+    n = len(symbols)
+    if isinstance(markets, str):
+        markets = np.full(n, markets, dtype=object)
+    else:
+        markets = np.asarray(markets, dtype=object)
+
+    roic = as_column(roic_10y_median, n, 0.0)
+    fcf = as_column(fcf_conversion, n, 0.0)
+    gm_std = as_column(gross_margin_std, n, 0.0)
+    debt = as_column(debt_to_equity, n, 0.0)
+
+    # Step 1: 硬筛选
+    passed = hard_screen_batch(roic, fcf, gm_std, debt, cfg)
+
+    # Step 2: 多维评分（未通过硬筛选的行置 0）
+    def masked(scores: np.ndarray) -> np.ndarray:
+        return np.where(passed, scores, 0.0)
+
+    roic_score = masked(score_roic_batch(roic))
+    fcf_score = masked(score_fcf_batch(fcf))
+    margin_score = masked(score_margin_stability_batch(gm_std))
+    concentration_score = masked(score_concentration_batch(
+        as_column(market_share, n, 0.0), as_column(cr4, n, 0.0),
+    ))
+    moat_score = masked(clamp_array(as_column(moat_rating, n, 50.0)))
+    rigidity_score = masked(clamp_array(as_column(demand_rigidity_rating, n, 50.0)))
+    substitution_score = masked(clamp_array(100 - as_column(substitution_risk_rating, n, 50.0)))
+
+    # 加权总分
+    total = masked(clamp_array(
+        roic_score * cfg.roic_weight
+        + fcf_score * cfg.fcf_weight
+        + margin_score * cfg.margin_stability_weight
+        + concentration_score * cfg.concentration_weight
+        + moat_score * cfg.moat_weight
+        + rigidity_score * cfg.demand_rigidity_weight
+        + substitution_score * cfg.substitution_risk_weight
+    ))
+
+    # Step 3: 分级（使用市场特定阈值）
+    level = np.where(
+        passed, classify_svi_batch(total, markets, cfg), SVI_LEVELS.index(SVILevel.BLOCK)
+    ).astype(np.int8)
+
+    return SVIScoreBatch(
+        symbol=symbols,
+        market=markets,
+        passed_hard_screen=passed,
+        roic_score=roic_score,
+        fcf_score=fcf_score,
+        margin_stability_score=margin_score,
+        concentration_score=concentration_score,
+        moat_score=moat_score,
+        demand_rigidity_score=rigidity_score,
+        substitution_risk_score=substitution_score,
+        total=total,
+        level=level,
+        roic_10y_median=roic,
+        fcf_conversion=fcf,
+        gross_margin_std=gm_std,
+    )
@@ -10,8 +10,12 @@ SVIP v1.0 — A7 Tail Risk Module (极端风险与黑天鹅模块)
 危机状态下自动压缩仓位。
 """
 from typing import Optional
+
+import numpy as np
+
 from config.settings import settings, TailRiskConfig
-from src.models import TailRiskResult, TailRiskState
+from src.macro_filter import ArrayLike, broadcast_columns
+from src.models import TailRiskBatch, TailRiskResult, TailRiskState, TAIL_RISK_STATES
 
 
 def assess_liquidity_risk(
@@ -127,3 +131,67 @@ def compute_tail_risk(
     result.tail_risk_factor = factor_map[result.state]
 
     return result
+
+
+def compute_tail_risk_batch(
+    vix: ArrayLike = None,
+    credit_spread_change: ArrayLike = None,
+    regulatory_intensity: ArrayLike = 0.0,
+    industry_revenue_decline_years: ArrayLike = 0,
+    market_share_erosion: ArrayLike = 0.0,
+    cfg: TailRiskConfig = None,
+) -> TailRiskBatch:
+    """
+    批量计算尾部风险（compute_tail_risk 的列式版本）。
+
+    各输入可为标量或等长数组，广播后逐行计算；逐行结果与 compute_tail_risk 完全一致。
+    """
+    if cfg is None:
+        cfg = settings.tail_risk
+
+    c = broadcast_columns(
+        vix=vix, credit_spread_change=credit_spread_change,
+        regulatory_intensity=regulatory_intensity,
+        decline_years=industry_revenue_decline_years,
+        erosion=market_share_erosion,
+    )
+    v, csc = c["vix"], c["credit_spread_change"]
+
+    # 流动性型（NaN 的 VIX / 利差变化不计分）
+    liquidity = np.select(
+        [v >= cfg.vix_crisis, v >= cfg.vix_tense, v >= cfg.vix_alert, ~np.isnan(v)],
+        [80.0, 60.0, 40.0, 10.0],
+        default=0.0,
+    )
+    liquidity = liquidity + np.select([csc > 1.5, csc > 0.5], [20.0, 10.0], default=0.0)
+    liquidity = np.minimum(liquidity, 100)
+
+    regime = np.minimum(np.maximum(c["regulatory_intensity"], 0), 100)
+
+    years = c["decline_years"]
+    disruption = np.select([years >= 3, years >= 2], [60.0, 30.0], default=0.0)
+    disruption = np.minimum(disruption + np.minimum(c["erosion"] * 100, 40), 100)
+
+    max_risk = np.maximum(np.maximum(liquidity, regime), disruption)
+    state = np.select(
+        [max_risk >= 70, max_risk >= 50, max_risk >= 30],
+        [TAIL_RISK_STATES.index(TailRiskState.CRISIS),
+         TAIL_RISK_STATES.index(TailRiskState.TENSE),
+         TAIL_RISK_STATES.index(TailRiskState.ALERT)],
+        default=TAIL_RISK_STATES.index(TailRiskState.NORMAL),
+    ).astype(np.int8)
+    factor_table = np.empty(len(TAIL_RISK_STATES))
+    factor_table[TAIL_RISK_STATES.index(TailRiskState.NORMAL)] = cfg.normal_factor
+    factor_table[TAIL_RISK_STATES.index(TailRiskState.ALERT)] = cfg.alert_factor
+    factor_table[TAIL_RISK_STATES.index(TailRiskState.TENSE)] = cfg.tense_factor
+    factor_table[TAIL_RISK_STATES.index(TailRiskState.CRISIS)] = cfg.crisis_factor
+
+    return TailRiskBatch(
+        liquidity_risk=liquidity,
+        regime_risk=regime,
+        disruption_risk=disruption,
+        state=state,
+        tail_risk_factor=factor_table[state],
+        vix=v,
+        credit_spread_change=csc,
+    )
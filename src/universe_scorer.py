@@ -0,0 +1,240 @@
+"""
+SVIP v1.0 — Fused Universe Scorer (融合评分)
+
+股票输入字典（YAML / 数据库加载器格式）一次取列，SVI → A1 → A2 在同一遍批量计算中完成：
+
+  1. extract_columns: 全部输入拆成连续数组（A2 序列打包为二维块）
+  2. compute_svi_batch → compute_valuation_batch（直接用 SVI 总分列）→ compute_acceleration_batch
+  3. classify_pools_batch 按 Core / Watch / Block 规则给出池编码
+  4. 结果存为列式 Universe，中间不创建逐只的 SVIScore / ValuationResult / AccelerationResult
+
+只有需要进入组合的股票（默认 Core + Watch）才用 pool_stocks() 物化为 SVIPStock，
+逐行结果与 build_stock 逐只评分完全一致。
+
+score_stream 对逐条读取的输入按块执行上述流程，只保留 Core/Watch 股票与禁入池紧凑行，
+峰值内存取决于块大小而非股票池规模。
+"""
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from src.acceleration_engine import (
+    SeriesBlock, compute_acceleration_batch, compute_acceleration_score, pack_series,
+)
+from src.data_loader import iter_chunks, validate_stock_data
+from src.instrumentation import tracer
+from src.models import SVI_LEVELS, BlockedRows, SVILevel, SVIPStock, Universe
+from src.portfolio_engine import classify_pools_batch
+from src.svi_engine import compute_svi, compute_svi_batch
+from src.valuation_engine import compute_valuation, compute_valuation_batch
+
+logger = logging.getLogger(__name__)
+
+# 输入字段 → 缺省值（逐只与批量评分共用）
+SVI_FIELDS = {
+    "roic_10y_median": 0.0,
+    "fcf_conversion": 0.0,
+    "gross_margin_std": 0.1,
+    "debt_to_equity": 1.0,
+    "market_share": 0.0,
+    "cr4": 0.0,
+    "moat_rating": 50.0,
+    "demand_rigidity_rating": 50.0,
+    "substitution_risk_rating": 50.0,
+}
+VALUATION_FIELDS = {
+    "fcf_yield": 0.0,
+    "pe_ratio": 0.0,
+    "growth_rate": 0.0,
+    "valuation_percentile": 0.5,
+    "growth_concentration": 0.3,
+    "reinvestment_declining_years": 0,
+}
+SERIES_FIELDS = ("penetration", "cost_curve", "capex", "policy")
+
+STREAM_CHUNK_SIZE = 5000
+
+
+def build_stock(item: Dict[str, Any], warnings: Optional[List[str]] = None) -> SVIPStock:
+    """
+    股票输入字典（YAML / 数据库加载器格式）→ 逐只评分后的 SVIPStock
+
+    先做数据范围校验：warnings 不为 None 时追加到该列表，否则写入日志。
+    """
+    item_warnings = validate_stock_data(item)
+    if warnings is not None:
+        warnings.extend(item_warnings)
+    else:
+        for w in item_warnings:
+            logger.warning(w)
+
+    fin = item.get("financials") or {}
+    val = item.get("valuation") or {}
+    accel = item.get("acceleration") or {}
+    svi = compute_svi(
+        symbol=item["symbol"],
+        market=item.get("market", "US"),
+        **{name: fin.get(name, default) for name, default in SVI_FIELDS.items()},
+    )
+    valuation = compute_valuation(
+        symbol=item["symbol"],
+        svi_score=svi.total,
+        **{name: val.get(name, default) for name, default in VALUATION_FIELDS.items()},
+    )
+    acceleration = compute_acceleration_score(
+        symbol=item["symbol"],
+        theme=item.get("theme", ""),
+        penetration_series=accel.get("penetration"),
+        cost_curve_series=accel.get("cost_curve"),
+        capex_series=accel.get("capex"),
+        policy_series=accel.get("policy"),
+    )
+    return SVIPStock(
+        symbol=item["symbol"],
+        name=item.get("name", ""),
+        market=item.get("market", "US"),
+        sector=item.get("sector", ""),
+        theme=item.get("theme", ""),
+        svi=svi,
+        valuation=valuation,
+        acceleration=acceleration,
+    )
+
+
+@dataclass
+class UniverseColumns:
+    """股票输入的列式表示（与配置无关）"""
+    symbols: np.ndarray
+    names: np.ndarray
+    markets: np.ndarray
+    sectors: np.ndarray
+    themes: np.ndarray
+    svi_columns: Dict[str, np.ndarray]
+    valuation_columns: Dict[str, np.ndarray]
+    series: Dict[str, Optional[SeriesBlock]]
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+
+def extract_columns(items: Sequence[Dict[str, Any]]) -> UniverseColumns:
+    """股票输入字典 → 列（每个字段遍历一次，A2 序列打包为 pack_series 块）"""
+    def column(section: str, name: str, default: float) -> np.ndarray:
+        return np.fromiter(
+            (item.get(section, {}).get(name, default) for item in items),
+            dtype=float, count=len(items),
+        )
+
+    def labels(name: str, default: str) -> np.ndarray:
+        return np.array([item.get(name, default) for item in items], dtype=object)
+
+    series = {}
+    for name in SERIES_FIELDS:
+        values = [(item.get("acceleration") or {}).get(name) for item in items]
+        series[name] = pack_series(values) if any(values) else None
+
+    return UniverseColumns(
+        symbols=labels("symbol", ""),
+        names=labels("name", ""),
+        markets=labels("market", "US"),
+        sectors=labels("sector", ""),
+        themes=labels("theme", ""),
+        svi_columns={
+            name: column("financials", name, default) for name, default in SVI_FIELDS.items()
+        },
+        valuation_columns={
+            name: column("valuation", name, default) for name, default in VALUATION_FIELDS.items()
+        },
+        series=series,
+    )
+
+
+def score_columns(columns: UniverseColumns) -> Universe:
+    """对已取列的输入做 SVI → A1 → A2 与分池，返回列式 Universe"""
+    with tracer.span("svi"):
+        svi = compute_svi_batch(columns.symbols, columns.markets, **columns.svi_columns)
+    with tracer.span("a1"):
+        valuation = compute_valuation_batch(
+            columns.symbols, svi_score=svi.total, **columns.valuation_columns,
+        )
+    with tracer.span("a2"):
+        acceleration = compute_acceleration_batch(
+            columns.symbols, columns.themes, **columns.series,
+        )
+    pool = classify_pools_batch(svi.level, valuation.tier, acceleration.phase)
+    return Universe.from_batches(
+        columns.names, columns.sectors, svi, valuation, acceleration, pool=pool,
+    )
+
+
+def score_universe(items: Sequence[Dict[str, Any]]) -> Universe:
+    """
+    融合评分：股票输入字典 → 列式 Universe（含 SVI / A1 / A2 结果与池编码）。
+    """
+    with tracer.span("extract"):
+        columns = extract_columns(items)
+    universe = score_columns(columns)
+    tracer.count("stocks_scored", len(universe))
+    return universe
+
+
+def pool_stocks(
+    universe: Universe,
+    levels: Sequence[SVILevel] = (SVILevel.CORE, SVILevel.WATCH),
+) -> List[SVIPStock]:
+    """只物化指定池的股票（保持原顺序）"""
+    codes = [SVI_LEVELS.index(level) for level in levels]
+    index = np.nonzero(np.isin(universe.pool, codes))[0]
+    return [universe.to_stock(int(i)) for i in index]
+
+
+def pool_counts(universe: Universe) -> Dict[SVILevel, int]:
+    """各池股票数"""
+    counts = np.bincount(universe.pool, minlength=len(SVI_LEVELS))
+    return {level: int(counts[i]) for i, level in enumerate(SVI_LEVELS)}
+
+
+@dataclass
+class StreamedUniverse:
+    """流式评分的汇总结果"""
+    stocks: List[SVIPStock]        # Core + Watch（已物化，保持输入顺序）
+    blocked: BlockedRows           # 禁入池紧凑行（不保留物化来源）
+    n_scored: int = 0
+    n_chunks: int = 0
+
+
+def score_stream(
+    records: Iterable[Dict[str, Any]],
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    on_chunk: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+) -> StreamedUniverse:
+    """
+    流式融合评分：按 chunk_size 分块读取输入，逐块 score_universe 后只保留
+    Core/Watch 股票与禁入池紧凑行，块本身随即释放。
+
+    Args:
+        records: 股票输入字典的可迭代对象（如 data_loader.iter_stock_records）
+        chunk_size: 每块股票数
+        on_chunk: 每块评分前的回调（输入校验等）
+    """
+    stocks: List[SVIPStock] = []
+    blocked: List[BlockedRows] = []
+    n_scored = n_chunks = 0
+    for chunk in iter_chunks(records, chunk_size):
+        if on_chunk is not None:
+            on_chunk(chunk)
+        universe = score_universe(chunk)
+        stocks.extend(pool_stocks(universe))
+        rows = universe.blocked_rows()
+        # 去掉 loader，不再引用整块 Universe
+        blocked.append(BlockedRows(rows.symbol, rows.reason, rows.metric))
+        n_scored += len(chunk)
+        n_chunks += 1
+    return StreamedUniverse(
+        stocks=stocks,
+        blocked=BlockedRows.concat(blocked),
+        n_scored=n_scored,
+        n_chunks=n_chunks,
+    )
@@ -11,9 +11,16 @@ SVIP v1.0 — A1 Valuation Engine (估值安全垫模块)
   C: 再投资回报坍塌
 
 输出：ValuationTier = A / B / C
+
+compute_valuation_batch 为列式版本：整列输入一次完成 QPEG、红旗、分级与估值因子。
 """
+from typing import Optional, Sequence
+
+import numpy as np
+
 from config.settings import settings, ValuationConfig
-from src.models import ValuationResult, ValuationTier
+from src.models import ValuationBatch, ValuationResult, ValuationTier, VALUATION_TIERS
+from src.svi_engine import ArrayLike, as_column
 
 
 def compute_qpeg(
@@ -143,3 +150,88 @@ def compute_valuation(
     result.valuation_factor = factor_map[result.tier]
 
     return result
+
+
+# ===============================================================================
+# 批量（列式）版本
+# ===============================================================================
+
+def compute_qpeg_batch(
+    pe_ratio: np.ndarray,
+    growth_rate: np.ndarray,
+    svi_score: np.ndarray,
+) -> np.ndarray:
+    """compute_qpeg 的列式版本（无增长或负 PE 的行为 999.0）"""
+    valid = (growth_rate > 0) & (pe_ratio > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        qpeg = (pe_ratio / (growth_rate * 100)) / (1 + svi_score / 100)
+    return np.where(valid, qpeg, 999.0)
+
+
+def compute_valuation_batch(
+    symbols: Sequence[str],
+    fcf_yield: ArrayLike,
+    pe_ratio: ArrayLike,
+    growth_rate: ArrayLike,
+    svi_score: ArrayLike,
+    valuation_percentile: Optional[ArrayLike] = None,
+    growth_concentration: Optional[ArrayLike] = None,
+    reinvestment_declining_years: Optional[ArrayLike] = None,
+    cfg: ValuationConfig = None,
+) -> ValuationBatch:
+    """
+    批量计算 A1 估值安全垫（compute_valuation 的列式版本）。
+
+    参数与 compute_valuation 一一对应，但每个指标为等长数组；可选列缺省时使用
+    compute_valuation 的默认值。逐行结果与 compute_valuation 完全一致。
+    """
+    if cfg is None:
+        cfg = settings.valuation
+
+    symbols = np.asarray(symbols, dtype=object)
+    n = len(symbols)
+    fcf = as_column(fcf_yield, n, 0.0)
+    pe = as_column(pe_ratio, n, 0.0)
+    growth = as_column(growth_rate, n, 0.0)
+    percentile = as_column(valuation_percentile, n, 0.5)
+    concentration = as_column(growth_concentration, n, 0.3)
+    declining = as_column(reinvestment_declining_years, n, 0)
+
+    qpeg = compute_qpeg_batch(pe, growth, as_column(svi_score, n, 0.0))
+
+    # 红旗
+    flag_a = percentile > cfg.valuation_percentile_max
+    flag_b = concentration > cfg.growth_concentration_max
+    flag_c = declining >= cfg.reinvestment_decline_years
+    count = (flag_a.astype(np.int8) + flag_b + flag_c).astype(np.int8)
+
+    # Tier（与 determine_tier 的判定顺序一致）
+    tier_a, tier_b, tier_c = (VALUATION_TIERS.index(t) for t in ValuationTier)
+    tier = np.select(
+        [
+            (fcf < cfg.fcf_yield_min) | (count >= 2) | (qpeg > cfg.qpeg_tier_b_max),
+            (qpeg <= cfg.qpeg_tier_a_max) & (count == 0),
+        ],
+        [tier_c, tier_a],
+        default=tier_b,
+    ).astype(np.int8)
+
+    factors = np.empty(len(VALUATION_TIERS))
+    factors[tier_a] = cfg.tier_a_factor
+    factors[tier_b] = cfg.tier_b_factor
+    factors[tier_c] = cfg.tier_c_factor
+
+    return ValuationBatch(
+        symbol=symbols,
+        fcf_yield=fcf,
+        pe_ratio=pe,
+        growth_rate=growth,
+        qpeg=qpeg,
+        valuation_percentile=percentile,
+        red_flag_a=flag_a,
+        red_flag_b=flag_b,
+        red_flag_c=flag_c,
+        red_flag_count=count,
+        tier=tier,
+        valuation_factor=factors[tier],
+    )
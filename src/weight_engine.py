@@ -4,10 +4,11 @@ SVIP v1.0 — A3 Weight Engine (组合权重引擎)
 W_raw = Q × V × P（质量因子 × 估值因子 × 相位因子）
 然后做归一化 + 约束投影（单票/行业/主题桶上限）。
 """
-from typing import List, Dict
+from typing import List, Sequence, Tuple
+import numpy as np
 from config.settings import settings, WeightConfig, MARKET_PARAMS
 from src.models import (
-    SVIPStock, SVILevel, ValuationTier, PhaseState, PoolAction,
+    SVIPStock, SVILevel, ValuationTier, PhaseState, PoolAction, Universe,
 )
 
 
@@ -65,6 +66,76 @@ def normalize_weights(
     return stocks
 
 
+def cap_single_stock(weights: np.ndarray, cap: float) -> np.ndarray:
+    """
+    单票上限的精确解（水位填充）。
+
+    超限部分按权重比例分配给未超限标的，等价于"截断→按比例再分配"
+    反复迭代的收敛点：w' = min(cap, c·w)，c 使总权重不变。
+    若全部标的封顶仍放不下总权重，则全部取 cap，余量留作现金。
+    """
+    if weights.size == 0 or weights.max() <= cap:
+        return weights.copy()
+
+    positive = weights[weights > 0]
+    total = positive.sum()
+    if len(positive) * cap <= total:
+        return np.where(weights > 0, cap, weights)
+
+    ws = np.sort(positive)[::-1]
+    suffix = np.cumsum(ws[::-1])[::-1]          # suffix[k] = sum(ws[k:])
+    k = np.arange(len(ws))
+    scale = (total - k * cap) / suffix          # 前 k 只封顶时其余标的的放大系数
+    first = int(np.argmax(scale * ws <= cap))   # 最小可行的封顶数
+    return np.minimum(cap, weights * scale[first])
+
+
+def cap_groups(
+    weights: np.ndarray,
+    group_index: np.ndarray,
+    cap: float,
+) -> np.ndarray:
+    """分组上限：超限分组整体按比例缩放到 cap（超出部分留作现金）"""
+    totals = np.bincount(group_index, weights=weights)
+    ratio = np.ones_like(totals)
+    over = totals > cap
+    ratio[over] = cap / totals[over]
+    return weights * ratio[group_index]
+
+
+def project_weights(
+    weights: np.ndarray,
+    theme_index: np.ndarray,
+    sector_index: np.ndarray,
+    stock_max: float,
+    theme_max: float,
+    sector_max: float,
+) -> np.ndarray:
+    """
+    联合约束投影：单票 → 慢变量桶 → 行业。
+
+    分组约束只会按比例缩小权重，不会破坏已满足的单票/主题上限，
+    因此一次投影即得到同时满足三类约束的可行解，复杂度 O(n log n)。
+    """
+    w = cap_single_stock(np.asarray(weights, dtype=float), stock_max)
+    w = cap_groups(w, theme_index, theme_max)
+    return cap_groups(w, sector_index, sector_max)
+
+
+def group_index(values: Sequence[str]) -> np.ndarray:
+    """分组键 → 连续整数编码"""
+    _, index = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return index.reshape(-1)
+
+
+def constraint_caps(cfg: WeightConfig, market: str) -> Tuple[float, float, float]:
+    """跨市场适配后的 (单票, 主题桶, 行业) 上限"""
+    mp = MARKET_PARAMS.get(market)
+    stock_max = mp.single_stock_max if mp else cfg.single_stock_max
+    theme_max = mp.theme_bucket_max if mp else cfg.theme_bucket_max
+    return stock_max, theme_max, cfg.sector_max
+
+
 def apply_constraints(
     stocks: List[SVIPStock],
     cfg: WeightConfig = None,
@@ -72,64 +143,42 @@ def apply_constraints(
 ) -> List[SVIPStock]:
     """
     约束投影：按顺序执行。
-    1. 单票上限 8%（跨市场适配）
+    1. 单票上限 8%（跨市场适配），超出部分按比例分给未超限标的
     2. 单慢变量桶上限 30%（跨市场适配）
     3. 单行业上限 25%
-    超出部分按比例缩放。
+    分组超限时按比例缩放。
     """
     if cfg is None:
         cfg = settings.weight
+    if not stocks:
+        return stocks
 
-    # 跨市场适配约束
-    mp = MARKET_PARAMS.get(market)
-    stock_max = mp.single_stock_max if mp else cfg.single_stock_max
-    theme_max = mp.theme_bucket_max if mp else cfg.theme_bucket_max
-
-    # 约束1：单票上限（迭代直到收敛）
-    for _ in range(10):  # 最多迭代10轮防无限循环
-        overflow = 0.0
-        for s in stocks:
-            if s.target_weight > stock_max:
-                overflow += s.target_weight - stock_max
-                s.target_weight = stock_max
-        if overflow < 1e-6:
-            break
-        # 溢出部分按原始权重比例分配给未超限标的
-        eligible = [s for s in stocks if 0 < s.target_weight < stock_max]
-        if not eligible:
-            break
-        total_eligible = sum(s.target_weight for s in eligible)
-        if total_eligible <= 0:
-            break
-        for s in eligible:
-            s.target_weight += overflow * (s.target_weight / total_eligible)
-
-    # 约束2：慢变量桶上限
-    _apply_group_cap(stocks, key="theme", cap=theme_max)
-
-    # 约束3：行业上限
-    _apply_group_cap(stocks, key="sector", cap=cfg.sector_max)
+    weights = np.fromiter((s.target_weight for s in stocks), dtype=float, count=len(stocks))
+    projected = project_weights(
+        weights,
+        group_index([getattr(s, "theme", "other") for s in stocks]),
+        group_index([getattr(s, "sector", "other") for s in stocks]),
+        *constraint_caps(cfg, market),
+    )
+    for s, w in zip(stocks, projected):
+        s.target_weight = float(w)
 
     return stocks
 
 
-def _apply_group_cap(
-    stocks: List[SVIPStock],
-    key: str,
-    cap: float,
-) -> None:
-    """对某个分组维度应用上限约束"""
-    groups: Dict[str, float] = {}
-    for s in stocks:
-        group = getattr(s, key, "other")
-        groups[group] = groups.get(group, 0) + s.target_weight
-
-    for group, total in groups.items():
-        if total > cap:
-            ratio = cap / total
-            for s in stocks:
-                if getattr(s, key, "other") == group:
-                    s.target_weight *= ratio
+def apply_constraints_universe(
+    universe: Universe,
+    cfg: WeightConfig = None,
+    market: str = "US",
+) -> Universe:
+    """apply_constraints 的列式版本：直接使用 theme/sector 编码，原地更新 target_weight"""
+    if cfg is None:
+        cfg = settings.weight
+    universe.target_weight[:] = project_weights(
+        universe.target_weight, universe.theme_code, universe.sector_code,
+        *constraint_caps(cfg, market),
+    )
+    return universe
 
 
 def determine_actions(
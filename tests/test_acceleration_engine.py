@@ -82,3 +82,54 @@ def test_compute_acceleration_score_no_data():
     assert result.acceleration_score == 50.0
     assert result.phase == PhaseState.STEADY
     assert result.phase_factor == 1.0
+
+
+def _random_series(rng, allow_zero=True):
+    """随机长度序列（含 None、短序列与 0 值）"""
+    import numpy as np
+    kind = rng.integers(0, 6)
+    if kind == 0:
+        return None
+    length = int(rng.integers(0, 12))
+    values = list(np.cumsum(rng.normal(1.0, 0.5, length)) * rng.choice([1, 1e3, 1e-2]))
+    if allow_zero and length > 3 and kind == 1:
+        values[length - 2] = 0.0
+    return values
+
+
+def test_compute_acceleration_batch_matches_scalar():
+    """批量检测与逐只 compute_acceleration_score 结果一致"""
+    import numpy as np
+    from config.settings import AccelerationConfig
+    from src.acceleration_engine import compute_acceleration_batch, pack_series
+
+    rng = np.random.default_rng(3)
+    n = 400
+    names = ("penetration", "cost_curve", "capex", "policy")
+    series = {name: [_random_series(rng) for _ in range(n)] for name in names}
+    symbols = [f"S{i}" for i in range(n)]
+    themes = [f"T{i % 3}" for i in range(n)]
+
+    for cfg in (AccelerationConfig(), AccelerationConfig(smoothing_periods=5)):
+        batch = compute_acceleration_batch(
+            symbols, themes, cfg=cfg,
+            **{name: pack_series(series[name]) for name in names},
+        )
+        expected = [
+            compute_acceleration_score(
+                symbol=symbols[i], theme=themes[i], cfg=cfg,
+                **{f"{name}_series": series[name][i] for name in names},
+            )
+            for i in range(n)
+        ]
+        assert batch.to_results() == expected
+    assert len(set(batch.phases())) == 3
+
+
+def test_compute_acceleration_batch_no_data():
+    """整块无数据时默认稳态"""
+    from src.acceleration_engine import compute_acceleration_batch
+
+    batch = compute_acceleration_batch(["A", "B"])
+    assert list(batch.acceleration_score) == [50.0, 50.0]
+    assert batch.phases() == [PhaseState.STEADY, PhaseState.STEADY]
@@ -0,0 +1,114 @@
+"""
+SVIP v1.0 — AIRS-X Bridge Tests
+
+测试 summary.csv 编译索引（精简列、优先级、增量重建）与评估字段补充。
+"""
+import csv
+import os
+
+import pytest
+
+from src import airsx_bridge
+from src.airsx_bridge import (
+    AIRSX_FIELDS, clear_airsx_cache, enrich_batch, load_airsx_summary,
+)
+
+COLUMNS = ["stock_code", "name", "industry", "airs_grade", "airs_score", "S", "P", "U", "D",
+           "zone", "esd_quadrant", "notes"]
+
+
+def _write_summary(path, rows):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({c: row.get(c, "") for c in COLUMNS})
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """记录被重新解析的 CSV"""
+    clear_airsx_cache()
+    calls = []
+    original = airsx_bridge._parse_summary
+    monkeypatch.setattr(
+        airsx_bridge, "_parse_summary", lambda p: calls.append(os.path.basename(os.path.dirname(p))) or original(p)
+    )
+    yield calls
+    clear_airsx_cache()
+
+
+def test_index_keeps_needed_columns_and_priority(tmp_path, parses):
+    """只保留 enrich 用到的列；同一代码以较新的结果目录为准"""
+    airsx = tmp_path / "airs-x"
+    _write_summary(str(airsx / "airs_cn_results_20250101" / "summary.csv"), [
+        {"stock_code": "600519", "S": "4.5", "U": "1.0", "zone": "稳定收益", "industry": "白酒"},
+        {"stock_code": "000001", "S": "2.0", "zone": "成长机遇", "notes": "x" * 100},
+    ])
+    _write_summary(str(airsx / "airs_cn_results_20250601" / "summary.csv"), [
+        {"stock_code": "600519", "S": "4.8", "zone": "主脊线资产", "airs_grade": "A"},
+    ])
+
+    summary = load_airsx_summary(str(airsx), cache_dir=str(tmp_path / "cache"))
+    assert set(summary["000001"]) == set(AIRSX_FIELDS)
+    assert summary["600519"]["zone"] == "主脊线资产"
+    assert summary["600519"]["S"] == "4.8"
+    assert summary["000001"]["U"] == ""
+    assert sorted(parses) == ["airs_cn_results_20250101", "airs_cn_results_20250601"]
+
+
+def test_index_persisted_and_rebuilt_incrementally(tmp_path, parses):
+    """CSV 未变化时从磁盘索引加载；新增结果目录只解析新文件"""
+    airsx, cache_dir = tmp_path / "airs-x", str(tmp_path / "cache")
+    _write_summary(str(airsx / "airs_cn_results_20250101" / "summary.csv"),
+                   [{"stock_code": "600519", "S": "4.5"}])
+
+    first = load_airsx_summary(str(airsx), cache_dir=cache_dir)
+    assert len(parses) == 1
+    assert load_airsx_summary(str(airsx), cache_dir=cache_dir) is first
+    assert len(os.listdir(cache_dir)) == 1
+
+    clear_airsx_cache()
+    assert load_airsx_summary(str(airsx), cache_dir=cache_dir) == first
+    assert len(parses) == 1
+
+    _write_summary(str(airsx / "airs_us_results_20250301" / "summary.csv"),
+                   [{"stock_code": "AAPL", "S": "3.5", "U": "2.5"}])
+    clear_airsx_cache()
+    summary = load_airsx_summary(str(airsx), cache_dir=cache_dir)
+    assert parses == ["airs_cn_results_20250101", "airs_us_results_20250301"]
+    assert set(summary) == {"600519", "AAPL"}
+
+    path = str(airsx / "airs_cn_results_20250101" / "summary.csv")
+    _write_summary(path, [{"stock_code": "600519", "S": "1.5"}, {"stock_code": "600036"}])
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    summary = load_airsx_summary(str(airsx), cache_dir=cache_dir)
+    assert parses[-1] == "airs_cn_results_20250101" and len(parses) == 3
+    assert summary["600519"]["S"] == "1.5" and "600036" in summary
+
+
+def test_corrupt_index_and_root_fallback(tmp_path, parses):
+    """损坏的索引自动重建；没有结果目录时回退到根目录 summary.csv"""
+    airsx, cache_dir = tmp_path / "airs-x", tmp_path / "cache"
+    _write_summary(str(airsx / "summary.csv"), [
+        {"stock_code": "MSFT", "S": "4.2", "U": "1.5", "zone": "主脊线资产",
+         "esd_quadrant": "护城河", "airs_grade": "A", "industry": "Software"},
+    ])
+    cache_dir.mkdir()
+    with open(airsx_bridge._index_path(str(cache_dir), str(airsx)), "wb") as f:
+        f.write(b"junk")
+
+    stocks = enrich_batch(
+        [{"symbol": "MSFT", "sector": "", "financials": {}}, {"symbol": "XYZ", "financials": {}}],
+        str(airsx),
+        cache_dir=str(cache_dir),
+    )
+    assert parses == ["airs-x"]
+    assert stocks[0]["sector"] == "Software"
+    assert stocks[0]["financials"] == {
+        "moat_rating": 100, "demand_rigidity_rating": 90, "substitution_risk_rating": 30,
+    }
+    assert stocks[1]["financials"] == {}
+    assert load_airsx_summary(str(airsx), cache_dir=None)["MSFT"]["industry"] == "Software"
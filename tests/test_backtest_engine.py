@@ -0,0 +1,306 @@
+"""
+SVIP v1.0 — Backtest Engine Tests
+
+用多年度合成 SQLite 库测试时点输入与财年滚动回测。
+"""
+import random
+import sqlite3
+
+import numpy as np
+import pytest
+from src.backtest_engine import (
+    load_annual_panel, point_in_time_inputs, run_backtest,
+)
+from src.db_loader import SVIPDatabaseLoader
+from src.snapshot_store import SnapshotStore
+
+FIRST_YEAR, LAST_YEAR = 2010, 2023
+
+
+def _make_china_db(path: str, n_companies: int = 10, seed: int = 3) -> None:
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE companies (
+            company_id INTEGER PRIMARY KEY, stock_code TEXT,
+            company_name TEXT, industry_name TEXT
+        );
+        CREATE TABLE financial_data (
+            id INTEGER PRIMARY KEY, company_id INTEGER, fiscal_year INTEGER,
+            report_period TEXT, net_profit REAL, total_assets REAL,
+            total_liabilities REAL, operating_cash_flow REAL, capex REAL,
+            free_cash_flow REAL, revenue REAL, operating_profit REAL, pe_ttm REAL
+        );
+        CREATE TABLE market_data (
+            id INTEGER PRIMARY KEY, company_id INTEGER, trade_date TEXT,
+            market_cap REAL, pe_ratio_ttm REAL
+        );
+    """)
+    for cid in range(1, n_companies + 1):
+        conn.execute(
+            "INSERT INTO companies VALUES (?, ?, ?, ?)",
+            (cid, f"{600000 + cid:06d}", f"公司{cid}", f"行业{cid % 3}"),
+        )
+        first = FIRST_YEAR + cid % 4
+        cap = rng.uniform(500, 5000)
+        roic, margin = rng.uniform(0.02, 0.35), rng.uniform(0.1, 0.3)
+        for year in range(first, LAST_YEAR + 1):
+            # 部分公司缺个别财年
+            if cid % 3 == 0 and year == first + 3:
+                continue
+            revenue = rng.uniform(50, 500)
+            assets = rng.uniform(100, 1000)
+            liabilities = assets * rng.uniform(0.1, 0.6)
+            profit = (assets - liabilities) * roic * rng.uniform(0.8, 1.2)
+            if rng.random() < 0.1:
+                profit = rng.uniform(-5, 5)
+            ocf = abs(profit) * rng.uniform(1.0, 1.6) + rng.uniform(0, 5)
+            capex = rng.choice([-ocf * rng.uniform(0, 0.3), -ocf * rng.uniform(0, 0.3), 0.0])
+            conn.execute(
+                "INSERT INTO financial_data (company_id, fiscal_year, report_period,"
+                " net_profit, total_assets, total_liabilities, operating_cash_flow,"
+                " capex, free_cash_flow, revenue, operating_profit, pe_ttm)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    cid, year, ["Q4", None, f"{year}1231"][year % 3],
+                    profit, assets, liabilities, ocf, capex, ocf - rng.uniform(1, 30),
+                    revenue, revenue * margin * rng.uniform(0.95, 1.05),
+                    rng.choice([None, rng.uniform(5, 60)]),
+                ),
+            )
+            conn.execute(
+                "INSERT INTO financial_data (company_id, fiscal_year, report_period,"
+                " net_profit, total_assets, total_liabilities, revenue, pe_ttm)"
+                " VALUES (?, ?, 'Q2', 1, 1, 1, 1, ?)",
+                (cid, year, rng.uniform(5, 60)),
+            )
+        # 每年一个披露前交易日与两个调仓窗口内交易日
+        for year in range(first + 1, LAST_YEAR + 2):
+            for day in ("01-05", "05-06", "05-08"):
+                cap *= rng.uniform(0.9, 1.15)
+                conn.execute(
+                    "INSERT INTO market_data (company_id, trade_date, market_cap, pe_ratio_ttm)"
+                    " VALUES (?, ?, ?, ?)",
+                    (cid, f"{year}-{day}", cap, rng.choice([None, rng.uniform(5, 60)])),
+                )
+    conn.commit()
+    conn.close()
+
+
+def _make_us_db(path: str, n_companies: int = 8, seed: int = 5) -> None:
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE companies (gvkey TEXT, tic TEXT, conm TEXT);
+        CREATE TABLE financial_data_annual (
+            gvkey TEXT, fyear INTEGER, ni REAL, ib REAL, at REAL, lt REAL,
+            oancf REAL, capx REAL, revt REAL, sale REAL, oiadp REAL,
+            oibdp REAL, prcc_f REAL, csho REAL, epsfi REAL
+        );
+    """)
+    for i in range(n_companies):
+        gvkey = f"{1000 + i:06d}"
+        conn.execute("INSERT INTO companies VALUES (?, ?, ?)", (gvkey, f"Tk{chr(65 + i)}", f"Co {i}"))
+        roic, margin = rng.uniform(0.02, 0.35), rng.uniform(0.1, 0.3)
+        for year in range(FIRST_YEAR + i % 3, LAST_YEAR + 1):
+            if i % 4 == 1 and year == FIRST_YEAR + 5:
+                continue
+            at = rng.uniform(100, 1000)
+            lt = at * rng.uniform(0.1, 0.6)
+            ni = (at - lt) * roic * rng.uniform(0.8, 1.2)
+            oancf = ni * rng.uniform(1.0, 1.6)
+            revt = rng.uniform(100, 900)
+            conn.execute(
+                "INSERT INTO financial_data_annual VALUES"
+                " (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    gvkey, year, rng.choice([None, ni]), ni * rng.uniform(0.9, 1.1),
+                    at, lt, oancf, oancf * rng.uniform(0, 0.3),
+                    rng.choice([None, revt]), revt,
+                    revt * margin * rng.uniform(0.95, 1.05), revt * rng.uniform(0.15, 0.35),
+                    rng.uniform(10, 300), rng.uniform(1, 50), rng.uniform(-1, 10),
+                ),
+            )
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def dbs(tmp_path):
+    china_db = str(tmp_path / "china.db")
+    us_db = str(tmp_path / "us.db")
+    _make_china_db(china_db)
+    _make_us_db(us_db)
+    return china_db, us_db
+
+
+def _rows(conn, sql, params):
+    return [dict(r) for r in conn.execute(sql, params)]
+
+
+def test_china_inputs_match_loader_point_in_time(dbs):
+    """每个 (股票, 财年) 的时点指标与加载器在截至该财年的数据上的计算一致"""
+    china_db, _ = dbs
+    loader = SVIPDatabaseLoader(china_db_path=china_db)
+    loader.connect("CN")
+    conn = loader.china_conn
+    panel = load_annual_panel(conn, "CN")
+    inputs = point_in_time_inputs(panel)
+
+    checked = 0
+    for i, cid in enumerate(panel.keys):
+        for t, year in enumerate(panel.years):
+            if not panel.present[i, t]:
+                continue
+            financials = _rows(conn, """
+                SELECT * FROM financial_data
+                WHERE company_id = ? AND fiscal_year <= ?
+                  AND (report_period = 'Q4' OR report_period IS NULL
+                       OR report_period LIKE '%1231')
+                ORDER BY fiscal_year DESC LIMIT 10
+            """, (cid, int(year)))
+            metrics = loader._compute_china_metrics(financials)
+            assert inputs.roic_10y_median[i, t] == pytest.approx(metrics["roic_10y_median"])
+            assert inputs.fcf_conversion[i, t] == pytest.approx(metrics["fcf_conversion"])
+            assert inputs.gross_margin_std[i, t] == pytest.approx(metrics["gross_margin_std"])
+            assert inputs.debt_to_equity[i, t] == pytest.approx(metrics["debt_to_equity"])
+            assert inputs.reinvestment_declining_years[i, t] == metrics["reinvestment_declining_years"]
+            length = inputs.capex_lengths[i, t]
+            assert list(inputs.capex[i, t, :length]) == pytest.approx(metrics["capex"] or [])
+
+            market = _rows(conn, """
+                SELECT * FROM market_data WHERE company_id = ? AND trade_date >= ?
+                  AND trade_date < ? ORDER BY trade_date LIMIT 1
+            """, (cid, f"{year + 1}-05-01", f"{year + 2}-01-01"))
+            if not market:
+                continue
+            fcf_yield, pe, growth = loader._calculate_valuation_metrics(financials, market[0])
+            pe_history = [r["pe_ttm"] for r in _rows(conn, """
+                SELECT pe_ttm FROM financial_data WHERE company_id = ? AND fiscal_year <= ?
+                  AND pe_ttm IS NOT NULL AND pe_ttm > 0
+            """, (cid, int(year)))]
+            assert inputs.fcf_yield[i, t] == pytest.approx(fcf_yield)
+            assert inputs.pe_ratio[i, t] == pytest.approx(pe)
+            assert inputs.growth_rate[i, t] == pytest.approx(growth)
+            assert inputs.valuation_percentile[i, t] == pytest.approx(
+                loader._calculate_china_valuation_percentile(cid, pe, pe_history)
+            )
+            checked += 1
+    loader.close()
+    assert checked > 50
+
+
+def test_us_inputs_match_loader_point_in_time(dbs):
+    """美股时点指标与加载器一致"""
+    _, us_db = dbs
+    loader = SVIPDatabaseLoader(us_db_path=us_db)
+    loader.connect("US")
+    conn = loader.us_conn
+    panel = load_annual_panel(conn, "US")
+    inputs = point_in_time_inputs(panel)
+
+    for i, gvkey in enumerate(panel.keys):
+        for t, year in enumerate(panel.years):
+            if not panel.present[i, t]:
+                continue
+            financials = _rows(conn, """
+                SELECT * FROM financial_data_annual WHERE gvkey = ? AND fyear <= ?
+                ORDER BY fyear DESC LIMIT 10
+            """, (gvkey, int(year)))
+            metrics = loader._compute_us_metrics(financials)
+            fcf_yield, pe, growth = loader._calculate_us_valuation_metrics(financials)
+            assert inputs.roic_10y_median[i, t] == pytest.approx(metrics["roic_10y_median"])
+            assert inputs.fcf_conversion[i, t] == pytest.approx(metrics["fcf_conversion"])
+            assert inputs.gross_margin_std[i, t] == pytest.approx(metrics["gross_margin_std"])
+            assert inputs.debt_to_equity[i, t] == pytest.approx(metrics["debt_to_equity"])
+            assert inputs.reinvestment_declining_years[i, t] == metrics["reinvestment_declining_years"]
+            assert inputs.fcf_yield[i, t] == pytest.approx(fcf_yield)
+            assert inputs.pe_ratio[i, t] == pytest.approx(pe)
+            assert inputs.growth_rate[i, t] == pytest.approx(growth)
+            assert inputs.valuation_percentile[i, t] == pytest.approx(
+                loader._calculate_us_valuation_percentile(financials, pe)
+            )
+    loader.close()
+
+
+def test_no_look_ahead(dbs):
+    """截断未来财年后，历史调仓期的输入与权重不变"""
+    china_db, _ = dbs
+    with sqlite3.connect(china_db) as conn:
+        full = run_backtest(load_annual_panel(conn, "CN"), end_year=2018)
+    with sqlite3.connect(china_db) as conn:
+        conn.execute("DELETE FROM financial_data WHERE fiscal_year > 2019")
+        conn.execute("DELETE FROM market_data WHERE trade_date >= '2021-01-01'")
+        truncated = run_backtest(load_annual_panel(conn, "CN"), end_year=2018)
+
+    assert list(full.fiscal_years) == list(truncated.fiscal_years)
+    np.testing.assert_array_equal(full.weights, truncated.weights)
+    np.testing.assert_array_equal(full.portfolio_returns, truncated.portfolio_returns)
+
+
+@pytest.mark.parametrize("market", ["CN", "US"])
+def test_backtest_weights_and_returns(dbs, market):
+    """权重满足约束，组合收益为权重与个股收益的内积"""
+    china_db, us_db = dbs
+    with sqlite3.connect(china_db if market == "CN" else us_db) as conn:
+        panel = load_annual_panel(conn, market)
+    ratings = {
+        symbol: {"moat_rating": 90, "demand_rigidity_rating": 90, "substitution_risk_rating": 10,
+                 "market_share": 0.3, "cr4": 0.6}
+        for symbol in panel.symbols
+    }
+    result = run_backtest(panel, ratings=ratings)
+
+    assert len(result) > 5
+    assert result.n_passed.sum() > 0
+    assert result.weights.sum() > 0
+    assert (result.weights.max(axis=1) <= 0.08 + 1e-9).all()
+    assert (result.weights >= 0).all()
+    assert (result.weights.sum(axis=1) <= 1.0 + 1e-9).all()
+    np.testing.assert_allclose(result.cash_weight, 1.0 - result.weights.sum(axis=1))
+    np.testing.assert_allclose(
+        result.portfolio_returns, (result.weights * result.asset_returns).sum(axis=1),
+    )
+    # 持仓只能来自当期有年报的股票
+    held = result.weights > 0
+    periods = [panel.year_index(int(y)) for y in result.fiscal_years]
+    assert not (held & ~panel.present[:, periods].T).any()
+
+    summary = result.summary()
+    assert summary["periods"] == len(result)
+    assert summary["total_return"] == pytest.approx(result.equity_curve[-1] - 1.0)
+    assert 0.0 <= summary["max_drawdown"] <= 1.0
+
+
+def test_us_prices_lag_one_fiscal_year(dbs):
+    """美股财年 Y 的持有期为 prcc_f[Y+1] → prcc_f[Y+2]"""
+    _, us_db = dbs
+    with sqlite3.connect(us_db) as conn:
+        panel = load_annual_panel(conn, "US")
+    price = panel.fields["price"]
+    np.testing.assert_array_equal(panel.prices[:, :-1], price[:, 1:])
+    assert np.isnan(panel.prices[:, -1]).all()
+
+
+def test_china_rebalance_uses_first_trade_after_cutoff(dbs):
+    """A股调仓价格取下一年 rebalance_day 之后的第一个交易日"""
+    china_db, _ = dbs
+    with sqlite3.connect(china_db) as conn:
+        panel = load_annual_panel(conn, "CN", symbols=["600001"])
+        expected = conn.execute(
+            "SELECT market_cap FROM market_data WHERE company_id = 1"
+            " AND trade_date = '2016-05-06'"
+        ).fetchone()[0]
+    assert list(panel.symbols) == ["600001"]
+    assert panel.prices[0, panel.year_index(2015)] == expected
+    assert panel.rebalance_dates[panel.year_index(2015)] == "2016-05-01"
+
+
+def test_backtest_records_snapshots(dbs, tmp_path):
+    """提供快照库时每个调仓日追加一份快照"""
+    china_db, _ = dbs
+    with sqlite3.connect(china_db) as conn:
+        panel = load_annual_panel(conn, "CN")
+    with SnapshotStore(str(tmp_path / "snapshots.db")) as store:
+        result = run_backtest(panel, start_year=2015, end_year=2017, snapshot_store=store)
+        assert store.dates("CN") == result.rebalance_dates
@@ -0,0 +1,38 @@
+"""
+SVIP v1.0 — Benchmark Suite Tests
+
+基准工具本身的冒烟测试：合成数据确定性、分阶段计时与基线对比。
+"""
+from benchmarks import bench_memory, bench_pipeline
+from benchmarks.synthetic_universe import make_universe, universe_themes
+
+
+def test_universe_is_deterministic():
+    a = make_universe(200, seed=3)
+    assert a == make_universe(200, seed=3)
+    assert a != make_universe(200, seed=4)
+    assert {item["market"] for item in a} == {"US", "CN", "HK"}
+    assert {item["theme"] for item in a} - {""} == set(universe_themes())
+
+
+def test_bench_size_times_every_stage(tmp_path, monkeypatch):
+    monkeypatch.setattr(bench_pipeline, "CACHE_DIR", str(tmp_path))
+    timings = bench_pipeline.bench_size(40, repeat=1)
+    assert list(timings) == bench_pipeline.STAGES
+    assert all(seconds >= 0 for seconds in timings.values())
+
+
+def test_compare_flags_regressions():
+    baseline = {"100": {"load": 0.1, "compute_svi": 0.001}}
+    results = {"100": {"load": 0.2, "compute_svi": 0.004}, "1000": {"load": 1.0}}
+    table, regressions = bench_pipeline.compare(results, baseline, tolerance=1.5)
+    # compute_svi 低于可比阈值，不判定退化；1000 无基线
+    assert regressions == ["100/load: 0.1000s → 0.2000s (2.00x)"]
+    assert "1000" in table
+
+
+def test_slots_shrink_result_objects():
+    results = bench_memory.bench(2000)
+    for row in results.values():
+        assert row["slots"] < row["dict"]
+        assert row["frozen"] <= row["dict"]
@@ -0,0 +1,110 @@
+"""
+SVIP v1.0 — Data Loader Tests
+
+测试主题桶/慢变量加载、缓存命中与失效，以及股票输入校验与流式读取。
+"""
+import json
+import os
+
+import pytest
+import yaml
+
+from src import data_loader
+from src.data_loader import (
+    clear_yaml_cache, get_proxy_indicators, get_valid_themes, iter_chunks, iter_stock_records,
+    load_slow_variables, load_yaml_cached, validate_stock_data, validate_stock_themes,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def _write(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, allow_unicode=True)
+
+
+def test_repo_data_lookups():
+    """仓库内的主题桶与慢变量：索引查询与逐条查找一致"""
+    themes = get_valid_themes(DATA_DIR)
+    assert "AI/算力密度" in themes
+    for sv in load_slow_variables(DATA_DIR):
+        assert get_proxy_indicators(DATA_DIR, sv["theme"]) == sv["proxy_indicators"]
+    assert get_proxy_indicators(DATA_DIR, "不存在的主题") == []
+
+    warnings = validate_stock_themes(
+        [{"symbol": "A", "theme": "AI/算力密度"}, {"symbol": "B", "theme": "不存在"}, {"symbol": "C"}],
+        DATA_DIR,
+    )
+    assert len(warnings) == 1 and warnings[0].startswith("B:")
+
+
+def test_cache_hit_and_invalidation(tmp_path, monkeypatch):
+    """文件未变化时只解析一次；mtime/大小变化或显式清除后重新解析"""
+    clear_yaml_cache()
+    path = tmp_path / "theme_buckets.yaml"
+    _write(path, {"theme_buckets": {"X": {}}})
+
+    parses = []
+    original = data_loader.load_yaml
+    monkeypatch.setattr(data_loader, "load_yaml", lambda p: parses.append(p) or original(p))
+
+    for _ in range(100):
+        assert get_valid_themes(str(tmp_path)) == {"X"}
+    assert validate_stock_themes([{"symbol": "S", "theme": "Y"}] * 50, str(tmp_path))
+    assert len(parses) == 1
+    assert load_yaml_cached(str(path)) is load_yaml_cached(str(path))
+
+    _write(path, {"theme_buckets": {"X": {}, "Y": {}}})
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert get_valid_themes(str(tmp_path)) == {"X", "Y"}
+    assert len(parses) == 2
+
+    clear_yaml_cache(str(path))
+    get_valid_themes(str(tmp_path))
+    assert len(parses) == 3
+
+    os.remove(path)
+    assert get_valid_themes(str(tmp_path)) == frozenset()
+    assert load_yaml_cached(str(path)) == {}
+
+
+def test_proxy_index_first_theme_wins(tmp_path):
+    """同一主题出现多次时返回第一条的代理指标"""
+    clear_yaml_cache()
+    _write(tmp_path / "slow_variables.yaml", {"slow_variables": [
+        {"theme": "T", "proxy_indicators": ["a"]},
+        {"theme": "T", "proxy_indicators": ["b"]},
+        {"theme": "U"},
+    ]})
+    assert get_proxy_indicators(str(tmp_path), "T") == ["a"]
+    assert get_proxy_indicators(str(tmp_path), "U") == []
+
+
+def test_iter_stock_records_formats(tmp_path):
+    """JSONL、多文档 YAML 与原单文档 stocks: 列表读出相同记录"""
+    items = load_yaml_cached(os.path.join(DATA_DIR, "sample_stocks.yaml"))["stocks"]
+
+    jsonl = tmp_path / "stocks.jsonl"
+    jsonl.write_text("".join(json.dumps(item, ensure_ascii=False) + "\n\n" for item in items),
+                     encoding="utf-8")
+    multi = tmp_path / "stocks.yaml"
+    with open(multi, "w", encoding="utf-8") as f:
+        yaml.safe_dump_all(items, f, allow_unicode=True)
+
+    assert list(iter_stock_records(str(jsonl))) == items
+    assert list(iter_stock_records(str(multi))) == items
+    assert list(iter_stock_records(os.path.join(DATA_DIR, "sample_stocks.yaml"))) == items
+
+    jsonl.write_text('{"symbol": "A"}\n{bad\n', encoding="utf-8")
+    with pytest.raises(ValueError, match=":2:"):
+        list(iter_stock_records(str(jsonl)))
+
+
+def test_iter_chunks_and_validate_stock_data():
+    assert [len(c) for c in iter_chunks(range(7), 3)] == [3, 3, 1]
+    with pytest.raises(ValueError):
+        list(iter_chunks([], 0))
+    warnings = validate_stock_data({"symbol": "X", "financials": {"roic_10y_median": 2.0},
+                                    "valuation": {"pe_ratio": -1}})
+    assert len(warnings) == 2 and all(w.startswith("X:") for w in warnings)
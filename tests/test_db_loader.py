@@ -0,0 +1,241 @@
+"""
+SVIP v1.0 — Database Loader Tests
+
+用合成的 SQLite 库测试数据库加载器。
+"""
+import random
+import sqlite3
+
+import dataclasses
+
+import pytest
+from config.settings import settings
+from src.db_loader import SVIPDatabaseLoader
+from src.svi_engine import hard_screen
+
+
+def _make_china_db(path: str, n_companies: int = 12, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE companies (
+            company_id INTEGER PRIMARY KEY, stock_code TEXT,
+            company_name TEXT, industry_name TEXT
+        );
+        CREATE TABLE financial_data (
+            id INTEGER PRIMARY KEY, company_id INTEGER, fiscal_year INTEGER,
+            report_period TEXT, net_profit REAL, total_assets REAL,
+            total_liabilities REAL, operating_cash_flow REAL, capex REAL,
+            free_cash_flow REAL, revenue REAL, operating_profit REAL, pe_ttm REAL
+        );
+        CREATE TABLE market_data (
+            id INTEGER PRIMARY KEY, company_id INTEGER, trade_date TEXT,
+            market_cap REAL, pe_ratio_ttm REAL
+        );
+    """)
+    for cid in range(1, n_companies + 1):
+        conn.execute(
+            "INSERT INTO companies VALUES (?, ?, ?, ?)",
+            (cid, f"{600000 + cid:06d}", f"公司{cid}", f"行业{cid % 3}"),
+        )
+        # 最后一家公司没有财务数据
+        if cid == n_companies:
+            continue
+        n_years = 3 + cid % 12
+        for year in range(2024 - n_years, 2025):
+            revenue = rng.uniform(50, 500)
+            assets = rng.uniform(100, 1000)
+            periods = ["Q4", None, f"{year}1231"]
+            conn.execute(
+                "INSERT INTO financial_data (company_id, fiscal_year, report_period,"
+                " net_profit, total_assets, total_liabilities, operating_cash_flow,"
+                " capex, free_cash_flow, revenue, operating_profit, pe_ttm)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    cid, year, periods[year % 3], rng.uniform(-5, 60), assets,
+                    assets * rng.uniform(0.2, 0.8), rng.uniform(10, 80),
+                    rng.choice([None, -rng.uniform(1, 20)]), rng.uniform(1, 40),
+                    revenue, revenue * rng.uniform(0.05, 0.4),
+                    rng.choice([None, rng.uniform(5, 60)]),
+                ),
+            )
+            # 季报不参与年报计算
+            conn.execute(
+                "INSERT INTO financial_data (company_id, fiscal_year, report_period,"
+                " net_profit, total_assets, total_liabilities, revenue, pe_ttm)"
+                " VALUES (?, ?, 'Q2', 1, 1, 1, 1, ?)",
+                (cid, year, rng.uniform(5, 60)),
+            )
+        for day in range(1, 4 + cid % 3):
+            conn.execute(
+                "INSERT INTO market_data (company_id, trade_date, market_cap, pe_ratio_ttm)"
+                " VALUES (?, ?, ?, ?)",
+                (cid, f"2025-01-{day:02d}", rng.uniform(500, 5000), rng.uniform(5, 60)),
+            )
+    conn.commit()
+    conn.close()
+
+
+def _make_us_db(path: str, n_companies: int = 8, seed: int = 11) -> None:
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE companies (gvkey TEXT, tic TEXT, conm TEXT);
+        CREATE TABLE financial_data_annual (
+            gvkey TEXT, fyear INTEGER, ni REAL, ib REAL, at REAL, lt REAL,
+            oancf REAL, capx REAL, revt REAL, sale REAL, oiadp REAL,
+            oibdp REAL, prcc_f REAL, csho REAL, epsfi REAL
+        );
+    """)
+    for i in range(n_companies):
+        gvkey = f"{1000 + i:06d}"
+        conn.execute(
+            "INSERT INTO companies VALUES (?, ?, ?)",
+            (gvkey, f"Tk{chr(65 + i)}", f"Company {i}"),
+        )
+        if i == n_companies - 1:
+            continue
+        for year in range(2024 - 4 - i, 2025):
+            at = rng.uniform(100, 1000)
+            conn.execute(
+                "INSERT INTO financial_data_annual VALUES"
+                " (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    gvkey, year, rng.choice([None, rng.uniform(-5, 80)]),
+                    rng.uniform(1, 50), at, at * rng.uniform(0.2, 0.8),
+                    rng.uniform(10, 90), rng.uniform(1, 30),
+                    rng.choice([None, rng.uniform(100, 900)]), rng.uniform(100, 900),
+                    rng.uniform(10, 200), rng.uniform(10, 200),
+                    rng.uniform(10, 300), rng.uniform(1, 50), rng.uniform(-1, 10),
+                ),
+            )
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def loader(tmp_path):
+    china_db = str(tmp_path / "china.db")
+    us_db = str(tmp_path / "us.db")
+    _make_china_db(china_db)
+    _make_us_db(us_db)
+    db_loader = SVIPDatabaseLoader(china_db, us_db)
+    db_loader.connect("CN")
+    db_loader.connect("US")
+    yield db_loader
+    db_loader.close()
+
+
+def _stock_list():
+    cn = [("CN", f"{600000 + cid:06d}", f"主题{cid % 2}") for cid in range(1, 14)]
+    us = [("US", f"TK{chr(65 + i)}", "") for i in range(9)]
+    return cn + [("US", "Tk.A", "AI/算力密度")] + us + [("JP", "7203", "")]
+
+
+def test_bulk_matches_one_by_one(loader):
+    """集合查询路径与逐只加载输出完全一致"""
+    stock_list = _stock_list()
+    bulk = loader.load_stocks_from_list(stock_list)
+    single = loader.load_stocks_from_list(stock_list, bulk=False)
+    assert len(bulk) > 10
+    assert bulk == single
+
+
+def test_bulk_skips_missing(loader):
+    """未找到公司或无财务数据的股票返回 None"""
+    results = loader.load_china_stocks_bulk([("999999", ""), ("600012", ""), ("600001", "X")])
+    assert results[0] is None
+    assert results[1] is None
+    assert results[2]["symbol"] == "600001"
+    assert results[2]["theme"] == "X"
+
+
+def test_bulk_respects_year_limit(loader):
+    """每家公司最多取最近 N 期年报"""
+    financials = loader._bulk_china_financials([11], years=4)
+    years = [row["fiscal_year"] for row in financials[11]]
+    assert years == sorted(years, reverse=True)
+    assert len(years) == 4
+    assert "_svip_rn" not in financials[11][0]
+
+
+def test_read_only_matches_default(loader):
+    """只读 + 内存映射模式加载结果与默认连接一致"""
+    ro_loader = SVIPDatabaseLoader(
+        loader.config.china_db_path, loader.config.us_db_path, read_only=True
+    )
+    ro_loader.connect("CN")
+    ro_loader.connect("US")
+    try:
+        stock_list = _stock_list()
+        assert ro_loader.load_stocks_from_list(stock_list) == loader.load_stocks_from_list(stock_list)
+        assert ro_loader.china_conn.execute("PRAGMA query_only").fetchone()[0] == 1
+        assert ro_loader.china_conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+    finally:
+        ro_loader.close()
+
+
+def test_read_only_rejects_writes(loader):
+    """只读连接拒绝写入"""
+    ro_loader = SVIPDatabaseLoader(
+        loader.config.china_db_path, loader.config.us_db_path, read_only=True
+    )
+    ro_loader.connect("CN")
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            ro_loader.china_conn.execute("DELETE FROM companies")
+    finally:
+        ro_loader.close()
+
+
+def _passes_hard_screen(stock):
+    fin = stock["financials"]
+    return hard_screen(
+        fin["roic_10y_median"], fin["fcf_conversion"],
+        fin["gross_margin_std"], fin["debt_to_equity"],
+    )
+
+
+def test_prescreen_metrics_match_python(loader):
+    """SQL 预筛指标与 Python 计算口径一致"""
+    checked = 0
+    for market, keys, fetch, compute in (
+        ("CN", list(range(1, 13)), loader._bulk_china_financials,
+         loader._compute_china_metrics),
+        ("US", [f"{1000 + i:06d}" for i in range(8)], loader._bulk_us_financials,
+         loader._compute_us_metrics),
+    ):
+        metrics = loader._prescreen_metrics(market, keys)
+        for key, rows in fetch(keys).items():
+            try:
+                expected = compute(rows)
+            except TypeError:
+                continue    # 缺失现金流字段，完整加载同样失败
+            got = metrics[key]
+            assert not got["ambiguous"]
+            assert got["roic_10y_median"] == pytest.approx(expected["roic_10y_median"], abs=1e-12)
+            assert got["fcf_conversion"] == pytest.approx(expected["fcf_conversion"], abs=1e-12)
+            assert got["margin_variance"] == pytest.approx(
+                expected["gross_margin_std"] ** 2, abs=1e-12)
+            assert got["debt_to_equity"] == pytest.approx(expected["debt_to_equity"], abs=1e-12)
+            checked += 1
+    assert checked > 10
+
+
+@pytest.mark.parametrize("relaxed", [False, True])
+def test_prescreen_keeps_every_hard_screen_pass(loader, monkeypatch, relaxed):
+    """预筛只剔除确定不通过硬筛选的股票，通过的股票加载结果不变"""
+    if relaxed:
+        monkeypatch.setattr(settings, "svi", dataclasses.replace(
+            settings.svi, roic_10y_min=0.08, fcf_conversion_min=0.5,
+            gross_margin_volatility_max=0.1, debt_to_equity_max=2.0,
+        ))
+    stock_list = _stock_list()
+    full = loader.load_stocks_from_list(stock_list)
+    screened = loader.load_stocks_from_list(stock_list, prescreen=True)
+    passing = [stock for stock in full if _passes_hard_screen(stock)]
+    assert len(screened) < len(full)
+    assert all(stock in full for stock in screened)
+    assert all(stock in screened for stock in passing)
+    if relaxed:
+        assert passing
@@ -0,0 +1,87 @@
+"""
+SVIP v1.0 — Database Index Advisor Tests
+"""
+import sqlite3
+
+import pytest
+from src.db_loader import SVIPDatabaseLoader
+from src.db_optimizer import apply_indexes, explain, missing_indexes, time_queries
+from tests.test_db_loader import _make_china_db, _make_us_db, _stock_list
+
+
+@pytest.fixture
+def db_paths(tmp_path):
+    china_db = str(tmp_path / "china.db")
+    us_db = str(tmp_path / "us.db")
+    _make_china_db(china_db)
+    _make_us_db(us_db)
+    return {"CN": china_db, "US": us_db}
+
+
+@pytest.mark.parametrize("market", ["CN", "US"])
+def test_explain_reports_full_scans(db_paths, market):
+    """无索引时加载器查询全表扫描，建索引后全部走索引"""
+    conn = sqlite3.connect(db_paths[market])
+    try:
+        before = explain(conn, market)
+        assert all(plan.error is None for plan in before)
+        assert any(plan.full_scans for plan in before)
+        assert missing_indexes(conn, market)
+
+        created = apply_indexes(conn, market)
+        assert created
+        assert not missing_indexes(conn, market)
+        assert apply_indexes(conn, market) == []
+
+        after = explain(conn, market)
+        assert [plan.full_scans for plan in after] == [[] for _ in after]
+    finally:
+        conn.close()
+
+
+def test_us_ticker_uses_expression_index(db_paths):
+    conn = sqlite3.connect(db_paths["US"])
+    try:
+        apply_indexes(conn, "US")
+        plan = next(p for p in explain(conn, "US") if p.name == "company")
+        assert any("idx_svip_companies_upper_tic" in line for line in plan.plan)
+    finally:
+        conn.close()
+
+
+def test_indexes_do_not_change_loader_output(db_paths):
+    """建索引前后加载结果一致，计时覆盖每条查询"""
+    def load():
+        loader = SVIPDatabaseLoader(db_paths["CN"], db_paths["US"])
+        loader.connect("CN")
+        loader.connect("US")
+        try:
+            return loader.load_stocks_from_list(_stock_list())
+        finally:
+            loader.close()
+
+    before = load()
+    for market, path in db_paths.items():
+        conn = sqlite3.connect(path)
+        apply_indexes(conn, market)
+        assert len(time_queries(conn, market, repeat=1)) == len(explain(conn, market))
+        conn.close()
+    assert load() == before
+
+
+@pytest.mark.parametrize("market", ["CN", "US"])
+@pytest.mark.parametrize("name", ["bulk_prescreen", "bulk_fingerprint"])
+def test_annual_aggregate_queries_are_explained(db_paths, market, name):
+    """预筛与指纹 SQL 纳入 EXPLAIN 与计时，建索引后不再全表扫描年报表"""
+    conn = sqlite3.connect(db_paths[market])
+    try:
+        before = next(p for p in explain(conn, market) if p.name == name)
+        assert before.error is None
+        assert before.full_scans
+
+        apply_indexes(conn, market)
+        after = next(p for p in explain(conn, market) if p.name == name)
+        assert after.full_scans == []
+        assert name in time_queries(conn, market, repeat=1)
+    finally:
+        conn.close()
@@ -0,0 +1,69 @@
+"""
+SVIP v1.0 — Instrumentation Tests
+"""
+import json
+
+from src.instrumentation import Tracer, profiled
+
+
+def test_span_nesting_and_aggregation():
+    """同名 span 聚合，嵌套路径以 / 连接，计数记到当前 span 与全局"""
+    tracer = Tracer()
+    with tracer.span("run"):
+        for _ in range(3):
+            with tracer.span("svi"):
+                tracer.count("stocks_scored")
+        tracer.count("queries", 2)
+    assert list(tracer.stats) == ["run", "run/svi"]
+    assert tracer.stats["run/svi"].calls == 3
+    assert tracer.stats["run/svi"].counters == {"stocks_scored": 3}
+    assert tracer.stats["run"].counters == {"queries": 2}
+    assert tracer.counters == {"stocks_scored": 3, "queries": 2}
+    assert tracer.stats["run"].seconds >= tracer.stats["run/svi"].seconds
+
+
+def test_isolated_export_merge():
+    """worker 状态隔离，导出后合并到主进程当前 span 之下"""
+    tracer = Tracer()
+    with tracer.span("build_stocks"):
+        for _ in range(2):
+            with tracer.isolated():
+                with tracer.span("load"):
+                    tracer.count("rows", 10)
+                exported = tracer.export()
+            tracer.merge(exported)
+    assert "load" not in tracer.stats
+    merged = tracer.stats["build_stocks/load"]
+    assert merged.calls == 2
+    assert merged.counters == {"rows": 20}
+    assert tracer.counters == {"rows": 20}
+
+
+def test_summary_and_json(tmp_path):
+    """汇总表按树序输出，JSON 追踪可读回"""
+    tracer = Tracer()
+    with tracer.span("a"):
+        pass
+    with tracer.span("b"):
+        pass
+    with tracer.span("a"):
+        with tracer.span("child"):
+            pass
+    table = tracer.summary_table()
+    assert table.index("child") < table.index("b")
+
+    path = tracer.write_json(str(tmp_path / "trace" / "t.json"))
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    assert [span["path"] for span in data["spans"]] == ["a", "a/child", "b"]
+    assert data["spans"][1]["depth"] == 1
+
+
+def test_profiled(tmp_path, capsys):
+    with profiled(None) as profiler:
+        assert profiler is None
+    path = tmp_path / "run.prof"
+    with profiled(str(path)):
+        sum(range(1000))
+    assert path.exists()
+    assert "cProfile" in capsys.readouterr().out
@@ -3,10 +3,12 @@ SVIP v1.0 — Macro Filter Tests
 
 测试 A4 宏观慢变量过滤器。
 """
+import itertools
+
 import pytest
 from src.macro_filter import (
     score_interest_rate, score_liquidity, score_earnings_cycle,
-    compute_macro_state,
+    compute_macro_state, compute_macro_state_batch,
 )
 from src.models import MacroWind
 
@@ -82,3 +84,31 @@ def test_compute_macro_state_no_data():
     state = compute_macro_state()
     assert state.total_score == 0
     assert state.wind == MacroWind.NEUTRAL
+
+
+def test_macro_state_batch_matches_scalar():
+    """批量版本逐行与 compute_macro_state 一致（含阈值边界与缺失值）"""
+    grids = {
+        "yield_spread": [None, -0.2, 0.5, 1.0],
+        "real_yield": [None, 0.5, 2.0],
+        "credit_spread": [3.5, 5.0, 6.0],
+        "m2_yoy": [None, 0.02, 0.07],
+        "fci": [None, -0.6],
+        "credit_growth": [0.0, 0.05],
+        "earnings_yoy": [None, -0.05, 0.1],
+        "ism_new_orders": [48, 55],
+    }
+    combos = list(itertools.product(*grids.values()))
+    columns = {
+        name: [combo[i] if combo[i] is not None else float("nan") for combo in combos]
+        for i, name in enumerate(grids)
+    }
+    batch = compute_macro_state_batch(**columns)
+    assert len(batch) == len(combos)
+    for i, combo in enumerate(combos):
+        assert batch.to_state(i) == compute_macro_state(**dict(zip(grids, combo)))
+
+    # 标量与 None 广播
+    single = compute_macro_state_batch(credit_spread=[2.0, 6.0])
+    assert single.to_state(1) == compute_macro_state(credit_spread=6.0)
+    assert compute_macro_state_batch().to_state(0) == compute_macro_state()
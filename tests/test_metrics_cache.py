@@ -0,0 +1,129 @@
+"""
+SVIP v1.0 — Derived Metrics Cache Tests
+
+测试衍生指标持久化缓存。
+"""
+import sqlite3
+
+from src.db_loader import SVIPDatabaseLoader
+from src.instrumentation import tracer
+from src.metrics_cache import DerivedMetricsCache, metrics_fingerprint
+from tests.test_db_loader import _make_china_db, _make_us_db
+
+
+def test_cache_roundtrip_and_invalidation(tmp_path):
+    """命中需要财年与年报指纹同时一致"""
+    path = str(tmp_path / "metrics.db")
+    checksum = metrics_fingerprint(10, 10, 1234, "1.5:2.5")
+    with DerivedMetricsCache(path) as cache:
+        assert cache.get("CN", 1, 2024, checksum) is None
+        cache.put("CN", 1, 2024, checksum, {"roic_10y_median": 0.2, "capex": [1.0, 2.0]})
+
+    with DerivedMetricsCache(path) as cache:
+        assert cache.get("CN", 1, 2024, checksum) == {"roic_10y_median": 0.2, "capex": [1.0, 2.0]}
+        assert cache.get("CN", 1, 2025, checksum) is None
+        for changed in (
+            metrics_fingerprint(10, 10, 1240, "1.5:2.5"),   # 新增年报
+            metrics_fingerprint(10, 10, 1234, "1.5:2.6"),   # 原地修订
+            metrics_fingerprint(3, 10, 1234, "1.5:2.5"),    # 取数窗口不同
+        ):
+            assert cache.get("CN", 1, 2024, changed) is None
+        assert cache.get("US", 1, 2024, checksum) is None
+
+
+def _load(tmp_path, cache_path):
+    china_db = str(tmp_path / "china.db")
+    us_db = str(tmp_path / "us.db")
+    stock_list = [("CN", f"{600000 + cid:06d}", "") for cid in range(1, 12)]
+    stock_list += [("US", f"TK{chr(65 + i)}", "") for i in range(7)]
+    with tracer.isolated(), SVIPDatabaseLoader(china_db, us_db, cache_path) as loader:
+        stocks = loader.load_stocks_from_list(stock_list)
+        hits, misses = loader.metrics_cache.hits, loader.metrics_cache.misses
+        rows = tracer.counters.get("rows", 0)
+    return stocks, hits, misses, rows
+
+
+def test_loader_reuses_cached_metrics(tmp_path):
+    """第二次加载全部命中且不取年报行，年报变化的公司重算，输出与无缓存一致"""
+    _make_china_db(str(tmp_path / "china.db"))
+    _make_us_db(str(tmp_path / "us.db"))
+    cache_path = str(tmp_path / "metrics.db")
+
+    uncached = SVIPDatabaseLoader(str(tmp_path / "china.db"), str(tmp_path / "us.db"))
+    expected = uncached.load_stocks_from_list(
+        [("CN", f"{600000 + cid:06d}", "") for cid in range(1, 12)]
+        + [("US", f"TK{chr(65 + i)}", "") for i in range(7)]
+    )
+    uncached.close()
+
+    cold, hits, cold_misses, cold_rows = _load(tmp_path, cache_path)
+    assert cold == expected
+    assert hits == 0
+
+    # 指标计算失败的公司不写缓存，每次都会重算
+    warm, hits, failed, warm_rows = _load(tmp_path, cache_path)
+    assert warm == expected
+    assert hits >= len(expected) and hits + failed == cold_misses
+    assert warm_rows < cold_rows
+
+    # 新披露一期年报：指纹变化，只有该公司重算
+    conn = sqlite3.connect(str(tmp_path / "china.db"))
+    conn.execute("""
+        INSERT INTO financial_data (company_id, fiscal_year, report_period, net_profit,
+            total_assets, total_liabilities, operating_cash_flow, capex, free_cash_flow,
+            revenue, operating_profit, pe_ttm)
+        SELECT company_id, fiscal_year + 1, 'Q4', net_profit + 1, total_assets,
+            total_liabilities, operating_cash_flow, capex, free_cash_flow, revenue,
+            operating_profit, pe_ttm
+        FROM financial_data WHERE company_id = 3 ORDER BY fiscal_year DESC LIMIT 1
+    """)
+    conn.commit()
+    conn.close()
+    _, hits, misses, _ = _load(tmp_path, cache_path)
+    assert misses == failed + 1
+
+
+def test_single_stock_load_uses_cache(tmp_path):
+    """逐只加载同样按指纹命中，结果与无缓存一致"""
+    china_db, us_db = str(tmp_path / "china.db"), str(tmp_path / "us.db")
+    _make_china_db(china_db)
+    _make_us_db(us_db)
+    cache_path = str(tmp_path / "metrics.db")
+    with SVIPDatabaseLoader(china_db, us_db) as loader:
+        expected = [loader.load_china_stock("600003"), loader.load_us_stock("TKA")]
+    for _ in range(2):
+        with SVIPDatabaseLoader(china_db, us_db, cache_path) as loader:
+            assert [loader.load_china_stock("600003"), loader.load_us_stock("TKA")] == expected
+            hits = loader.metrics_cache.hits
+    assert hits == 2
+
+
+def _us_bulk(us_db, cache_path, years=10):
+    items = [(f"TK{chr(65 + i)}", "") for i in range(7)]
+    with SVIPDatabaseLoader(":memory:", us_db, cache_path) as loader:
+        loader.connect("US")
+        return loader.load_us_stocks_bulk(items, years)
+
+
+def test_restated_financials_invalidate_cache(tmp_path):
+    """原地修订历史年报（行数与 rowid 不变）同样使缓存失效"""
+    us_db = str(tmp_path / "us.db")
+    _make_us_db(us_db)
+    cache_path = str(tmp_path / "metrics.db")
+    _us_bulk(us_db, cache_path)
+
+    conn = sqlite3.connect(us_db)
+    conn.execute("UPDATE financial_data_annual SET ni = ni * 0.1")
+    conn.commit()
+    conn.close()
+    assert _us_bulk(us_db, cache_path) == _us_bulk(us_db, None)
+
+
+def test_years_window_is_part_of_fingerprint(tmp_path):
+    """不同 years 的加载互不命中缓存"""
+    us_db = str(tmp_path / "us.db")
+    _make_us_db(us_db)
+    cache_path = str(tmp_path / "metrics.db")
+    _us_bulk(us_db, cache_path, years=10)
+    assert _us_bulk(us_db, cache_path, years=3) == _us_bulk(us_db, None, years=3)
+    assert _us_bulk(us_db, None, years=3) != _us_bulk(us_db, None, years=10)
@@ -0,0 +1,100 @@
+"""
+SVIP v1.0 — Models Tests
+
+测试列式 Universe 容器与 slots / 只读评分结果。
+"""
+import dataclasses
+
+import numpy as np
+import pytest
+from src.models import (
+    SVIPStock, SVIScore, ValuationResult, AccelerationResult, Universe,
+    SVILevel, ValuationTier, PhaseState, PoolAction,
+    FrozenSVIScore, freeze, freeze_stock, thaw,
+)
+from src.portfolio_engine import generate_report
+from src.report_generator import generate_markdown_report
+
+
+def _make_stock(i: int) -> SVIPStock:
+    pool = (SVILevel.CORE, SVILevel.WATCH, SVILevel.BLOCK)[i % 3]
+    symbol = f"S{i}"
+    theme = f"T{i % 4}"
+    return SVIPStock(
+        symbol=symbol, name=f"Name{i}", market=("US", "CN")[i % 2],
+        sector=f"Sec{i % 5}", theme=theme,
+        svi=SVIScore(symbol=symbol, market=("US", "CN")[i % 2], total=60 + i * 0.5,
+                     level=pool, passed_hard_screen=i % 2 == 0, roic_score=12.5),
+        valuation=None if i % 7 == 0 else ValuationResult(
+            symbol=symbol, qpeg=1.1, red_flag_b=True, red_flag_count=1,
+            tier=ValuationTier.B, valuation_factor=0.6,
+        ),
+        acceleration=AccelerationResult(
+            symbol=symbol, theme=theme, acceleration_score=70.0,
+            phase=PhaseState.ACCELERATING, phase_factor=1.2,
+        ),
+        raw_weight=0.01 * i, target_weight=0.002 * i,
+        pool=pool, action=PoolAction.ADD,
+    )
+
+
+def test_universe_roundtrip():
+    """SVIPStock → Universe → SVIPStock 往返一致"""
+    stocks = [_make_stock(i) for i in range(20)]
+    universe = Universe.from_stocks(stocks)
+    assert len(universe) == 20
+    assert universe.to_stocks() == stocks
+    assert list(universe.labels("symbol")) == [s.symbol for s in stocks]
+    assert universe.svi_total.dtype == np.float64
+
+
+def test_universe_pool_views_are_zero_copy():
+    """分池视图共享底层数组"""
+    universe = Universe.from_stocks([_make_stock(i) for i in range(30)]).group_by_pool()
+    core = universe.pool_view(SVILevel.CORE)
+    watch = universe.pool_view(SVILevel.WATCH)
+    assert len(core) == 10 and len(watch) == 10
+    assert np.shares_memory(core.target_weight, universe.target_weight)
+    core.target_weight[:] = 0.05
+    assert universe.target_weight[:10].sum() == pytest.approx(0.5)
+
+
+def test_universe_pool_view_requires_grouping():
+    universe = Universe.from_stocks([_make_stock(i) for i in range(6)])
+    with pytest.raises(ValueError):
+        universe.pool_view(SVILevel.CORE)
+
+
+def test_universe_write_back():
+    stocks = [_make_stock(i) for i in range(5)]
+    universe = Universe.from_stocks(stocks)
+    universe.target_weight[:] = 0.01
+    universe.write_back(stocks)
+    assert all(s.target_weight == 0.01 for s in stocks)
+
+
+def test_result_types_are_slotted():
+    """三层评分结果无 __dict__，不能新增属性"""
+    stock = _make_stock(1)
+    for result in (stock.svi, stock.valuation, stock.acceleration):
+        assert not hasattr(result, "__dict__")
+        with pytest.raises(AttributeError):
+            result.extra = 1
+
+
+def test_freeze_thaw_roundtrip():
+    """只读变体字段与可变版本一致、可哈希、不可修改；freeze_stock 后报告不变"""
+    stock = _make_stock(2)
+    frozen = freeze(stock.svi)
+    assert isinstance(frozen, FrozenSVIScore)
+    assert [f.name for f in dataclasses.fields(frozen)] == [f.name for f in dataclasses.fields(SVIScore)]
+    assert frozen.level == SVILevel.BLOCK and hash(frozen) == hash(freeze(stock.svi))
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        frozen.total = 0.0
+    assert thaw(frozen) == stock.svi
+    assert freeze(None) is None and freeze(frozen) is frozen
+
+    stocks = [_make_stock(i) for i in range(12)]
+    expected = generate_markdown_report(generate_report([_make_stock(i) for i in range(12)]))
+    report = generate_report([freeze_stock(s) for s in stocks])
+    assert generate_markdown_report(report).split("\n", 3)[3] == expected.split("\n", 3)[3]
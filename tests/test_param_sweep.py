@@ -0,0 +1,126 @@
+"""
+SVIP v1.0 — Parameter Sweep Tests
+
+测试覆盖空间生成、配置覆盖与恢复、基线一致性与多进程结果一致性。
+"""
+import numpy as np
+import pytest
+from benchmarks.synthetic_universe import make_universe
+from config.settings import settings, MARKET_PARAMS
+from src.acceleration_engine import compute_acceleration_score
+from src.macro_filter import compute_macro_state
+from src.models import SVILevel, SVIPStock
+from src.param_sweep import (
+    compare_to_baseline, format_sweep_report, grid, overridden_settings,
+    prepare_inputs, random_configs, run_sweep,
+)
+from src.portfolio_engine import build_allocation
+from src.svi_engine import compute_svi
+from src.tail_risk import compute_tail_risk
+from src.valuation_engine import compute_valuation
+
+
+@pytest.fixture(scope="module")
+def inputs():
+    macro = compute_macro_state(yield_spread=0.35, real_yield=1.8, credit_spread=3.2, m2_yoy=0.04)
+    tail_risk = compute_tail_risk(vix=18.5, credit_spread_change=0.2)
+    return prepare_inputs(make_universe(300, seed=5), macro, tail_risk, market="US")
+
+
+def _scalar_pipeline(items, macro, tail_risk):
+    """逐只标量路径（与 run_svip.build_stocks_from_yaml 一致）"""
+    stocks = []
+    for item in items:
+        fin, val, accel = item["financials"], item["valuation"], item["acceleration"]
+        svi = compute_svi(symbol=item["symbol"], market=item["market"], **fin)
+        stocks.append(SVIPStock(
+            symbol=item["symbol"], name=item["name"], market=item["market"],
+            sector=item["sector"], theme=item["theme"], svi=svi,
+            valuation=compute_valuation(symbol=item["symbol"], svi_score=svi.total, **val),
+            acceleration=compute_acceleration_score(
+                symbol=item["symbol"], theme=item["theme"],
+                penetration_series=accel.get("penetration"),
+                cost_curve_series=accel.get("cost_curve"),
+                capex_series=accel.get("capex"),
+            ),
+        ))
+    return build_allocation(stocks, macro, tail_risk, market="US")
+
+
+def test_grid_and_random_configs():
+    """网格为笛卡尔积；随机采样可复现且落在给定范围内"""
+    configs = grid({"svi.roic_10y_min": [0.12, 0.15], "weight.cash_min": [0.05, 0.1, 0.2]})
+    assert len(configs) == 6
+    assert configs[0] == {"svi.roic_10y_min": 0.12, "weight.cash_min": 0.05}
+
+    space = {"svi.core_threshold": {"low": 70, "high": 80}, "market.single_stock_max": [0.05, 0.08]}
+    sample = random_configs(space, 20, seed=3)
+    assert sample == random_configs(space, 20, seed=3)
+    assert all(70 <= c["svi.core_threshold"] <= 80 for c in sample)
+    assert {c["market.single_stock_max"] for c in sample} <= {0.05, 0.08}
+
+    with pytest.raises(ValueError):
+        grid({"svi.no_such_field": [1]})
+    with pytest.raises(ValueError):
+        grid({"macro.yield_spread_neutral": [1]})
+
+
+def test_overridden_settings_restores():
+    """覆盖只在上下文内生效，退出（含异常）后恢复"""
+    svi_cfg, us_params = settings.svi, MARKET_PARAMS["US"]
+    with overridden_settings({"svi.roic_10y_min": 0.3, "market.single_stock_max": 0.02}, "US"):
+        assert settings.svi.roic_10y_min == 0.3
+        assert settings.svi.fcf_conversion_min == svi_cfg.fcf_conversion_min
+        assert MARKET_PARAMS["US"].single_stock_max == 0.02
+    assert settings.svi is svi_cfg
+    assert MARKET_PARAMS["US"] is us_params
+
+    with pytest.raises(RuntimeError):
+        with overridden_settings({"weight.cash_min": 0.5}):
+            raise RuntimeError
+    assert settings.weight.cash_min != 0.5
+
+
+def test_baseline_matches_scalar_pipeline(inputs):
+    """基线结果与逐只标量流水线的分池与权重一致"""
+    items = make_universe(300, seed=5)
+    allocation = _scalar_pipeline(items, inputs.macro, inputs.tail_risk)
+    expected = {s.symbol: s for s in allocation.stocks}
+
+    (baseline,) = run_sweep(inputs, [])
+    for i, symbol in enumerate(inputs.symbols):
+        assert baseline.weights[i] == pytest.approx(expected[symbol].target_weight)
+    assert baseline.count(SVILevel.CORE) == sum(
+        1 for s in allocation.stocks if s.pool == SVILevel.CORE
+    )
+    assert baseline.violations == allocation.violations
+
+
+def test_sweep_reports_changes(inputs):
+    """收紧硬筛选减少入池数量，收紧单票上限改变权重"""
+    results = run_sweep(inputs, [
+        {"svi.roic_10y_min": 0.30},
+        {"market.single_stock_max": 0.02},
+    ])
+    rows = compare_to_baseline(results, list(inputs.symbols))
+    base, strict, capped = rows
+
+    assert base["pool_changes"] == 0 and base["weight_shift"] == 0.0
+    assert strict["n_core"] + strict["n_watch"] < base["n_core"] + base["n_watch"]
+    assert strict["n_block"] - base["n_block"] == strict["pool_changes"] > 0
+    assert capped["weight_shift"] > 0
+    assert np.max(results[2].weights) <= 0.02 + 1e-12
+    assert "(基线)" in format_sweep_report(rows)
+
+
+def test_parallel_matches_serial(inputs):
+    """多进程结果与串行完全一致"""
+    configs = grid({"svi.core_threshold": [70.0, 80.0], "valuation.fcf_yield_min": [0.02, 0.04]})
+    serial = run_sweep(inputs, configs)
+    parallel = run_sweep(inputs, configs, workers=2)
+    assert [r.index for r in parallel] == list(range(len(configs) + 1))
+    for a, b in zip(serial, parallel):
+        assert a.overrides == b.overrides
+        np.testing.assert_array_equal(a.pools, b.pools)
+        np.testing.assert_array_equal(a.weights, b.weights)
+        assert a.violations == b.violations
@@ -3,14 +3,20 @@ SVIP v1.0 — Portfolio Engine Tests
 
 测试组合编排引擎。
 """
+import copy
+import gc
+import random
+import weakref
+
 import pytest
 from src.portfolio_engine import (
     classify_pools, determine_cash_level, build_allocation,
-    apply_rotation_adjustments, generate_report,
+    apply_rotation_adjustments, generate_report, IncrementalAllocator,
 )
 from src.models import (
-    SVIPStock, SVIScore, ValuationResult, AccelerationResult,
+    SVIPStock, SVIScore, ValuationResult, AccelerationResult, TailRiskResult,
     SVILevel, ValuationTier, PhaseState, RotationSignal, MacroState, MacroWind,
+    BlockReason, BlockedRows,
 )
 
 
@@ -106,3 +112,93 @@ def test_generate_report():
     report = generate_report(stocks, market="US")
     assert report.market == "US"
     assert report.allocation is not None
+
+
+def _random_stocks(n: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    themes = ["AI/算力密度", "老龄化/医疗支付", "金融制度/支付清算", "能源转型", ""]
+    sectors = ["Tech", "Healthcare", "Fin", "Energy"]
+    stocks = []
+    for i in range(n):
+        total = rng.uniform(55, 98)
+        level = SVILevel.CORE if total >= 75 else rng.choice([SVILevel.WATCH, SVILevel.BLOCK])
+        stock = _make_stock(
+            f"S{i:03d}",
+            svi_total=total,
+            svi_level=level,
+            val_tier=rng.choice(list(ValuationTier)),
+            val_factor=rng.choice([1.0, 0.7, 0.2]),
+            phase=rng.choice(list(PhaseState)),
+            phase_factor=rng.choice([1.2, 1.0, 0.8]),
+            theme=rng.choice(themes),
+            sector=rng.choice(sectors),
+        )
+        stock.acceleration.acceleration_score = rng.uniform(20, 90)
+        stock.current_weight = rng.choice([0.0, 0.0, rng.uniform(0.0, 0.06)])
+        stocks.append(stock)
+    return stocks
+
+
+def test_incremental_allocator_matches_build_allocation():
+    """增量构建在各组宏观/尾部风险因子下与 build_allocation 完全一致"""
+    stocks = _random_stocks(150)
+    allocator = IncrementalAllocator(copy.deepcopy(stocks), market="US")
+    assert len(allocator) > 20
+
+    for mrf in (0.75, 0.9, 1.1):
+        for trf in (0.3, 0.7, 1.0):
+            macro = MacroState(macro_risk_factor=mrf)
+            tail = TailRiskResult(tail_risk_factor=trf)
+            expected = build_allocation(copy.deepcopy(stocks), macro, tail, market="US")
+            got = allocator.allocate(macro, tail)
+
+            assert [s.symbol for s in got.stocks] == [s.symbol for s in expected.stocks]
+            for a, b in zip(got.stocks, expected.stocks):
+                assert (a.pool, a.target_weight, a.action) == (b.pool, b.target_weight, b.action)
+            for name in ("total_equity", "cash_weight", "core_pool_weight", "watch_pool_weight",
+                         "final_equity_ceiling", "theme_exposure", "sector_exposure", "violations"):
+                assert getattr(got, name) == getattr(expected, name), name
+
+            weights, _ = allocator.weights(mrf, trf)
+            assert weights.tolist() == [s.target_weight for s in allocator.active]
+
+
+def test_lazy_block_matches_eager():
+    """惰性禁入池：权重与违规同非惰性模式，紧凑行记录原因与 SVI 总分，按需物化"""
+    stocks = _random_stocks(120)
+    stocks[0].svi = None
+    stocks[1].svi.passed_hard_screen = False
+    stocks[1].svi.level = SVILevel.BLOCK
+    eager = build_allocation(copy.deepcopy(stocks), market="US")
+    lazy = build_allocation(copy.deepcopy(stocks), market="US", lazy_block=True)
+
+    assert all(s.pool != SVILevel.BLOCK for s in lazy.stocks)
+    assert lazy.n_block == eager.n_block == len(lazy.blocked) > 2
+    for name in ("total_equity", "cash_weight", "core_pool_weight", "watch_pool_weight",
+                 "theme_exposure", "sector_exposure", "violations"):
+        assert getattr(lazy, name) == getattr(eager, name), name
+
+    reasons = dict(zip(lazy.blocked.symbol, lazy.blocked.reasons()))
+    assert reasons["S000"] == BlockReason.NO_SCORE
+    assert reasons["S001"] == BlockReason.HARD_SCREEN
+    assert lazy.all_stocks() == eager.stocks
+
+    # 调用方传入的紧凑行接在本次禁入池之后
+    extra = BlockedRows.from_stocks([_make_stock("X", svi_total=40, svi_level=SVILevel.BLOCK)])
+    merged = build_allocation(copy.deepcopy(stocks), market="US", lazy_block=True, blocked=extra)
+    assert merged.blocked.symbol[-1] == "X" and merged.blocked.metric[-1] == 40
+    assert merged.blocked.to_stock(len(merged.blocked) - 1).symbol == "X"
+    with pytest.raises(ValueError):
+        BlockedRows(extra.symbol, extra.reason, extra.metric).to_stock(0)
+
+
+def test_blocked_rows_drop_stock_references():
+    """紧凑行不引用原 SVIPStock，物化结果与原对象相等"""
+    stocks = [_make_stock(f"B{i}", svi_total=30, svi_level=SVILevel.BLOCK) for i in range(3)]
+    expected = copy.deepcopy(stocks)
+    rows = BlockedRows.from_stocks(stocks)
+    ref = weakref.ref(stocks[0])
+    del stocks
+    gc.collect()
+    assert ref() is None
+    assert rows.to_stocks() == expected
@@ -0,0 +1,101 @@
+"""
+SVIP v1.0 — Scenario Grid Tests
+
+测试宏观 / 尾部风险情景网格：逐情景结果与一次性流程一致、透视与 CSV 输出。
+"""
+import copy
+import csv
+import os
+
+import pytest
+
+from src.data_loader import load_yaml
+from src.macro_filter import compute_macro_state
+from src.portfolio_engine import build_allocation
+from src.scenario_grid import (
+    DEFAULT_AXES, axis_values, evaluate_scenarios, format_heatmap, parse_axes,
+)
+from src.tail_risk import compute_tail_risk
+from tests.test_portfolio_engine import _random_stocks
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+BASE = load_yaml(os.path.join(DATA_DIR, "macro_inputs.yaml"))
+
+
+def _scalar(stocks, md, td):
+    macro = compute_macro_state(
+        yield_spread=md.get("yield_spread_10y2y"),
+        real_yield=md.get("real_yield"),
+        credit_spread=md.get("credit_spread"),
+        m2_yoy=md.get("m2_yoy"),
+        fci=md.get("fci"),
+        credit_growth=md.get("credit_growth"),
+        earnings_yoy=md.get("earnings_yoy"),
+        ism_new_orders=md.get("ism_new_orders"),
+    )
+    tail_risk = compute_tail_risk(
+        vix=td.get("vix"),
+        credit_spread_change=td.get("credit_spread_change"),
+        regulatory_intensity=td.get("regulatory_intensity", 0),
+    )
+    return macro, tail_risk, build_allocation(copy.deepcopy(stocks), macro, tail_risk, "US")
+
+
+def test_grid_matches_scalar_pipeline():
+    """每个情景的状态、仓位与违规数与逐次 compute_* + build_allocation 一致"""
+    stocks = _random_stocks(80)
+    before = [(s.target_weight, s.action) for s in stocks]
+    axes = {
+        "tail_risk.vix": [15, 25, 30, 35, 45, 60],
+        "macro.credit_spread": [2.0, 3.5, 5.0, 8.0],
+        "macro.ism_new_orders": [45, 55],
+    }
+    table = evaluate_scenarios(stocks, axes, base_inputs=BASE)
+
+    assert len(table) == 6 * 4 * 2
+    assert len(table.factor_pairs) < len(table)
+    assert [(s.target_weight, s.action) for s in stocks] == before
+
+    for i, row in enumerate(table.to_rows()):
+        md = dict(BASE["macro"], credit_spread=row["macro.credit_spread"],
+                  ism_new_orders=row["macro.ism_new_orders"])
+        td = dict(BASE["tail_risk"], vix=row["tail_risk.vix"])
+        macro, tail_risk, alloc = _scalar(stocks, md, td)
+        assert table.macro.to_state(i) == macro
+        assert table.tail_risk.to_result(i) == tail_risk
+        assert row["total_equity"] == alloc.total_equity
+        assert row["cash_weight"] == alloc.cash_weight
+        assert row["core_pool_weight"] == alloc.core_pool_weight
+        assert row["final_equity_ceiling"] == alloc.final_equity_ceiling
+        assert row["n_violations"] == len(alloc.violations)
+        assert table.violations[table.scenario_factor[i]] == alloc.violations
+
+
+def test_pivot_heatmap_and_csv(tmp_path):
+    """默认 VIX × 信用利差网格：透视形状、文本热力图与长表 CSV"""
+    table = evaluate_scenarios(_random_stocks(40), base_inputs=BASE)
+    vix, spread = axis_values(DEFAULT_AXES["tail_risk.vix"]), axis_values(DEFAULT_AXES["macro.credit_spread"])
+    assert vix.tolist() == [15, 20, 25, 30, 35, 40, 45, 50, 55, 60]
+    assert spread[0] == 2.0 and spread[-1] == 8.0 and len(spread) == 13
+
+    rows, cols, matrix = table.pivot("total_equity")
+    assert matrix.shape == (10, 13)
+    # 高 VIX 只会压低仓位
+    assert (matrix[-1] <= matrix[0]).all()
+    assert len(format_heatmap(table, "n_violations").splitlines()) == 12
+
+    path = table.write_csv(str(tmp_path / "grid.csv"))
+    with open(path, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 130
+    assert rows[0]["tail_state"] == "normal" and rows[-1]["tail_state"] == "crisis"
+
+
+def test_axis_validation():
+    """未知轴与空轴报错；num 与 step 两种写法"""
+    with pytest.raises(ValueError):
+        parse_axes({"macro.vix": [1]})
+    with pytest.raises(ValueError):
+        parse_axes({"tail_risk.vix": []})
+    assert axis_values({"start": 2, "stop": 3, "step": 0.1}).tolist()[-1] == 3.0
+    assert len(axis_values({"start": 15, "stop": 60, "num": 46})) == 46
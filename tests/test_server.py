@@ -0,0 +1,143 @@
+"""
+SVIP v1.0 — Service Tests
+
+测试常驻服务的评分缓存、组合构建与 HTTP/JSON 接口。
+"""
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.data_loader import load_yaml
+from src.server import (
+    SVIPService, create_server, macro_from_dict, tail_risk_from_dict,
+)
+from run_svip_db import build_stocks_from_yaml
+from src.portfolio_engine import generate_report
+from tests.test_db_loader import _make_china_db, _make_us_db
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+SAMPLE = os.path.join(DATA_DIR, "sample_stocks.yaml")
+MACRO = load_yaml(os.path.join(DATA_DIR, "macro_inputs.yaml"))
+
+
+@pytest.fixture
+def db_service(tmp_path):
+    china_db, us_db = str(tmp_path / "china.db"), str(tmp_path / "us.db")
+    _make_china_db(china_db)
+    _make_us_db(us_db)
+    service = SVIPService(china_db, us_db, airsx_dir=str(tmp_path / "no-airsx"))
+    yield service
+    service.close()
+
+
+def test_allocation_matches_batch_run():
+    """YAML 股票池的组合与 run_svip_db 的一次性流程一致"""
+    service = SVIPService(yaml_path=SAMPLE, use_db=False)
+    try:
+        macro = macro_from_dict(MACRO["macro"])
+        tail_risk = tail_risk_from_dict(MACRO["tail_risk"])
+        report, missing = service.allocate(market="US", macro=macro, tail_risk=tail_risk)
+        expected = generate_report(build_stocks_from_yaml(load_yaml(SAMPLE)), macro, tail_risk, "US")
+
+        assert missing == []
+        got = {s.symbol: (s.pool, s.target_weight) for s in report.allocation.stocks}
+        assert got == {s.symbol: (s.pool, s.target_weight) for s in expected.allocation.stocks}
+        assert report.allocation.violations == expected.allocation.violations
+
+        # 缓存中的评分结果不被组合构建写入
+        stocks, _ = service.score(["MSFT"])
+        assert stocks[0].target_weight == 0.0
+        assert service.latest_report()[1].startswith("#")
+    finally:
+        service.close()
+
+
+def test_score_cache_and_missing(db_service, monkeypatch):
+    """已评分股票命中缓存不再访问数据库；未找到的代码单独返回"""
+    loads = []
+    original = db_service.loader.load_stocks_from_list
+    monkeypatch.setattr(
+        db_service.loader, "load_stocks_from_list", lambda lst, **kw: loads.append(lst) or original(lst, **kw)
+    )
+
+    symbols = ["600001", "600003", "US:TKA", "999999"]
+    stocks, missing = db_service.score(symbols, market="CN")
+    assert [s.symbol for s in stocks] == ["600001", "600003", "TkA"]
+    assert missing == ["999999"]
+    assert len(loads) == 1
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(db_service.score(symbols[:3], market="CN")))
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(loads) == 1
+    assert all([s.symbol for s in r[0]] == ["600001", "600003", "TkA"] for r in results)
+
+    # 不同主题是不同的缓存项；refresh 强制重新加载
+    stocks, _ = db_service.score(["600001"], market="CN", themes={"600001": "AI/算力密度"})
+    assert stocks[0].theme == "AI/算力密度" and len(loads) == 2
+    db_service.score(["600001"], market="CN", refresh=True)
+    assert len(loads) == 3
+    assert db_service.health()["connected_markets"] == ["CN", "US"]
+
+
+def _request(base, method, path, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(base + path, data=data, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, response.headers, response.read().decode("utf-8")
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read().decode("utf-8")
+
+
+def test_http_api(db_service):
+    """HTTP 接口：评分、组合、最新报告、请求耗时与错误处理"""
+    server = create_server(db_service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        status, _, body = _request(base, "GET", "/report/latest")
+        assert status == 404
+
+        status, headers, body = _request(base, "POST", "/score", {"symbols": ["TKA", "TKB"], "market": "US"})
+        assert status == 200 and float(headers["X-Response-Time-Ms"]) >= 0
+        assert [s["symbol"] for s in json.loads(body)["stocks"]] == ["TkA", "TkB"]
+
+        codes = [f"{600000 + cid:06d}" for cid in range(1, 12)]
+        status, _, body = _request(base, "POST", "/allocation", {
+            "symbols": codes, "market": "CN", "macro": MACRO["macro"], "tail_risk": MACRO["tail_risk"],
+        })
+        summary = json.loads(body)
+        assert status == 200
+        assert summary["total_equity"] + summary["cash_weight"] == pytest.approx(1.0)
+        n_scored = len(codes) - len(summary["missing"])
+        assert summary["n_block"] + len(summary["core_pool"]) + len(summary["watch_pool"]) == n_scored
+
+        status, headers, body = _request(base, "GET", "/report/latest?format=markdown")
+        assert status == 200 and headers["Content-Type"].startswith("text/markdown")
+        assert body.startswith("#")
+
+        assert _request(base, "POST", "/score", {"symbols": []})[0] == 400
+        assert _request(base, "POST", "/score", {"symbols": ["A"], "market": "JP"})[0] == 400
+        assert _request(base, "GET", "/nope")[0] == 404
+
+        status, _, body = _request(base, "GET", "/metrics")
+        metrics = json.loads(body)
+        assert metrics["POST /score"]["calls"] == 3
+        assert metrics["POST /score"]["errors"] == 2
+        assert metrics["POST /allocation"]["p95_ms"] >= metrics["POST /allocation"]["p50_ms"] > 0
+        assert json.loads(_request(base, "GET", "/health")[2])["scored_stocks"] == 2 + n_scored
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,110 @@
+"""
+SVIP v1.0 — Snapshot Store Tests
+
+测试时点快照库的写入、截面与历史查询。
+"""
+import json
+import math
+from datetime import datetime
+
+import pytest
+from src.macro_filter import compute_macro_state
+from src.models import SVILevel, ValuationTier
+from src.portfolio_engine import generate_report
+from src.snapshot_store import SnapshotStore
+from src.tail_risk import compute_tail_risk
+from tests.test_portfolio_engine import _make_stock
+
+
+def _report(svi_a: float = 80.0):
+    stocks = [
+        _make_stock("AAA", svi_total=svi_a),
+        _make_stock("BBB", val_tier=ValuationTier.C, theme="老龄化/医疗支付"),
+        _make_stock("CCC", svi_total=40.0, svi_level=SVILevel.BLOCK),
+    ]
+    macro = compute_macro_state(yield_spread=0.35, real_yield=1.8, credit_spread=3.2, m2_yoy=0.04)
+    tail_risk = compute_tail_risk(vix=18.5, credit_spread_change=0.2)
+    return generate_report(stocks, macro, tail_risk, market="US")
+
+
+@pytest.fixture
+def store(tmp_path):
+    with SnapshotStore(str(tmp_path / "snapshots.db")) as s:
+        yield s
+
+
+def test_record_and_snapshot_roundtrip(store):
+    """写入一次运行后，截面包含全部股票（含禁入池）与宏观/尾部风险"""
+    report = _report()
+    run_id = store.record(report, run_date="2025-03-31")
+
+    rows = store.snapshot("2025-03-31", "US")
+    assert [row["symbol"] for row in rows] == [s.symbol for s in report.allocation.stocks]
+    by_symbol = {row["symbol"]: row for row in rows}
+    stock = next(s for s in report.allocation.stocks if s.symbol == "AAA")
+    assert by_symbol["AAA"]["run_id"] == run_id
+    assert by_symbol["AAA"]["svi_total"] == stock.svi.total
+    assert by_symbol["AAA"]["val_tier"] == stock.valuation.tier.value
+    assert by_symbol["AAA"]["accel_phase"] == stock.acceleration.phase.value
+    assert by_symbol["AAA"]["target_weight"] == stock.target_weight
+    assert by_symbol["AAA"]["pool"] == stock.pool.value
+    assert by_symbol["AAA"]["action"] == stock.action.value
+    assert by_symbol["CCC"]["pool"] == SVILevel.BLOCK.value
+
+    (run,) = store.runs()
+    assert run["market"] == "US"
+    assert run["n_stocks"] == 3
+    assert run["macro_wind"] == report.macro.wind.value
+    assert run["tail_risk_state"] == report.tail_risk.state.value
+    assert json.loads(run["macro"])["total_score"] == report.macro.total_score
+
+
+def test_same_date_keeps_latest_run(store):
+    """同日多次运行全部保留，查询取最后一次"""
+    store.record(_report(svi_a=70.0), run_date="2025-03-31")
+    store.record(_report(svi_a=90.0), run_date="2025-03-31")
+    assert len(store.runs()) == 2
+    rows = store.snapshot("2025-03-31", "US")
+    assert len(rows) == 3
+    assert {row["symbol"]: row["svi_total"] for row in rows}["AAA"] == 90.0
+
+
+def test_history_and_panel(store):
+    """按日期区间查询单只股票历史与数值面板"""
+    for day, svi in (("2024-12-31", 70.0), ("2025-03-31", 80.0), ("2025-06-30", 90.0)):
+        store.record(_report(svi_a=svi), run_date=day)
+
+    history = store.stock_history("AAA", market="US", start="2025-01-01")
+    assert [row["run_date"] for row in history] == ["2025-03-31", "2025-06-30"]
+    assert [row["svi_total"] for row in history] == [80.0, 90.0]
+
+    dates, keys, values = store.panel("svi_total", market="US")
+    assert dates == ["2024-12-31", "2025-03-31", "2025-06-30"]
+    assert keys == ["US:AAA", "US:BBB", "US:CCC"]
+    assert values.shape == (3, 3)
+    assert list(values[:, 0]) == [70.0, 80.0, 90.0]
+    assert not any(math.isnan(v) for v in values.ravel())
+
+    with pytest.raises(ValueError):
+        store.panel("pool")
+
+
+def test_default_run_date_from_report_timestamp(store):
+    """未指定日期时取报告时间戳的日期"""
+    report = _report()
+    report.timestamp = datetime(2025, 9, 30, 16, 5)
+    store.record(report)
+    assert store.dates("US") == ["2025-09-30"]
+
+
+def test_snapshot_query_uses_index(store):
+    """截面查询走 (run_date, market, symbol) 索引"""
+    store.record(_report(), run_date="2025-03-31")
+    plan = " ".join(
+        row[-1] for row in store.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM svip_stock_snapshots"
+            " WHERE run_date = ? AND market = ?",
+            ("2025-03-31", "US"),
+        )
+    )
+    assert "idx_svip_snapshots_date_market_symbol" in plan
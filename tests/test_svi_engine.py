@@ -105,3 +105,45 @@ def test_compute_svi_fail_hard_screen():
     assert result.passed_hard_screen is False
     assert result.level == SVILevel.BLOCK
     assert result.total == 0.0
+
+
+def test_compute_svi_batch_matches_scalar():
+    """批量评分与逐只 compute_svi 结果完全一致"""
+    import numpy as np
+    from src.svi_engine import compute_svi_batch
+
+    rng = np.random.default_rng(42)
+    n = 500
+    edges = np.array([0.10, 0.35, 0.15, 0.5, 1.0, 0.8, 0.01, 0.05, 0.15])
+    cols = {
+        "roic_10y_median": np.concatenate([rng.uniform(0.0, 0.5, n), edges]),
+        "fcf_conversion": np.concatenate([rng.uniform(0.6, 1.3, n), edges]),
+        "gross_margin_std": np.concatenate([rng.uniform(0.0, 0.08, n), edges / 10]),
+        "debt_to_equity": np.concatenate([rng.uniform(0.0, 2.0, n), edges]),
+        "market_share": np.concatenate([rng.uniform(0.0, 0.5, n), edges]),
+        "cr4": np.concatenate([rng.uniform(0.0, 1.0, n), edges]),
+        "moat_rating": np.concatenate([rng.uniform(-10, 110, n), edges * 100]),
+        "demand_rigidity_rating": np.concatenate([rng.uniform(0, 100, n), edges * 100]),
+        "substitution_risk_rating": np.concatenate([rng.uniform(0, 120, n), edges * 100]),
+    }
+    size = n + len(edges)
+    symbols = [f"S{i}" for i in range(size)]
+    markets = [("US", "CN", "HK", "XX")[i % 4] for i in range(size)]
+
+    batch = compute_svi_batch(symbols, markets, **cols)
+    expected = [
+        compute_svi(symbol=symbols[i], market=markets[i],
+                    **{k: float(v[i]) for k, v in cols.items()})
+        for i in range(size)
+    ]
+    assert batch.to_scores() == expected
+    assert batch.passed_hard_screen.any() and not batch.passed_hard_screen.all()
+    assert set(batch.levels()) == {SVILevel.CORE, SVILevel.WATCH, SVILevel.BLOCK}
+
+
+def test_compute_svi_batch_defaults():
+    """可选列缺省时使用 compute_svi 的默认值"""
+    from src.svi_engine import compute_svi_batch
+
+    batch = compute_svi_batch(["A"], "US", [0.30], [0.95], [0.02], [0.5])
+    assert batch.to_score(0) == compute_svi("A", "US", 0.30, 0.95, 0.02, 0.5)
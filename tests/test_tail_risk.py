@@ -3,10 +3,13 @@ SVIP v1.0 — Tail Risk Tests
 
 测试 A7 极端风险模块。
 """
+import itertools
+
 import pytest
+from config.settings import settings
 from src.tail_risk import (
     assess_liquidity_risk, assess_regime_risk, assess_disruption_risk,
-    determine_tail_risk_state, compute_tail_risk,
+    determine_tail_risk_state, compute_tail_risk, compute_tail_risk_batch,
 )
 from src.models import TailRiskState
 
@@ -64,3 +67,25 @@ def test_compute_tail_risk_crisis():
     result = compute_tail_risk(vix=50, credit_spread_change=2.0)
     assert result.state in (TailRiskState.TENSE, TailRiskState.CRISIS)
     assert result.tail_risk_factor < 1.0
+
+
+def test_tail_risk_batch_matches_scalar():
+    """批量版本逐行与 compute_tail_risk 一致（含阈值边界与缺失值）"""
+    cfg = settings.tail_risk
+    grids = {
+        "vix": [None, 12.0, cfg.vix_alert, cfg.vix_tense, cfg.vix_crisis, 60.0],
+        "credit_spread_change": [None, 0.5, 1.0, 1.5, 2.0],
+        "regulatory_intensity": [-5.0, 30.0, 70.0, 120.0],
+        "industry_revenue_decline_years": [0, 2, 3],
+        "market_share_erosion": [0.0, 0.2, 0.6],
+    }
+    combos = list(itertools.product(*grids.values()))
+    columns = {
+        name: [combo[i] if combo[i] is not None else float("nan") for combo in combos]
+        for i, name in enumerate(grids)
+    }
+    batch = compute_tail_risk_batch(**columns)
+    for i, combo in enumerate(combos):
+        assert batch.to_result(i) == compute_tail_risk(**dict(zip(grids, combo)))
+
+    assert compute_tail_risk_batch(vix=[20, 50]).to_result(1) == compute_tail_risk(vix=50)
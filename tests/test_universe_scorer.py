@@ -0,0 +1,115 @@
+"""
+SVIP v1.0 — Fused Universe Scorer Tests
+
+测试融合评分：与逐只评分一致、只物化 Core/Watch、分块拼接、流式评分与数据库路径。
+"""
+import numpy as np
+
+from benchmarks.synthetic_universe import make_universe
+import run_svip_db
+from run_svip_db import build_stocks_from_db, build_universe_from_db
+from src.models import SVI_LEVELS, SVILevel, Universe
+from src.portfolio_engine import classify_pools, generate_report
+from src.universe_scorer import (
+    build_stock, pool_counts, pool_stocks, score_stream, score_universe,
+)
+from tests.test_db_loader import _make_china_db, _make_us_db
+
+
+def test_fused_matches_per_stock_scoring():
+    """逐行 SVI / A1 / A2 与池分类同 build_stock + classify_pools"""
+    items = make_universe(600, seed=11)
+    universe = score_universe(items)
+    expected = [build_stock(item) for item in items]
+    classify_pools(expected)
+
+    assert universe.to_stocks() == expected
+    assert [SVI_LEVELS[c] for c in universe.pool] == [s.pool for s in expected]
+    counts = pool_counts(universe)
+    assert counts[SVILevel.BLOCK] > 0 and counts[SVILevel.CORE] + counts[SVILevel.WATCH] > 0
+
+    # 只物化 Core/Watch，组合与全量股票一致
+    selected = pool_stocks(universe)
+    assert selected == [s for s in expected if s.pool != SVILevel.BLOCK]
+    fused = generate_report(selected, market="US")
+    full = generate_report(expected, market="US")
+    assert [(s.symbol, s.target_weight, s.action) for s in fused.core_pool + fused.watch_pool] == \
+        [(s.symbol, s.target_weight, s.action) for s in full.core_pool + full.watch_pool]
+    assert fused.allocation.total_equity == full.allocation.total_equity
+
+    # 禁入池以紧凑行并入报告，物化后与全量股票一致
+    lazy = generate_report(selected, market="US", blocked=universe.blocked_rows())
+    assert lazy.allocation.n_block == counts[SVILevel.BLOCK]
+    assert sorted(lazy.allocation.all_stocks(), key=lambda s: s.symbol) == \
+        sorted(full.allocation.stocks, key=lambda s: s.symbol)
+
+
+def test_build_stock_validates_input(caplog):
+    """逐只评分先做数据范围校验：有列表时追加，否则写日志"""
+    item = {"symbol": "X", "financials": {"roic_10y_median": 2.0}, "valuation": {"pe_ratio": -3}}
+    warnings = []
+    stock = build_stock(item, warnings)
+    assert stock.symbol == "X" and stock.svi is not None
+    assert len(warnings) == 2 and all(w.startswith("X:") for w in warnings)
+
+    with caplog.at_level("WARNING", logger="src.universe_scorer"):
+        assert build_stock(item) == stock
+    assert [r.getMessage() for r in caplog.records] == warnings
+
+
+def test_concat_chunks():
+    """分块融合评分后拼接与整体评分一致"""
+    items = make_universe(90, seed=5)
+    whole = score_universe(items)
+    parts = Universe.concat([score_universe(items[:30]), score_universe(items[30:])])
+    assert parts.to_stocks() == whole.to_stocks()
+    assert np.array_equal(parts.pool, whole.pool)
+
+
+def test_score_stream_matches_whole():
+    """流式分块评分：Core/Watch 与禁入池紧凑行同整体评分，报告一致"""
+    items = make_universe(250, seed=8)
+    whole = score_universe(items)
+    seen = []
+    result = score_stream(iter(items), chunk_size=60, on_chunk=lambda chunk: seen.append(len(chunk)))
+
+    assert seen == [60, 60, 60, 60, 10] and result.n_chunks == 5 and result.n_scored == 250
+    assert result.stocks == pool_stocks(whole)
+    expected = whole.blocked_rows()
+    assert list(result.blocked.symbol) == list(expected.symbol)
+    assert np.array_equal(result.blocked.reason, expected.reason)
+    assert np.array_equal(result.blocked.metric, expected.metric, equal_nan=True)
+
+    streamed = generate_report(result.stocks, market="US", blocked=result.blocked)
+    full = generate_report(pool_stocks(whole), market="US")
+    assert streamed.allocation.total_equity == full.allocation.total_equity
+    assert streamed.allocation.n_block == len(expected)
+
+
+def test_build_universe_from_db(tmp_path):
+    """数据库路径：融合评分与逐只评分的股票一致（含分块）"""
+    china_db, us_db = str(tmp_path / "china.db"), str(tmp_path / "us.db")
+    _make_china_db(china_db)
+    _make_us_db(us_db)
+    codes = ["600001", "600003", "US:TKA", "US:TKB", "999999"]
+
+    stocks = build_stocks_from_db(codes, "CN", {}, china_db, us_db, chunk_size=2)
+    universe = build_universe_from_db(codes, "CN", {}, china_db, us_db, chunk_size=2)
+    classify_pools(stocks)
+    assert universe.to_stocks() == stocks
+    assert build_universe_from_db(["999999"], "CN", {}, china_db, us_db) is None
+
+
+def test_parallel_workers_reuse_loader(tmp_path):
+    """并行 worker（只读连接、每进程一个加载器与衍生指标缓存）与串行结果一致"""
+    china_db, us_db = str(tmp_path / "china.db"), str(tmp_path / "us.db")
+    _make_china_db(china_db)
+    _make_us_db(us_db)
+    codes = [f"{600000 + cid:06d}" for cid in range(1, 12)] + ["US:TKA", "US:TKB", "US:TKC"]
+    cache = str(tmp_path / "metrics.db")
+
+    serial = build_stocks_from_db(codes, "CN", {}, china_db, us_db, chunk_size=3)
+    for _ in range(2):
+        parallel = build_stocks_from_db(codes, "CN", {}, china_db, us_db, cache, workers=2, chunk_size=3)
+        assert parallel == serial
+    assert not run_svip_db._WORKER
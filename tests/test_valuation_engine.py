@@ -128,3 +128,44 @@ def test_compute_valuation_tier_c():
     assert result.tier == ValuationTier.C
     assert result.valuation_factor == 0.2
     assert result.red_flag_count >= 2
+
+
+def test_compute_valuation_batch_matches_scalar():
+    """批量估值与逐只 compute_valuation 结果完全一致（含阈值边界）"""
+    import numpy as np
+    from config.settings import settings
+    from src.valuation_engine import compute_valuation_batch
+
+    cfg = settings.valuation
+    rng = np.random.default_rng(7)
+    n = 2000
+    cols = {
+        "fcf_yield": rng.choice([cfg.fcf_yield_min, 0.0, -0.01], n) + rng.uniform(0, 0.08, n) * (rng.random(n) < 0.7),
+        "pe_ratio": rng.choice([0.0, -5.0, 12.0, 25.0, 60.0], n) * rng.uniform(0.5, 1.5, n),
+        "growth_rate": rng.choice([0.0, -0.05, 0.08, 0.15, 0.3], n),
+        "svi_score": rng.uniform(0, 100, n),
+        "valuation_percentile": rng.choice([cfg.valuation_percentile_max, 0.5, 0.95], n),
+        "growth_concentration": rng.choice([cfg.growth_concentration_max, 0.2, 0.8], n),
+        "reinvestment_declining_years": rng.integers(0, cfg.reinvestment_decline_years + 2, n),
+    }
+    symbols = [f"S{i}" for i in range(n)]
+
+    batch = compute_valuation_batch(symbols, **cols)
+    expected = [
+        compute_valuation(
+            symbol=symbols[i],
+            **{k: float(v[i]) for k, v in cols.items() if k != "reinvestment_declining_years"},
+            reinvestment_declining_years=int(cols["reinvestment_declining_years"][i]),
+        )
+        for i in range(n)
+    ]
+    assert batch.to_results() == expected
+    assert set(batch.tiers()) == {ValuationTier.A, ValuationTier.B, ValuationTier.C}
+    assert (batch.qpeg == 999.0).any()
+
+    flags = batch.red_flags
+    assert ((flags & 1 > 0) == batch.red_flag_a).all() and ((flags & 4 > 0) == batch.red_flag_c).all()
+
+    # 可选列缺省
+    single = compute_valuation_batch(["A"], [0.05], [20.0], [0.15], [80.0])
+    assert single.to_result(0) == compute_valuation("A", 0.05, 20.0, 0.15, 80.0)
@@ -117,3 +117,69 @@ def test_compute_portfolio_weights_full():
     total = sum(s.target_weight for s in result)
     assert total <= 0.85 + 0.001
     assert all(s.target_weight <= 0.08 + 0.001 for s in result)
+
+
+def test_cap_single_stock_matches_iterative_fixed_point():
+    """水位填充解等于"截断→按比例再分配"迭代的收敛点"""
+    import numpy as np
+    from src.weight_engine import cap_single_stock
+
+    rng = np.random.default_rng(0)
+    w = rng.pareto(1.5, 200)
+    w = w / w.sum() * 0.8
+    cap = 0.02
+
+    it = w.copy()
+    for _ in range(1000):
+        over = it > cap
+        overflow = (it[over] - cap).sum()
+        it[over] = cap
+        eligible = (it > 0) & (it < cap)
+        if overflow < 1e-15 or not eligible.any():
+            break
+        it[eligible] += overflow * it[eligible] / it[eligible].sum()
+
+    exact = cap_single_stock(w, cap)
+    assert exact.max() <= cap
+    assert exact.sum() == pytest.approx(w.sum())
+    assert exact == pytest.approx(it, abs=1e-12)
+
+
+def test_cap_single_stock_all_capped():
+    """全部封顶仍放不下时，余量留作现金"""
+    import numpy as np
+    from src.weight_engine import cap_single_stock
+
+    result = cap_single_stock(np.array([0.5, 0.3, 0.0]), 0.08)
+    assert list(result) == [0.08, 0.08, 0.0]
+
+
+def test_project_weights_large_universe_feasible():
+    """大规模联合投影：所有单票/主题/行业约束同时满足"""
+    import numpy as np
+    from src.weight_engine import project_weights
+
+    rng = np.random.default_rng(1)
+    n = 20000
+    w = rng.lognormal(size=n)
+    w = w / w.sum() * 0.85
+    themes = rng.integers(0, 6, n)
+    sectors = rng.integers(0, 300, n)
+    sectors[:3000] = 0  # 一个超大行业
+
+    result = project_weights(w, themes, sectors, 0.0005, 0.20, 0.05)
+    assert result.max() <= 0.0005 + 1e-12
+    assert np.bincount(themes, weights=result).max() <= 0.20 + 1e-9
+    assert np.bincount(sectors, weights=result).max() <= 0.05 + 1e-9
+    assert (result >= 0).all()
+
+
+def test_apply_constraints_theme_and_sector_together():
+    """主题与行业同时超限时两者都被压到上限内"""
+    stocks = [_make_stock(f"S{i}", theme="T", sector="Sec") for i in range(5)]
+    stocks += [_make_stock(f"X{i}", theme=f"X{i}", sector="Sec") for i in range(2)]
+    for s in stocks:
+        s.target_weight = 0.07
+    result = apply_constraints(stocks)
+    assert sum(s.target_weight for s in result if s.theme == "T") <= 0.30 + 1e-9
+    assert sum(s.target_weight for s in result) <= 0.25 + 1e-9